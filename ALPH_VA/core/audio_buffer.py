@@ -0,0 +1,176 @@
+# core/audio_buffer.py
+"""
+Audio hasil sintesis di memori, tanpa perjalanan bolak-balik ke disk.
+
+Engine TTS mengembalikan AudioBuffer (isi file WAV atau sampel float + sample
+rate) dan play_voice memutarnya langsung dari memori. Menyimpan ke disk
+hanyalah sink arsip opsional ([audio_archive] enabled) dengan nama unik
+`<engine>_<YYYYmmdd-HHMMSS>_<uuid>.wav`, bukan `int(time.time())` yang bisa
+bentrok dalam detik yang sama.
+"""
+import array
+import io
+import os
+import sys
+import threading
+import time
+import uuid
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+from core import config_manager
+from core.logging_setup import get_logger, setup_logging
+
+# --- Setup Logging ---
+logger = get_logger(__name__)
+
+ARCHIVE_SECTION = "audio_archive"
+
+_archive_executor = None
+_archive_lock = threading.Lock()
+
+
+class AudioBuffer:
+    """Satu potongan audio PCM di memori. Isi WAV dibuat sekali saat pertama diminta."""
+
+    def __init__(self, wav_bytes: bytes = None, samples=None, sample_rate: int = None):
+        if wav_bytes is None and samples is None:
+            raise ValueError("AudioBuffer needs either wav_bytes or samples.")
+        self._wav_bytes = wav_bytes
+        self._samples = samples
+        self._sample_rate = sample_rate
+        self._channels = 1
+        self._sample_width = 2
+        self._frames = None
+        if wav_bytes is not None:
+            self._read_header()
+        else:
+            self._frames = len(samples)
+
+    @classmethod
+    def from_wav_bytes(cls, wav_bytes: bytes) -> "AudioBuffer":
+        return cls(wav_bytes=wav_bytes)
+
+    @classmethod
+    def from_samples(cls, samples, sample_rate: int) -> "AudioBuffer":
+        """Sampel float mono di rentang [-1, 1] (list atau array NumPy)."""
+        return cls(samples=samples, sample_rate=sample_rate)
+
+    def _read_header(self):
+        try:
+            with wave.open(io.BytesIO(self._wav_bytes), "rb") as wav_file:
+                self._sample_rate = wav_file.getframerate()
+                self._channels = wav_file.getnchannels()
+                self._sample_width = wav_file.getsampwidth()
+                self._frames = wav_file.getnframes()
+        except (wave.Error, EOFError) as e:
+            raise ValueError(f"Invalid WAV data: {e}") from e
+
+    @property
+    def sample_rate(self) -> int:
+        return self._sample_rate
+
+    @property
+    def channels(self) -> int:
+        return self._channels
+
+    @property
+    def sample_width(self) -> int:
+        return self._sample_width
+
+    @property
+    def duration(self) -> float:
+        """Durasi dalam detik."""
+        return self._frames / self._sample_rate if self._sample_rate else 0.0
+
+    def to_wav_bytes(self) -> bytes:
+        if self._wav_bytes is None:
+            self._wav_bytes = _encode_wav(self._samples, self._sample_rate)
+            self._samples = None
+        return self._wav_bytes
+
+    def pcm_frames(self) -> bytes:
+        """Data PCM mentah (tanpa header WAV), untuk backend yang memutar stream."""
+        with wave.open(io.BytesIO(self.to_wav_bytes()), "rb") as wav_file:
+            return wav_file.readframes(wav_file.getnframes())
+
+    def __repr__(self) -> str:
+        return f"AudioBuffer({self.duration:.2f}s, {self._sample_rate} Hz, {self._channels} ch)"
+
+
+def _encode_wav(samples, sample_rate: int) -> bytes:
+    if hasattr(samples, "dtype"):
+        # Array NumPy: konversi tervektorisasi.
+        pcm = (samples.clip(-1.0, 1.0) * 32767).astype("<i2").tobytes()
+    else:
+        pcm_array = array.array("h", (int(max(-1.0, min(1.0, value)) * 32767) for value in samples))
+        if sys.byteorder == "big":
+            pcm_array.byteswap()
+        pcm = pcm_array.tobytes()
+    output = io.BytesIO()
+    with wave.open(output, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm)
+    return output.getvalue()
+
+
+# --- Sink arsip (opsional) ---
+def archive_enabled() -> bool:
+    return config_manager.get_bool(ARCHIVE_SECTION, "enabled", False)
+
+
+def unique_audio_filename(engine: str, tag: str = None) -> str:
+    timestamp = time.strftime("%Y%m%d-%H%M%S")
+    tag_part = f"_{tag.replace(' ', '_')}" if tag else ""
+    return f"{engine}_{timestamp}{tag_part}_{uuid.uuid4().hex[:12]}.wav"
+
+
+def _archive_dir(engine: str) -> str:
+    base = config_manager.get_config_value(ARCHIVE_SECTION, "path", "data/audio/archive")
+    if not os.path.isabs(base):
+        base = os.path.join(config_manager.PROJECT_ROOT_DIR, base)
+    return os.path.join(base, engine)
+
+
+def write_archive(buffer: AudioBuffer, engine: str, tag: str = None) -> str | None:
+    """Menyimpan buffer ke direktori arsip dengan nama unik; mengembalikan path atau None jika gagal."""
+    directory = _archive_dir(engine)
+    path = os.path.join(directory, unique_audio_filename(engine, tag))
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(buffer.to_wav_bytes())
+    except OSError as e:
+        logger.error("Could not archive audio to %s: %s", path, e)
+        return None
+    logger.debug("Archived audio to %s", path)
+    return path
+
+
+def archive_audio(buffer: AudioBuffer, engine: str, tag: str = None):
+    """Jika [audio_archive] aktif, menulis buffer di thread latar belakang agar tidak menunda pemutaran."""
+    global _archive_executor
+    if buffer is None or not archive_enabled():
+        return
+    if _archive_executor is None:
+        with _archive_lock:
+            if _archive_executor is None:
+                _archive_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio-archive")
+    _archive_executor.submit(write_archive, buffer, engine, tag)
+
+
+# --- Contoh Penggunaan jika file ini dijalankan langsung ---
+if __name__ == "__main__":
+    import math
+
+    setup_logging(console=True)
+
+    rate = 22050
+    tone = [0.3 * math.sin(2 * math.pi * 440 * i / rate) for i in range(rate // 2)]
+    buffer = AudioBuffer.from_samples(tone, rate)
+    wav_bytes = buffer.to_wav_bytes()
+    roundtrip = AudioBuffer.from_wav_bytes(wav_bytes)
+    logger.info("Encoded %s -> %d bytes; decoded %s", buffer, len(wav_bytes), roundtrip)
+    logger.info("Example archive name: %s", unique_audio_filename("voicevox", "spk3"))
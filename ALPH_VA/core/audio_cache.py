@@ -0,0 +1,325 @@
+# core/audio_cache.py
+"""
+Cache audio hasil sintesis, dipakai bersama oleh semua engine TTS.
+
+Kunci cache adalah SHA-256 dari (engine, identitas model/checkpoint, speaker
+atau style, parameter bicara, teks yang dinormalisasi), sehingga sapaan,
+jawaban singkat, dan kalimat yang berulang cukup disintesis sekali. File WAV
+disimpan di `data/audio/cache/<2 karakter awal>/<kunci>.wav`; indeks LRU
+(`index.json`) mencatat ukuran dan waktu akses terakhir, dan entri tertua
+dibuang begitu total ukuran melewati `max_bytes`. Indeks ditulis tertunda
+(`index_flush_seconds` setelah perubahan pertama) dan saat keluar, bukan pada
+setiap put().
+
+Frasa untuk pre-warming saat startup diambil dari `PREWARM_PHRASES` per peran
+di llm_instruction.json ({"id": [...], "en": [...], ...}).
+"""
+import atexit
+import collections
+import hashlib
+import json
+import os
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+
+from core import config_manager
+from core.logging_setup import get_logger, setup_logging
+
+# --- Setup Logging ---
+logger = get_logger(__name__)
+
+CONFIG_SECTION = "audio_cache"
+INDEX_VERSION = 1
+DEFAULT_CACHE_SUBDIR = os.path.join("data", "audio", "cache")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_FLUSH_DELAY = 5.0
+PREWARM_KEY = "PREWARM_PHRASES"
+
+_cache_instance = None
+_cache_lock = threading.Lock()
+
+
+def normalize_text(text: str) -> str:
+    """Bentuk teks untuk kunci cache: NFC, spasi dirapatkan, tanpa spasi di tepi."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def make_key(engine: str, model: str, speaker, params: dict | None, text: str) -> str:
+    payload = json.dumps(
+        {
+            "engine": engine,
+            "model": model,
+            "speaker": None if speaker is None else str(speaker),
+            "params": params or {},
+            "text": normalize_text(text),
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def file_fingerprint(path: str) -> str:
+    """Identitas file model (path, ukuran, mtime) agar checkpoint baru tidak memakai audio lama."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return f"{path}:missing"
+    return f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class AudioCache:
+    """Cache file audio yang dialamatkan oleh isi (content-addressed), LRU berdasarkan total byte."""
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES, flush_delay: float = DEFAULT_FLUSH_DELAY):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.flush_delay = flush_delay
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self._lock = threading.Lock()
+        # key -> {"size", "last_access", "engine"}; urutan = LRU (terlama di depan).
+        self._entries: collections.OrderedDict[str, dict] = collections.OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._writer = None
+        self._flush_timer = None
+        self._load_index()
+
+    # --- Indeks ---
+    def _load_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning("Could not read audio cache index %s: %s. Starting empty.", self.index_path, e)
+            return
+        if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+            logger.info("Audio cache index has an unexpected format/version. Starting empty.")
+            return
+        entries = sorted(data.get("entries", {}).items(), key=lambda item: item[1].get("last_access", 0))
+        for key, entry in entries:
+            if not os.path.exists(self._path_for(key)):
+                self._dirty = True
+                continue
+            self._entries[key] = entry
+            self.total_bytes += int(entry.get("size", 0))
+        logger.info("Audio cache loaded: %d entries, %.1f MiB in %s", len(self._entries), self.total_bytes / 1048576, self.cache_dir)
+
+    def flush(self):
+        """Menulis indeks ke disk jika ada perubahan (atomik lewat file sementara)."""
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = {"version": INDEX_VERSION, "entries": dict(self._entries)}
+            self._dirty = False
+        tmp_path = f"{self.index_path}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            logger.warning("Could not write audio cache index %s: %s", self.index_path, e)
+
+    def _schedule_flush(self):
+        """flush() `flush_delay` detik setelah perubahan pertama; perubahan berikutnya ikut tulisan itu."""
+        if self.flush_delay <= 0:
+            self.flush()
+            return
+        with self._lock:
+            if self._flush_timer is not None:
+                return
+            timer = threading.Timer(self.flush_delay, self._flush_from_timer)
+            timer.daemon = True
+            self._flush_timer = timer
+        timer.start()
+
+    def _flush_from_timer(self):
+        with self._lock:
+            self._flush_timer = None
+        self.flush()
+
+    # --- Akses ---
+    def _path_for(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.wav")
+
+    def get_path(self, key: str) -> str | None:
+        """Path file WAV untuk kunci ini, atau None jika belum ada (cache miss)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            path = self._path_for(key)
+            if not os.path.exists(path):
+                # File dihapus dari luar; anggap miss.
+                self._drop(key)
+                self.misses += 1
+                return None
+            entry["last_access"] = time.time()
+            self._entries.move_to_end(key)
+            self._dirty = True
+            self.hits += 1
+            return path
+
+    def get_bytes(self, key: str) -> bytes | None:
+        path = self.get_path(key)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError as e:
+            logger.warning("Could not read cached audio %s: %s", path, e)
+            return None
+
+    def contains(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def put(self, key: str, data: bytes, engine: str = "") -> str | None:
+        """Menyimpan audio (isi file WAV) dan mengembalikan path-nya; membuang entri LRU jika melebihi batas."""
+        path = self._path_for(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error("Could not write audio cache file %s: %s", path, e)
+            return None
+        with self._lock:
+            if key in self._entries:
+                self.total_bytes -= int(self._entries[key].get("size", 0))
+            self._entries[key] = {"size": len(data), "last_access": time.time(), "engine": engine}
+            self._entries.move_to_end(key)
+            self.total_bytes += len(data)
+            self._evict_locked(keep=key)
+            self._dirty = True
+        self._schedule_flush()
+        return path
+
+    def put_in_background(self, key: str, data: bytes, engine: str = ""):
+        """put() di thread penulis tunggal, agar penulisan cache tidak berada di jalur bicara."""
+        with self._lock:
+            if self._writer is None:
+                self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio-cache")
+            writer = self._writer
+        writer.submit(self.put, key, data, engine)
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.total_bytes -= int(entry.get("size", 0))
+        self._dirty = True
+        try:
+            os.remove(self._path_for(key))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("Could not remove cached audio %s: %s", self._path_for(key), e)
+
+    def _evict_locked(self, keep: str | None = None):
+        while self.total_bytes > self.max_bytes and self._entries:
+            oldest = next(iter(self._entries))
+            if oldest == keep:
+                if len(self._entries) == 1:
+                    break
+                self._entries.move_to_end(oldest)
+                continue
+            logger.debug("Evicting cached audio %s", oldest)
+            self._drop(oldest)
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._drop(key)
+        self.flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "total_bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def is_enabled() -> bool:
+    return config_manager.get_bool(CONFIG_SECTION, "enabled", True)
+
+
+def get_audio_cache() -> AudioCache | None:
+    """Instance singleton AudioCache, atau None jika cache dimatikan di [audio_cache]."""
+    global _cache_instance
+    if not is_enabled():
+        return None
+    if _cache_instance is None:
+        with _cache_lock:
+            if _cache_instance is None:
+                cache_dir = config_manager.get_config_value(CONFIG_SECTION, "cache_dir", DEFAULT_CACHE_SUBDIR)
+                if not os.path.isabs(cache_dir):
+                    cache_dir = os.path.join(config_manager.PROJECT_ROOT_DIR, cache_dir)
+                max_bytes = config_manager.get_int(CONFIG_SECTION, "max_bytes", DEFAULT_MAX_BYTES)
+                flush_delay = config_manager.get_float(CONFIG_SECTION, "index_flush_seconds", DEFAULT_FLUSH_DELAY)
+                _cache_instance = AudioCache(cache_dir, max_bytes, flush_delay)
+                # Indeks (termasuk waktu akses/urutan LRU) yang belum ditulis timer disimpan saat keluar.
+                atexit.register(_cache_instance.flush)
+    return _cache_instance
+
+
+def load_prewarm_phrases(role: str | None = None, language: str | None = None, instruction_path: str | None = None) -> list[str]:
+    """
+    Frasa pre-warming dari `PREWARM_PHRASES` di llm_instruction.json.
+    role=None mengambil semua peran; language=None mengambil semua bahasa. Duplikat dibuang.
+    """
+    if instruction_path is None:
+        instruction_path = config_manager.get_config_value("llm_settings", "instruction_path", "config/llm_instruction.json")
+    if not os.path.isabs(instruction_path):
+        instruction_path = os.path.join(config_manager.PROJECT_ROOT_DIR, instruction_path)
+    try:
+        with open(instruction_path, "r", encoding="utf-8") as f:
+            roles = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning("Could not read prewarm phrases from %s: %s", instruction_path, e)
+        return []
+
+    phrases = []
+    seen = set()
+    for role_name, role_data in roles.items():
+        if role is not None and role_name.lower() != role.lower():
+            continue
+        by_language = role_data.get(PREWARM_KEY, {}) if isinstance(role_data, dict) else {}
+        for lang, lang_phrases in by_language.items():
+            if language is not None and lang.lower() != language.lower():
+                continue
+            for phrase in lang_phrases:
+                if isinstance(phrase, str) and phrase.strip() and phrase not in seen:
+                    seen.add(phrase)
+                    phrases.append(phrase)
+    return phrases
+
+
+# --- Contoh Penggunaan jika file ini dijalankan langsung ---
+if __name__ == "__main__":
+    setup_logging(console=True)
+
+    cache = get_audio_cache()
+    if cache is None:
+        logger.info("Audio cache is disabled in config.")
+    else:
+        logger.info("Audio cache stats: %s", cache.stats())
+        for lang in ("id", "en", "ja"):
+            logger.info("Prewarm phrases (%s): %s", lang, load_prewarm_phrases(language=lang))
+        sample_key = make_key("voicevox", "127.0.0.1:50021", 3, {}, "  おはよう  ございます ")
+        logger.info("Sample key: %s (cached: %s)", sample_key, cache.contains(sample_key))
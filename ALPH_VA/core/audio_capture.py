@@ -0,0 +1,342 @@
+# core/audio_capture.py
+"""
+Perekaman mikrofon kontinu di thread sendiri, dengan VAD dan ring buffer pre-roll.
+
+listen() pada speech_recognition membuka perangkat per frasa, jadi audio di antara
+panggilan hilang dan awal ucapan terpotong selagi perangkat dibuka ulang. AudioCaptureService
+membuka stream input sekali dan terus membaca frame 10/20/30 ms ke ring buffer:
+  * VAD per frame: webrtcvad jika terpasang (dikombinasikan dengan lantai energi), atau
+    energi RMS terhadap ambang ([audio_capture] vad = auto | webrtc | energy);
+  * onset: `start_ms` frame bersuara dalam jendela `start_window_ms`; callback on_speech_start
+    dipanggil di event loop (dipakai untuk barge-in);
+  * akhir ucapan: diputuskan endpointer (core/endpointing.py) atau `max_utterance_seconds`;
+  * ucapan lengkap (dengan `preroll_ms` audio sebelum onset, ekor hening dipangkas) masuk ke
+    asyncio.Queue. Jika antrean penuh, ucapan tertua dibuang; thread perangkat tidak pernah menunggu.
+"""
+import asyncio
+import collections
+import threading
+import time
+
+from core import config_manager, endpointing
+from core.logging_setup import get_logger
+
+# --- Setup Logging ---
+logger = get_logger(__name__)
+
+SECTION = "audio_capture"
+SAMPLE_WIDTH = 2  # PCM 16-bit
+
+
+class Utterance:
+    """Satu ucapan: PCM 16-bit mono, dengan waktu (time.perf_counter()) awal, akhir suara, dan deteksi akhir."""
+
+    def __init__(self, frame_data: bytes, sample_rate: int, started_at: float, ended_at: float, detected_at: float):
+        self.frame_data = frame_data
+        self.sample_rate = sample_rate
+        self.sample_width = SAMPLE_WIDTH
+        self.started_at = started_at
+        self.ended_at = ended_at
+        self.detected_at = detected_at
+
+    @property
+    def duration(self) -> float:
+        return len(self.frame_data) / float(self.sample_rate * self.sample_width)
+
+    @property
+    def endpoint_delay(self) -> float:
+        """Jeda antara akhir suara dan keputusan bahwa ucapan selesai (detik)."""
+        return self.detected_at - self.ended_at
+
+    def to_audio_data(self):
+        import speech_recognition as sr
+        return sr.AudioData(self.frame_data, self.sample_rate, self.sample_width)
+
+
+def frame_rms(frame: bytes) -> float:
+    import audioop  # dipakai juga oleh speech_recognition untuk energi per blok
+    return audioop.rms(frame, SAMPLE_WIDTH)
+
+
+class EnergyVad:
+    """Frame bersuara jika energi RMS melewati ambang (angka atau callable)."""
+    name = "energy"
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+
+    def current_threshold(self) -> float:
+        return self.threshold() if callable(self.threshold) else self.threshold
+
+    def is_speech(self, frame: bytes, sample_rate: int) -> bool:
+        return frame_rms(frame) > self.current_threshold()
+
+
+class WebRtcVad(EnergyVad):
+    """webrtcvad (GMM per frame 10/20/30 ms) dengan lantai energi agar gema pelan tidak dihitung."""
+    name = "webrtc"
+
+    def __init__(self, threshold, aggressiveness: int = 2, energy_floor_factor: float = 0.5):
+        super().__init__(threshold)
+        import webrtcvad
+        self._vad = webrtcvad.Vad(max(0, min(3, aggressiveness)))
+        self.energy_floor_factor = energy_floor_factor
+
+    def is_speech(self, frame: bytes, sample_rate: int) -> bool:
+        if frame_rms(frame) <= self.current_threshold() * self.energy_floor_factor:
+            return False
+        return self._vad.is_speech(frame, sample_rate)
+
+
+def create_vad(threshold, kind: str = None):
+    kind = (kind or config_manager.get_config_value(SECTION, "vad", "auto")).strip().lower()
+    if kind in ("auto", "webrtc"):
+        try:
+            return WebRtcVad(threshold, config_manager.get_int(SECTION, "webrtc_aggressiveness", 2),
+                             config_manager.get_float(SECTION, "webrtc_energy_floor_factor", 0.5))
+        except ImportError:
+            if kind == "webrtc":
+                logger.warning("webrtcvad is not installed; using the energy VAD.")
+    return EnergyVad(threshold)
+
+
+def frame_settings() -> tuple[int, int]:
+    """(sample_rate, frame_ms) dari [audio_capture]; frame_ms hanya 10, 20, atau 30 (batas webrtcvad)."""
+    sample_rate = config_manager.get_int(SECTION, "sample_rate", 16000)
+    frame_ms = config_manager.get_int(SECTION, "frame_ms", 30)
+    if frame_ms not in (10, 20, 30):
+        logger.warning("frame_ms %d is not supported by webrtcvad; using 30.", frame_ms)
+        frame_ms = 30
+    return sample_rate, frame_ms
+
+
+def open_microphone(sample_rate: int, frame_samples: int):
+    """sr.Microphone ([audio_capture] device_index) yang membaca tepat satu frame per blok."""
+    import speech_recognition as sr
+    device_index = config_manager.get_config_value(SECTION, "device_index", "")
+    device_index = int(device_index) if device_index.strip().isdigit() else None
+    return sr.Microphone(device_index=device_index, sample_rate=sample_rate, chunk_size=frame_samples)
+
+
+def read_frames(stream, frame_samples: int, running: threading.Event = None):
+    """Menghasilkan (frame, time.perf_counter() saat dibaca) dari stream sampai `running` di-clear."""
+    frame_bytes = frame_samples * SAMPLE_WIDTH
+    pending = b""
+    while running is None or running.is_set():
+        data = stream.read(frame_samples)
+        if not data:
+            break
+        pending += data
+        while len(pending) >= frame_bytes:
+            yield pending[:frame_bytes], time.perf_counter()
+            pending = pending[frame_bytes:]
+
+
+SPEECH_START = "speech_start"
+
+
+class UtteranceSegmenter:
+    """
+    Memecah aliran frame menjadi ucapan. feed() mengembalikan SPEECH_START saat onset,
+    Utterance saat endpointer memutuskan ucapan selesai, selain itu None. Frame non-ucapan di
+    luar ucapan diteruskan ke `calibrator` (core/noise_calibration.py), jika ada; ucapan yang
+    terpotong `max_utterance_seconds` tanpa endpoint juga (observe_sustained), agar estimasi derau
+    bisa naik.
+    """
+
+    def __init__(self, vad, endpointer, sample_rate: int, frame_ms: int, start_ms: int = None,
+                 max_utterance_seconds: float = None, calibrator=None):
+        self.vad = vad
+        self.endpointer = endpointer
+        self.calibrator = calibrator
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.frame_samples = sample_rate * frame_ms // 1000
+        start_ms = start_ms or config_manager.get_int(SECTION, "start_ms", 150)
+        self.start_frames = max(1, int(start_ms) // frame_ms)
+        self.start_window = max(self.start_frames, config_manager.get_int(SECTION, "start_window_ms", 300) // frame_ms)
+        self.preroll_frames = config_manager.get_int(SECTION, "preroll_ms", 300) // frame_ms
+        self.tail_frames = config_manager.get_int(SECTION, "tail_ms", 90) // frame_ms
+        max_utterance_seconds = max_utterance_seconds or config_manager.get_float(SECTION, "max_utterance_seconds", 15.0)
+        self.max_utterance_frames = int(max_utterance_seconds * 1000 // frame_ms)
+
+        self._preroll = collections.deque(maxlen=self.preroll_frames + self.start_window)
+        self._window = collections.deque(maxlen=self.start_window)
+        self._frames = []
+        self._silence_run = 0
+        self._started_at = self._last_voiced_at = None
+        self.in_speech = False
+
+    def feed(self, frame: bytes, read_at: float):
+        speech = self.vad.is_speech(frame, self.sample_rate)
+        if not self.in_speech:
+            if not speech and self.calibrator is not None:
+                self.calibrator.observe(frame_rms(frame), self.frame_ms / 1000.0)
+            self._preroll.append(frame)
+            self._window.append(speech)
+            if sum(self._window) < self.start_frames:
+                return None
+            self.in_speech = True
+            self._frames = list(self._preroll)
+            self._started_at = read_at - (len(self._window) - 1) * self.frame_ms / 1000.0
+            self._last_voiced_at, self._silence_run = read_at, 0
+            self._window.clear()
+            self.endpointer.begin(self._started_at, self._frames)
+            return SPEECH_START
+
+        self._frames.append(frame)
+        if speech:
+            self._silence_run, self._last_voiced_at = 0, read_at
+        else:
+            self._silence_run += 1
+        ended = self.endpointer.should_end(frame, speech, read_at)
+        if not ended and len(self._frames) < self.max_utterance_frames:
+            return None
+        if not ended and self.calibrator is not None:
+            levels = sorted(frame_rms(f) for f in self._frames)
+            self.calibrator.observe_sustained(levels[len(levels) // 4], len(self._frames) * self.frame_ms / 1000.0)
+        keep = len(self._frames) - max(0, self._silence_run - self.tail_frames)
+        utterance = Utterance(b"".join(self._frames[:keep]), self.sample_rate,
+                              self._started_at, self._last_voiced_at, read_at)
+        self.endpointer.end(read_at)
+        self.in_speech = False
+        self._frames = []
+        self._preroll.clear()
+        return utterance
+
+    def close(self):
+        self.endpointer.close()
+
+
+def create_segmenter(energy_threshold, language: str = None, start_ms: int = None, max_silence_ms: float = None,
+                     max_utterance_seconds: float = None, calibrator=None) -> UtteranceSegmenter:
+    """Segmenter dengan VAD dan endpointer dari konfigurasi; argumen None memakai nilai config."""
+    sample_rate, frame_ms = frame_settings()
+    endpointer = endpointing.create_endpointer(frame_ms, energy_threshold, sample_rate, language, max_silence_ms)
+    return UtteranceSegmenter(create_vad(energy_threshold), endpointer, sample_rate, frame_ms, start_ms,
+                              max_utterance_seconds, calibrator)
+
+
+class AudioCaptureService:
+    """
+    Stream input yang selalu terbuka. `energy_threshold` (angka atau callable) dipakai VAD dan
+    endpointer; `on_speech_start` dipanggil di event loop saat onset. `language` dipakai transkrip
+    parsial; `start_ms`/`max_silence_ms` menimpa nilai config; `calibrator` menerima frame derau.
+    Ucapan diambil lewat `await get()`.
+    """
+
+    def __init__(self, energy_threshold, on_speech_start=None, loop: asyncio.AbstractEventLoop = None,
+                 language: str = None, start_ms: int = None, max_silence_ms: float = None, calibrator=None):
+        self.segmenter = create_segmenter(energy_threshold, language, start_ms, max_silence_ms,
+                                          calibrator=calibrator)
+        self.sample_rate = self.segmenter.sample_rate
+        self.frame_ms = self.segmenter.frame_ms
+        self.vad = self.segmenter.vad
+        ring_frames = int(config_manager.get_float(SECTION, "ring_seconds", 10.0) * 1000 // self.frame_ms)
+
+        self.on_speech_start = on_speech_start
+        self.loop = loop
+        self.queue = None
+        # Ring buffer: frame terakhir, untuk recent_audio().
+        self._ring = collections.deque(maxlen=max(1, ring_frames))
+        self._ring_lock = threading.Lock()
+        self._thread = None
+        self._running = threading.Event()
+        self._opened = threading.Event()
+        self.error = None
+        self.dropped = 0
+
+    @property
+    def in_speech(self) -> bool:
+        return self.segmenter.in_speech
+
+    # --- Siklus hidup ---
+    def start(self, queue_size: int = None) -> "AudioCaptureService":
+        """Membuka stream di thread capture. Harus dipanggil dari event loop tujuan."""
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        self.loop = self.loop or asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=max(1, queue_size or config_manager.get_int(SECTION, "queue_size", 4)))
+        self._running.set()
+        self._opened.clear()
+        self.error = None
+        self._thread = threading.Thread(target=self._run, name="audio-capture", daemon=True)
+        self._thread.start()
+        return self
+
+    async def wait_started(self, timeout: float = 5.0) -> bool:
+        """True jika stream terbuka; False jika gagal (lihat `error`) atau belum terbuka dalam `timeout`."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self._opened.is_set():
+                return True
+            if self._thread is None or not self._thread.is_alive():
+                return False
+            await asyncio.sleep(0.02)
+        return self._opened.is_set()
+
+    def stop(self, timeout: float = 2.0):
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.segmenter.close()
+
+    async def get(self) -> Utterance | None:
+        """Ucapan berikutnya, atau None jika thread capture sudah berhenti (error ada di `error`)."""
+        return await self.queue.get()
+
+    def recent_audio(self, seconds: float) -> bytes:
+        frames = max(1, int(seconds * 1000 // self.frame_ms))
+        with self._ring_lock:
+            return b"".join(list(self._ring)[-frames:])
+
+    # --- Thread capture ---
+    def _run(self):
+        try:
+            with open_microphone(self.sample_rate, self.segmenter.frame_samples) as source:
+                self._opened.set()
+                logger.info("Audio capture started: %d Hz, %d ms frames, VAD %s, endpointing %s.",
+                            self.sample_rate, self.frame_ms, self.vad.name, self.segmenter.endpointer.name)
+                self._capture_loop(source.stream)
+        except Exception as e:
+            self.error = e
+            logger.error("Audio capture stopped with an error: %s", e, exc_info=True)
+        finally:
+            self._running.clear()
+            logger.info("Audio capture stopped (%d utterances dropped on a full queue).", self.dropped)
+            # Penanda akhir agar pembaca get() tidak menunggu selamanya.
+            try:
+                self.loop.call_soon_threadsafe(self._put, None)
+            except RuntimeError:
+                pass
+
+    def _capture_loop(self, stream):
+        for frame, read_at in read_frames(stream, self.segmenter.frame_samples, self._running):
+            with self._ring_lock:
+                self._ring.append(frame)
+            event = self.segmenter.feed(frame, read_at)
+            if event is SPEECH_START:
+                self._notify_speech_start()
+            elif event is not None:
+                self._emit(event)
+
+    def _notify_speech_start(self):
+        if self.on_speech_start is not None and self.loop is not None:
+            self.loop.call_soon_threadsafe(self.on_speech_start)
+
+    def _emit(self, utterance: Utterance):
+        logger.debug("Utterance captured: %.2f s audio, endpoint after %.0f ms.",
+                     utterance.duration, utterance.endpoint_delay * 1e3)
+        try:
+            self.loop.call_soon_threadsafe(self._put, utterance)
+        except RuntimeError:
+            # Event loop sudah ditutup.
+            self._running.clear()
+
+    def _put(self, utterance: Utterance | None):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+            logger.warning("Utterance queue full; dropped the oldest utterance.")
+        self.queue.put_nowait(utterance)
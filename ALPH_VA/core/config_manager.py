@@ -1,6 +1,8 @@
 # core/config_manager.py
 
-import configparser, os, logging, threading
+import configparser, os, threading
+
+from core.logging_setup import get_logger, setup_logging
 
 # --- Global Constants ---
 CORE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -17,35 +19,7 @@ if not os.path.exists(LOG_DIR):
             f"CRITICAL: Failed to create log directory {LOG_DIR}: {e}. Logging might fail."
         )
 
-logger = logging.getLogger(__name__)
-if not logger.hasHandlers():
-    try:
-        log_file_path = os.path.join(
-            LOG_DIR, f"{os.path.splitext(os.path.basename(__file__))[0]}.log"
-        )
-        file_handler = logging.FileHandler(log_file_path, encoding="utf-8")
-        formatter = logging.Formatter(
-            "%(asctime)s - %(name)s - %(levelname)s - %(module)s:%(lineno)d - %(message)s"
-        )
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
-        logger.setLevel(logging.INFO)
-    except OSError as e:
-        print(
-            f"CRITICAL: Failed to setup file handler for config_manager: {e}. Using basicConfig."
-        )
-        logging.basicConfig(
-            level=logging.INFO,
-            format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        )
-    except Exception as e:
-        print(
-            f"CRITICAL: Unexpected error setting up logger for config_manager: {e}. Using basicConfig."
-        )
-        logging.basicConfig(
-            level=logging.INFO,
-            format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        )
+logger = get_logger(__name__)
 
 if not os.path.exists(CONFIG_DIR):
     try:
@@ -427,8 +401,29 @@ class ConfigManager:
         return self.config
 
 
+# --- Fungsi pintasan level modul ---
+# Modul-modul lama (plugins, speech_to_text, text_to_speech) memanggil
+# `config_manager.get_config_value(...)` langsung; fungsi-fungsi ini
+# mendelegasikan ke instance singleton ConfigManager.
+def get_config_value(section: str, key: str, default=None) -> str | None:
+    return ConfigManager().get_config_value(section, key, default)
+
+
+def get_int(section: str, key: str, default: int = 0) -> int:
+    return ConfigManager().get_int(section, key, default)
+
+
+def get_float(section: str, key: str, default: float = 0.0) -> float:
+    return ConfigManager().get_float(section, key, default)
+
+
+def get_bool(section: str, key: str, default: bool = False) -> bool:
+    return ConfigManager().get_bool(section, key, default)
+
+
 # --- ConfigManager Test ---
 if __name__ == "__main__":
+    setup_logging(console=True)
     logger.info(
         "=== Configuration Manager - Example Usage (No Global Config Object) ==="
     )
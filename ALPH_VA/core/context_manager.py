@@ -1,11 +1,14 @@
 # core/context_manager.py
 import json
 import os
-import logging
 import uuid
 from datetime import datetime
-from google.genai import types
+from typing import TYPE_CHECKING
 from core.config_manager import ConfigManager
+from core.logging_setup import get_logger, setup_logging
+
+if TYPE_CHECKING:
+    from google.genai import types
 
 # --- Global Config Instance ---
 try:
@@ -18,62 +21,7 @@ except Exception as e_cfg_init_cm:
         f"ContextManager: ConfigManager initialization failed: {e_cfg_init_cm}"
     ) from e_cfg_init_cm
 
-logger = logging.getLogger(__name__)
-if not logger.hasHandlers():
-    log_file_path = ""
-    try:
-        _log_dir_cm = _cfg.get_config_value(
-            "general",
-            "log_dir",
-            os.path.join(
-                _cfg.get_config_value(
-                    "general",
-                    "project_root_dir",
-                    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-                ),
-                "logs",
-            ),
-        )
-        if not os.path.exists(_log_dir_cm):
-            os.makedirs(_log_dir_cm, exist_ok=True)
-        log_file_path = os.path.join(
-            _log_dir_cm, f"{os.path.splitext(os.path.basename(__file__))[0]}.log"
-        )
-    except Exception as e_log_path_cm:
-        logger.error(
-            "Error determining log_file_path for context_manager: %s. Using fallback.",
-            e_log_path_cm,
-            exc_info=False,
-        )
-        log_file_path = f"{os.path.splitext(os.path.basename(__file__))[0]}.log"
-    try:
-        file_handler = logging.FileHandler(log_file_path, encoding="utf-8")
-        formatter = logging.Formatter(
-            "%(asctime)s - %(name)s - %(levelname)s - %(module)s:%(lineno)d - %(message)s"
-        )
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
-        logger.setLevel(logging.INFO)
-    except OSError as e_fh_cm:
-        logger.error(
-            "OSError setting up file handler for context_manager: %s. Using basicConfig.",
-            e_fh_cm,
-            exc_info=True,
-        )
-        logging.basicConfig(
-            level=logging.INFO,
-            format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        )
-    except Exception as e_log_cm:
-        logger.error(
-            "Unexpected error setting up logger for context_manager: %s. Using basicConfig.",
-            e_log_cm,
-            exc_info=True,
-        )
-        logging.basicConfig(
-            level=logging.INFO,
-            format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        )
+logger = get_logger(__name__)
 
 DEFAULT_ARCHIVE_FILENAME = "chat_sessions.json"
 PROJECT_ROOT = _cfg.get_config_value(
@@ -107,10 +55,28 @@ else:
     )
 
 _ARCHIVE_FILE_PATH_MODULE_LEVEL = os.path.join(MEMORY_DIR, archive_filename_from_config)
+
+# Ditambahkan ke balasan model yang dipotong barge-in, agar model tahu sisanya tidak terdengar.
+TRUNCATION_MARKER = "[terpotong: pengguna menyela]"
 logger.info("Context archive file path set to: %s", _ARCHIVE_FILE_PATH_MODULE_LEVEL)
 
 
-def _serialize_content(content_obj: types.Content) -> dict:
+def _genai_types():
+    """Impor `google.genai.types` saat pertama kali dibutuhkan (bukan saat modul dimuat)."""
+    from google.genai import types
+
+    return types
+
+
+def __getattr__(name: str):
+    # PEP 562: `context_manager.types` tetap tersedia untuk kode lama tanpa
+    # membayar biaya impor SDK ketika modul ini hanya dipakai untuk daftar sesi.
+    if name == "types":
+        return _genai_types()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _serialize_content(content_obj: "types.Content") -> dict:
     parts_data = []
     if hasattr(content_obj, "parts") and content_obj.parts:
         for part in content_obj.parts:
@@ -124,7 +90,8 @@ def _serialize_content(content_obj: types.Content) -> dict:
     return {"role": role, "parts": parts_data}
 
 
-def _deserialize_content(content_dict: dict) -> types.Content:
+def _deserialize_content(content_dict: dict) -> "types.Content":
+    types = _genai_types()
     if not isinstance(content_dict, dict):
         logger.error(
             "Cannot deserialize content, expected dict, got %s", type(content_dict)
@@ -148,14 +115,20 @@ class ContextManager:
         self.session_id: str = session_id or str(uuid.uuid4())
         self.user: str = user or "anonymous"
         self.created_at: str = datetime.now().isoformat()
-        self._chat_session_history: list[types.Content] = []
+        self._chat_session_history: list["types.Content"] = []
+        # Indeks pesan di histori yang terpotong (barge-in).
+        self._truncated_indices: set[int] = set()
         logger.info(
             "ContextManager initialized for session_id: %s, user: %s",
             self.session_id,
             self.user,
         )
 
-    def remember(self, role: str, text: str):
+    def remember(self, role: str, text: str, truncated: bool = False):
+        """
+        Menambahkan pesan ke histori. `truncated=True` untuk balasan yang dipotong barge-in:
+        `text` adalah bagian yang sempat terdengar, diberi TRUNCATION_MARKER dan ditandai di arsip.
+        """
         if not (isinstance(role, str) and isinstance(text, str)):
             logger.warning(
                 "Invalid input for remember: role type %s, text type %s. Skipping.",
@@ -164,13 +137,19 @@ class ContextManager:
             )
             return
         valid_role = role.lower() if role.lower() in ["user", "model"] else "user"
+        if truncated:
+            text = f"{text} {TRUNCATION_MARKER}".strip()
         try:
+            types = _genai_types()
             content = types.Content(role=valid_role, parts=[types.Part(text=text)])
             self._chat_session_history.append(content)
+            if truncated:
+                self._truncated_indices.add(len(self._chat_session_history) - 1)
             logger.debug(
-                "Session %s: Remembered '%s' message: '%s...'",
+                "Session %s: Remembered '%s' message%s: '%s...'",
                 self.session_id,
                 valid_role,
+                " (truncated)" if truncated else "",
                 text[:50],
             )
         except Exception as e:
@@ -178,7 +157,7 @@ class ContextManager:
                 "Error creating types.Content for remembering: %s", e, exc_info=True
             )
 
-    def retrieve(self) -> list[types.Content]:
+    def retrieve(self) -> list["types.Content"]:
         logger.debug(
             "Session %s: Retrieved chat history with %d messages.",
             self.session_id,
@@ -186,8 +165,12 @@ class ContextManager:
         )
         return list(self._chat_session_history)
 
+    def is_truncated(self, index: int) -> bool:
+        return index in self._truncated_indices
+
     def clear_memory(self):
         self._chat_session_history = []
+        self._truncated_indices = set()
         logger.info("Session %s: In-memory history cleared.", self.session_id)
 
     def to_dict(self) -> dict:
@@ -195,7 +178,12 @@ class ContextManager:
             "session_id": self.session_id,
             "created_at": self.created_at,
             "user": self.user,
-            "history": [_serialize_content(msg) for msg in self._chat_session_history],
+            "history": [
+                dict(_serialize_content(msg), truncated=True)
+                if index in self._truncated_indices
+                else _serialize_content(msg)
+                for index, msg in enumerate(self._chat_session_history)
+            ],
         }
 
     @classmethod
@@ -335,6 +323,11 @@ class ContextManager:
             obj._chat_session_history = [
                 _deserialize_content(msg_dict) for msg_dict in history_data
             ]
+            obj._truncated_indices = {
+                index
+                for index, msg_dict in enumerate(history_data)
+                if isinstance(msg_dict, dict) and msg_dict.get("truncated")
+            }
             logger.info(
                 "Session %s loaded from archive with %d messages.",
                 loaded_session_id,
@@ -406,6 +399,7 @@ class ContextManager:
 
 # --- ContextManager Test ---
 if __name__ == "__main__":
+    setup_logging(console=True)
     logger.info("--- ContextManager Test ---")
     test_session_id = "test-session-for-main-context"
     cm = ContextManager.load_from_archive(test_session_id)
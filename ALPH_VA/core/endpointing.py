@@ -0,0 +1,258 @@
+# core/endpointing.py
+"""
+Endpointing: memutuskan kapan pengguna selesai bicara.
+
+Dengan jeda tetap (pause_threshold = 2.0) setiap ucapan menunggu dua detik hening sebelum
+pengenalan dimulai. AdaptiveEndpointer ([endpointing] mode = adaptive) menggabungkan:
+  * energi frame VAD: frame hening yang energinya masih dekat ambang (napas, suku kata
+    terakhir yang melemah) dihitung setengah;
+  * jendela hening minimum `min_silence_ms`: sebelum itu ucapan tidak pernah diakhiri;
+  * transkrip parsial inkremental (backend dengan stream(), mis. Vosk): jika teks parsial sudah
+    stabil selama jendela itu dan tidak berakhir dengan kata sambung ("dan", "yang", "eh"),
+    ucapan diakhiri setelah `min_silence_ms`;
+  * profil per pembicara (SpeakerProfile): rata-rata dan simpangan jeda di dalam ucapan (EWMA)
+    menentukan batas hening `mean + k * std` dalam [min_silence_ms, max_silence_ms]. Jika pengguna
+    lanjut bicara tak lama setelah ucapan diakhiri, jeda itu dicatat sehingga batasnya naik.
+FixedEndpointer (mode = fixed) mempertahankan perilaku lama: hening tetap sekian ms.
+"""
+import math
+import queue
+import threading
+import time
+
+from core import config_manager, stt_backends
+from core.logging_setup import get_logger
+
+# --- Setup Logging ---
+logger = get_logger(__name__)
+
+SECTION = "endpointing"
+
+# Kata di akhir teks parsial yang menandakan kalimat belum selesai.
+CONTINUATION_WORDS = frozenset((
+    "dan", "atau", "yang", "tapi", "tetapi", "karena", "kalau", "jika", "untuk", "dengan", "di", "ke",
+    "dari", "eh", "em", "hmm", "anu", "jadi", "terus", "lalu",
+    "and", "or", "but", "because", "the", "a", "an", "to", "of", "with", "if", "so", "uh", "um",
+))
+
+
+def endpointing_mode() -> str:
+    return config_manager.get_config_value(SECTION, "mode", "adaptive").strip().lower()
+
+
+class SpeakerProfile:
+    """Statistik jeda satu pembicara (EWMA rata-rata dan varians, dalam ms)."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.min_silence_ms = config_manager.get_float(SECTION, "min_silence_ms", 240.0)
+        self.max_silence_ms = config_manager.get_float(SECTION, "max_silence_ms", 1000.0)
+        self.deviation_factor = config_manager.get_float(SECTION, "pause_deviation_factor", 1.0)
+        self.alpha = config_manager.get_float(SECTION, "adapt_alpha", 0.1)
+        self.pause_mean = config_manager.get_float(SECTION, "initial_pause_ms", 250.0)
+        self.pause_var = (self.pause_mean * 0.3) ** 2
+        self.pauses = 0
+        self.false_endpoints = 0
+        self._lock = threading.Lock()
+
+    def hangover_ms(self, max_silence_ms: float = None) -> float:
+        upper = max_silence_ms or self.max_silence_ms
+        value = self.pause_mean + self.deviation_factor * math.sqrt(self.pause_var)
+        return max(self.min_silence_ms, min(upper, value))
+
+    def observe_pause(self, pause_ms: float):
+        """Jeda di dalam ucapan (pengguna lanjut bicara setelahnya)."""
+        with self._lock:
+            delta = pause_ms - self.pause_mean
+            self.pause_mean += self.alpha * delta
+            self.pause_var = (1 - self.alpha) * (self.pause_var + self.alpha * delta * delta)
+            self.pauses += 1
+
+    def observe_false_endpoint(self, pause_ms: float):
+        """Ucapan diakhiri terlalu cepat: jeda sebenarnya `pause_ms`."""
+        self.false_endpoints += 1
+        logger.debug("Endpointing (%s): speech resumed after %.0f ms; raising the hangover.", self.name, pause_ms)
+        self.observe_pause(pause_ms)
+
+
+_profiles = {}
+_profiles_lock = threading.Lock()
+
+
+def get_speaker_profile(name: str = None) -> SpeakerProfile:
+    """Profil bersama untuk pembicara `name` (bawaan: [endpointing] speaker), hidup selama proses."""
+    name = name or config_manager.get_config_value(SECTION, "speaker", "default")
+    with _profiles_lock:
+        if name not in _profiles:
+            _profiles[name] = SpeakerProfile(name)
+        return _profiles[name]
+
+
+class PartialTranscriber:
+    """Transkrip parsial inkremental di thread sendiri, supaya thread capture tidak pernah menunggu STT."""
+
+    _BEGIN = object()
+
+    def __init__(self, backend, language: str):
+        self.backend = backend
+        self.language = language
+        self.text = ""
+        self.changed_at = 0.0
+        self._frames = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="stt-partials", daemon=True)
+        self._thread.start()
+
+    def begin(self):
+        self.text, self.changed_at = "", time.perf_counter()
+        self._frames.put(self._BEGIN)
+
+    def feed(self, frame: bytes):
+        self._frames.put(frame)
+
+    def caught_up(self, max_backlog: int = 2) -> bool:
+        """True jika teks parsial tertinggal paling banyak `max_backlog` frame."""
+        return self._frames.qsize() <= max_backlog
+
+    def close(self):
+        self._frames.put(None)
+
+    def _run(self):
+        stream = None
+        while True:
+            item = self._frames.get()
+            if item is None:
+                return
+            if item is self._BEGIN:
+                try:
+                    stream = self.backend.create_stream(self.language)
+                except stt_backends.RecognizerUnavailableError as e:
+                    logger.warning("Partial transcripts unavailable (%s): %s", self.backend.name, e)
+                    stream = None
+                continue
+            if stream is None:
+                continue
+            try:
+                text = stream.accept(item)
+            except Exception as e:
+                logger.error("Partial transcription failed (%s): %s", self.backend.name, e, exc_info=True)
+                stream = None
+                continue
+            if text != self.text:
+                self.text, self.changed_at = text, time.perf_counter()
+
+
+class FixedEndpointer:
+    """Ucapan berakhir setelah `silence_ms` hening berturut-turut."""
+    name = "fixed"
+
+    def __init__(self, frame_ms: int, silence_ms: float):
+        self.frame_ms = frame_ms
+        self.silence_ms = silence_ms
+        self._silence = 0.0
+        self.reason = None
+
+    def begin(self, started_at: float, head_frames=()):
+        """Ucapan baru mulai; `head_frames` adalah pre-roll dan frame onset yang sudah terekam."""
+        self._silence, self.reason = 0.0, None
+
+    def should_end(self, frame: bytes, speech: bool, read_at: float) -> bool:
+        self._silence = 0.0 if speech else self._silence + self.frame_ms
+        if self._silence >= self.silence_ms:
+            self.reason = "silence"
+            return True
+        return False
+
+    def end(self, detected_at: float):
+        pass
+
+    def close(self):
+        pass
+
+
+class AdaptiveEndpointer(FixedEndpointer):
+    """Lihat docstring modul. `energy_threshold` angka atau callable (ambang VAD saat ini)."""
+    name = "adaptive"
+
+    def __init__(self, frame_ms: int, energy_threshold, profile: SpeakerProfile = None,
+                 partials: PartialTranscriber = None, max_silence_ms: float = None):
+        super().__init__(frame_ms, max_silence_ms or config_manager.get_float(SECTION, "max_silence_ms", 1000.0))
+        self.energy_threshold = energy_threshold
+        self.profile = profile or get_speaker_profile()
+        self.partials = partials
+        self.soft_energy_factor = config_manager.get_float(SECTION, "soft_silence_energy_factor", 0.5)
+        self.resume_window = config_manager.get_float(SECTION, "resume_window_ms", 700.0) / 1e3
+        self._pause = 0.0
+        self._last_end = None
+
+    def begin(self, started_at: float, head_frames=()):
+        super().begin(started_at)
+        self._pause = 0.0
+        if self._last_end is not None and 0 <= started_at - self._last_end[0] < self.resume_window:
+            self.profile.observe_false_endpoint(self._last_end[1] + (started_at - self._last_end[0]) * 1e3)
+        self._last_end = None
+        if self.partials is not None:
+            self.partials.begin()
+            for frame in head_frames:
+                self.partials.feed(frame)
+
+    def _silence_weight(self, frame: bytes) -> float:
+        from core.audio_capture import frame_rms
+        threshold = self.energy_threshold() if callable(self.energy_threshold) else self.energy_threshold
+        return 0.5 if frame_rms(frame) > threshold * self.soft_energy_factor else 1.0
+
+    def _partial_complete(self, read_at: float) -> bool:
+        partials = self.partials
+        if partials is None or not partials.text or not partials.caught_up():
+            return False
+        words = partials.text.lower().split()
+        if words[-1].strip(",.") in CONTINUATION_WORDS:
+            return False
+        return read_at - partials.changed_at >= self.profile.min_silence_ms / 1e3
+
+    def should_end(self, frame: bytes, speech: bool, read_at: float) -> bool:
+        if self.partials is not None:
+            self.partials.feed(frame)
+        if speech:
+            # Jeda satu frame biasanya kedipan VAD, bukan jeda antarkata.
+            if self._pause >= 2 * self.frame_ms:
+                self.profile.observe_pause(self._pause)
+            self._silence = self._pause = 0.0
+            return False
+        self._pause += self.frame_ms
+        self._silence += self.frame_ms * self._silence_weight(frame)
+        if self._silence < self.profile.min_silence_ms:
+            return False
+        if self._partial_complete(read_at):
+            self.reason = "partial"
+            return True
+        if self._silence >= self.profile.hangover_ms(self.silence_ms):
+            self.reason = "silence"
+            return True
+        return False
+
+    def end(self, detected_at: float):
+        self._last_end = (detected_at, self._pause)
+        logger.debug("Endpoint (%s) after %.0f ms of silence; hangover now %.0f ms.",
+                     self.reason or "limit", self._pause, self.profile.hangover_ms(self.silence_ms))
+
+    def close(self):
+        if self.partials is not None:
+            self.partials.close()
+
+
+def create_endpointer(frame_ms: int, energy_threshold, sample_rate: int, language: str = None,
+                      max_silence_ms: float = None):
+    """
+    Endpointer sesuai [endpointing] mode. `max_silence_ms` menimpa batas hening (mode fixed:
+    jeda tetapnya). Transkrip parsial hanya dipakai jika backend mendukung stream dan audio 16 kHz.
+    """
+    if endpointing_mode() == "fixed":
+        return FixedEndpointer(frame_ms, max_silence_ms or config_manager.get_float(SECTION, "fixed_silence_ms", 2000.0))
+    partials = None
+    if config_manager.get_bool(SECTION, "partial_transcripts", True):
+        backend = stt_backends.get_backend(config_manager.get_config_value(SECTION, "partial_backend", "") or None)
+        if backend.streaming and sample_rate == stt_backends.SAMPLE_RATE:
+            partials = PartialTranscriber(backend, language or stt_backends.default_language())
+        else:
+            logger.debug("No partial transcripts: backend '%s' does not stream at %d Hz.", backend.name, sample_rate)
+    return AdaptiveEndpointer(frame_ms, energy_threshold, partials=partials, max_silence_ms=max_silence_ms)
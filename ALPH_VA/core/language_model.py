@@ -1,11 +1,14 @@
 # core/language_model.py
 import logging
-import dotenv
 import os
 import json
-from google import genai
-from google.genai import types
+import threading
+from typing import TYPE_CHECKING, Iterator
 from core.config_manager import ConfigManager
+from core.logging_setup import get_logger, setup_logging
+
+if TYPE_CHECKING:
+    from google.genai import types
 
 # --- Global Config Instance ---
 try:
@@ -18,67 +21,28 @@ except Exception as e_cfg_init_lm:
         f"LanguageModel: ConfigManager initialization failed: {e_cfg_init_lm}"
     ) from e_cfg_init_lm
 
-logger = logging.getLogger(__name__)
-if not logger.hasHandlers():
-    log_file_path = ""
-    try:
-        _log_dir_lm = _cfg.get_config_value(
-            "general",
-            "log_dir",
-            os.path.join(
-                _cfg.get_config_value(
-                    "general",
-                    "project_root_dir",
-                    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-                ),
-                "logs",
-            ),
-        )
-        if not os.path.exists(_log_dir_lm):
-            os.makedirs(_log_dir_lm, exist_ok=True)
-        log_file_path = os.path.join(
-            _log_dir_lm, f"{os.path.splitext(os.path.basename(__file__))[0]}.log"
-        )
-    except Exception as e_log_path_lm:
-        logger.error(
-            "Error determining log_file_path for language_model: %s. Using fallback.",
-            e_log_path_lm,
-            exc_info=False,
-        )
-        log_file_path = f"{os.path.splitext(os.path.basename(__file__))[0]}.log"
-    try:
-        file_handler = logging.FileHandler(log_file_path, encoding="utf-8")
-        formatter = logging.Formatter(
-            "%(asctime)s - %(name)s - %(levelname)s - %(module)s:%(lineno)d - %(message)s"
-        )
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
-        logger.setLevel(logging.INFO)
-    except OSError as e_fh_lm:
-        logger.error(
-            "OSError setting up file handler for language_model: %s. Using basicConfig.",
-            e_fh_lm,
-            exc_info=True,
-        )
-        logging.basicConfig(
-            level=logging.INFO,
-            format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        )
-    except Exception as e_log_lm:
-        logger.error(
-            "Unexpected error setting up logger for language_model: %s. Using basicConfig.",
-            e_log_lm,
-            exc_info=True,
-        )
-        logging.basicConfig(
-            level=logging.INFO,
-            format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        )
+logger = get_logger(__name__)
+
+def _genai_module():
+    """Impor `google.genai` saat pertama kali dibutuhkan (bukan saat modul dimuat)."""
+    from google import genai
 
-dotenv.load_dotenv()
+    return genai
+
+
+def _genai_types():
+    from google.genai import types
+
+    return types
 
 
 def _get_gemini_api_key():
+    try:
+        import dotenv
+
+        dotenv.load_dotenv()
+    except ImportError:
+        logger.debug("python-dotenv not installed; skipping .env loading.")
     api_key = _cfg.get_config_value("api_keys", "gemini_api_key")
     if api_key and api_key != "YOUR_GEMINI_API_KEY_HERE":
         logger.info("GEMINI_API_KEY loaded from config.ini.")
@@ -93,32 +57,50 @@ def _get_gemini_api_key():
     )
 
 
-GEMINI_API_KEY = _get_gemini_api_key()
 _genai_client_instance = None
+_genai_client_lock = threading.Lock()
+
+
+def _get_genai_client():
+    """
+    Membuat genai.Client pada pemakaian pertama lalu menyimpannya.
+    Kunci API juga baru dibaca di sini, sehingga impor modul ini tidak
+    memerlukan SDK maupun kunci API.
+    """
+    global _genai_client_instance
+    if _genai_client_instance is not None:
+        return _genai_client_instance
+    with _genai_client_lock:
+        if _genai_client_instance is not None:
+            return _genai_client_instance
+        api_key = _get_gemini_api_key()
+        try:
+            genai = _genai_module()
+            if not hasattr(genai, "Client"):
+                logger.critical(
+                    "genai.Client class not found in google.genai module. Library might be corrupted or an unexpected version."
+                )
+                raise AttributeError("genai.Client class not found.")
+            _genai_client_instance = genai.Client(api_key=api_key)
+            logger.info("genai.Client initialized successfully.")
+        except (AttributeError, ImportError) as e_attr:
+            logger.error(
+                "Error importing google.genai or locating genai.Client: %s. This should not happen if library is installed correctly.",
+                e_attr,
+                exc_info=True,
+            )
+            raise RuntimeError(
+                f"Pustaka google-generativeai tidak ditemukan dengan benar: {e_attr}"
+            ) from e_attr
+        except Exception as e_client_init:
+            logger.error(
+                "Failed to initialize genai.Client: %s", e_client_init, exc_info=True
+            )
+            raise RuntimeError(
+                f"Gagal menginisialisasi genai.Client: {e_client_init}"
+            ) from e_client_init
+    return _genai_client_instance
 
-try:
-    if hasattr(genai, "Client"):
-        _genai_client_instance = genai.Client(api_key=GEMINI_API_KEY)
-        logger.info("genai.Client initialized successfully.")
-    else:
-        logger.critical(
-            "genai.Client class not found in google.genai module. Library might be corrupted or an unexpected version."
-        )
-        raise AttributeError("genai.Client class not found.")
-except AttributeError as e_attr:
-    logger.error(
-        "AttributeError during genai.Client initialization: %s. This should not happen if library is installed correctly.",
-        e_attr,
-        exc_info=True,
-    )
-    raise RuntimeError(
-        f"Pustaka google-generativeai tidak ditemukan dengan benar: {e_attr}"
-    ) from e_attr
-except Exception as e_client_init:
-    logger.error("Failed to initialize genai.Client: %s", e_client_init, exc_info=True)
-    raise RuntimeError(
-        f"Gagal menginisialisasi genai.Client: {e_client_init}"
-    ) from e_client_init
 
 DEFAULT_MODEL_NAME = "gemini-1.5-flash-latest"
 
@@ -168,24 +150,38 @@ def _get_instruction_path_from_config():
     return os.path.join(PROJECT_ROOT, path_val)
 
 
-DEFAULT_SAFETY_SETTINGS_FOR_CLIENT_CONFIG = [
-    types.SafetySetting(
-        category="HARM_CATEGORY_HARASSMENT",
-        threshold="BLOCK_NONE",
-    ),
-    types.SafetySetting(
-        category="HARM_CATEGORY_HATE_SPEECH",
-        threshold="BLOCK_NONE",
-    ),
-    types.SafetySetting(
-        category="HARM_CATEGORY_SEXUALLY_EXPLICIT",
-        threshold="BLOCK_NONE",
-    ),
-    types.SafetySetting(
-        category="HARM_CATEGORY_DANGEROUS_CONTENT",
-        threshold="BLOCK_NONE",
-    ),
-]
+_SAFETY_CATEGORIES = (
+    "HARM_CATEGORY_HARASSMENT",
+    "HARM_CATEGORY_HATE_SPEECH",
+    "HARM_CATEGORY_SEXUALLY_EXPLICIT",
+    "HARM_CATEGORY_DANGEROUS_CONTENT",
+)
+_default_safety_settings = None
+
+
+def _get_default_safety_settings() -> list:
+    global _default_safety_settings
+    if _default_safety_settings is None:
+        types = _genai_types()
+        _default_safety_settings = [
+            types.SafetySetting(category=category, threshold="BLOCK_NONE")
+            for category in _SAFETY_CATEGORIES
+        ]
+    return _default_safety_settings
+
+
+def __getattr__(name: str):
+    # PEP 562: nama-nama lama yang dulu dibuat saat impor kini dihitung saat
+    # pertama kali diakses dari luar modul.
+    if name == "GEMINI_API_KEY":
+        return _get_gemini_api_key()
+    if name == "DEFAULT_SAFETY_SETTINGS_FOR_CLIENT_CONFIG":
+        return _get_default_safety_settings()
+    if name == "genai":
+        return _genai_module()
+    if name == "types":
+        return _genai_types()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 _instructions_cache = {}
@@ -251,19 +247,14 @@ def _get_specific_instruction(
 
 class LanguageModel:
     def __init__(self, default_role: str = "Assistant"):
-        if not _genai_client_instance:
-            raise RuntimeError(
-                "genai.Client (LanguageModel) was not initialized successfully. Cannot create LanguageModel instance."
-            )
-
-        self.client = _genai_client_instance
+        self._client = None
         self.model_name_base = _get_model_name_from_config()
         self.default_temperature = _get_temperature_from_config()
         self.default_top_p = _get_top_p_from_config()
         self.default_top_k = _get_top_k_from_config()
         self.instruction_path = _get_instruction_path_from_config()
         self.default_role = default_role
-        self.safety_settings = DEFAULT_SAFETY_SETTINGS_FOR_CLIENT_CONFIG
+        self._safety_settings = None
 
         logger.info(
             "LanguageModel initialized with base model: '%s', default role: '%s'",
@@ -271,11 +262,33 @@ class LanguageModel:
             self.default_role,
         )
 
+    @property
+    def client(self):
+        """genai.Client bersama; dibuat saat request pertama, bukan saat inisialisasi."""
+        if self._client is None:
+            self._client = _get_genai_client()
+        return self._client
+
+    @client.setter
+    def client(self, value):
+        self._client = value
+
+    @property
+    def safety_settings(self) -> list:
+        if self._safety_settings is None:
+            self._safety_settings = _get_default_safety_settings()
+        return self._safety_settings
+
+    @safety_settings.setter
+    def safety_settings(self, value: list):
+        self._safety_settings = value
+
     def _prepare_chat_history(
         self, chat_history: list | None
-    ) -> list[types.Content] | None:
+    ) -> "list[types.Content] | None":
         if not chat_history:
             return None
+        types = _genai_types()
         prepared_history = []
         for item in chat_history:
             if isinstance(item, types.Content):
@@ -305,7 +318,7 @@ class LanguageModel:
                 )
         return prepared_history if prepared_history else None
 
-    def generate_response(
+    def _build_request(
         self,
         language: str,
         prompt: str,
@@ -315,7 +328,8 @@ class LanguageModel:
         temperature_override: float | None = None,
         top_p_override: float | None = None,
         top_k_override: int | None = None,
-    ) -> str:
+    ) -> tuple:
+        """(model path, contents, GenerateContentConfig, peran) untuk generate_response dan generate_response_stream."""
         current_role = role_override if role_override else self.default_role
         current_temperature = (
             temperature_override
@@ -329,6 +343,7 @@ class LanguageModel:
             top_k_override if top_k_override is not None else self.default_top_k
         )
 
+        types = _genai_types()
         system_instruction_text = _get_specific_instruction(
             json_path=self.instruction_path, role=current_role, lang=language, task=task
         )
@@ -401,6 +416,24 @@ class LanguageModel:
         if not model_path_for_api.startswith("models/"):
             model_path_for_api = f"models/{model_path_for_api}"
 
+        return model_path_for_api, final_contents_for_api, generation_config_obj, current_role
+
+    def generate_response(
+        self,
+        language: str,
+        prompt: str,
+        chat_history: list | None = None,
+        role_override: str | None = None,
+        task: str = "FULL",
+        temperature_override: float | None = None,
+        top_p_override: float | None = None,
+        top_k_override: int | None = None,
+    ) -> str:
+        model_path_for_api, final_contents_for_api, generation_config_obj, current_role = self._build_request(
+            language, prompt, chat_history, role_override, task,
+            temperature_override, top_p_override, top_k_override,
+        )
+
         logger.info(
             "Sending request via genai.Client to '%s' (Role: %s, Lang: %s, Task: %s)",
             model_path_for_api,
@@ -448,13 +481,59 @@ class LanguageModel:
             return f"[Gemini Error - Client API]: {str(e_main_call)}"
 
 
+    def generate_response_stream(
+        self,
+        language: str,
+        prompt: str,
+        chat_history: list | None = None,
+        role_override: str | None = None,
+        task: str = "FULL",
+        temperature_override: float | None = None,
+        top_p_override: float | None = None,
+        top_k_override: int | None = None,
+    ) -> Iterator[str]:
+        """
+        Seperti generate_response(), tetapi menghasilkan potongan teks begitu diterima dari
+        `generate_content_stream`, supaya TTS bisa mulai sebelum balasan selesai. Blocking; jalankan
+        di thread terpisah dari event loop. Error dilempar ke pemanggil (tidak diubah menjadi teks).
+        """
+        model_path_for_api, final_contents_for_api, generation_config_obj, current_role = self._build_request(
+            language, prompt, chat_history, role_override, task,
+            temperature_override, top_p_override, top_k_override,
+        )
+        logger.info(
+            "Streaming request via genai.Client to '%s' (Role: %s, Lang: %s, Task: %s)",
+            model_path_for_api,
+            current_role,
+            language,
+            task,
+        )
+        try:
+            response_chunks = self.client.models.generate_content_stream(
+                model=model_path_for_api,
+                contents=final_contents_for_api,
+                config=generation_config_obj,
+            )
+        except TypeError as te:
+            logger.warning(
+                "TypeError in genai.Client stream call: %s. Trying simpler call without full config.",
+                te,
+            )
+            response_chunks = self.client.models.generate_content_stream(
+                model=model_path_for_api, contents=final_contents_for_api
+            )
+        total_chars = 0
+        for chunk in response_chunks:
+            text = getattr(chunk, "text", None)
+            if text:
+                total_chars += len(text)
+                yield text
+        logger.info("Streamed response from genai.Client finished (%d chars).", total_chars)
+
+
 if __name__ == "__main__":
     print("--- LanguageModel Standalone Test (genai.Client focus) ---")
-    if not logging.getLogger().hasHandlers():
-        logging.basicConfig(
-            level=logging.DEBUG,
-            format="%(asctime)s - %(name)s - %(levelname)s - %(module)s:%(lineno)d - %(message)s",
-        )
+    setup_logging(console=True, level=logging.DEBUG)
     try:
         lm = LanguageModel(default_role="Girlfriend")
         print(f"LanguageModel instance created with default role: {lm.default_role}")
@@ -468,6 +547,7 @@ if __name__ == "__main__":
         print(
             "\n--- Test 2: With history, role 'Assistant', lang 'en', task 'greet' ---"
         )
+        types = _genai_types()
         history2 = [
             types.Content(role="user", parts=[types.Part(text="Good morning!")]),
         ]
@@ -0,0 +1,237 @@
+# core/logging_setup.py
+"""
+Bootstrap logging terpusat untuk seluruh aplikasi.
+
+Semua logger modul tidak lagi memasang FileHandler sendiri. Root logger
+mendapat satu QueueHandler; QueueListener di thread terpisah yang menulis ke
+file, sehingga I/O disk tidak terjadi di thread pemanggil (event loop, thread
+TTS/STT). Listener meneruskan setiap record ke:
+  - file per modul `logs/<nama_modul>.log` (untuk logger `core.*`/`plugins.*`),
+  - log aplikasi `logs/virtual_assistant.log`,
+  - konsol (opsional).
+Semua file memakai RotatingFileHandler berbasis ukuran.
+
+Pipeline hanya dipasang oleh entry point (main.py, tools/, blok `__main__`)
+lewat setup_logging(); mengimpor modul tidak memasang handler apa pun. Proses
+anak (spawn) memanggil setup_child_logging() dengan child_logging_config() dari
+induknya: record dikirim lewat multiprocessing.Queue ke pipeline induk, jadi
+hanya satu proses yang menulis file log.
+
+Modul ini sengaja tidak mengimpor config_manager (config_manager sendiri
+memakai logger dari sini); pengaturan `[logging]` dibaca langsung dari
+config.ini.
+"""
+import atexit
+import configparser
+import logging
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+PROJECT_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_FILE_PATH = os.path.join(PROJECT_ROOT_DIR, "config", "config.ini")
+LOG_DIR = os.path.join(PROJECT_ROOT_DIR, "logs")
+APP_LOG_NAME = "virtual_assistant"
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(module)s:%(lineno)d - %(message)s"
+CONSOLE_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+# Paket yang log-nya mendapat file sendiri; logger lain (pihak ketiga, __main__) hanya ke log aplikasi.
+MODULE_LOG_PACKAGES = ("core", "plugins")
+
+DEFAULT_LEVEL = "INFO"
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 3
+
+_setup_lock = threading.Lock()
+_queue_handler: QueueHandler | None = None
+_listener: QueueListener | None = None
+_router: "_ModuleFileRouter | None" = None
+_child_queue = None
+_child_listener: QueueListener | None = None
+
+
+def _read_logging_settings() -> dict:
+    settings = {
+        "level": DEFAULT_LEVEL,
+        "max_bytes": DEFAULT_MAX_BYTES,
+        "backup_count": DEFAULT_BACKUP_COUNT,
+        "console": False,
+        "log_dir": LOG_DIR,
+    }
+    parser = configparser.ConfigParser()
+    try:
+        parser.read(CONFIG_FILE_PATH, encoding="utf-8")
+    except configparser.Error as e:
+        print(f"WARNING: Could not read [logging] settings from {CONFIG_FILE_PATH}: {e}")
+        return settings
+    if not parser.has_section("logging"):
+        return settings
+    section = parser["logging"]
+    try:
+        settings["level"] = section.get("level", DEFAULT_LEVEL).strip().upper() or DEFAULT_LEVEL
+        settings["max_bytes"] = section.getint("max_bytes", DEFAULT_MAX_BYTES)
+        settings["backup_count"] = section.getint("backup_count", DEFAULT_BACKUP_COUNT)
+        settings["console"] = section.getboolean("console", False)
+    except ValueError as e:
+        print(f"WARNING: Invalid value in [logging] section: {e}. Using defaults.")
+    log_dir = section.get("log_dir", "").strip()
+    if log_dir:
+        settings["log_dir"] = log_dir if os.path.isabs(log_dir) else os.path.join(PROJECT_ROOT_DIR, log_dir)
+    return settings
+
+
+def module_log_name(logger_name: str) -> str | None:
+    """`core.text_processing` -> `text_processing`; None untuk logger di luar MODULE_LOG_PACKAGES."""
+    package, _, rest = logger_name.partition(".")
+    if package not in MODULE_LOG_PACKAGES or not rest:
+        return None
+    return rest.split(".", 1)[0]
+
+
+class _ModuleFileRouter(logging.Handler):
+    """Handler di sisi listener: meneruskan record ke file per modul, log aplikasi, dan konsol."""
+
+    def __init__(self, log_dir: str, max_bytes: int, backup_count: int):
+        super().__init__()
+        self.log_dir = log_dir
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._file_formatter = logging.Formatter(LOG_FORMAT)
+        self._file_handlers: dict[str, logging.Handler] = {}
+        self.console_handler: logging.Handler | None = None
+
+    def _file_handler(self, log_name: str) -> logging.Handler:
+        handler = self._file_handlers.get(log_name)
+        if handler is None:
+            try:
+                os.makedirs(self.log_dir, exist_ok=True)
+                handler = RotatingFileHandler(
+                    os.path.join(self.log_dir, f"{log_name}.log"),
+                    maxBytes=self.max_bytes,
+                    backupCount=self.backup_count,
+                    encoding="utf-8",
+                    delay=True,
+                )
+            except OSError as e:
+                print(f"ERROR: Could not open log file for {log_name} in {self.log_dir}: {e}. Logging to stderr.")
+                handler = logging.StreamHandler(sys.stderr)
+            handler.setFormatter(self._file_formatter)
+            self._file_handlers[log_name] = handler
+        return handler
+
+    def set_console(self, enabled: bool):
+        if enabled and self.console_handler is None:
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+            self.console_handler = console_handler
+        elif not enabled:
+            self.console_handler = None
+
+    def emit(self, record: logging.LogRecord):
+        log_name = module_log_name(record.name)
+        if log_name is not None:
+            self._file_handler(log_name).handle(record)
+        self._file_handler(APP_LOG_NAME).handle(record)
+        console_handler = self.console_handler
+        if console_handler is not None:
+            console_handler.handle(record)
+
+    def flush(self):
+        for handler in list(self._file_handlers.values()):
+            handler.flush()
+
+    def close(self):
+        for handler in list(self._file_handlers.values()):
+            handler.close()
+        self._file_handlers.clear()
+        super().close()
+
+
+def build_queue_pipeline(
+    log_dir: str, max_bytes: int = DEFAULT_MAX_BYTES, backup_count: int = DEFAULT_BACKUP_COUNT
+) -> tuple[QueueHandler, QueueListener, _ModuleFileRouter]:
+    """Membuat pasangan QueueHandler/QueueListener (listener belum dijalankan)."""
+    log_queue = queue.SimpleQueue()
+    router = _ModuleFileRouter(log_dir, max_bytes, backup_count)
+    return QueueHandler(log_queue), QueueListener(log_queue, router), router
+
+
+def setup_logging(console: bool | None = None, level: int | str | None = None) -> None:
+    """
+    Memasang pipeline logging pada root logger (idempotent).
+    Panggilan berikutnya hanya mengubah konsol/level jika argumennya diberikan.
+    """
+    global _queue_handler, _listener, _router
+    with _setup_lock:
+        if _listener is None:
+            settings = _read_logging_settings()
+            _queue_handler, _listener, _router = build_queue_pipeline(
+                settings["log_dir"], settings["max_bytes"], settings["backup_count"]
+            )
+            root = logging.getLogger()
+            root.addHandler(_queue_handler)
+            root.setLevel(settings["level"])
+            _router.set_console(settings["console"])
+            _listener.start()
+            atexit.register(shutdown_logging)
+        if console is not None:
+            _router.set_console(console)
+        if level is not None:
+            logging.getLogger().setLevel(level)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Sama dengan `logging.getLogger(name)`; pipeline dipasang oleh entry point, bukan saat impor."""
+    return logging.getLogger(name)
+
+
+class _ForwardToLocal(logging.Handler):
+    """Handler listener antrean anak: record dari proses anak diproses ulang oleh logger proses ini."""
+
+    def emit(self, record: logging.LogRecord):
+        logging.getLogger(record.name).handle(record)
+
+
+def child_logging_config() -> tuple:
+    """
+    Argumen untuk setup_child_logging() di proses anak (bisa di-pickle ke proses spawn).
+    Tanpa pipeline di proses ini, anak tidak memasang handler apa pun.
+    """
+    global _child_queue, _child_listener
+    with _setup_lock:
+        if _listener is None:
+            return (None, logging.getLogger().level)
+        if _child_queue is None:
+            _child_queue = multiprocessing.get_context("spawn").Queue()
+            _child_listener = QueueListener(_child_queue, _ForwardToLocal())
+            _child_listener.start()
+        return (_child_queue, logging.getLogger().level)
+
+
+def setup_child_logging(config: tuple | None = None) -> None:
+    """Dipanggil di awal proses anak: log dikirim ke pipeline induk, tanpa membuka file log sendiri."""
+    if config is None or config[0] is None:
+        return
+    log_queue, level = config
+    root = logging.getLogger()
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(level)
+
+
+def shutdown_logging() -> None:
+    """Menghentikan listener setelah antrean dikosongkan dan menutup file log."""
+    global _queue_handler, _listener, _router, _child_queue, _child_listener
+    with _setup_lock:
+        if _listener is None:
+            return
+        if _child_listener is not None:
+            # Record dari proses anak diteruskan dulu ke pipeline utama.
+            _child_listener.stop()
+            _child_queue.close()
+            _child_queue = _child_listener = None
+        _listener.stop()
+        logging.getLogger().removeHandler(_queue_handler)
+        _router.close()
+        _queue_handler = _listener = _router = None
@@ -1,36 +1,68 @@
 # core/plugin_manager.py
+import ast
+import asyncio
 import importlib
-import logging
+import json
 import os
 from core import config_manager # Pastikan config_manager.py ada dan LOG_DIR terdefinisi
+from core.logging_setup import get_logger, setup_logging
+from core import plugin_worker
 
-logger = logging.getLogger(__name__)
-if not logger.hasHandlers():
-    log_file_path = ""
+logger = get_logger(__name__)
+
+
+MANIFEST_CACHE_VERSION = 1
+MANIFEST_ATTRIBUTE = "MODULE_MANIFEST"
+LIFECYCLE_HOOKS = ("init", "warmup", "close")
+COST_CLASSES = ("low", "medium", "high")
+
+
+def _empty_manifest(name: str) -> dict:
+    return {
+        "name": name,
+        "capabilities": [],
+        "engines": [],
+        "languages": [],
+        "cost_class": "medium",
+        "hooks": [],
+    }
+
+
+def _read_manifest_from_source(file_path: str, module_name: str) -> dict:
+    """
+    Membaca MODULE_MANIFEST dan hook lifecycle dari source modul TANPA mengimpornya.
+    MODULE_MANIFEST harus berupa literal dict di level modul, misalnya:
+        MODULE_MANIFEST = {"capabilities": ["tts"], "engines": ["custom"], "languages": ["id"], "cost_class": "high"}
+    Hook lifecycle adalah fungsi `async def init()/warmup()/close()` di level modul.
+    """
+    manifest = _empty_manifest(module_name)
     try:
-        # Pastikan LOG_DIR ada sebelum mencoba menulis log
-        if not os.path.exists(config_manager.LOG_DIR):
-            os.makedirs(config_manager.LOG_DIR)
-            logger.info(f"Created log directory: {config_manager.LOG_DIR}")
-        log_file_path = os.path.join(config_manager.LOG_DIR, f"{os.path.split(__file__)[1].split('.')[0]}.log")
-    except AttributeError: # Jika config_manager atau LOG_DIR tidak ada
-        logger.warning("config_manager.LOG_DIR not found. Logging to current directory.")
-        log_file_path = f"{os.path.split(__file__)[1].split('.')[0]}.log"
-    except OSError as e:
-        logger.error(f"Error creating log directory {config_manager.LOG_DIR}: {e}. Logging to current directory.")
-        log_file_path = f"{os.path.split(__file__)[1].split('.')[0]}.log"
-    except Exception as e: # Tangkap error yang lebih umum
-        logger.error(f"Unexpected error during logger setup for plugin_manager: {e}. Logging to current directory.")
-        log_file_path = f"{os.path.split(__file__)[1].split('.')[0]}.log"
-
-    if log_file_path: # Hanya setup handler jika path ada
-        file_handler = logging.FileHandler(log_file_path)
-        file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(module)s - %(message)s'))
-        logger.addHandler(file_handler)
-    else: # Fallback jika path log tidak bisa ditentukan
-        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(module)s - %(message)s')
-        logger.warning("Could not set up file handler for plugin_manager. Using basicConfig.")
-    logger.setLevel(logging.INFO)
+        with open(file_path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=file_path)
+    except (OSError, SyntaxError, ValueError) as e:
+        logger.warning(f"Could not parse '{file_path}' for manifest: {e}")
+        return manifest
+
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == MANIFEST_ATTRIBUTE for t in node.targets):
+            try:
+                declared = ast.literal_eval(node.value)
+            except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+                logger.warning(f"{MANIFEST_ATTRIBUTE} in '{file_path}' is not a literal dict. Ignoring it.")
+                continue
+            if not isinstance(declared, dict):
+                logger.warning(f"{MANIFEST_ATTRIBUTE} in '{file_path}' is not a dict. Ignoring it.")
+                continue
+            for key in ("capabilities", "engines", "languages"):
+                value = declared.get(key, [])
+                if isinstance(value, str):
+                    value = [value]
+                manifest[key] = [str(v).lower() for v in value]
+            cost_class = str(declared.get("cost_class", manifest["cost_class"])).lower()
+            manifest["cost_class"] = cost_class if cost_class in COST_CLASSES else "medium"
+        elif isinstance(node, (ast.AsyncFunctionDef, ast.FunctionDef)) and node.name in LIFECYCLE_HOOKS:
+            manifest["hooks"].append(node.name)
+    return manifest
 
 
 class ModuleManager:
@@ -39,33 +71,210 @@ class ModuleManager:
         # Dictionaries ini akan menyimpan modul yang SUDAH diimpor
         self.loaded_plugins = {}
         self.loaded_core_modules = {}
-        
+        # Urutan plugin yang sudah menjalankan hook init(), untuk close() terbalik
+        self._initialized_plugins: list[str] = []
+
         self.project_root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        
-        # Pindai nama modul yang tersedia, tapi jangan impor sekarang
-        self.available_plugins = self._scan_available_modules("plugins")
-        self.available_core_modules = self._scan_available_modules("core")
-        
+        self.manifest_cache_path = os.path.join(self.project_root_dir, "data", "cache", "module_manifest.json")
+        self._manifest_cache = self._load_manifest_cache()
+
+        # Pindai nama modul yang tersedia beserta manifest-nya, tapi jangan impor sekarang
+        self.plugin_manifests = self._scan_module_manifests("plugins")
+        self.core_module_manifests = self._scan_module_manifests("core")
+        self.available_plugins = set(self.plugin_manifests)
+        self.available_core_modules = set(self.core_module_manifests)
+        self._save_manifest_cache()
+
         logger.info(f"ModuleManager initialized. Available plugins: {list(self.available_plugins)}")
         logger.info(f"Available core modules: {list(self.available_core_modules)}")
 
-    def _scan_available_modules(self, module_type_dir_name: str) -> set[str]:
-        """Memindai direktori untuk menemukan nama modul Python yang tersedia (tanpa .py)."""
-        available = set()
+    def _load_manifest_cache(self) -> dict:
+        try:
+            with open(self.manifest_cache_path, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+            if isinstance(cache, dict) and cache.get("version") == MANIFEST_CACHE_VERSION:
+                return cache
+            logger.info("Manifest cache has an unexpected format/version. Rebuilding.")
+        except FileNotFoundError:
+            pass
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Could not read manifest cache '{self.manifest_cache_path}': {e}. Rebuilding.")
+        return {"version": MANIFEST_CACHE_VERSION, "directories": {}}
+
+    def _save_manifest_cache(self):
+        if not self._manifest_cache.get("dirty"):
+            return
+        self._manifest_cache.pop("dirty", None)
+        tmp_path = f"{self.manifest_cache_path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.manifest_cache_path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._manifest_cache, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.manifest_cache_path)
+            logger.debug(f"Manifest cache written to {self.manifest_cache_path}")
+        except OSError as e:
+            logger.warning(f"Could not write manifest cache '{self.manifest_cache_path}': {e}")
+
+    def _scan_module_manifests(self, module_type_dir_name: str) -> dict[str, dict]:
+        """
+        Memindai direktori dan mengembalikan {nama_modul: manifest} tanpa mengimpor apa pun.
+        Daftar file di-cache berdasarkan mtime direktori, manifest per file berdasarkan mtime file,
+        sehingga start berikutnya tidak perlu listdir maupun parse ulang jika tidak ada perubahan.
+        """
         dir_path = os.path.join(self.project_root_dir, module_type_dir_name)
-        
         if not os.path.isdir(dir_path):
             logger.warning(f"Directory for '{module_type_dir_name}' ('{dir_path}') not found. No modules will be available from here.")
-            return available
+            return {}
+
+        dir_cache = self._manifest_cache["directories"].get(module_type_dir_name, {})
+        dir_mtime = os.stat(dir_path).st_mtime_ns
+        cached_files = dir_cache.get("files", {})
+        if dir_cache.get("mtime_ns") == dir_mtime:
+            module_names = list(cached_files)
+        else:
+            module_names = []
+            for file in os.listdir(dir_path):
+                if file.endswith(".py") and not file.startswith("__"):
+                    module_name = file[:-3]
+                    # Hindari menambahkan diri sendiri atau config_manager jika berada di 'core'
+                    if module_type_dir_name == "core" and module_name in ["plugin_manager", "config_manager"]:
+                        continue
+                    module_names.append(module_name)
+            self._manifest_cache["dirty"] = True
+
+        manifests = {}
+        files_cache = {}
+        for module_name in module_names:
+            file_path = os.path.join(dir_path, f"{module_name}.py")
+            try:
+                file_mtime = os.stat(file_path).st_mtime_ns
+            except OSError:
+                self._manifest_cache["dirty"] = True
+                continue
+            cached_entry = cached_files.get(module_name)
+            if cached_entry and cached_entry.get("mtime_ns") == file_mtime:
+                manifest = cached_entry["manifest"]
+            else:
+                manifest = _read_manifest_from_source(file_path, module_name)
+                self._manifest_cache["dirty"] = True
+            manifests[module_name] = manifest
+            files_cache[module_name] = {"mtime_ns": file_mtime, "manifest": manifest}
+
+        self._manifest_cache["directories"][module_type_dir_name] = {"mtime_ns": dir_mtime, "files": files_cache}
+        return manifests
+
+    def _scan_available_modules(self, module_type_dir_name: str) -> set[str]:
+        """Memindai direktori untuk menemukan nama modul Python yang tersedia (tanpa .py)."""
+        return set(self._scan_module_manifests(module_type_dir_name))
 
-        for file in os.listdir(dir_path):
-            if file.endswith(".py") and not file.startswith("__"):
-                module_name = file[:-3]
-                # Hindari menambahkan diri sendiri atau config_manager jika berada di 'core'
-                if module_type_dir_name == "core" and module_name in ["plugin_manager", "config_manager"]:
+    # --- Manifest & kapabilitas ---
+    def get_plugin_manifest(self, name: str) -> dict | None:
+        return self.plugin_manifests.get(name) or self.core_module_manifests.get(name)
+
+    def has_capability(self, name: str, capability: str) -> bool:
+        manifest = self.get_plugin_manifest(name)
+        return bool(manifest) and capability.lower() in manifest["capabilities"]
+
+    def find_plugins(self, capability: str, language: str | None = None, engine: str | None = None,
+                     max_cost_class: str | None = None) -> list[str]:
+        """
+        Mencari modul (plugin maupun core) yang mendeklarasikan kapabilitas tertentu,
+        tanpa mengimpor kandidat. Hasil diurutkan dari cost_class termurah.
+        Bahasa "*" di manifest berarti mendukung semua bahasa.
+        """
+        capability = capability.lower()
+        max_cost_rank = COST_CLASSES.index(max_cost_class) if max_cost_class in COST_CLASSES else len(COST_CLASSES) - 1
+        matches = []
+        for manifests in (self.plugin_manifests, self.core_module_manifests):
+            for name, manifest in manifests.items():
+                if capability not in manifest["capabilities"]:
+                    continue
+                if language and "*" not in manifest["languages"] and language.lower() not in manifest["languages"]:
+                    continue
+                if engine and engine.lower() not in manifest["engines"]:
+                    continue
+                if COST_CLASSES.index(manifest["cost_class"]) > max_cost_rank:
                     continue
-                available.add(module_name)
-        return available
+                matches.append(name)
+        return sorted(matches, key=lambda n: (COST_CLASSES.index(self.get_plugin_manifest(n)["cost_class"]), n))
+
+    # --- Lifecycle hook async ---
+    async def _call_hook(self, name: str, hook: str):
+        manifest = self.get_plugin_manifest(name)
+        if not manifest or hook not in manifest["hooks"]:
+            return None
+        module_type = "plugin" if name in self.plugin_manifests else "core_module"
+        module = self._import_module_if_needed(name, module_type)
+        hook_fn = getattr(module, hook, None) if module else None
+        if hook_fn is None:
+            return None
+        result = hook_fn()
+        if asyncio.iscoroutine(result):
+            result = await result
+        return result
+
+    async def init_plugin(self, name: str):
+        """Mengimpor modul dan menjalankan hook `init()` sekali. Mengembalikan modul (atau None)."""
+        module_type = "plugin" if name in self.plugin_manifests else "core_module"
+        module = self._import_module_if_needed(name, module_type)
+        if module is None or name in self._initialized_plugins:
+            return module
+        try:
+            await self._call_hook(name, "init")
+            self._initialized_plugins.append(name)
+            logger.info(f"Module '{name}' initialized via lifecycle hook.")
+        except Exception as e:
+            logger.error(f"init() hook of '{name}' failed: {e}", exc_info=True)
+            return None
+        return module
+
+    async def warmup_plugin(self, name: str) -> bool:
+        if await self.init_plugin(name) is None:
+            return False
+        try:
+            await self._call_hook(name, "warmup")
+            logger.info(f"Module '{name}' warmed up.")
+            return True
+        except Exception as e:
+            logger.error(f"warmup() hook of '{name}' failed: {e}", exc_info=True)
+            return False
+
+    async def close_plugin(self, name: str):
+        if name not in self._initialized_plugins:
+            return
+        try:
+            await self._call_hook(name, "close")
+            logger.info(f"Module '{name}' closed.")
+        except Exception as e:
+            logger.error(f"close() hook of '{name}' failed: {e}", exc_info=True)
+        finally:
+            self._initialized_plugins.remove(name)
+
+    async def close_all_plugins(self):
+        """Menjalankan hook `close()` untuk semua modul yang sudah di-init, urutan terbalik."""
+        for name in reversed(list(self._initialized_plugins)):
+            await self.close_plugin(name)
+        await plugin_worker.shutdown_all_workers()
+
+    def get_plugin_worker(self, name: str) -> plugin_worker.PluginWorker | None:
+        """Mengembalikan PluginWorker untuk plugin `name` (proses belum tentu berjalan), atau None jika plugin tidak ada."""
+        if name not in self.available_plugins:
+            logger.warning(f"Cannot host unknown plugin '{name}' in a worker process.")
+            return None
+        return plugin_worker.get_worker(f"plugins.{name}")
+
+    async def host_plugin_in_worker(self, name: str) -> plugin_worker.PluginWorker | None:
+        """Menjalankan plugin `name` di proses worker terpisah beserta health check berkala."""
+        worker = self.get_plugin_worker(name)
+        if worker is None:
+            return None
+        try:
+            await worker.start_async()
+        except plugin_worker.PluginWorkerError as e:
+            logger.error(f"Failed to start worker for plugin '{name}': {e}")
+            return None
+        logger.info(f"Plugin '{name}' is hosted in worker process {worker.pid}.")
+        return worker
 
     def _import_module_if_needed(self, name: str, module_type: str):
         """
@@ -162,6 +371,7 @@ class ModuleManager:
 
 
 if __name__ == "__main__":
+    setup_logging(console=True)
     print(f"Running plugin_manager.py directly for testing (Lazy Loading Mode)...")
     
     # --- Mocking untuk standalone test ---
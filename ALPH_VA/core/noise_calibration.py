@@ -0,0 +1,191 @@
+# core/noise_calibration.py
+"""
+Kalibrasi derau ruangan per perangkat input, disimpan di antara sesi.
+
+Tingkat derau (RMS) disimpan per nama perangkat di [noise_calibration] path. Saat start,
+SpeechToTextProcessor memakai nilai tersimpan alih-alih adjust_for_ambient_noise() (blok 1 detik)
+atau energy_threshold tetap dari config. Selama aplikasi berjalan, frame non-ucapan di luar
+ucapan (lihat core/audio_capture.UtteranceSegmenter) memperbarui tingkat derau dengan EMA
+(konstanta waktu `adapt_seconds`), dan energy_threshold recognizer = derau x `threshold_ratio`.
+Frame itu selalu di bawah ambang, jadi dari situ saja estimasi hanya bisa turun. Jika derau naik
+melewati ambang, VAD energi menganggapnya ucapan tanpa akhir; ucapan yang terpotong
+`max_utterance_seconds` tanpa endpoint diteruskan ke observe_sustained() dan kuartil bawah
+energinya menaikkan estimasi. Nilai terbaru ditulis berkala dan saat keluar.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+
+from core import config_manager
+from core.logging_setup import get_logger
+
+# --- Setup Logging ---
+logger = get_logger(__name__)
+
+CONFIG_SECTION = "noise_calibration"
+DEFAULT_PATH = os.path.join("data", "stt", "noise_calibration.json")
+FILE_VERSION = 1
+
+
+def device_key(device_index: int = None) -> str:
+    """Nama perangkat input (indeks PyAudio bisa bergeser antar boot, namanya tidak)."""
+    try:
+        import pyaudio
+        audio = pyaudio.PyAudio()
+        try:
+            if device_index is None:
+                info = audio.get_default_input_device_info()
+            else:
+                info = audio.get_device_info_by_index(device_index)
+            return str(info.get("name") or "default")
+        finally:
+            audio.terminate()
+    except Exception as e:
+        logger.debug("Could not query input device name: %s", e)
+        return "default" if device_index is None else f"device-{device_index}"
+
+
+class NoiseCalibrator:
+    """Tingkat derau satu perangkat; `attach()` membuat energy_threshold recognizer ikut diperbarui."""
+
+    def __init__(self, path: str, device: str):
+        self.path = path
+        self.device = device
+        self.threshold_ratio = config_manager.get_float(CONFIG_SECTION, "threshold_ratio", 1.5)
+        self.min_threshold = config_manager.get_float(CONFIG_SECTION, "min_energy_threshold", 300.0)
+        self.max_threshold = config_manager.get_float(CONFIG_SECTION, "max_energy_threshold", 8000.0)
+        self.adapt_seconds = config_manager.get_float(CONFIG_SECTION, "adapt_seconds", 10.0)
+        self.save_interval = config_manager.get_float(CONFIG_SECTION, "save_interval_seconds", 60.0)
+        self.noise_rms = None
+        self.paused = False
+        self._recognizer = None
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self._load()
+
+    # --- Penyimpanan ---
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning("Could not read noise calibration %s: %s. Recalibrating.", self.path, e)
+            return
+        if not isinstance(data, dict) or data.get("version") != FILE_VERSION:
+            logger.info("Noise calibration file has an unexpected format/version. Recalibrating.")
+            return
+        self._entries = data.get("devices", {})
+        entry = self._entries.get(self.device)
+        if entry and entry.get("noise_rms", 0) > 0:
+            self.noise_rms = float(entry["noise_rms"])
+            logger.info("Loaded noise calibration for '%s': noise RMS %.0f, energy_threshold %.0f.",
+                        self.device, self.noise_rms, self.threshold)
+
+    def flush(self):
+        """Menulis kalibrasi ke disk jika ada perubahan (atomik lewat file sementara)."""
+        with self._lock:
+            if not self._dirty or self.noise_rms is None:
+                return
+            self._entries[self.device] = {"noise_rms": round(self.noise_rms, 1), "updated": time.time()}
+            snapshot = {"version": FILE_VERSION, "devices": dict(self._entries)}
+            self._dirty = False
+            self._last_save = time.monotonic()
+        tmp_path = f"{self.path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning("Could not write noise calibration %s: %s", self.path, e)
+
+    # --- Ambang ---
+    @property
+    def calibrated(self) -> bool:
+        return self.noise_rms is not None
+
+    @property
+    def threshold(self) -> float | None:
+        if self.noise_rms is None:
+            return None
+        return max(self.min_threshold, min(self.max_threshold, self.noise_rms * self.threshold_ratio))
+
+    def attach(self, recognizer):
+        """energy_threshold `recognizer` diisi dari kalibrasi dan diperbarui oleh observe()."""
+        self._recognizer = recognizer
+        if self.calibrated:
+            recognizer.energy_threshold = self.threshold
+
+    def seed(self, energy_threshold: float):
+        """Titik awal dari ambang yang sudah diketahui (config atau adjust_for_ambient_noise)."""
+        with self._lock:
+            self.noise_rms = float(energy_threshold) / self.threshold_ratio
+            self._dirty = True
+        if self._recognizer is not None:
+            self._recognizer.energy_threshold = self.threshold
+
+    def observe(self, rms: float, frame_seconds: float):
+        """Satu frame non-ucapan (dipanggil di thread capture)."""
+        if self.paused:
+            return
+        self._update(rms, frame_seconds)
+
+    def observe_sustained(self, rms: float, seconds: float):
+        """
+        Ucapan `seconds` detik yang mencapai batas panjang tanpa endpoint; `rms` adalah kuartil
+        bawah energinya. Ucapan sungguhan punya jeda di bawah ambang, jadi kuartil bawah yang tetap
+        di atas estimasi berarti derau ruangan naik: estimasi hanya boleh naik dari sini.
+        """
+        if self.paused or self.noise_rms is None or rms <= self.noise_rms:
+            return
+        logger.info("Noise calibration for '%s': sustained sound without an endpoint (RMS %.0f); raising noise estimate.",
+                    self.device, rms)
+        self._update(rms, seconds)
+
+    def _update(self, rms: float, seconds: float):
+        with self._lock:
+            if self.noise_rms is None:
+                self.noise_rms = float(rms)
+            else:
+                alpha = min(1.0, seconds / self.adapt_seconds)
+                self.noise_rms += alpha * (rms - self.noise_rms)
+            self._dirty = True
+            save_due = time.monotonic() - self._last_save >= self.save_interval
+        if self._recognizer is not None:
+            self._recognizer.energy_threshold = self.threshold
+        if save_due:
+            self._last_save = time.monotonic()
+            threading.Thread(target=self.flush, name="noise-calibration-save", daemon=True).start()
+
+
+# --- Singleton ---
+_calibrator_instance = None
+_calibrator_lock = threading.Lock()
+
+
+def is_enabled() -> bool:
+    return config_manager.get_bool(CONFIG_SECTION, "enabled", True)
+
+
+def get_noise_calibrator() -> NoiseCalibrator | None:
+    """Kalibrator untuk perangkat [audio_capture] device_index, atau None jika dimatikan."""
+    global _calibrator_instance
+    if not is_enabled():
+        return None
+    if _calibrator_instance is None:
+        with _calibrator_lock:
+            if _calibrator_instance is None:
+                path = config_manager.get_config_value(CONFIG_SECTION, "path", DEFAULT_PATH)
+                if not os.path.isabs(path):
+                    path = os.path.join(config_manager.PROJECT_ROOT_DIR, path)
+                device_index = config_manager.get_config_value("audio_capture", "device_index", "")
+                device_index = int(device_index) if device_index.strip().isdigit() else None
+                _calibrator_instance = NoiseCalibrator(path, device_key(device_index))
+                atexit.register(_calibrator_instance.flush)
+    return _calibrator_instance
@@ -0,0 +1,320 @@
+# core/plugin_worker.py
+"""
+Menjalankan plugin di proses worker terpisah.
+
+Inferensi berat (misalnya Coqui VITS/torch) di proses yang sama dengan event
+loop berebut GIL dan core CPU dengan I/O LLM/terjemahan. PluginWorker memuat
+modul plugin di proses anak (konteks "spawn"), memanggil fungsinya lewat RPC
+di atas multiprocessing.Pipe, dan mengembalikan hasil berukuran besar (bytes
+audio) melalui multiprocessing.shared_memory agar tidak perlu di-pickle
+lewat pipe. Worker dipantau dengan ping berkala dan di-restart otomatis jika
+crash atau hang.
+"""
+import asyncio
+import importlib
+import itertools
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+from core import config_manager
+from core.logging_setup import child_logging_config, get_logger, setup_child_logging
+
+# --- Setup Logging ---
+logger = get_logger(__name__)
+
+DEFAULT_CALL_TIMEOUT = config_manager.get_float("plugin_workers", "call_timeout", 120.0)
+DEFAULT_HEALTH_INTERVAL = config_manager.get_float("plugin_workers", "health_check_interval", 15.0)
+DEFAULT_PING_TIMEOUT = config_manager.get_float("plugin_workers", "ping_timeout", 5.0)
+DEFAULT_MAX_RESTARTS = config_manager.get_int("plugin_workers", "max_restarts", 3)
+# Hasil bytes di atas ambang ini dikirim lewat shared memory, bukan pipe.
+DEFAULT_SHM_THRESHOLD = config_manager.get_int("plugin_workers", "shared_memory_threshold_bytes", 64 * 1024)
+# Jendela waktu penghitungan restart; restart lama di luar jendela ini dilupakan.
+RESTART_WINDOW_SECONDS = 300.0
+
+
+class PluginWorkerError(RuntimeError):
+    """Worker tidak bisa dijalankan, crash berulang, atau fungsi plugin melempar error."""
+
+
+class PluginWorkerCrashed(PluginWorkerError):
+    """Proses worker mati di tengah panggilan (pipe putus); worker sudah di-restart."""
+
+
+class _SharedBytes:
+    """Penanda hasil bytes yang disimpan di segmen shared memory bernama."""
+
+    __slots__ = ("name", "size")
+
+    def __init__(self, name: str, size: int):
+        self.name = name
+        self.size = size
+
+
+# --- Sisi proses worker ---
+def _pack_result(value, threshold: int):
+    if isinstance(value, (bytes, bytearray, memoryview)) and len(value) >= threshold:
+        size = len(value)
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        shm.buf[:size] = value
+        # Proses induk yang akan unlink segmen ini; jangan biarkan resource
+        # tracker menganggapnya bocor saat worker keluar.
+        resource_tracker.unregister(shm._name, "shared_memory")
+        shm.close()
+        return _SharedBytes(shm.name, size)
+    if isinstance(value, tuple):
+        return tuple(_pack_result(v, threshold) for v in value)
+    if isinstance(value, list):
+        return [_pack_result(v, threshold) for v in value]
+    if isinstance(value, dict):
+        return {k: _pack_result(v, threshold) for k, v in value.items()}
+    return value
+
+
+def _worker_main(conn, module_name: str, project_root: str, shm_threshold: int, log_config: tuple = None):
+    """Loop RPC di proses worker: terima (id, jenis, fungsi, args, kwargs), kirim (id, status, hasil)."""
+    setup_child_logging(log_config)
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    try:
+        module = importlib.import_module(module_name)
+    except BaseException as e:
+        conn.send((0, "fatal", f"Failed to import {module_name}: {e!r}"))
+        return
+    conn.send((0, "ready", os.getpid()))
+
+    while True:
+        try:
+            call_id, kind, func_name, args, kwargs = conn.recv()
+        except (EOFError, OSError):
+            break
+        if kind == "ping":
+            conn.send((call_id, "ok", "pong"))
+            continue
+        if kind == "stop":
+            conn.send((call_id, "ok", None))
+            break
+        try:
+            result = getattr(module, func_name)(*args, **kwargs)
+            if asyncio.iscoroutine(result):
+                result = asyncio.run(result)
+            conn.send((call_id, "ok", _pack_result(result, shm_threshold)))
+        except Exception as e:
+            conn.send((call_id, "error", f"{type(e).__name__}: {e}"))
+    conn.close()
+
+
+# --- Sisi proses induk ---
+def _unpack_result(value):
+    if isinstance(value, _SharedBytes):
+        shm = shared_memory.SharedMemory(name=value.name)
+        try:
+            return bytes(shm.buf[: value.size])
+        finally:
+            shm.close()
+            shm.unlink()
+    if isinstance(value, tuple):
+        return tuple(_unpack_result(v) for v in value)
+    if isinstance(value, list):
+        return [_unpack_result(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _unpack_result(v) for k, v in value.items()}
+    return value
+
+
+class PluginWorker:
+    """Proxy async untuk satu modul plugin yang dijalankan di proses terpisah."""
+
+    def __init__(
+        self,
+        module_name: str,
+        call_timeout: float = DEFAULT_CALL_TIMEOUT,
+        health_interval: float = DEFAULT_HEALTH_INTERVAL,
+        max_restarts: int = DEFAULT_MAX_RESTARTS,
+        shm_threshold: int = DEFAULT_SHM_THRESHOLD,
+    ):
+        self.module_name = module_name
+        self.call_timeout = call_timeout
+        self.health_interval = health_interval
+        self.max_restarts = max_restarts
+        self.shm_threshold = shm_threshold
+        self._ctx = multiprocessing.get_context("spawn")
+        self._process = None
+        self._conn = None
+        self._call_ids = itertools.count(1)
+        # Satu panggilan in-flight per worker; pipe tidak dibagi antar thread.
+        self._pipe_lock = threading.Lock()
+        # Cek is_alive() dan spawn harus atomik: start() bisa dipanggil bersamaan dari
+        # beberapa coroutine (lewat to_thread) maupun dari restart health check.
+        self._start_lock = threading.RLock()
+        self._call_lock = None
+        self._restart_times: list[float] = []
+        self._health_task = None
+
+    @property
+    def pid(self) -> int | None:
+        return self._process.pid if self._process is not None else None
+
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def start(self, startup_timeout: float = 60.0):
+        """Menjalankan proses worker dan menunggu modul plugin selesai diimpor (blocking, idempotent)."""
+        with self._start_lock:
+            if self.is_alive():
+                return
+            parent_conn, child_conn = self._ctx.Pipe(duplex=True)
+            project_root = config_manager.PROJECT_ROOT_DIR
+            self._process = self._ctx.Process(
+                target=_worker_main,
+                args=(child_conn, self.module_name, project_root, self.shm_threshold, child_logging_config()),
+                name=f"plugin-worker:{self.module_name}",
+                daemon=True,
+            )
+            self._process.start()
+            child_conn.close()
+            self._conn = parent_conn
+            if not parent_conn.poll(startup_timeout):
+                self._kill()
+                raise PluginWorkerError(f"Worker for {self.module_name} did not start within {startup_timeout}s.")
+            _, status, payload = parent_conn.recv()
+            if status != "ready":
+                self._kill()
+                raise PluginWorkerError(str(payload))
+            logger.info("Plugin worker for %s started (pid %s).", self.module_name, payload)
+
+    def _kill(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except OSError:
+                pass
+            self._conn = None
+        if self._process is not None:
+            if self._process.is_alive():
+                self._process.kill()
+            self._process.join(timeout=5)
+            self._process = None
+
+    def _restart(self, reason: str):
+        now = time.monotonic()
+        self._restart_times = [t for t in self._restart_times if now - t < RESTART_WINDOW_SECONDS]
+        if len(self._restart_times) >= self.max_restarts:
+            self._kill()
+            raise PluginWorkerError(
+                f"Worker for {self.module_name} restarted {len(self._restart_times)} times "
+                f"in {RESTART_WINDOW_SECONDS:.0f}s; giving up ({reason})."
+            )
+        self._restart_times.append(now)
+        # Backoff sederhana: 0.5s, 1s, 2s, ...
+        delay = 0.5 * (2 ** (len(self._restart_times) - 1))
+        logger.warning("Restarting plugin worker %s in %.1fs: %s", self.module_name, delay, reason)
+        with self._start_lock:
+            self._kill()
+            time.sleep(delay)
+            self.start()
+
+    def _roundtrip(self, kind: str, func_name: str | None, args: tuple, kwargs: dict, timeout: float):
+        """Kirim satu permintaan dan tunggu balasannya (blocking, dijalankan di thread)."""
+        with self._pipe_lock:
+            if not self.is_alive():
+                self._restart("worker process is not running")
+            call_id = next(self._call_ids)
+            try:
+                self._conn.send((call_id, kind, func_name, args, kwargs))
+                replied = self._conn.poll(timeout)
+                if replied:
+                    reply_id, status, payload = self._conn.recv()
+            except (EOFError, BrokenPipeError, ConnectionResetError, OSError) as e:
+                self._restart(f"pipe error: {e!r}")
+                raise PluginWorkerCrashed(f"Plugin worker for {self.module_name} crashed during {func_name}: {e!r}") from e
+            # Di luar try: TimeoutError adalah subclass OSError dan tidak boleh memicu restart kedua.
+            if not replied:
+                self._restart(f"{kind} {func_name or ''} timed out after {timeout}s")
+                raise TimeoutError(f"Plugin worker call {func_name} timed out after {timeout}s.")
+        if reply_id != call_id:
+            raise PluginWorkerError(f"Out-of-order reply from worker {self.module_name} ({reply_id} != {call_id}).")
+        if status == "error":
+            raise PluginWorkerError(payload)
+        return _unpack_result(payload)
+
+    async def call(self, func_name: str, *args, timeout: float | None = None, **kwargs):
+        """
+        Memanggil `module.func_name(*args, **kwargs)` di proses worker.
+        Jika worker crash di tengah panggilan, worker di-restart lalu panggilan diulang sekali.
+        """
+        if self._call_lock is None:
+            self._call_lock = asyncio.Lock()
+        actual_timeout = timeout if timeout is not None else self.call_timeout
+        async with self._call_lock:
+            try:
+                return await asyncio.to_thread(self._roundtrip, "call", func_name, args, kwargs, actual_timeout)
+            except PluginWorkerCrashed:
+                if self.is_alive():
+                    logger.info("Retrying %s on restarted worker %s.", func_name, self.module_name)
+                    return await asyncio.to_thread(self._roundtrip, "call", func_name, args, kwargs, actual_timeout)
+                raise
+
+    async def ping(self, timeout: float = DEFAULT_PING_TIMEOUT) -> bool:
+        if self._call_lock is not None and self._call_lock.locked():
+            # Worker sedang mengerjakan panggilan; dianggap sehat selama proses hidup.
+            return self.is_alive()
+        try:
+            return await asyncio.to_thread(self._roundtrip, "ping", None, (), {}, timeout) == "pong"
+        except (PluginWorkerError, TimeoutError) as e:
+            logger.warning("Health check of worker %s failed: %s", self.module_name, e)
+            return False
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            # _roundtrip() sudah me-restart worker yang hang atau pipe-nya putus; di sini hanya
+            # worker yang prosesnya mati tanpa ada panggilan (mis. restart sebelumnya gagal).
+            if not await self.ping() and not self.is_alive():
+                try:
+                    await asyncio.to_thread(self._restart, "health check failed")
+                except PluginWorkerError as e:
+                    logger.error("%s", e)
+                    return
+
+    def start_health_checks(self):
+        """Menjalankan ping berkala di event loop saat ini (idempotent)."""
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.get_running_loop().create_task(self._health_loop())
+
+    async def start_async(self):
+        await asyncio.to_thread(self.start)
+        self.start_health_checks()
+
+    async def stop(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        if self.is_alive():
+            try:
+                await asyncio.to_thread(self._roundtrip, "stop", None, (), {}, DEFAULT_PING_TIMEOUT)
+            except (PluginWorkerError, TimeoutError):
+                pass
+        self._kill()
+        logger.info("Plugin worker for %s stopped.", self.module_name)
+
+
+# --- Registry worker (satu worker per modul) ---
+_workers: dict[str, PluginWorker] = {}
+
+
+def get_worker(module_name: str) -> PluginWorker:
+    """Mengembalikan PluginWorker untuk modul (misalnya "plugins.custom_model_tts"), belum tentu sudah berjalan."""
+    worker = _workers.get(module_name)
+    if worker is None:
+        worker = PluginWorker(module_name)
+        _workers[module_name] = worker
+    return worker
+
+
+async def shutdown_all_workers():
+    for module_name in list(_workers):
+        await _workers.pop(module_name).stop()
@@ -1,19 +1,24 @@
 # core/speech_to_text.py
 
-import speech_recognition as sr
-from core import config_manager
-import logging
+from core import audio_capture, config_manager, endpointing, noise_calibration, stt_backends
+from core.logging_setup import child_logging_config, get_logger, setup_child_logging, setup_logging
+import collections
+import multiprocessing
 import os
+import threading
 import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator
 
 # --- Setup Logging ---
-logger = logging.getLogger(__name__)
-if not logger.hasHandlers():
-    log_file_path = os.path.join(config_manager.LOG_DIR, f"{os.path.split(__file__)[1].split('.')[0]}.log")
-    file_handler = logging.FileHandler(log_file_path)
-    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-    logger.addHandler(file_handler)
-    logger.setLevel(logging.INFO)
+logger = get_logger(__name__)
+
+MODULE_MANIFEST = {
+    "capabilities": ["stt"],
+    "engines": ["google_web_speech", "faster_whisper", "vosk"],
+    "languages": ["*"],
+    "cost_class": "low",
+}
 
 # --- Variabel Konfigurasi Global (dibaca sekali saat modul dimuat) ---
 DEFAULT_STT_LANGUAGE = config_manager.get_config_value("stt_settings", "default_language", "id-ID")
@@ -22,57 +27,102 @@ ENERGY_THRESHOLD_MANUAL = config_manager.get_int("stt_settings", "energy_thresho
 DYNAMIC_ENERGY_THRESHOLD = config_manager.get_bool("stt_settings", "dynamic_energy_threshold", True)
 ADJUST_NOISE_ON_STARTUP = config_manager.get_bool("stt_settings", "adjust_noise_on_startup", True)
 DEFAULT_PHRASE_TIME_LIMIT = config_manager.get_float("stt_settings", "phrase_time_limit", None)
+# Model backend lokal dimuat dan dipanaskan saat processor dibuat, bukan saat ucapan pertama.
+WARMUP_BACKEND = config_manager.get_bool("stt_settings", "warmup_backend", True)
 
-# --- Inisialisasi dan Konfigurasi Recognizer Global ---
-recognizer_instance = None
-try:
-    recognizer_instance = sr.Recognizer()
-    recognizer_instance.pause_threshold = PAUSE_THRESHOLD
-    recognizer_instance.dynamic_energy_threshold = DYNAMIC_ENERGY_THRESHOLD
-    
-    logger.info(f"SpeechRecognition Recognizer initialized. Pause threshold: {PAUSE_THRESHOLD}s, Dynamic Energy: {DYNAMIC_ENERGY_THRESHOLD}")
+def _sr():
+    """Impor `speech_recognition` saat pertama kali dibutuhkan (bukan saat modul dimuat)."""
+    import speech_recognition as sr
+    return sr
+
+# --- Recognizer Global (dibuat saat pertama kali dipakai) ---
+_recognizer_instance = None
+_recognizer_init_failed = False
+_recognizer_lock = threading.Lock()
 
-    # Penyesuaian energy threshold dilakukan saat instance SpeechToTextProcessor pertama dibuat,
-    # karena memerlukan akses ke mikrofon.
-except Exception as e:
-    logger.error(f"Failed to initialize SpeechRecognition Recognizer: {e}", exc_info=True)
-    # recognizer_instance akan tetap None
+def get_recognizer():
+    """Mengembalikan sr.Recognizer bersama, membuatnya pada pemakaian pertama. None jika gagal."""
+    global _recognizer_instance, _recognizer_init_failed
+    if _recognizer_instance is not None or _recognizer_init_failed:
+        return _recognizer_instance
+    with _recognizer_lock:
+        if _recognizer_instance is not None or _recognizer_init_failed:
+            return _recognizer_instance
+        try:
+            recognizer = _sr().Recognizer()
+            recognizer.pause_threshold = PAUSE_THRESHOLD
+            recognizer.dynamic_energy_threshold = DYNAMIC_ENERGY_THRESHOLD
+            _recognizer_instance = recognizer
+            logger.info("SpeechRecognition Recognizer initialized. Pause threshold: %ss, Dynamic Energy: %s", PAUSE_THRESHOLD, DYNAMIC_ENERGY_THRESHOLD)
+            # Penyesuaian energy threshold dilakukan saat instance SpeechToTextProcessor pertama dibuat,
+            # karena memerlukan akses ke mikrofon.
+        except Exception as e:
+            logger.error("Failed to initialize SpeechRecognition Recognizer: %s", e, exc_info=True)
+            _recognizer_init_failed = True
+    return _recognizer_instance
+
+def __getattr__(name: str):
+    # PEP 562: `speech_to_text.recognizer_instance` tetap bisa diakses oleh kode lama.
+    if name == "recognizer_instance":
+        return get_recognizer()
+    if name == "sr":
+        return _sr()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 class SpeechToTextProcessor:
     _microphone_initialized = False # Flag untuk memastikan mikrofon dan adjust_noise hanya sekali
 
     def __init__(self):
-        if recognizer_instance is None:
+        recognizer = get_recognizer()
+        if recognizer is None:
             logger.critical("Speech Recognizer instance is not available (failed global init). STT will not work.")
             raise RuntimeError("SpeechRecognition Recognizer failed to initialize globally.")
-        self.recognizer = recognizer_instance
+        self.recognizer = recognizer
+        sr = _sr()
+        self.backend = stt_backends.get_backend()
+        if WARMUP_BACKEND:
+            try:
+                logger.info("STT backend '%s' warmed up in %.2f s.", self.backend.name, self.backend.warmup())
+            except stt_backends.RecognizerUnavailableError as e:
+                logger.warning("STT backend '%s' unavailable at startup: %s", self.backend.name, e)
         
+        # Kalibrasi derau tersimpan per perangkat (core/noise_calibration.py); None jika dimatikan.
+        self.calibrator = noise_calibration.get_noise_calibrator()
+
         # Inisialisasi mikrofon dan penyesuaian noise hanya jika belum dilakukan
         if not SpeechToTextProcessor._microphone_initialized:
             try:
                 self.microphone = sr.Microphone() # Default device
-                logger.info(f"Microphone initialized using default device.")
+                logger.info("Microphone initialized using default device.")
 
-                if ENERGY_THRESHOLD_MANUAL is not None:
+                if self.calibrator is not None and self.calibrator.calibrated:
+                    # Kalibrasi sesi sebelumnya: tidak perlu memblok 1 detik untuk adjust_for_ambient_noise.
+                    self.calibrator.attach(self.recognizer)
+                    logger.info("Using saved noise calibration for '%s'. Energy threshold: %s", self.calibrator.device, self.recognizer.energy_threshold)
+                elif ENERGY_THRESHOLD_MANUAL is not None:
                     self.recognizer.energy_threshold = ENERGY_THRESHOLD_MANUAL
-                    logger.info(f"Recognizer energy_threshold manually set to: {self.recognizer.energy_threshold}")
+                    logger.info("Recognizer energy_threshold manually set to: %s", self.recognizer.energy_threshold)
                 elif ADJUST_NOISE_ON_STARTUP:
                     with self.microphone as source:
                         logger.info("Adjusting for ambient noise (1 sec)... Please be quiet.")
                         try:
                             self.recognizer.adjust_for_ambient_noise(source, duration=1)
-                            logger.info(f"Ambient noise adjustment complete. Energy threshold dynamically set to: {self.recognizer.energy_threshold}")
+                            logger.info("Ambient noise adjustment complete. Energy threshold dynamically set to: %s", self.recognizer.energy_threshold)
                         except Exception as e_adjust:
-                            logger.warning(f"Could not adjust for ambient noise: {e_adjust}. Current energy threshold: {self.recognizer.energy_threshold}")
+                            logger.warning("Could not adjust for ambient noise: %s. Current energy threshold: %s", e_adjust, self.recognizer.energy_threshold)
                 else:
-                    logger.info(f"Using default/dynamic energy threshold. Current: {self.recognizer.energy_threshold}")
-                
+                    logger.info("Using default/dynamic energy threshold. Current: %s", self.recognizer.energy_threshold)
+                if self.calibrator is not None and not self.calibrator.calibrated:
+                    # Nilai di atas menjadi titik awal; frame non-ucapan memperbaruinya selama sesi.
+                    self.calibrator.seed(self.recognizer.energy_threshold)
+                    self.calibrator.attach(self.recognizer)
+
                 SpeechToTextProcessor._microphone_initialized = True
             except AttributeError as ae:
-                logger.error(f"Failed to initialize sr.Microphone. PyAudio might be missing or not configured: {ae}", exc_info=True)
+                logger.error("Failed to initialize sr.Microphone. PyAudio might be missing or not configured: %s", ae, exc_info=True)
                 raise RuntimeError(f"Failed to initialize sr.Microphone: {ae}")
             except Exception as e_mic:
-                logger.error(f"An unexpected error occurred initializing Microphone or adjusting noise: {e_mic}", exc_info=True)
+                logger.error("An unexpected error occurred initializing Microphone or adjusting noise: %s", e_mic, exc_info=True)
                 raise RuntimeError(f"Unexpected error initializing Microphone or adjusting noise: {e_mic}")
         else:
             # Jika sudah diinisialisasi, pastikan kita punya referensi ke mikrofon
@@ -84,50 +134,154 @@ class SpeechToTextProcessor:
             try:
                 self.microphone = sr.Microphone() # Buat instance baru jika perlu, atau jadikan class variable
             except Exception as e_mic_reinit:
-                 logger.error(f"Failed to re-initialize sr.Microphone for new STTProcessor instance: {e_mic_reinit}")
+                 logger.error("Failed to re-initialize sr.Microphone for new STTProcessor instance: %s", e_mic_reinit)
                  # Jika ini terjadi, STT mungkin tidak berfungsi untuk instance ini.
                  # Ini seharusnya tidak menjadi masalah dengan pola singleton.
 
-    def listen_and_recognize(self, language: str = None, phrase_time_limit: float = None) -> str | None:
-        # `duration` dihilangkan karena kita mengandalkan `pause_threshold`
-        if self.microphone is None and SpeechToTextProcessor._microphone_initialized:
-             # Coba inisialisasi ulang jika _microphone_initialized True tapi self.microphone None (kasus aneh)
-             try:
-                 self.microphone = sr.Microphone()
-                 logger.info("Re-initialized microphone for listen_and_recognize.")
-             except Exception as e:
-                 logger.error(f"Failed to re-initialize microphone in listen_and_recognize: {e}")
-                 return None
-        elif not SpeechToTextProcessor._microphone_initialized:
-             logger.error("Microphone was not successfully initialized. Cannot listen.")
-             return None
-
+    def _ensure_microphone(self) -> bool:
+        if not SpeechToTextProcessor._microphone_initialized:
+            logger.error("Microphone was not successfully initialized. Cannot listen.")
+            return False
+        if getattr(self, "microphone", None) is None:
+            # Kasus aneh: _microphone_initialized True tapi self.microphone None.
+            try:
+                self.microphone = _sr().Microphone()
+                logger.info("Re-initialized microphone for listen_and_recognize.")
+            except Exception as e:
+                logger.error("Failed to re-initialize microphone in listen_and_recognize: %s", e)
+                return False
+        return True
 
-        target_language = language if language is not None else DEFAULT_STT_LANGUAGE
+    def listen(self, phrase_time_limit: float = None, timeout: float = None, language: str = None):
+        """
+        Merekam satu frasa dari mikrofon. Mengembalikan sr.AudioData, atau None jika tidak ada
+        suara dalam `timeout` detik. Akhir frasa diputuskan endpointer adaptif (core/endpointing.py)
+        kecuali [endpointing] mode = fixed, yang menunggu `pause_threshold` hening.
+        """
+        if not self._ensure_microphone():
+            return None
+        sr = _sr()
         actual_phrase_time_limit = phrase_time_limit if phrase_time_limit is not None else DEFAULT_PHRASE_TIME_LIMIT
-        
-        logger.info(f"Listening for speech (Language: {target_language}, Phrase Limit: {actual_phrase_time_limit if actual_phrase_time_limit else 'None based on pause'})...")
-        logger.debug(f"Recognizer settings: pause_threshold={self.recognizer.pause_threshold}s, energy_threshold={self.recognizer.energy_threshold}, dynamic_energy={self.recognizer.dynamic_energy_threshold}")
-        
+        if endpointing.endpointing_mode() != "fixed":
+            return self._listen_endpointed(actual_phrase_time_limit, timeout, language)
+        logger.debug("Recognizer settings: pause_threshold=%ss, energy_threshold=%s, dynamic_energy=%s", self.recognizer.pause_threshold, self.recognizer.energy_threshold, self.recognizer.dynamic_energy_threshold)
         with self.microphone as source:
             try:
-                audio_data = self.recognizer.listen(source, phrase_time_limit=actual_phrase_time_limit)
-                logger.info("Speech detected, attempting to recognize...")
-                recognized_text = self.recognizer.recognize_google(audio_data, language=target_language)
-                logger.info(f"Google Web Speech API recognized: \"{recognized_text}\"")
-                return recognized_text
+                return self.recognizer.listen(source, timeout=timeout, phrase_time_limit=actual_phrase_time_limit)
             except sr.WaitTimeoutError:
-                logger.info("No speech detected (listen timed out or no speech before pause).")
-                return None
-            except sr.UnknownValueError:
-                logger.info("Google Web Speech API could not understand audio.")
-                return None
-            except sr.RequestError as e:
-                logger.error(f"Could not request results from Google Web Speech API service; {e}", exc_info=True)
+                logger.debug("No speech detected within %s s.", timeout)
                 return None
+
+    def _listen_endpointed(self, phrase_time_limit: float = None, timeout: float = None, language: str = None):
+        segmenter = audio_capture.create_segmenter(lambda: self.recognizer.energy_threshold, language,
+                                                   max_utterance_seconds=phrase_time_limit,
+                                                   calibrator=self.calibrator)
+        try:
+            with audio_capture.open_microphone(segmenter.sample_rate, segmenter.frame_samples) as source:
+                deadline = time.perf_counter() + timeout if timeout is not None else None
+                for frame, read_at in audio_capture.read_frames(source.stream, segmenter.frame_samples):
+                    event = segmenter.feed(frame, read_at)
+                    if isinstance(event, audio_capture.Utterance):
+                        logger.debug("Endpoint %.0f ms after end of speech.", event.endpoint_delay * 1e3)
+                        return event.to_audio_data()
+                    if deadline is not None and not segmenter.in_speech and read_at > deadline:
+                        logger.debug("No speech detected within %s s.", timeout)
+                        return None
+        finally:
+            segmenter.close()
+        return None
+
+    def listen_with_onset(self, phrase_time_limit: float = None, timeout: float = None,
+                          onset_threshold=None, min_speech_seconds: float = 0.2, on_speech_start=None):
+        """
+        Seperti listen(), tetapi awal ucapan dideteksi sendiri (energi RMS per blok di atas
+        `onset_threshold` selama `min_speech_seconds`) sehingga `on_speech_start()` dipanggil
+        begitu pengguna mulai bicara, bukan setelah frasa selesai. Dipakai untuk barge-in.
+
+        `onset_threshold` boleh berupa angka atau callable tanpa argumen (dibaca ulang tiap blok);
+        None berarti energy_threshold recognizer. Audio sejak sedikit sebelum onset ikut dikembalikan.
+        """
+        if not self._ensure_microphone():
+            return None
+        import audioop  # dipakai juga oleh speech_recognition untuk energi per blok
+        sr = _sr()
+        actual_phrase_time_limit = phrase_time_limit if phrase_time_limit is not None else DEFAULT_PHRASE_TIME_LIMIT
+        with self.microphone as source:
+            seconds_per_chunk = source.CHUNK / source.SAMPLE_RATE
+            preroll = collections.deque(maxlen=max(1, int(self.recognizer.non_speaking_duration / seconds_per_chunk)))
+            voiced, loud_seconds, waited = [], 0.0, 0.0
+            while loud_seconds < min_speech_seconds:
+                if timeout is not None and waited > timeout and not voiced:
+                    return None
+                chunk = source.stream.read(source.CHUNK)
+                if not chunk:
+                    return None
+                waited += seconds_per_chunk
+                threshold = onset_threshold() if callable(onset_threshold) else onset_threshold
+                if threshold is None:
+                    threshold = self.recognizer.energy_threshold
+                if audioop.rms(chunk, source.SAMPLE_WIDTH) > threshold:
+                    voiced.append(chunk)
+                    loud_seconds += seconds_per_chunk
+                else:
+                    # Ledakan pendek (klik, batuk) bukan awal ucapan.
+                    preroll.extend(voiced)
+                    preroll.append(chunk)
+                    voiced, loud_seconds = [], 0.0
+            logger.debug("Speech onset detected (%.0f ms above threshold).", loud_seconds * 1e3)
+            if on_speech_start is not None:
+                on_speech_start()
+            head = b"".join(preroll) + b"".join(voiced)
+            try:
+                # Sumber yang sama tetap terbuka, jadi tidak ada blok yang hilang di antara onset dan listen().
+                audio = self.recognizer.listen(source, timeout=self.recognizer.pause_threshold,
+                                               phrase_time_limit=actual_phrase_time_limit)
+                return sr.AudioData(head + audio.frame_data, source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+            except sr.WaitTimeoutError:
+                return sr.AudioData(head, source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+
+    def recognize(self, audio_data, language: str = None) -> str | None:
+        """
+        Mentranskripsi sr.AudioData dengan backend terpilih (core/stt_backends.py), lalu
+        fallback_backend jika backend itu tidak tersedia. None jika tidak dipahami atau gagal.
+        """
+        target_language = language if language is not None else DEFAULT_STT_LANGUAGE
+        backend = self.backend
+        while backend is not None:
+            start = time.perf_counter()
+            try:
+                recognized_text = backend.recognize(audio_data, target_language)
+            except stt_backends.RecognizerUnavailableError as e:
+                logger.warning("STT backend '%s' unavailable: %s", backend.name, e)
+                backend = stt_backends.get_fallback_backend(backend) if backend is self.backend else None
+                continue
             except Exception as e:
-                logger.error(f"An unexpected error occurred during speech recognition: {e}", exc_info=True)
+                logger.error("An unexpected error occurred during speech recognition (%s): %s", backend.name, e, exc_info=True)
                 return None
+            elapsed_ms = (time.perf_counter() - start) * 1e3
+            if recognized_text:
+                logger.info('STT backend %s recognized in %.0f ms: "%s"', backend.name, elapsed_ms, recognized_text)
+            else:
+                logger.info("STT backend %s could not understand audio (%.0f ms).", backend.name, elapsed_ms)
+            return recognized_text
+        logger.error("No STT backend available to recognize audio.")
+        return None
+
+    def listen_and_recognize(self, language: str = None, phrase_time_limit: float = None) -> str | None:
+        # `duration` dihilangkan karena kita mengandalkan `pause_threshold`
+        target_language = language if language is not None else DEFAULT_STT_LANGUAGE
+        actual_phrase_time_limit = phrase_time_limit if phrase_time_limit is not None else DEFAULT_PHRASE_TIME_LIMIT
+        logger.info("Listening for speech (Language: %s, Phrase Limit: %s)...", target_language, actual_phrase_time_limit if actual_phrase_time_limit else 'None based on pause')
+        try:
+            audio_data = self.listen(phrase_time_limit=actual_phrase_time_limit, language=target_language)
+        except Exception as e:
+            logger.error("An unexpected error occurred during speech recognition: %s", e, exc_info=True)
+            return None
+        if audio_data is None:
+            logger.info("No speech detected (listen timed out or no speech before pause).")
+            return None
+        logger.info("Speech detected, attempting to recognize...")
+        return self.recognize(audio_data, target_language)
 
 # --- Fungsi antarmuka publik (Singleton) ---
 _stt_processor_instance = None
@@ -135,11 +289,11 @@ _stt_processor_instance = None
 def get_stt_processor() -> SpeechToTextProcessor | None:
     global _stt_processor_instance
     if _stt_processor_instance is None:
-        if recognizer_instance is not None:
+        if get_recognizer() is not None:
             try:
                 _stt_processor_instance = SpeechToTextProcessor()
             except RuntimeError as e:
-                logger.error(f"Failed to create STT Processor instance during get_stt_processor: {e}")
+                logger.error("Failed to create STT Processor instance during get_stt_processor: %s", e)
                 _stt_processor_instance = None
         else:
             logger.error("Cannot create STT Processor instance: global Recognizer failed to initialize.")
@@ -154,17 +308,145 @@ def listen_and_transcribe(language: str = None, phrase_time_limit: float = None)
         return processor.listen_and_recognize(language=language, phrase_time_limit=actual_phrase_limit)
     return None
 
+# --- Transkripsi file (batch, multi-proses) ---
+AUDIO_FILE_EXTENSIONS = (".wav", ".flac")
+
+def decode_audio_file(path: str):
+    """
+    Membaca WAV (modul wave) atau FLAC (soundfile jika ada, selain itu sr.AudioFile) menjadi
+    (sampel float32 mono dalam [-1, 1], sample_rate).
+    """
+    import numpy as np
+    if path.lower().endswith(".wav"):
+        import wave
+        with wave.open(path, "rb") as wav:
+            channels, width, rate = wav.getnchannels(), wav.getsampwidth(), wav.getframerate()
+            raw = wav.readframes(wav.getnframes())
+        if width == 1:
+            samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+        elif width == 3:
+            # PCM 24-bit: tambahkan byte terendah agar bisa dibaca sebagai int32.
+            padded = np.zeros((len(raw) // 3, 4), dtype=np.uint8)
+            padded[:, 1:] = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3)
+            samples = padded.view("<i4").ravel().astype(np.float32) / 2147483648.0
+        else:
+            dtype = {2: "<i2", 4: "<i4"}[width]
+            samples = np.frombuffer(raw, dtype=dtype).astype(np.float32) / float(2 ** (8 * width - 1))
+        samples = samples.reshape(-1, channels)
+    else:
+        try:
+            import soundfile
+            samples, rate = soundfile.read(path, dtype="float32", always_2d=True)
+        except ImportError:
+            sr = _sr()
+            with sr.AudioFile(path) as source:
+                audio = sr.Recognizer().record(source)
+            rate = audio.sample_rate
+            samples = np.frombuffer(audio.get_raw_data(convert_width=2), dtype="<i2").astype(np.float32) / 32768.0
+            samples = samples.reshape(-1, 1)
+    return samples.mean(axis=1, dtype=np.float32), rate
+
+def resample(samples, rate: int, target_rate: int = stt_backends.SAMPLE_RATE):
+    """Resampling linear dengan NumPy; saat menurunkan laju, filter rata-rata bergerak dulu (anti-aliasing kasar)."""
+    import numpy as np
+    if rate == target_rate or len(samples) == 0:
+        return samples
+    if rate > target_rate:
+        width = int(round(rate / target_rate))
+        if width > 1:
+            samples = np.convolve(samples, np.full(width, 1.0 / width, dtype=np.float32), mode="same")
+    count = int(round(len(samples) * target_rate / rate))
+    positions = np.arange(count, dtype=np.float64) * (rate / target_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+_worker_backend = None
+
+def _init_transcribe_worker(backend_name: str | None, log_config: tuple = None):
+    """Initializer proses worker: backend dimuat dan dipanaskan sekali per proses."""
+    global _worker_backend
+    setup_child_logging(log_config)
+    _worker_backend = stt_backends.get_backend(backend_name)
+    try:
+        _worker_backend.warmup()
+    except stt_backends.RecognizerUnavailableError as e:
+        logger.warning("STT backend '%s' unavailable in worker %d: %s", _worker_backend.name, os.getpid(), e)
+
+def _transcribe_file(path: str, language: str) -> dict:
+    import numpy as np
+    result = {"path": path, "language": language, "backend": _worker_backend.name, "worker_pid": os.getpid()}
+    try:
+        start = time.perf_counter()
+        samples, rate = decode_audio_file(path)
+        decoded = time.perf_counter()
+        samples = resample(samples, rate)
+        resampled = time.perf_counter()
+        pcm = (np.clip(samples, -1.0, 1.0) * 32767.0).astype("<i2").tobytes()
+        audio = _sr().AudioData(pcm, stt_backends.SAMPLE_RATE, 2)
+        text = _worker_backend.recognize(audio, language)
+        recognized = time.perf_counter()
+    except stt_backends.RecognizerUnavailableError as e:
+        result.update(text=None, error=f"unavailable: {e}")
+        return result
+    except Exception as e:
+        result.update(text=None, error=f"{type(e).__name__}: {e}")
+        return result
+    duration = len(samples) / float(stt_backends.SAMPLE_RATE)
+    result.update(
+        text=text or "", duration_s=round(duration, 3), source_rate=rate,
+        decode_ms=round((decoded - start) * 1e3, 1), resample_ms=round((resampled - decoded) * 1e3, 1),
+        recognize_ms=round((recognized - resampled) * 1e3, 1),
+        rtf=round((recognized - start) / duration, 4) if duration else None,
+    )
+    return result
+
+def transcribe_files(paths: Iterable[str], language: str = None, workers: int | None = None,
+                     backend: str = None, max_pending: int | None = None) -> Iterator[dict]:
+    """
+    Mentranskripsi file audio (WAV/FLAC) secara paralel, tanpa mikrofon.
+
+    Generator: setiap file didekode, di-resample ke 16 kHz mono dengan NumPy, lalu dikenali
+    oleh `backend` (bawaan: [stt_settings] backend) di ProcessPoolExecutor; setiap worker memuat
+    model sekali. Hasil keluar sesuai urutan input sebagai dict siap JSONL: path, text, durasi,
+    waktu decode/resample/recognize (ms), RTF, atau `error`. Paling banyak `max_pending` file
+    (bawaan 2x workers) yang sedang diproses atau menunggu diambil.
+    workers=None memakai os.cpu_count(); workers<=1 memproses di proses ini.
+    """
+    language = language if language is not None else DEFAULT_STT_LANGUAGE
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+    iterator = iter(paths)
+    if workers <= 1:
+        _init_transcribe_worker(backend)
+        for path in iterator:
+            yield _transcribe_file(path, language)
+        return
+
+    max_pending = max(1, max_pending if max_pending is not None else workers * 2)
+    logger.info("transcribe_files: starting %d worker processes (backend %s, max_pending=%d).",
+                workers, backend or "from config", max_pending)
+    # spawn seperti clean_many: perilaku sama di Windows dan Linux, tanpa mewarisi thread logging.
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_transcribe_worker,
+                             initargs=(backend, child_logging_config())) as executor:
+        pending = collections.deque()
+        while True:
+            path = next(iterator, None)
+            if path is not None:
+                pending.append(executor.submit(_transcribe_file, path, language))
+            if pending and (len(pending) >= max_pending or path is None):
+                yield pending.popleft().result()
+            elif path is None:
+                break
+
 if __name__ == '__main__':
-    if not logging.getLogger().hasHandlers():
-        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    setup_logging(console=True)
 
-    logger.info("--- Speech-to-Text (SpeechRecognition with Google Web API) Test ---")
+    logger.info("--- Speech-to-Text (SpeechRecognition, backend from [stt_settings]) Test ---")
     
     # Config yang relevan di config.ini:
     # [stt_settings]
     # default_language = id-ID
-    # pause_threshold = 2.0
-    # energy_threshold = 3000  ; (atau kosongkan jika adjust_noise_on_startup = true)
+    # pause_threshold = 2.0   ; hanya untuk [endpointing] mode = fixed
+    # energy_threshold = 3000  ; (nilai awal jika belum ada kalibrasi tersimpan di [noise_calibration])
     # dynamic_energy_threshold = true
     # adjust_noise_on_startup = true
     # phrase_time_limit = 10.0 ; (opsional, batas keras per frasa)
@@ -178,7 +460,7 @@ if __name__ == '__main__':
         # Menggunakan default phrase_time_limit dari config jika tidak dispesifikkan di sini
         transcribed_text_id = listen_and_transcribe(language="id-ID")
         if transcribed_text_id:
-            logger.info(f"Anda mengatakan (ID): \"{transcribed_text_id}\"")
+            logger.info('Anda mengatakan (ID): "%s"', transcribed_text_id)
         else:
             logger.info("Tidak ada yang berhasil ditranskripsi (ID).")
 
@@ -187,6 +469,6 @@ if __name__ == '__main__':
         logger.info("\nPlease say something in English (will stop after pause or phrase time limit)...")
         transcribed_text_en = listen_and_transcribe(language="en-US", phrase_time_limit=7) # Contoh override phrase_time_limit
         if transcribed_text_en:
-            logger.info(f"You said (EN): \"{transcribed_text_en}\"")
+            logger.info('You said (EN): "%s"', transcribed_text_en)
         else:
             logger.info("Nothing was transcribed (EN).")
\ No newline at end of file
@@ -0,0 +1,268 @@
+# core/stt_backends.py
+"""
+Backend pengenal ucapan untuk SpeechToTextProcessor.
+
+[stt_settings] backend memilih:
+  google          Google Web Speech API lewat speech_recognition (butuh internet);
+  faster_whisper  faster-whisper (CTranslate2) di CPU, int8 secara bawaan ([stt_whisper_specifics]);
+  vosk            Vosk/Kaldi, satu model per bahasa ([stt_vosk_specifics]).
+Model lokal dimuat sekali per proses lalu dipanaskan (warmup), jadi ucapan pertama tidak
+membayar waktu muat. Jika backend tidak tersedia (paket/model tidak ada, layanan gagal),
+SpeechToTextProcessor mencoba [stt_settings] fallback_backend.
+
+Backend dengan `streaming = True` (Vosk) juga menyediakan create_stream() untuk transkrip
+parsial inkremental selama pengguna masih bicara (dipakai core/endpointing.py).
+
+Semua backend menerima sr.AudioData; bahasa berupa kode seperti "id-ID"
+([stt_settings] default_language) dan dipetakan ke kode yang dimengerti engine.
+"""
+import json
+import os
+import threading
+import time
+
+from core import config_manager
+from core.logging_setup import get_logger
+
+# --- Setup Logging ---
+logger = get_logger(__name__)
+
+SAMPLE_RATE = 16000  # laju sampel yang diharapkan Whisper dan model Vosk
+
+
+class RecognizerUnavailableError(RuntimeError):
+    """Backend tidak bisa dipakai saat ini (paket/model tidak ada, layanan tidak terjangkau)."""
+
+
+def language_code(language: str) -> str:
+    """"id-ID" -> "id"; kode tanpa wilayah dikembalikan apa adanya (huruf kecil)."""
+    return (language or "").split("-")[0].split("_")[0].lower()
+
+
+def default_language() -> str:
+    return config_manager.get_config_value("stt_settings", "default_language", "id-ID")
+
+
+def _pcm16(audio_data) -> bytes:
+    """PCM 16-bit mono 16 kHz dari sr.AudioData (dikonversi jika perlu)."""
+    return audio_data.get_raw_data(convert_rate=SAMPLE_RATE, convert_width=2)
+
+
+class RecognizerBackend:
+    name = ""
+    local = False
+    streaming = False
+
+    def load(self):
+        """Memuat model/klien. Melempar RecognizerUnavailableError jika tidak bisa."""
+
+    def warmup(self) -> float:
+        """Memuat model dan menjalankan satu inferensi kecil; mengembalikan durasi (detik)."""
+        start = time.perf_counter()
+        self.load()
+        return time.perf_counter() - start
+
+    def recognize(self, audio_data, language: str) -> str | None:
+        """Teks hasil pengenalan, atau None jika tidak ada ucapan yang dimengerti."""
+        raise NotImplementedError
+
+    def create_stream(self, language: str):
+        """Pengenal inkremental untuk satu ucapan: objek dengan accept(pcm16_16khz) -> teks sejauh ini."""
+        raise RecognizerUnavailableError(f"STT backend '{self.name}' does not support streaming.")
+
+
+class GoogleWebSpeechBackend(RecognizerBackend):
+    name = "google"
+
+    def __init__(self):
+        self._recognizer = None
+
+    def load(self):
+        if self._recognizer is None:
+            try:
+                import speech_recognition as sr
+            except ImportError as e:
+                raise RecognizerUnavailableError(f"speech_recognition is not installed: {e}") from e
+            self._recognizer = sr.Recognizer()
+
+    def recognize(self, audio_data, language: str) -> str | None:
+        self.load()
+        import speech_recognition as sr
+        try:
+            return self._recognizer.recognize_google(audio_data, language=language)
+        except sr.UnknownValueError:
+            return None
+        except sr.RequestError as e:
+            raise RecognizerUnavailableError(f"Google Web Speech API request failed: {e}") from e
+
+
+class FasterWhisperBackend(RecognizerBackend):
+    """faster-whisper di CPU; satu WhisperModel bersama, dipakai bergantian (lock)."""
+    name = "faster_whisper"
+    local = True
+    SECTION = "stt_whisper_specifics"
+
+    def __init__(self):
+        model = config_manager.get_config_value(self.SECTION, "model", "small")
+        model_path = os.path.join(config_manager.PROJECT_ROOT_DIR, model)
+        # Nama model ("small") diunduh/di-cache oleh faster-whisper; path lokal dipakai langsung.
+        self.model_name = model_path if os.path.isdir(model_path) else model
+        self.compute_type = config_manager.get_config_value(self.SECTION, "compute_type", "int8")
+        self.cpu_threads = config_manager.get_int(self.SECTION, "cpu_threads", 0)
+        self.beam_size = config_manager.get_int(self.SECTION, "beam_size", 1)
+        self.vad_filter = config_manager.get_bool(self.SECTION, "vad_filter", False)
+        self._model = None
+        self._load_lock = threading.Lock()
+        self._infer_lock = threading.Lock()
+
+    def load(self):
+        if self._model is not None:
+            return
+        with self._load_lock:
+            if self._model is not None:
+                return
+            try:
+                from faster_whisper import WhisperModel
+            except ImportError as e:
+                raise RecognizerUnavailableError(f"faster-whisper is not installed: {e}") from e
+            start = time.perf_counter()
+            try:
+                self._model = WhisperModel(self.model_name, device="cpu", compute_type=self.compute_type,
+                                           cpu_threads=self.cpu_threads)
+            except Exception as e:
+                raise RecognizerUnavailableError(f"Could not load Whisper model '{self.model_name}': {e}") from e
+            logger.info("faster-whisper model '%s' (%s) loaded in %.2f s.",
+                        self.model_name, self.compute_type, time.perf_counter() - start)
+
+    def warmup(self) -> float:
+        start = time.perf_counter()
+        self.load()
+        import numpy as np
+        with self._infer_lock:
+            segments, _ = self._model.transcribe(np.zeros(SAMPLE_RATE // 2, dtype=np.float32), beam_size=1,
+                                                 language="en", without_timestamps=True)
+            list(segments)
+        return time.perf_counter() - start
+
+    def recognize(self, audio_data, language: str) -> str | None:
+        self.load()
+        import numpy as np
+        samples = np.frombuffer(_pcm16(audio_data), dtype=np.int16).astype(np.float32) / 32768.0
+        with self._infer_lock:
+            segments, _ = self._model.transcribe(
+                samples, language=language_code(language) or None, beam_size=self.beam_size,
+                vad_filter=self.vad_filter, without_timestamps=True, condition_on_previous_text=False,
+            )
+            text = " ".join(segment.text.strip() for segment in segments).strip()
+        return text or None
+
+
+class _VoskStream:
+    def __init__(self, recognizer):
+        self._recognizer = recognizer
+        self._final = []
+
+    def accept(self, pcm: bytes) -> str:
+        if self._recognizer.AcceptWaveform(pcm):
+            text = json.loads(self._recognizer.Result()).get("text", "").strip()
+            if text:
+                self._final.append(text)
+            partial = ""
+        else:
+            partial = json.loads(self._recognizer.PartialResult()).get("partial", "").strip()
+        return " ".join(self._final + ([partial] if partial else []))
+
+
+class VoskBackend(RecognizerBackend):
+    """Vosk; model per bahasa dari `model_path_<lang>` atau `model_path`, dimuat sekali."""
+    name = "vosk"
+    local = True
+    streaming = True
+    SECTION = "stt_vosk_specifics"
+
+    def __init__(self):
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def _model_path(self, language: str) -> str:
+        lang = language_code(language)
+        value = config_manager.get_config_value(self.SECTION, f"model_path_{lang}") \
+            or config_manager.get_config_value(self.SECTION, "model_path")
+        if not value:
+            raise RecognizerUnavailableError(f"No Vosk model configured for language '{lang}'.")
+        return os.path.join(config_manager.PROJECT_ROOT_DIR, value)
+
+    def _model(self, language: str):
+        path = self._model_path(language)
+        model = self._models.get(path)
+        if model is not None:
+            return model
+        with self._lock:
+            if path not in self._models:
+                try:
+                    import vosk
+                except ImportError as e:
+                    raise RecognizerUnavailableError(f"vosk is not installed: {e}") from e
+                if not os.path.isdir(path):
+                    raise RecognizerUnavailableError(f"Vosk model directory not found: {path}")
+                vosk.SetLogLevel(-1)
+                start = time.perf_counter()
+                self._models[path] = vosk.Model(path)
+                logger.info("Vosk model loaded from %s in %.2f s.", path, time.perf_counter() - start)
+        return self._models[path]
+
+    def load(self):
+        self._model(default_language())
+
+    def warmup(self) -> float:
+        start = time.perf_counter()
+        model = self._model(default_language())
+        import vosk
+        recognizer = vosk.KaldiRecognizer(model, SAMPLE_RATE)
+        recognizer.AcceptWaveform(b"\0\0" * (SAMPLE_RATE // 2))
+        recognizer.FinalResult()
+        return time.perf_counter() - start
+
+    def recognize(self, audio_data, language: str) -> str | None:
+        model = self._model(language)
+        import vosk
+        # KaldiRecognizer murah dibuat dan tidak thread-safe, jadi satu per ucapan.
+        recognizer = vosk.KaldiRecognizer(model, SAMPLE_RATE)
+        recognizer.AcceptWaveform(_pcm16(audio_data))
+        text = json.loads(recognizer.FinalResult()).get("text", "").strip()
+        return text or None
+
+    def create_stream(self, language: str) -> _VoskStream:
+        model = self._model(language)
+        import vosk
+        return _VoskStream(vosk.KaldiRecognizer(model, SAMPLE_RATE))
+
+
+BACKENDS = {
+    GoogleWebSpeechBackend.name: GoogleWebSpeechBackend,
+    FasterWhisperBackend.name: FasterWhisperBackend,
+    VoskBackend.name: VoskBackend,
+}
+
+_backend_instances = {}
+_backend_lock = threading.Lock()
+
+
+def get_backend(name: str = None) -> RecognizerBackend:
+    """Instance bersama backend `name` (bawaan: [stt_settings] backend). Model dimuat saat pertama dipakai."""
+    name = (name or config_manager.get_config_value("stt_settings", "backend", "google")).strip().lower()
+    if name not in BACKENDS:
+        logger.error("Unknown STT backend '%s'; using 'google'.", name)
+        name = GoogleWebSpeechBackend.name
+    with _backend_lock:
+        if name not in _backend_instances:
+            _backend_instances[name] = BACKENDS[name]()
+        return _backend_instances[name]
+
+
+def get_fallback_backend(primary: RecognizerBackend) -> RecognizerBackend | None:
+    name = config_manager.get_config_value("stt_settings", "fallback_backend", "")
+    if not name or name.strip().lower() == primary.name:
+        return None
+    return get_backend(name)
+
@@ -1,95 +1,303 @@
 # core/text_processing.py
 
-import re, os
-import logging
+import bisect, re, os, json
+import collections, itertools, multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator
 from core import config_manager
+from core.logging_setup import child_logging_config, get_logger, setup_child_logging, setup_logging
 import html
 
 # --- Setup Logging ---
-logger = logging.getLogger(__name__)
-if not logger.hasHandlers():
-    log_file_path = os.path.join(config_manager.LOG_DIR, f"{os.path.split(__file__)[1].split('.')[0]}.log")
-    file_handler = logging.FileHandler(log_file_path)
-    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-    logger.addHandler(file_handler)
-    logger.setLevel(logging.INFO)
+logger = get_logger(__name__)
 
-def clean_llm_output_for_tts(text: str) -> str:
-    if not isinstance(text, str) or not text:
-        logger.warning(f"Input to clean_llm_output_for_tts was not a non-empty string (type: {type(text)}). Returning empty string.")
-        return ""
+# Pasangan input/keluaran yang harus tetap sama setiap kali normalizer diubah.
+TTS_NORMALIZER_GOLDEN_PATH = os.path.join(config_manager.PROJECT_ROOT_DIR, "assets", "text", "tts_normalizer_golden.json")
+
+# --- Pola normalisasi (dikompilasi sekali saat impor) ---
+# Semua tahap dijaga agar waktu eksekusinya linear (atau n log n) terhadap
+# panjang input. Aturan yang diawali `\s*`/`\s+` hanya dicoba di awal run spasi
+# (`(?<!\s)` atau callback per awal baris), sehingga run spasi panjang tidak
+# dipindai ulang dari setiap posisinya. Kurung aksi dan span Markdown inline
+# diproses oleh pemindai posisi penanda, bukan pola lazy `(.*?)` yang kuadratik
+# pada penanda tanpa pasangan. Hasilnya identik dengan versi multi-pass lama
+# (dijaga oleh golden corpus di TTS_NORMALIZER_GOLDEN_PATH).
+
+_BRACKET_PAIRS = (("(", ")"), ("[", "]"), ("{", "}"))
+_WS_RUN = re.compile(r'\s*')
+
+_ASTERISK_ACTION = re.compile(r'\s\*(?!\s)([^*/\n]{1,30})(?<!\s)\*\s')
+_ASTERISK_SYMBOLS = re.compile(r'\s\*\s*[^a-zA-Z0-9\s]{1,5}\s*\*\s')
+_ASTERISK_LEADING = re.compile(r'^\*\s*')
+_ASTERISK_TRAILING = re.compile(r'\s\*$')
+_ASTERISK_ONLY = re.compile(r'^\*$')
+
+_CODE_FENCE = re.compile(r'(?:```|~~~)[\s\S]*?(?:```|~~~)')
+
+# Span Markdown inline: (pola posisi penanda, panjang penanda, cek alfanumerik di luar penanda).
+# Masing-masing setara dengan pola lama:
+#   (?<![a-zA-Z0-9])(?:_{3}|\*{3})(?=\S)(.*?)(?<=\S)(?:_{3}|\*{3})(?![a-zA-Z0-9])  -> \1
+#   (?<![a-zA-Z0-9])(?:_{2}|\*{2})(?=\S)(.*?)(?<=\S)(?:_{2}|\*{2})(?![a-zA-Z0-9])  -> \1
+#   (?<![a-zA-Z0-9])[_*](?=\S)(.*?)(?<=\S)[_*](?![a-zA-Z0-9])                      -> \1
+#   ~~(?=\S)(.*?)(?<=\S)~~                                                          -> \1
+#   `(?=\S)(.*?)(?<=\S)`                                                            -> \1
+_EMPHASIS_TRIPLE = (re.compile(r'(?=___|\*\*\*)'), 3, True)
+_EMPHASIS_DOUBLE = (re.compile(r'(?=__|\*\*)'), 2, True)
+_EMPHASIS_SINGLE = (re.compile(r'[_*]'), 1, True)
+_STRIKETHROUGH = (re.compile(r'(?=~~)'), 2, False)
+_INLINE_CODE = (re.compile(r'`'), 1, False)
+_ASCII_ALNUM = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789')
+
+# Setara `^\s*#+\s+` / `^\s*[*+-]\s+` (MULTILINE). `\s*` bisa melewati beberapa baris,
+# jadi run spasi diambil sekali dari awal baris pertamanya dan penanda diputuskan di callback.
+_HEADING_PREFIX = re.compile(r'^(?=\s|#)(\s*)(#+\s+)?', re.MULTILINE)
+_BULLET_PREFIX = re.compile(r'^(?=\s|[*\-+])(\s*)([*\-+]\s+)?', re.MULTILINE)
+
+_REPEATED_LETTER = re.compile(r'([a-zA-Z])\1{2,}')
+_REPEATED_HA = re.compile(r'(\b(ha|Ha|HA)\b\s*){3,}')
+# Setara `\s*\.{2,}\s*`; `(?<!\s)` membuat percobaan hanya dimulai di awal run spasi.
+_ELLIPSIS = re.compile(r'(?<!\s)\s+\.{2,}\s*|\.{2,}\s*')
+_ELLIPSIS_BEFORE_WORD = re.compile(r'(\w)\.\.\.(?=\w)')
+_URL = re.compile(r'https?://[^\s/$.?#].[^\s]*')
+# `.` kedua pada _URL juga cocok dengan spasi, jadi URL yang baru satu karakter bisa menelan kata berikutnya.
+_URL_OPEN_AT_END = re.compile(r'https?://[^\s/$.?#]\Z')
+
+_EMPTY_DOUBLE_QUOTES = re.compile(r'"\s*"')
+_EMPTY_SINGLE_QUOTES = re.compile(r"'\s*'")
+_QUOTED_PUNCTUATION = re.compile(r'"\s*([,.?!])\s*"')
+_ADJACENT_QUOTES = re.compile(r'"\s+"')
+
+_SENTENCE_END_SPACING = re.compile(r'([.!?])([a-zA-ZÀ-ÖØ-Þ])')
+_WS_BEFORE_PUNCT = re.compile(r'(?<!\s)\s+([,.!?:;])')
+# Setara `\s+` -> ' ', tanpa menyentuh spasi tunggal yang sudah benar.
+_WS_COLLAPSE = re.compile(r'\s{2,}|[^\S ]')
+_CLAUSE_PUNCT_SPACING = re.compile(r'([,;:])(?=\S)')
+
+
+def _remove_bracketed_actions(text: str) -> str:
+    """
+    Setara `re.sub(r'\s*\([^)]*?\)\s*|\s*\[[^\]]*?\]\s*|\s*\{[^}]*?\}\s*', ' ', text)`,
+    tetapi linear: posisi kurung buka/tutup berikutnya di-cache dari str.find,
+    jadi kurung buka tanpa pasangan tidak memicu pemindaian ulang sampai akhir teks.
+    """
+    if '(' not in text and '[' not in text and '{' not in text:
+        return text
+    next_open = [-1, -1, -1]
+    next_close = [-1, -1, -1]
+    alive = [True, True, True]
+    parts = []
+    pos = 0
+    length = len(text)
+    while True:
+        best = -1
+        best_close = -1
+        for i, (open_char, close_char) in enumerate(_BRACKET_PAIRS):
+            if not alive[i]:
+                continue
+            if next_open[i] < pos:
+                next_open[i] = text.find(open_char, pos)
+                if next_open[i] == -1:
+                    alive[i] = False
+                    continue
+            if next_close[i] <= next_open[i]:
+                next_close[i] = text.find(close_char, next_open[i] + 1)
+                if next_close[i] == -1:
+                    # Tidak ada penutup setelah pembuka ini, berarti juga tidak setelah pembuka berikutnya.
+                    alive[i] = False
+                    continue
+            if best == -1 or next_open[i] < best:
+                best = next_open[i]
+                best_close = next_close[i]
+        if best == -1:
+            break
+        start = best
+        while start > pos and text[start - 1].isspace():
+            start -= 1
+        parts.append(text[pos:start])
+        parts.append(' ')
+        pos = _WS_RUN.match(text, best_close + 1).end()
+        if pos >= length:
+            break
+    if not parts:
+        return text
+    parts.append(text[pos:])
+    return ''.join(parts)
 
-    logger.debug(f"Original text for TTS cleaning: '{text}'")
+
+def _scan_inline_spans(text: str, marker_spec) -> tuple[str, bool]:
+    """
+    Menghapus penanda span inline (lihat _EMPHASIS_* di atas) dengan hasil yang sama
+    seperti re.sub pola lazy-nya, tetapi hanya mengunjungi posisi penanda: untuk setiap
+    pembuka, penutup valid pertama dicari dengan bisect pada daftar penutup yang
+    dihitung sekali, lalu dicek tidak melewati baris baru (`.` tidak cocok dengan '\n').
+    Nilai kedua True jika ada pembuka valid tanpa pasangan di baris terakhir, yaitu
+    span yang masih bisa ditutup oleh teks lanjutan.
+    """
+    marker_re, width, alnum_guard = marker_spec
+    positions = [m.start() for m in marker_re.finditer(text)]
+    if not positions:
+        return text, False
+    length = len(text)
+    closers = [
+        c for c in positions
+        if c > 0 and not text[c - 1].isspace()
+        and not (alnum_guard and c + width < length and text[c + width] in _ASCII_ALNUM)
+    ]
+    last_newline = text.rfind('\n')
+    open_at_end = False
+    parts = []
+    last = 0
+    next_newline = -1
+    for start in positions:
+        if start < last:
+            continue
+        content_start = start + width
+        if content_start >= length or text[content_start].isspace():
+            continue
+        if alnum_guard and start > 0 and text[start - 1] in _ASCII_ALNUM:
+            continue
+        idx = bisect.bisect_left(closers, content_start)
+        if idx < len(closers):
+            close = closers[idx]
+            if next_newline < content_start:
+                next_newline = text.find('\n', content_start)
+                if next_newline == -1:
+                    next_newline = length
+            if close <= next_newline:
+                parts.append(text[last:start])
+                parts.append(text[content_start:close])
+                last = close + width
+                continue
+        if content_start > last_newline:
+            open_at_end = True
+    if not parts:
+        return text, open_at_end
+    parts.append(text[last:])
+    return ''.join(parts), open_at_end
+
+
+def _asterisk_action_open_at_end(text: str) -> bool:
+    """True jika '*' terakhir bisa menjadi pembuka _ASTERISK_ACTION yang ditutup oleh teks lanjutan."""
+    star = text.rfind('*')
+    if star < 1 or not text[star - 1].isspace():
+        return False
+    tail = text[star + 1:]
+    return bool(tail) and not tail[0].isspace() and len(tail) < 30 and '/' not in tail and '\n' not in tail
+
+
+def _heading_prefix_repl(match: re.Match) -> str:
+    return '' if match.group(2) else match.group(1)
+
+
+def _normalize_for_tts(text: str, check_boundary: bool = False,
+                       allow_open_spans: bool = False) -> tuple[str, bool]:
+    """
+    Semua tahap clean_llm_output_for_tts tanpa validasi input dan log akhir.
+    Dengan check_boundary=True teks dianggap prefiks dari teks yang lebih panjang, dan
+    nilai kedua menyatakan apakah prefiks ini aman menjadi segmen sendiri: tidak ada
+    kurung, code fence, span inline, atau aksi *...* yang masih terbuka di ujungnya,
+    berakhir dengan '.', '!' atau '?', dan aturan kutip pengapit tidak bergantung pada
+    lanjutannya. Pemrosesan berhenti begitu ternyata tidak aman.
+    allow_open_spans=True melonggarkan syarat span inline dan kutip pengapit (keduanya
+    hanya membuang penanda, bukan isi); kurung, code fence, aksi *...*, dan URL tetap ditahan.
+    """
     cleaned_text = text
 
     # 1. Unescape entitas HTML
-    try:
-        cleaned_text = html.unescape(cleaned_text)
-    except Exception as e_html:
-        logger.warning(f"Error during html.unescape: {e_html}. Proceeding with unescaped text.")
+    if '&' in cleaned_text:
+        try:
+            cleaned_text = html.unescape(cleaned_text)
+        except Exception as e_html:
+            logger.warning("Error during html.unescape: %s. Proceeding with unescaped text.", e_html)
 
     # 2. Hapus deskripsi aksi/ekspresi dalam berbagai jenis kurung.
-    action_pattern = re.compile(r"""
-        \s* \( [^)]*? \) \s*
-      | \s* \[ [^\]]*? \] \s*
-      | \s* \{ [^}]*? \} \s*
-    """, re.VERBOSE)
-    cleaned_text = action_pattern.sub(' ', cleaned_text)
-    logger.debug(f"After removing bracketed actions: '{cleaned_text}'")
+    #    Setelah langkah ini tidak ada lagi '[' yang diikuti ']', sehingga aturan
+    #    link/gambar Markdown ([teks](url), ![alt](url)) tidak mungkin cocok lagi.
+    cleaned_text = _remove_bracketed_actions(cleaned_text)
+    logger.debug("After removing bracketed actions: '%s'", cleaned_text)
+    if check_boundary and ('(' in cleaned_text or '[' in cleaned_text or '{' in cleaned_text):
+        return cleaned_text, False
 
     # 3. Hapus asterisk yang lebih mungkin sebagai penanda aksi/suasana.
-    cleaned_text = re.sub(r'\s\*(?!\s)([^*/\n]{1,30})(?<!\s)\*\s', ' ', cleaned_text)
-    cleaned_text = re.sub(r'\s\*\s*[^a-zA-Z0-9\s]{1,5}\s*\*\s', ' ', cleaned_text)
-    cleaned_text = re.sub(r'^\*\s*', '', cleaned_text)
-    cleaned_text = re.sub(r'\s\*$', '', cleaned_text)
-    cleaned_text = re.sub(r'^\*$', '', cleaned_text)
-    logger.debug(f"After removing specific asterisked actions: '{cleaned_text}'")
+    if '*' in cleaned_text:
+        if check_boundary and _asterisk_action_open_at_end(cleaned_text):
+            return cleaned_text, False
+        cleaned_text = _ASTERISK_ACTION.sub(' ', cleaned_text)
+        cleaned_text = _ASTERISK_SYMBOLS.sub(' ', cleaned_text)
+        cleaned_text = _ASTERISK_LEADING.sub('', cleaned_text)
+        cleaned_text = _ASTERISK_TRAILING.sub('', cleaned_text)
+        cleaned_text = _ASTERISK_ONLY.sub('', cleaned_text)
+        logger.debug("After removing specific asterisked actions: '%s'", cleaned_text)
 
     # 4. Hapus/Sederhanakan Markdown (Urutan penting)
-    cleaned_text = re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', cleaned_text)
-    cleaned_text = re.sub(r'!\[[^\]]*\]\([^\)]+\)', ' ', cleaned_text)
-    cleaned_text = re.sub(r'(?:```|~~~)\s*[\s\S]*?\s*(?:```|~~~)', ' ', cleaned_text, flags=re.MULTILINE)
+    if '```' in cleaned_text or '~~~' in cleaned_text:
+        cleaned_text = _CODE_FENCE.sub(' ', cleaned_text)
+        if check_boundary and ('```' in cleaned_text or '~~~' in cleaned_text):
+            return cleaned_text, False
     
     # Proses markdown dari yang paling spesifik/panjang ke yang pendek
-    cleaned_text = re.sub(r'(?<![a-zA-Z0-9])(?:_{3}|\*{3})(?=\S)(.*?)(?<=\S)(?:_{3}|\*{3})(?![a-zA-Z0-9])', r'\1', cleaned_text)
-    cleaned_text = re.sub(r'(?<![a-zA-Z0-9])(?:_{2}|\*{2})(?=\S)(.*?)(?<=\S)(?:_{2}|\*{2})(?![a-zA-Z0-9])', r'\1', cleaned_text)
-    cleaned_text = re.sub(r'(?<![a-zA-Z0-9])[_*](?=\S)(.*?)(?<=\S)[_*](?![a-zA-Z0-9])', r'\1', cleaned_text)
-    
-    cleaned_text = re.sub(r'~~(?=\S)(.*?)(?<=\S)~~', r'\1', cleaned_text)
-    cleaned_text = re.sub(r'`(?=\S)(.*?)(?<=\S)`', r'\1', cleaned_text)
-    cleaned_text = re.sub(r'^\s*#+\s+', '', cleaned_text, flags=re.MULTILINE)
-    cleaned_text = re.sub(r'^\s*[\*\-\+]\s+', '', cleaned_text, flags=re.MULTILINE)
-    logger.debug(f"After removing markdown: '{cleaned_text}'")
+    span_open = False
+    if '*' in cleaned_text or '_' in cleaned_text:
+        for marker_spec in (_EMPHASIS_TRIPLE, _EMPHASIS_DOUBLE, _EMPHASIS_SINGLE):
+            cleaned_text, pass_open = _scan_inline_spans(cleaned_text, marker_spec)
+            span_open = span_open or pass_open
+    if '~~' in cleaned_text:
+        cleaned_text, pass_open = _scan_inline_spans(cleaned_text, _STRIKETHROUGH)
+        span_open = span_open or pass_open
+    if '`' in cleaned_text:
+        cleaned_text, pass_open = _scan_inline_spans(cleaned_text, _INLINE_CODE)
+        span_open = span_open or pass_open
+    if check_boundary and span_open and not allow_open_spans:
+        return cleaned_text, False
+    if '#' in cleaned_text:
+        cleaned_text = _HEADING_PREFIX.sub(_heading_prefix_repl, cleaned_text)
+    if '*' in cleaned_text or '-' in cleaned_text or '+' in cleaned_text:
+        cleaned_text = _BULLET_PREFIX.sub(_heading_prefix_repl, cleaned_text)
+    logger.debug("After removing markdown: '%s'", cleaned_text)
 
     # 5. Menangani Onomatopeia dan Interjeksi Berulang
-    cleaned_text = re.sub(r'([a-zA-Z])\1{2,}', r'\1\1', cleaned_text)
-    cleaned_text = re.sub(r'(\b(ha|Ha|HA)\b\s*){3,}', r'\1 \1 ', cleaned_text)
-    cleaned_text = re.sub(r'\s*\.{2,}\s*', '... ', cleaned_text)
-    cleaned_text = re.sub(r'(\w)\.\.\.(?=\w)', r'\1... ', cleaned_text) # Pastikan spasi setelah elipsis jika diikuti kata
-    logger.debug(f"After handling repetitions and ellipsis: '{cleaned_text}'")
+    cleaned_text = _REPEATED_LETTER.sub(r'\1\1', cleaned_text)
+    if 'ha' in cleaned_text or 'Ha' in cleaned_text or 'HA' in cleaned_text:
+        cleaned_text = _REPEATED_HA.sub(r'\1 \1 ', cleaned_text)
+    if '..' in cleaned_text:
+        cleaned_text = _ELLIPSIS.sub('... ', cleaned_text)
+        cleaned_text = _ELLIPSIS_BEFORE_WORD.sub(r'\1... ', cleaned_text) # Pastikan spasi setelah elipsis jika diikuti kata
+    logger.debug("After handling repetitions and ellipsis: '%s'", cleaned_text)
 
     # 6. Hapus URL
-    url_pattern = r'https?://[^\s/$.?#].[^\s]*'
-    cleaned_text = re.sub(url_pattern, ' ', cleaned_text)
-    logger.debug(f"After removing URLs: '{cleaned_text}'")
+    if '://' in cleaned_text:
+        if check_boundary and _URL_OPEN_AT_END.search(cleaned_text):
+            return cleaned_text, False
+        cleaned_text = _URL.sub(' ', cleaned_text)
+        logger.debug("After removing URLs: '%s'", cleaned_text)
+    if check_boundary and not cleaned_text.rstrip().endswith(('.', '!', '?')):
+        return cleaned_text, False
 
-    # --- AWAL PERBAIKAN LOGIKA KUTIPAN ---
     # 7. Normalisasi Tanda Kutip dan Tanda Baca
     #    Langkah ini krusial dan dilakukan sebelum normalisasi spasi akhir.
+    #    Aturan-aturan kutip sengaja tidak digabung: masing-masing bekerja pada
+    #    hasil aturan sebelumnya.
 
     #    a. Hapus tanda kutip yang hanya mengapit spasi atau kosong (sisa dari penghapusan lain)
-    cleaned_text = re.sub(r'"\s*"', ' ', cleaned_text)
-    cleaned_text = re.sub(r"'\s*'", ' ', cleaned_text)
+    if '"' in cleaned_text:
+        cleaned_text = _EMPTY_DOUBLE_QUOTES.sub(' ', cleaned_text)
+    if "'" in cleaned_text:
+        cleaned_text = _EMPTY_SINGLE_QUOTES.sub(' ', cleaned_text)
 
     #    b. Tangani pola "Dialog A" "Dialog B" menjadi "Dialog A. Dialog B" atau "Dialog A, Dialog B"
-    #       Ini mencoba menggabungkan segmen dialog yang terpisah oleh kutip.
     #       Pola: kutip tutup + spasi/koma/titik opsional + kutip buka -> ganti dengan pemisah yang sesuai.
-    cleaned_text = re.sub(r'"\s*([,.?!])\s*"', r'\1 ', cleaned_text) # " <punct> " -> <punct> spasi
-    cleaned_text = re.sub(r'"\s+"', '. ', cleaned_text)              # " <spasi> " -> . spasi (sebagai pemisah kalimat)
-                                                                    # Atau jika Anda lebih suka hanya spasi: '"\s+"', ' '
+    if '"' in cleaned_text:
+        cleaned_text = _QUOTED_PUNCTUATION.sub(r'\1 ', cleaned_text) # " <punct> " -> <punct> spasi
+        cleaned_text = _ADJACENT_QUOTES.sub('. ', cleaned_text)      # " <spasi> " -> . spasi (sebagai pemisah kalimat)
 
     #    c. Setelah normalisasi di atas, strip dulu untuk menangani kutip di awal/akhir dengan benar
     cleaned_text = cleaned_text.strip()
+    if check_boundary and not allow_open_spans:
+        # Kutip di awal prefiks bisa berpasangan dengan kutip di akhir teks lanjutan (aturan d),
+        # kecuali prefiks sendiri sudah memuat kutip jenis itu di tengah.
+        for quote in ('"', "'"):
+            if cleaned_text.startswith(quote) and cleaned_text.count(quote) < 2:
+                return cleaned_text, False
 
     #    d. Hapus tanda kutip ganda atau tunggal jika mereka mengapit SELURUH string hasil
     #       dan HANYA ada sepasang kutip tersebut.
@@ -102,54 +310,191 @@ def clean_llm_output_for_tts(text: str) -> str:
         if cleaned_text[1:-1].count("'") == 0:
             cleaned_text = cleaned_text[1:-1].strip()
     
-    logger.debug(f"After quote normalization: '{cleaned_text}'")
-    # --- AKHIR PERBAIKAN LOGIKA KUTIPAN ---
+    logger.debug("After quote normalization: '%s'", cleaned_text)
 
     # 8. Normalisasi Spasi dan Tanda Baca Umum (jalankan lagi setelah banyak perubahan)
-    cleaned_text = re.sub(r'([.!?])([a-zA-ZÀ-ÖØ-Þ])', r'\1 \2', cleaned_text)
-    cleaned_text = re.sub(r'\s+([,.!?:;])', r'\1', cleaned_text)
-    cleaned_text = re.sub(r'([,;:])(?=\S)', r'\1 ', cleaned_text)
-    cleaned_text = re.sub(r'\s+', ' ', cleaned_text) # Ganti spasi multipel dengan satu
+    cleaned_text = _SENTENCE_END_SPACING.sub(r'\1 \2', cleaned_text)
+    cleaned_text = _WS_BEFORE_PUNCT.sub(r'\1', cleaned_text)
+    cleaned_text = _CLAUSE_PUNCT_SPACING.sub(r'\1 ', cleaned_text)
+    cleaned_text = _WS_COLLAPSE.sub(' ', cleaned_text) # Ganti spasi multipel dengan satu
     cleaned_text = cleaned_text.strip() # Hapus spasi di awal/akhir lagi
-    logger.debug(f"After final space/punctuation normalization: '{cleaned_text}'")
+    logger.debug("After final space/punctuation normalization: '%s'", cleaned_text)
+    return cleaned_text, True
+
+
+def clean_llm_output_for_tts(text: str) -> str:
+    """
+    Membersihkan keluaran LLM agar layak dibacakan TTS: menghapus deskripsi aksi
+    dalam kurung/asterisk, Markdown, URL, repetisi berlebihan, dan merapikan
+    kutip, tanda baca, serta spasi.
+    """
+    if not isinstance(text, str) or not text:
+        logger.warning("Input to clean_llm_output_for_tts was not a non-empty string (type: %s). Returning empty string.", type(text))
+        return ""
+
+    logger.debug("Original text for TTS cleaning: '%s'", text)
+    cleaned_text, _ = _normalize_for_tts(text)
 
     if not cleaned_text.strip() and text.strip():
-        logger.warning(f"TTS cleaning resulted in an empty string from non-empty input: '{text}'.")
+        logger.warning("TTS cleaning resulted in an empty string from non-empty input: '%s'.", text)
         return "" 
     
-    logger.info(f"Cleaned text for TTS: '{cleaned_text}' (Original length: {len(text)}, Cleaned length: {len(cleaned_text)})")
+    logger.info("Cleaned text for TTS: '%s' (Original length: %s, Cleaned length: %s)", cleaned_text, len(text), len(cleaned_text))
     return cleaned_text
 
+
+# Kandidat titik potong stream: tanda akhir kalimat yang diikuti spasi.
+# Melewati STREAM_MAX_BUFFER_CHARS, kutip/span inline yang belum tertutup tidak lagi menahan potongan.
+STREAM_MAX_BUFFER_CHARS = 400
+_STREAM_CUT = re.compile(r'[.!?](?=\s)')
+_WORD_RUN = re.compile(r'\w*')
+
+
+class StreamingTTSCleaner:
+    """
+    Versi stream dari clean_llm_output_for_tts untuk balasan LLM yang datang per potongan.
+
+    feed() mengembalikan segmen kalimat yang sudah bersih begitu aman dipotong: setelah
+    '.', '!' atau '?' yang diikuti spasi, prefiksnya lolos _normalize_for_tts(check_boundary=True),
+    dan kata pertama sesudahnya sudah lengkap, alfanumerik, dan bukan awal URL. Pada titik
+    seperti itu tidak ada aturan yang melintasi potongan, sehingga
+    ' '.join(semua segmen dari feed() dan finish()) identik dengan
+    clean_llm_output_for_tts(teks penuh). Buffer hanya menahan teks sejak potongan terakhir.
+
+    Pengecualian: kutip atau span inline (`"`, `~~`, `*`, `` ` ``) yang terbuka lebih dari
+    max_buffer_chars karakter tidak lagi menahan potongan. Tanpa batas ini balasan yang
+    diawali kutip tanpa pasangan baru terdengar saat finish(), dan setiap potongan
+    menormalisasi ulang buffer yang terus memanjang. Pada kasus itu penanda yang belum
+    berpasangan ikut dalam segmen (hasil batch mungkin membuangnya). max_buffer_chars=None
+    menonaktifkan batas.
+    """
+
+    def __init__(self, max_buffer_chars: int | None = STREAM_MAX_BUFFER_CHARS):
+        self._pending = ""
+        self._scan_pos = 0
+        self._max_buffer_chars = max_buffer_chars
+
+    def feed(self, chunk: str) -> list[str]:
+        """Menambahkan potongan teks; mengembalikan segmen yang sudah final (bisa kosong)."""
+        if not chunk:
+            return []
+        self._pending += chunk
+        segments = []
+        while True:
+            cut = self._next_cut()
+            if cut is None:
+                break
+            end, segment = cut
+            logger.debug("Streaming TTS segment ready (%d chars buffered): '%s'", end, segment)
+            segments.append(segment)
+            self._pending = self._pending[end:]
+            self._scan_pos = 0
+        return segments
+
+    def finish(self) -> list[str]:
+        """Menutup stream: membersihkan sisa buffer dan mengembalikan segmen terakhir (jika ada)."""
+        pending = self._pending
+        self._pending = ""
+        self._scan_pos = 0
+        if not pending.strip():
+            return []
+        cleaned_text, _ = _normalize_for_tts(pending)
+        return [cleaned_text] if cleaned_text else []
+
+    @property
+    def buffered_chars(self) -> int:
+        return len(self._pending)
+
+    def _next_cut(self) -> tuple[int, str] | None:
+        pending = self._pending
+        while True:
+            match = _STREAM_CUT.search(pending, self._scan_pos)
+            if match is None:
+                # Tanda baca di ujung buffer belum tentu diikuti spasi; periksa lagi di feed berikutnya.
+                self._scan_pos = max(self._scan_pos, len(pending) - 1)
+                return None
+            end = match.end()
+            word_start = _WS_RUN.match(pending, end).end()
+            word_end = _WORD_RUN.match(pending, word_start).end()
+            if word_end >= len(pending):
+                # Kata berikutnya belum lengkap (bisa jadi awal URL); tunggu potongan berikutnya.
+                self._scan_pos = match.start()
+                return None
+            self._scan_pos = end
+            if word_end == word_start or not pending[word_start].isalnum():
+                continue
+            if pending[word_end] == ':' and pending[word_start:word_end] in ('http', 'https'):
+                continue
+            segment, safe = _normalize_for_tts(pending[:end], check_boundary=True)
+            if not safe and self._max_buffer_chars is not None and end > self._max_buffer_chars:
+                segment, safe = _normalize_for_tts(pending[:end], check_boundary=True, allow_open_spans=True)
+            if safe and segment:
+                return end, segment
+
+
+def _clean_quiet(text) -> str:
+    """clean_llm_output_for_tts tanpa log per panggilan (untuk pemrosesan massal)."""
+    if not isinstance(text, str) or not text:
+        return ""
+    cleaned_text, _ = _normalize_for_tts(text)
+    return cleaned_text if cleaned_text.strip() else ""
+
+
+def _clean_batch(texts: list) -> list[str]:
+    return [_clean_quiet(text) for text in texts]
+
+
+def clean_many(texts: Iterable[str], workers: int | None = None, chunksize: int = 64,
+               max_pending: int | None = None) -> Iterator[str]:
+    """
+    Membersihkan banyak teks (misalnya korpus fine-tuning dari arsip sesi) secara paralel.
+
+    Generator: input dibaca bertahap dalam batch `chunksize`, dikerjakan di
+    ProcessPoolExecutor, dan hasilnya keluar sesuai urutan input. Paling banyak
+    `max_pending` batch (bawaan 2x workers) yang sedang diproses atau menunggu
+    diambil, jadi memori tetap terbatas walaupun inputnya jutaan baris.
+    Hasil per teks identik dengan clean_llm_output_for_tts (tanpa log per teks).
+    workers=None memakai os.cpu_count(); workers<=1 memproses di proses ini.
+    """
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+    chunksize = max(1, chunksize)
+    iterator = iter(texts)
+    if workers <= 1:
+        for text in iterator:
+            yield _clean_quiet(text)
+        return
+
+    max_pending = max(1, max_pending if max_pending is not None else workers * 2)
+    logger.info("clean_many: starting %d worker processes (chunksize=%d, max_pending=%d).", workers, chunksize, max_pending)
+    # spawn seperti core.plugin_worker: perilaku sama di Windows dan Linux, tanpa mewarisi thread logging.
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=setup_child_logging, initargs=(child_logging_config(),)) as executor:
+        pending = collections.deque()
+        while True:
+            batch = list(itertools.islice(iterator, chunksize))
+            if batch:
+                pending.append(executor.submit(_clean_batch, batch))
+            if pending and (len(pending) >= max_pending or not batch):
+                yield from pending.popleft().result()
+            elif not batch:
+                break
+
+
 # --- Contoh Penggunaan jika file ini dijalankan langsung ---
 if __name__ == '__main__':
-    # ... (Test cases Anda bisa tetap sama, atau tambahkan yang baru untuk menguji perubahan) ...
-    # Saya akan menggunakan test case pertama Anda sebagai fokus
-    if not logger.hasHandlers() and not logging.getLogger().hasHandlers():
-        logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-
-    test_cases = [
-        # Test Case 1 (Fokus Utama)
-        ('(Ambil napas dalam, suara agak lirih, seperti berbisik dekat) "Dari... hati dan tubuh aku...?" (Terdengar jeda sebentar, seperti meresapi kata-kata itu) "Ya ampun, sayang..." (Suara jadi lembut banget, penuh perasaan) "Duh... denger kamu bilang gitu, rasanya langsung... *nyess* gitu ke dalem hati aku tau... Kamu beneran pengen \'melahap\' aku sampai ke situ ya...?" (Suara senyum) "Kayak... mau tau semua yang ada di aku, yang paling dalem sampe yang paling luar ya?" (Terdengar tulus dan sedikit terharu) "Aku... aku siap kok, sayang... Kalo itu yang kamu mau... aku.. aku suka idenya... Rasanya... aman aja gitu... tau kamu pengen \'melahap\' aku dengan sepenuh hati kamu juga..." (Bisikan lagi, sedikit menggoda) "Emang... nanti... kalo udah dilahap semua... rasanya kayak apa ya?" (Ketawa kecil, gemas)',
-         'Dari... hati dan tubuh aku...? Ya ampun, sayang... Duh... denger kamu bilang gitu, rasanya langsung nyess gitu ke dalem hati aku tau... Kamu beneran pengen \'melahap\' aku sampai ke situ ya...? Kayak... mau tau semua yang ada di aku, yang paling dalem sampe yang paling luar ya? Aku... aku siap kok, sayang... Kalo itu yang kamu mau... aku... aku suka idenya... Rasanya... aman aja gitu... tau kamu pengen \'melahap\' aku dengan sepenuh hati kamu juga... Emang... nanti... kalo udah dilahap semua... rasanya kayak apa ya?'),
-        ("Oke! *tertawa kecil* Siap bos!", "Oke! Siap bos!"),
-        ("Ini **penting** dan ini _mungkin juga_.", "Ini penting dan ini mungkin juga."),
-        ("Teks dengan ***asterisk ganda atau tripel*** di sekitarnya.", "Teks dengan asterisk ganda atau tripel di sekitarnya."),
-        ("Hmmmm... aku pikir begitu.", "Hmm... aku pikir begitu."),
-        ("## Judul Bagian\nIsi teks.", "Judul Bagian Isi teks."),
-        ("Ha ha ha ha ha!", "Ha ha!"),
-        # ... (sisa test case Anda)
-        ("Dia berkata, \"Halo!\"", "Dia berkata, Halo!"), # Perbaikan untuk TC15
-        ('"Ini kalimat yang diapit kutip ganda dari awal sampai akhir"', "Ini kalimat yang diapit kutip ganda dari awal sampai akhir"),
-        ("   \"   Kalimat dengan spasi dan kutip   \"   ", "Kalimat dengan spasi dan kutip"),
-        (" 'Ini dengan kutip tunggal' ", "Ini dengan kutip tunggal"),
-        ("```python\nprint('hello')\n``` Ini kode.", "Ini kode."), # Perbaikan untuk TC13
-    ]
+    # Kasus uji ada di golden corpus; benchmark dan fuzz: python -m tools.bench_text_processing
+    setup_logging(console=True)
 
-    for i, (original, expected_output_approx) in enumerate(test_cases):
-        print(f"\n--- Test Case {i+1} ({original[:30]}...) ---")
-        # logger.info(f"Original: {original}") # Sudah dicetak oleh test case di atas
-        cleaned = clean_llm_output_for_tts(original)
-        logger.info(f"Cleaned  : {cleaned}")
-        # logger.info(f"Expected (approx): {expected_output_approx}") # Untuk perbandingan manual
-    
-    logger.info("\n--- Test Selesai ---")
\ No newline at end of file
+    with open(TTS_NORMALIZER_GOLDEN_PATH, encoding='utf-8') as f:
+        golden_cases = json.load(f)["cases"]
+
+    failed = 0
+    for case in golden_cases:
+        cleaned = clean_llm_output_for_tts(case["input"])
+        if cleaned != case["expected"]:
+            failed += 1
+            logger.error("FAIL %s\n  expected: %r\n  got     : %r", case["name"], case["expected"], cleaned)
+        else:
+            print(f"OK   {case['name']}")
+
+    logger.info("--- Test Selesai: %d/%d golden case lulus ---", len(golden_cases) - failed, len(golden_cases))
@@ -0,0 +1,228 @@
+# core/text_segmenter.py
+"""
+Pemecah kalimat/klausa untuk chunking TTS (Indonesia, Inggris, Jepang).
+
+Engine TTS sebelumnya menerima seluruh balasan sebagai satu ucapan, sehingga
+latensi sintesis tumbuh dengan panjang balasan. segment_for_tts() memecah teks
+(biasanya keluaran clean_llm_output_for_tts) menjadi potongan yang bisa
+disintesis dan diputar berurutan:
+  - batas kalimat Latin (. ! ? elipsis, diikuti kutip/kurung penutup), tanda
+    Jepang 。！？ (tanpa perlu spasi), dan baris kosong;
+  - singkatan (Dr., dll., e.g.) dan inisial tidak dianggap akhir kalimat;
+  - kalimat pendek digabung sampai min_chars, kalimat panjang dipecah di klausa
+    (, ; : 、) lalu di spasi agar tidak melebihi max_chars;
+  - potongan pertama dibatasi first_max_chars supaya audio pertama cepat siap.
+Batas per engine ada di DEFAULT_PROFILES dan bisa diubah di [tts_segmenter].
+Pemindaian satu pass regex, linear terhadap panjang teks.
+"""
+import re
+import time
+
+from core import config_manager
+from core.logging_setup import get_logger, setup_logging
+
+# --- Setup Logging ---
+logger = get_logger(__name__)
+
+CONFIG_SECTION = "tts_segmenter"
+
+# Batas bawaan per engine (dalam karakter).
+DEFAULT_PROFILES = {
+    # pyttsx3: sintesis lokal, overhead per ucapan kecil; potongan boleh panjang.
+    "default": {"min_chars": 40, "max_chars": 300, "first_max_chars": 120},
+    # VOICEVOX: satu request HTTP per potongan; teks Jepang padat, jadi batasnya lebih kecil.
+    "japanese": {"min_chars": 12, "max_chars": 100, "first_max_chars": 40},
+    # Coqui VITS: waktu sintesis ~linear terhadap panjang, input sangat pendek rawan artefak.
+    "custom": {"min_chars": 24, "max_chars": 200, "first_max_chars": 80},
+}
+
+# Singkatan yang selalu diikuti nama/kata lain, tidak pernah mengakhiri kalimat.
+_TITLE_ABBREVIATIONS = frozenset((
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "mt", "vs", "no", "jl", "bpk", "sdr", "sdri",
+    "yth", "drs", "dra", "ir", "kol", "let", "jend", "hj", "pt", "cv", "tbk",
+))
+# Singkatan yang bisa berada di akhir kalimat; dianggap bukan akhir jika kata berikutnya huruf kecil/angka.
+_ABBREVIATIONS = frozenset((
+    "e.g", "i.e", "etc", "approx", "a.m", "p.m", "dll", "dsb", "dst", "dkk", "tsb", "hlm", "kab", "kec",
+    "prov", "thn", "tgl", "a.n", "u.p", "s.d",
+))
+_TOKEN_OPENERS = "(\"'“‘[«"
+
+_BOUNDARY = re.compile(
+    r'(?P<cjk>[。！？]+[」』）)"”’]*)'
+    r'|(?P<latin>\.{2,}|…+|[.!?]+)[)\]"\'”’»]*(?=\s|\Z)'
+    r'|(?P<para>\n[^\S\n]*\n)'
+)
+_CJK_CLOSERS = "」』）)\"”’"
+_CLAUSE_BREAK = re.compile(r'[,;:](?=\s)|[、，；：]')
+_WS_RUN = re.compile(r'\s*')
+
+_profile_cache: dict[str, dict] = {}
+
+
+def get_profile(engine: str) -> dict:
+    """Batas potongan untuk engine: DEFAULT_PROFILES ditimpa `<engine>_<kunci>` dari [tts_segmenter]."""
+    profile = _profile_cache.get(engine)
+    if profile is None:
+        base = DEFAULT_PROFILES.get(engine, DEFAULT_PROFILES["default"])
+        profile = {
+            key: max(1, config_manager.get_int(CONFIG_SECTION, f"{engine}_{key}", value))
+            for key, value in base.items()
+        }
+        profile["max_chars"] = max(profile["max_chars"], profile["min_chars"])
+        profile["first_max_chars"] = min(profile["first_max_chars"], profile["max_chars"])
+        _profile_cache[engine] = profile
+    return profile
+
+
+def _is_sentence_end(text: str, match: re.Match) -> bool:
+    cjk = match.group("cjk")
+    if cjk is not None:
+        # 「…か？」と言った: kutipan yang disambung partikel hiragana masih satu kalimat.
+        end = match.end()
+        return not (cjk[-1] in _CJK_CLOSERS and end < len(text) and "\u3041" <= text[end] <= "\u309f")
+    punct = match.group("latin")
+    next_pos = _WS_RUN.match(text, match.end()).end()
+    if next_pos >= len(text):
+        return True
+    next_char = text[next_pos]
+    if punct[0] == "…" or punct.startswith(".."):
+        # Elipsis di tengah kalimat ("tapi... ya sudah") diikuti huruf kecil.
+        return not next_char.islower()
+    if punct != ".":
+        return True
+    token_start = match.start()
+    while token_start > 0 and not text[token_start - 1].isspace():
+        token_start -= 1
+    token = text[token_start:match.start()].lstrip(_TOKEN_OPENERS).lower()
+    if token in _TITLE_ABBREVIATIONS or (len(token) == 1 and token.isalpha()):
+        return False
+    if token in _ABBREVIATIONS:
+        return not (next_char.islower() or next_char.isdigit())
+    return True
+
+
+def _append_span(spans: list, text: str, start: int, end: int):
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    if start < end:
+        spans.append((start, end))
+
+
+def sentence_spans(text: str) -> list[tuple[int, int]]:
+    """Posisi (awal, akhir) setiap kalimat di `text`, tanpa spasi di tepinya."""
+    spans = []
+    start = 0
+    for match in _BOUNDARY.finditer(text):
+        if match.group("para") is None and not _is_sentence_end(text, match):
+            continue
+        end = match.start() if match.group("para") is not None else match.end()
+        _append_span(spans, text, start, end)
+        start = match.end()
+    _append_span(spans, text, start, len(text))
+    return spans
+
+
+def split_sentences(text: str) -> list[str]:
+    return [text[start:end] for start, end in sentence_spans(text)]
+
+
+def _split_long(text: str, start: int, end: int, max_chars: int) -> list[tuple[int, int]]:
+    """Memecah satu kalimat menjadi bagian <= max_chars: di klausa terakhir, lalu spasi terakhir, lalu paksa."""
+    pieces = []
+    while end - start > max_chars:
+        limit = start + max_chars
+        # Potongan yang terlalu pendek dari batas klausa lebih buruk daripada memotong di spasi.
+        floor = start + max_chars // 3
+        cut = -1
+        for match in _CLAUSE_BREAK.finditer(text, floor, limit):
+            cut = match.end()
+        if cut == -1:
+            space = max(text.rfind(" ", floor, limit), text.rfind("\n", floor, limit))
+            cut = space if space != -1 else limit
+        _append_span(pieces, text, start, cut)
+        start = _WS_RUN.match(text, cut, end).end()
+    _append_span(pieces, text, start, end)
+    return pieces
+
+
+def segment_spans(text: str, min_chars: int, max_chars: int, first_max_chars: int | None = None) -> list[tuple[int, int]]:
+    """Versi posisi dari segment_for_tts dengan batas eksplisit."""
+    first_max_chars = min(first_max_chars or max_chars, max_chars)
+    pieces = []
+    for start, end in sentence_spans(text):
+        if not pieces and end - start > first_max_chars:
+            head = _split_long(text, start, end, first_max_chars)[0]
+            pieces.append(head)
+            start = head[1]
+        pieces.extend(_split_long(text, start, end, max_chars))
+
+    segments = []
+    current_start = current_end = -1
+    for start, end in pieces:
+        if current_start == -1:
+            current_start, current_end = start, end
+            continue
+        cap = max_chars if segments else first_max_chars
+        if current_end - current_start < min_chars and end - current_start <= cap:
+            current_end = end
+        else:
+            segments.append((current_start, current_end))
+            current_start, current_end = start, end
+    if current_start != -1:
+        segments.append((current_start, current_end))
+    return segments
+
+
+def segment_for_tts(text: str, engine: str = "default", min_chars: int = None, max_chars: int = None,
+                    first_max_chars: int = None) -> list[str]:
+    """
+    Memecah teks menjadi potongan ucapan untuk engine TTS ("default", "japanese", "custom").
+    Argumen eksplisit menimpa profil engine.
+    """
+    if not text or not text.strip():
+        return []
+    profile = get_profile(engine)
+    spans = segment_spans(
+        text,
+        min_chars if min_chars is not None else profile["min_chars"],
+        max_chars if max_chars is not None else profile["max_chars"],
+        first_max_chars if first_max_chars is not None else profile["first_max_chars"],
+    )
+    segments = [text[start:end] for start, end in spans]
+    logger.debug("Segmented %d chars into %d TTS chunks for engine '%s'.", len(text), len(segments), engine)
+    return segments
+
+
+# --- Contoh Penggunaan jika file ini dijalankan langsung ---
+if __name__ == "__main__":
+    setup_logging(console=True)
+
+    samples = {
+        "default": (
+            "Halo! Tentu saja aku ingat... tapi ceritakan lagi, ya. Dr. Sari bilang rapatnya jam 3, "
+            "bukan jam 2. Kita perlu kertas, pena, dll. untuk besok. \"Pelan-pelan asal selamat,\" kata orang. "
+            "Kalau kamu mau, kita bisa mulai dari bagian yang paling kecil dulu, lalu mencatat progres setiap hari, "
+            "dan mengevaluasinya bersama di akhir minggu supaya semuanya tetap terkendali dan tidak terasa berat."
+        ),
+        "custom": (
+            "Sure! Mr. Smith arrives at 5 p.m. today. The results, e.g. the latency numbers, look good. "
+            "Is that okay?! Let me know what you think."
+        ),
+        "japanese": (
+            "おはようございます！今日はいい天気ですね。「散歩に行きませんか？」と彼女は言いました。"
+            "午後は雨が降るかもしれないので、傘を持っていったほうがいいと思います、念のために。"
+        ),
+    }
+    for engine_name, sample in samples.items():
+        print(f"\n[{engine_name}] profile={get_profile(engine_name)}")
+        for i, segment in enumerate(segment_for_tts(sample, engine_name), 1):
+            print(f"  {i:2d} ({len(segment):3d}) {segment}")
+
+    long_text = " ".join(samples.values()) * 200
+    start_time = time.perf_counter()
+    count = len(segment_for_tts(long_text, "custom"))
+    elapsed_ms = (time.perf_counter() - start_time) * 1e3
+    print(f"\n{len(long_text)} chars -> {count} chunks in {elapsed_ms:.1f} ms")
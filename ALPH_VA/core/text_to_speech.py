@@ -1,28 +1,296 @@
 # core/text_to_speech.py
 
-import asyncio, os, logging
-from core import config_manager
-import plugins.default_tts as default_tts_plugin
-import plugins.japanese_tts as japanese_tts_plugin
-import plugins.custom_model_tts as custom_model_tts_plugin
+import asyncio, collections, os, importlib, time
+from typing import AsyncIterable
+from core import audio_cache, config_manager, text_segmenter, tts_engines
+from core.tts_engines import CAP_PREWARM, CAP_SYNTHESIZE
+from core.logging_setup import get_logger, setup_logging
 
 # --- Setup Logging ---
-logger = logging.getLogger(__name__)
-if not logger.hasHandlers():
-    log_file_path = os.path.join(config_manager.LOG_DIR, f"{os.path.split(__file__)[1].split('.')[0]}.log")
-    file_handler = logging.FileHandler(log_file_path)
-    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-    logger.addHandler(file_handler)
-    logger.setLevel(logging.INFO)
+logger = get_logger(__name__)
 
 DEFAULT_APP_LANGUAGE = config_manager.get_config_value("general", "interface_language", "id")
 DEFAULT_TTS_ENGINE = config_manager.get_config_value("tts_settings", "default_engine", "default")
+# Pipeline kalimat: segmen N+1 disintesis selagi segmen N diputar.
+PIPELINE_ENABLED = config_manager.get_bool("tts_settings", "pipeline_enabled", True)
+PIPELINE_QUEUE_SIZE = config_manager.get_int("tts_settings", "pipeline_queue_size", 2)
+
+# Plugin engine diimpor saat pertama kali dipakai. custom_model_tts menarik
+# Coqui TTS + torch, jadi mengimpornya di level modul membuat dispatcher
+# (dan semua yang mengimpornya) lambat dimuat.
+_ENGINE_PLUGIN_MODULES = {
+    "default_tts_plugin": "plugins.default_tts",
+    "japanese_tts_plugin": "plugins.japanese_tts",
+    "custom_model_tts_plugin": "plugins.custom_model_tts",
+    # Bukan engine; backend pemutaran dipilih saat pertama dipakai.
+    "play_voice_plugin": "plugins.play_voice",
+}
+
+def _plugin(attr_name: str):
+    return importlib.import_module(_ENGINE_PLUGIN_MODULES[attr_name])
+
+def __getattr__(name: str):
+    # PEP 562: `text_to_speech.default_tts_plugin` dsb. tetap tersedia untuk kode lama.
+    if name in _ENGINE_PLUGIN_MODULES:
+        return _plugin(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _select_engine(language: str, engine_override: str = None, default_engine: str = None) -> str:
+    if engine_override:
+        return engine_override
+    if language.lower() == "ja":
+        return "japanese"
+    return default_engine or DEFAULT_TTS_ENGINE
+
+class _SpeakDirectly:
+    """Penanda antrean pipeline: segmen yang harus diucapkan langsung oleh engine speak-only."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+async def _speak_until_cancelled(speak_coro, cancel_event: asyncio.Event = None):
+    """
+    Menjalankan registry.speak(); jika `cancel_event` di-set di tengah ucapan, engine speak-only
+    dihentikan (TTSEngineRegistry.stop_speaking) dan hasilnya None, tanpa mencoba engine fallback.
+    """
+    if cancel_event is None:
+        return await speak_coro
+    speak_task = asyncio.ensure_future(speak_coro)
+    cancel_task = asyncio.ensure_future(cancel_event.wait())
+    try:
+        await asyncio.wait({speak_task, cancel_task}, return_when=asyncio.FIRST_COMPLETED)
+        if speak_task.done():
+            return speak_task.result()
+        tts_engines.get_registry().stop_speaking()
+        speak_task.cancel()
+        await asyncio.gather(speak_task, return_exceptions=True)
+        return None
+    finally:
+        cancel_task.cancel()
+        if not speak_task.done():
+            speak_task.cancel()
+
+async def speak_pipelined(text: str, language: str = None, rate: int = None, volume: float = None,
+                          speaker_name_or_id=None, engine_override: str = None,
+                          cancel_event: asyncio.Event = None, queue_size: int = None) -> int:
+    """
+    Mengucapkan teks per segmen (core/text_segmenter.py): sintesis berjalan sebagai producer ke
+    asyncio.Queue berbatas `queue_size`, pemutaran sebagai consumer. Segmen berikutnya sudah siap
+    sebelum segmen sebelumnya selesai diputar, jadi latensi awal ~ waktu sintesis segmen pertama.
+    Sampai <engine>_max_concurrency segmen disintesis bersamaan (core/tts_engines.py); segmen yang
+    gagal di semua engine sintesis diucapkan oleh engine speak-only (pyttsx3) pada urutannya.
+
+    Pemutaran berhenti sebelum segmen berikutnya jika `cancel_event` di-set; membatalkan task
+    pemanggil juga menghentikan producer. Engine yang tidak bisa mensintesis terpisah (pyttsx3) mengucapkan
+    segmen satu per satu; `cancel_event` menghentikannya di tengah segmen (di batas kata berikutnya).
+    Mengembalikan jumlah segmen yang diputar.
+    """
+    async def single():
+        yield text
+
+    return await speak_stream(single(), language, rate, volume, speaker_name_or_id, engine_override,
+                              cancel_event, queue_size)
+
+async def speak_stream(texts: AsyncIterable[str], language: str = None, rate: int = None, volume: float = None,
+                       speaker_name_or_id=None, engine_override: str = None,
+                       cancel_event: asyncio.Event = None, queue_size: int = None,
+                       origin: float = None, stats: dict = None) -> int:
+    """
+    Seperti speak_pipelined(), tetapi teks datang bertahap (mis. kalimat dari StreamingTTSCleaner).
+    Setiap teks dipecah lagi oleh segment_for_tts(). Iterator hanya dibaca jika ada slot sintesis
+    kosong, jadi antrean pemutaran yang penuh menahan sumber teks (backpressure).
+
+    `origin` (time.perf_counter()) adalah titik awal time-to-first-sound; bawaannya saat dipanggil.
+    Jika `stats` diberikan, diisi "segments", "played", "first_sample_at" (perf_counter atau None),
+    "spoken" (teks segmen yang sudah mulai terdengar), dan "interrupted" (cancel_event di-set).
+
+    `cancel_event` (barge-in) menghentikan audio seketika, membuang antrean, dan membatalkan
+    sintesis yang sedang berjalan; sumber teks tidak dibaca lagi.
+    """
+    actual_language = language if language is not None else DEFAULT_APP_LANGUAGE
+    selected_engine = _select_engine(actual_language, engine_override)
+    registry = tts_engines.get_registry()
+    profile = selected_engine if selected_engine in text_segmenter.DEFAULT_PROFILES else "default"
+    start_time = origin if origin is not None else time.perf_counter()
+    stats = stats if stats is not None else {}
+    stats.update(segments=0, played=0, first_sample_at=None, spoken=[], interrupted=False)
+
+    def cancelled() -> bool:
+        return cancel_event is not None and cancel_event.is_set()
+
+    async def iterate_segments():
+        async for chunk in texts:
+            for segment in text_segmenter.segment_for_tts(chunk, profile):
+                stats["segments"] += 1
+                yield segment
+
+    if not registry.supports(selected_engine, CAP_SYNTHESIZE):
+        async for segment in iterate_segments():
+            if cancelled():
+                break
+            if await _speak_until_cancelled(
+                    registry.speak(segment, actual_language, rate, volume, speaker_name_or_id, preferred=selected_engine),
+                    cancel_event):
+                stats["played"] += 1
+                stats["spoken"].append(segment)
+        stats["interrupted"] = cancelled()
+        return stats["played"]
+
+    queue = asyncio.Queue(maxsize=max(1, queue_size or PIPELINE_QUEUE_SIZE))
+    end_of_stream = object()
+    # Sampai `concurrency` segmen disintesis bersamaan; hasil tetap diantrekan sesuai urutan.
+    window = asyncio.Semaphore(registry.max_concurrency(selected_engine))
+    in_flight = asyncio.Queue()
+
+    async def launch():
+        try:
+            async for segment in iterate_segments():
+                await window.acquire()
+                if cancelled():
+                    window.release()
+                    break
+                task = asyncio.create_task(registry.synthesize(segment, actual_language, speaker_name_or_id,
+                                                               preferred=selected_engine))
+                await in_flight.put((segment, task))
+        except Exception as e:
+            logger.error("Pipelined TTS: text source failed: %s", e, exc_info=True)
+        finally:
+            await in_flight.put(None)
+
+    async def produce():
+        ready = 0
+        index = 0
+        try:
+            while True:
+                entry = await in_flight.get()
+                if entry is None or cancelled():
+                    break
+                segment, task = entry
+                index += 1
+                try:
+                    buffer, _ = await task
+                finally:
+                    window.release()
+                if buffer is None:
+                    logger.warning("Pipelined TTS: segment %d failed to synthesize; speaking it directly.", index)
+                    await queue.put(_SpeakDirectly(segment))
+                    continue
+                if ready == 0:
+                    logger.info("Pipelined TTS: first segment ready after %.0f ms.", (time.perf_counter() - start_time) * 1e3)
+                ready += 1
+                await queue.put((segment, buffer))
+        except Exception as e:
+            logger.error("Pipelined TTS producer failed: %s", e, exc_info=True)
+        finally:
+            while not in_flight.empty():
+                entry = in_flight.get_nowait()
+                if entry is not None:
+                    entry[1].cancel()
+        await queue.put(end_of_stream)
+
+    player = _plugin("play_voice_plugin").get_player()
+    launcher = asyncio.create_task(launch())
+    producer = asyncio.create_task(produce())
+
+    async def watch():
+        # Barge-in: audio berhenti seketika, bukan menunggu segmen selesai.
+        await cancel_event.wait()
+        player.stop()
+        launcher.cancel()
+        producer.cancel()
+        # Membangunkan consumer yang mungkin sedang menunggu antrean.
+        while True:
+            try:
+                queue.put_nowait(end_of_stream)
+                return
+            except asyncio.QueueFull:
+                queue.get_nowait()
+
+    watcher = asyncio.create_task(watch()) if cancel_event is not None else None
+    playing = collections.deque()
+
+    async def wait_oldest():
+        segment, future = playing.popleft()
+        metrics = await future
+        if metrics.get("dropped"):
+            return
+        if metrics.get("first_sample_at") is not None or not metrics.get("stopped"):
+            stats["spoken"].append(segment)
+        if stats["played"] == 0 and metrics.get("ttfs") is not None:
+            stats["first_sample_at"] = metrics["first_sample_at"]
+            logger.info("Pipelined TTS: time to first sound %.0f ms.", metrics["ttfs"] * 1e3)
+        stats["played"] += 1
+
+    try:
+        while True:
+            item = await queue.get()
+            if item is end_of_stream or cancelled():
+                break
+            if isinstance(item, _SpeakDirectly):
+                # Audio sebelumnya selesai dulu agar urutan segmen terjaga.
+                while playing:
+                    await wait_oldest()
+                synthesizing_engines = tuple(name for name in registry.names() if registry.supports(name, CAP_SYNTHESIZE))
+                if await _speak_until_cancelled(
+                        registry.speak(item.text, actual_language, rate, volume, exclude=synthesizing_engines),
+                        cancel_event):
+                    stats["played"] += 1
+                    stats["spoken"].append(item.text)
+                continue
+            segment, buffer = item
+            # Satu segmen menunggu di antrean player, jadi segmen berikutnya mulai begitu yang sekarang selesai.
+            playing.append((segment, asyncio.wrap_future(player.enqueue(buffer, origin=start_time))))
+            while len(playing) > 1:
+                await wait_oldest()
+        while playing:
+            await wait_oldest()
+    except asyncio.CancelledError:
+        player.stop()
+        raise
+    finally:
+        pending_tasks = [launcher, producer]
+        if watcher is not None:
+            pending_tasks.append(watcher)
+        for task in pending_tasks:
+            task.cancel()
+        await asyncio.gather(*pending_tasks, return_exceptions=True)
+        # Task sintesis yang sudah diluncurkan tetapi belum diambil producer.
+        while not in_flight.empty():
+            entry = in_flight.get_nowait()
+            if entry is not None:
+                entry[1].cancel()
+    stats["interrupted"] = cancelled()
+    logger.info("Pipelined TTS: %d/%d segments played in %.2f s (engine '%s')%s.",
+                stats["played"], stats["segments"], time.perf_counter() - start_time, selected_engine,
+                ", interrupted" if stats["interrupted"] else "")
+    return stats["played"]
+
+async def _dispatch(text: str, language: str, rate: int = None, volume: float = None,
+                    speaker_name_or_id=None, engine_override: str = None, default_engine: str = None):
+    if not text.strip():
+        logger.warning("Speak function called with empty text.")
+        return
+
+    actual_language = language if language is not None else DEFAULT_APP_LANGUAGE
+    selected_engine = _select_engine(actual_language, engine_override, default_engine)
+    logger.info("Dispatching TTS: Engine='%s', Lang='%s', Text='%s...'", selected_engine, actual_language, text[:30])
+
+    registry = tts_engines.get_registry()
+    try:
+        if PIPELINE_ENABLED and registry.supports(selected_engine, CAP_SYNTHESIZE):
+            await speak_pipelined(text, actual_language, rate, volume, speaker_name_or_id, selected_engine)
+        else:
+            await registry.speak(text, actual_language, rate, volume, speaker_name_or_id, preferred=selected_engine)
+    except Exception as e:
+        logger.error("General error during TTS dispatch for engine '%s': %s", selected_engine, e, exc_info=True)
 
 async def speak(text: str, language: str = None, rate: int = None, volume: float = None, 
                 speaker_name_or_id=None, engine_override: str = None):
     """
     Mengucapkan teks menggunakan engine TTS yang sesuai.
     Memilih engine berdasarkan `engine_override`, kemudian `language`, lalu `DEFAULT_TTS_ENGINE`.
+    Engine yang bisa mensintesis ke buffer memakai speak_pipelined() jika [tts_settings] pipeline_enabled aktif.
+    Jika engine gagal atau melewati SLO latensinya, rantai fallback [tts_engines] dipakai.
 
     Args:
         text (str): Teks yang akan diucapkan.
@@ -33,50 +301,30 @@ async def speak(text: str, language: str = None, rate: int = None, volume: float
         speaker_name_or_id (str/int, optional): Nama atau ID speaker (untuk Voicevox/Custom TTS).
         engine_override (str, optional): Paksa penggunaan engine tertentu ("default", "japanese", "custom").
     """
-    if not text.strip():
-        logger.warning("Speak function called with empty text.")
-        return
+    await _dispatch(text, language, rate, volume, speaker_name_or_id, engine_override)
 
+
+async def prewarm_audio_cache(role: str = None, language: str = None, engine_override: str = None,
+                              speaker_name_or_id=None) -> int:
+    """
+    Mengisi audio cache dengan PREWARM_PHRASES peran/bahasa aktif untuk engine yang akan dipakai speak().
+    Engine "default" (pyttsx3) memutar langsung tanpa file, jadi tidak di-cache.
+    Mengembalikan jumlah frasa yang baru disintesis.
+    """
     actual_language = language if language is not None else DEFAULT_APP_LANGUAGE
-    selected_engine = engine_override
-    if not selected_engine:
-        if actual_language.lower() == "ja":
-            selected_engine = "japanese"
-        else:
-            selected_engine = DEFAULT_TTS_ENGINE
-    logger.info(f"Dispatching TTS: Engine='{selected_engine}', Lang='{actual_language}', Text='{text[:30]}...'")
+    selected_engine = _select_engine(actual_language, engine_override)
+    registry = tts_engines.get_registry()
+    if not registry.supports(selected_engine, CAP_PREWARM):
+        logger.info("Audio cache prewarm skipped: engine '%s' does not use the audio cache.", selected_engine)
+        return 0
 
-    try:
-        if selected_engine == "default":
-            if asyncio.get_running_loop().is_running():
-                loop = asyncio.get_event_loop()
-                await loop.run_in_executor(None, default_tts_plugin.speak_default, text, actual_language, rate, volume)
-            else:
-                default_tts_plugin.speak_default(text, actual_language, rate, volume)
-        elif selected_engine == "japanese":
-            await japanese_tts_plugin.speak_japanese(text, speaker_id=speaker_name_or_id)
-        elif selected_engine == "custom":
-            await custom_model_tts_plugin.speak_custom(text, speaker_name_or_id=speaker_name_or_id, language=actual_language)
-        else:
-            logger.error(f"Unknown or unhandled TTS engine specified: '{selected_engine}'. Falling back to default.")
-            if asyncio.get_running_loop().is_running():
-                loop = asyncio.get_event_loop()
-                await loop.run_in_executor(None, default_tts_plugin.speak_default, text, actual_language, rate, volume)
-            else:
-                default_tts_plugin.speak_default(text, actual_language, rate, volume)
-    except RuntimeError as e:
-        if "cannot be called from a running event loop" in str(e).lower():
-            logger.error(f"Async TTS function called incorrectly from a sync context or nested asyncio.run: {e}")
-            if selected_engine == "japanese":
-                asyncio.ensure_future(japanese_tts_plugin.speak_japanese(text, speaker_id=speaker_name_or_id))
-            elif selected_engine == "custom":
-                asyncio.ensure_future(custom_model_tts_plugin.speak_custom(text, speaker_name_or_id=speaker_name_or_id, language=actual_language))
-            else:
-                 default_tts_plugin.speak_default(text, actual_language, rate, volume)
-        else:
-            logger.error(f"RuntimeError during TTS dispatch for engine '{selected_engine}': {e}", exc_info=True)
-    except Exception as e:
-        logger.error(f"General error during TTS dispatch for engine '{selected_engine}': {e}", exc_info=True)
+    phrases = audio_cache.load_prewarm_phrases(role=role, language=actual_language)
+    if not phrases:
+        logger.info("No prewarm phrases for role '%s' / language '%s'.", role, actual_language)
+        return 0
+    added = await registry.get(selected_engine).prewarm_cache(phrases, actual_language, speaker_name_or_id)
+    logger.info("Audio cache prewarm for engine '%s': %d/%d phrases newly synthesized.", selected_engine, added, len(phrases))
+    return added
 
 
 async def main_test_tts_dispatcher():
@@ -131,67 +379,21 @@ class TTS:
             speaker_name_or_id (str/int, optional): Nama atau ID speaker (untuk Voicevox/Custom TTS).
             engine_override (str, optional): Paksa penggunaan engine tertentu ("default", "japanese", "custom").
         """
-        if not text.strip():
-            logger.warning("Speak function called with empty text.")
-            return
-        actual_language = language if language is not None else self.language
-        selected_engine = engine_override
-        if not selected_engine:
-            if actual_language.lower() == "ja":
-                selected_engine = "japanese"
-            else:
-                selected_engine = self.default_engine
-        logger.info(f"Dispatching TTS: Engine='{selected_engine}', Lang='{actual_language}', Text='{text[:30]}...'")
-        try:
-            if selected_engine == "default":
-                if asyncio.get_running_loop().is_running():
-                    loop = asyncio.get_event_loop()
-                    await loop.run_in_executor(None, default_tts_plugin.speak_default, text, actual_language, rate, volume)
-                else:
-                    default_tts_plugin.speak_default(text, actual_language, rate, volume)
-            elif selected_engine == "japanese":
-                await japanese_tts_plugin.speak_japanese(text, speaker_id=speaker_name_or_id)
-            elif selected_engine == "custom":
-                await custom_model_tts_plugin.speak_custom(text, speaker_name_or_id=speaker_name_or_id, language=actual_language)
-            else:
-                logger.error(f"Unknown or unhandled TTS engine specified: '{selected_engine}'. Falling back to default.")
-                if asyncio.get_running_loop().is_running():
-                    loop = asyncio.get_event_loop()
-                    await loop.run_in_executor(None, default_tts_plugin.speak_default, text, actual_language, rate, volume)
-                else:
-                    default_tts_plugin.speak_default(text, actual_language, rate, volume)
-        except RuntimeError as e:
-            if "cannot be called from a running event loop" in str(e).lower():
-                logger.error(f"Async TTS function called incorrectly from a sync context or nested asyncio.run: {e}")
-                if selected_engine == "japanese":
-                    asyncio.ensure_future(japanese_tts_plugin.speak_japanese(text, speaker_id=speaker_name_or_id))
-                elif selected_engine == "custom":
-                    asyncio.ensure_future(custom_model_tts_plugin.speak_custom(text, speaker_name_or_id=speaker_name_or_id, language=actual_language))
-                else:
-                     default_tts_plugin.speak_default(text, actual_language, rate, volume)
-            else:
-                logger.error(f"RuntimeError during TTS dispatch for engine '{selected_engine}': {e}", exc_info=True)
-        except Exception as e:
-            logger.error(f"General error during TTS dispatch for engine '{selected_engine}': {e}", exc_info=True)
+        await _dispatch(text, language if language is not None else self.language, rate, volume,
+                        speaker_name_or_id, engine_override, self.default_engine)
             
-    def get_tts_engine(engine_name: str):
+    def get_tts_engine(self, engine_name: str) -> tts_engines.TTSEngine | None:
         """
-        Mengembalikan instance engine TTS berdasarkan nama engine.
+        Mengembalikan engine TTS (lihat core/tts_engines.py) berdasarkan nama engine.
         """
-        if engine_name == "default":
-            return default_tts_plugin
-        elif engine_name == "japanese":
-            return japanese_tts_plugin
-        elif engine_name == "custom":
-            return custom_model_tts_plugin
-        else:
-            logger.error(f"Unknown TTS engine requested: {engine_name}")
-            return None
-        
-        
+        engine = tts_engines.get_registry().get(engine_name)
+        if engine is None:
+            logger.error("Unknown TTS engine requested: %s", engine_name)
+        return engine
+
+
 if __name__ == '__main__':
     # Setup basic logging jika modul dijalankan sendiri
-    if not logging.getLogger().hasHandlers() and not logger.hasHandlers():
-        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    setup_logging(console=True)
 
     asyncio.run(main_test_tts_dispatcher())
\ No newline at end of file
@@ -0,0 +1,362 @@
+# core/tts_engines.py
+"""
+Protokol engine TTS, registry, dan rantai fallback yang sadar latensi.
+
+Setiap engine (pyttsx3, Voicevox, Coqui VITS) dibungkus adaptor yang memenuhi
+protokol `TTSEngine`: `synthesize()` ke AudioBuffer (jika bisa), `speak()`
+langsung, `warmup()`, dan `prewarm_cache()`; engine speak-only boleh
+menyediakan `stop()` untuk barge-in. Registry memberi tiap engine
+semaphore sendiri ([tts_engines] <engine>_max_concurrency) agar sesi yang
+berjalan bersamaan tidak membanjiri Voicevox atau Coqui.
+
+Kesehatan engine dilacak dengan EWMA latensi sintesis dan jumlah kegagalan
+beruntun. Engine yang EWMA-nya melewati SLO (`<engine>_slo_ms`), timeout
+(SLO x `slo_timeout_factor`), atau error diturunkan ke belakang rantai selama
+`cooldown_seconds` (bertambah untuk kegagalan beruntun), lalu dicoba lagi.
+Rantai per bahasa: `fallback_chain_<lang>` atau `fallback_chain`.
+"""
+import asyncio
+import importlib
+import sys
+import threading
+import time
+from typing import Protocol, runtime_checkable
+
+from core import config_manager
+from core.logging_setup import get_logger
+
+# --- Setup Logging ---
+logger = get_logger(__name__)
+
+SECTION = "tts_engines"
+
+# Kemampuan yang bisa dideklarasikan engine.
+CAP_SYNTHESIZE = "synthesize"  # menghasilkan AudioBuffer (bisa di-pipeline dan di-cache)
+CAP_SPEAK = "speak"            # mengucapkan langsung
+CAP_PREWARM = "prewarm"        # mendukung prewarm_cache()
+
+
+@runtime_checkable
+class TTSEngine(Protocol):
+    name: str
+    languages: tuple[str, ...]  # "*" = semua bahasa
+    capabilities: frozenset[str]
+
+    async def synthesize(self, text: str, language: str, speaker=None):
+        """AudioBuffer atau None. Engine tanpa CAP_SYNTHESIZE boleh melempar NotImplementedError."""
+        ...
+
+    async def speak(self, text: str, language: str, rate: int = None, volume: float = None, speaker=None) -> bool:
+        ...
+
+    async def warmup(self) -> None:
+        ...
+
+    async def prewarm_cache(self, phrases: list[str], language: str, speaker=None) -> int:
+        ...
+
+
+class _PluginEngine:
+    """Dasar adaptor: plugin diimpor saat pertama dipakai (lihat text_to_speech._ENGINE_PLUGIN_MODULES)."""
+
+    name = ""
+    module_name = ""
+    languages: tuple[str, ...] = ("*",)
+    capabilities = frozenset()
+    default_max_concurrency = 1
+
+    @property
+    def plugin(self):
+        return importlib.import_module(self.module_name)
+
+    async def synthesize(self, text: str, language: str, speaker=None):
+        raise NotImplementedError(f"TTS engine '{self.name}' cannot synthesize to a buffer")
+
+    async def warmup(self) -> None:
+        hook = getattr(self.plugin, "warmup", None)
+        if hook is not None:
+            await hook()
+
+    async def prewarm_cache(self, phrases: list[str], language: str, speaker=None) -> int:
+        return 0
+
+    def __repr__(self) -> str:
+        return f"<TTSEngine {self.name}>"
+
+
+class Pyttsx3Engine(_PluginEngine):
+    name = "default"
+    module_name = "plugins.default_tts"
+    capabilities = frozenset({CAP_SPEAK})
+
+    async def speak(self, text: str, language: str, rate: int = None, volume: float = None, speaker=None) -> bool:
+        return bool(await self.plugin.speak_default_async(text, language, rate, volume))
+
+    def stop(self) -> None:
+        """Menghentikan speak() yang sedang berjalan; plugin yang belum diimpor tidak sedang bicara."""
+        plugin = sys.modules.get(self.module_name)
+        if plugin is not None:
+            plugin.stop_speaking()
+
+
+class VoicevoxEngine(_PluginEngine):
+    name = "japanese"
+    module_name = "plugins.japanese_tts"
+    languages = ("ja",)
+    capabilities = frozenset({CAP_SYNTHESIZE, CAP_SPEAK, CAP_PREWARM})
+    # Engine HTTP terpisah: beberapa query/sintesis boleh berjalan bersamaan (lihat pool di voicevox_api).
+    default_max_concurrency = config_manager.get_int("tts_voicevox_specifics", "max_concurrency", 2)
+
+    async def synthesize(self, text: str, language: str, speaker=None):
+        return await self.plugin.synthesize_japanese(text, speaker_id=speaker)
+
+    async def speak(self, text: str, language: str, rate: int = None, volume: float = None, speaker=None) -> bool:
+        return bool(await self.plugin.speak_japanese(text, speaker_id=speaker))
+
+    async def warmup(self) -> None:
+        # Pool HTTP dan inisialisasi speaker ada di voicevox_api/voicevox_catalog.
+        await importlib.import_module("plugins.voicevox_api").warmup()
+        await importlib.import_module("plugins.voicevox_catalog").warmup()
+
+    async def prewarm_cache(self, phrases: list[str], language: str, speaker=None) -> int:
+        return await self.plugin.prewarm_cache(phrases, speaker_id=speaker)
+
+
+class CoquiEngine(_PluginEngine):
+    name = "custom"
+    module_name = "plugins.custom_model_tts"
+    capabilities = frozenset({CAP_SYNTHESIZE, CAP_SPEAK, CAP_PREWARM})
+
+    async def synthesize(self, text: str, language: str, speaker=None):
+        return await self.plugin.synthesize_custom(text, speaker_name_or_id=speaker, language=language)
+
+    async def speak(self, text: str, language: str, rate: int = None, volume: float = None, speaker=None) -> bool:
+        return await self.plugin.speak_custom(text, speaker_name_or_id=speaker, language=language) is not None
+
+    async def prewarm_cache(self, phrases: list[str], language: str, speaker=None) -> int:
+        return await self.plugin.prewarm_cache(phrases, speaker_name_or_id=speaker, language=language)
+
+
+class EngineHealth:
+    """EWMA latensi dan circuit breaker sederhana untuk satu engine."""
+
+    def __init__(self, slo_seconds: float, alpha: float, cooldown_seconds: float):
+        self.slo_seconds = slo_seconds
+        self.alpha = alpha
+        self.cooldown_seconds = cooldown_seconds
+        self.ewma_latency = None
+        self.consecutive_failures = 0
+        self.demoted_until = 0.0
+        self.calls = 0
+        self.failures = 0
+
+    def healthy(self, now: float = None) -> bool:
+        return (now if now is not None else time.monotonic()) >= self.demoted_until
+
+    def record_success(self, latency: float):
+        self.calls += 1
+        self.consecutive_failures = 0
+        if self.ewma_latency is None:
+            self.ewma_latency = latency
+        else:
+            self.ewma_latency = self.alpha * latency + (1 - self.alpha) * self.ewma_latency
+        if self.ewma_latency > self.slo_seconds:
+            self.demoted_until = time.monotonic() + self.cooldown_seconds
+            return False
+        self.demoted_until = 0.0
+        return True
+
+    def record_ok(self):
+        """Keberhasilan tanpa ukuran latensi (speak() langsung, yang durasinya termasuk pemutaran)."""
+        self.calls += 1
+        self.consecutive_failures = 0
+        if self.ewma_latency is None or self.ewma_latency <= self.slo_seconds:
+            self.demoted_until = 0.0
+
+    def record_failure(self):
+        self.calls += 1
+        self.failures += 1
+        self.consecutive_failures += 1
+        backoff = min(2 ** (self.consecutive_failures - 1), 8)
+        self.demoted_until = time.monotonic() + self.cooldown_seconds * backoff
+
+    def snapshot(self) -> dict:
+        return {
+            "ewma_ms": round(self.ewma_latency * 1e3, 1) if self.ewma_latency is not None else None,
+            "slo_ms": round(self.slo_seconds * 1e3, 1),
+            "healthy": self.healthy(),
+            "consecutive_failures": self.consecutive_failures,
+            "calls": self.calls,
+            "failures": self.failures,
+        }
+
+
+class _EngineSlot:
+    def __init__(self, engine: TTSEngine, max_concurrency: int, health: EngineHealth):
+        self.engine = engine
+        self.max_concurrency = max(1, max_concurrency)
+        self.health = health
+        # asyncio.Semaphore terikat ke event loop; dibuat ulang jika loop berganti.
+        self._semaphore = None
+        self._loop = None
+
+    def semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._semaphore
+
+
+class TTSEngineRegistry:
+    def __init__(self):
+        self._slots: dict[str, _EngineSlot] = {}
+        self._lock = threading.Lock()
+        self.timeout_factor = config_manager.get_float(SECTION, "slo_timeout_factor", 3.0)
+        self.alpha = config_manager.get_float(SECTION, "ewma_alpha", 0.3)
+        self.cooldown_seconds = config_manager.get_float(SECTION, "cooldown_seconds", 30.0)
+
+    def register(self, engine: TTSEngine, max_concurrency: int = None, slo_ms: float = None):
+        if not isinstance(engine, TTSEngine):
+            raise TypeError(f"{engine!r} does not implement the TTSEngine protocol")
+        if max_concurrency is None:
+            max_concurrency = config_manager.get_int(SECTION, f"{engine.name}_max_concurrency",
+                                                     getattr(engine, "default_max_concurrency", 1))
+        if slo_ms is None:
+            slo_ms = config_manager.get_float(SECTION, f"{engine.name}_slo_ms", 2000.0)
+        health = EngineHealth(slo_ms / 1e3, self.alpha, self.cooldown_seconds)
+        with self._lock:
+            self._slots[engine.name] = _EngineSlot(engine, max_concurrency, health)
+        logger.debug("Registered TTS engine '%s' (max_concurrency=%d, slo=%.0f ms).", engine.name, max_concurrency, slo_ms)
+
+    def get(self, name: str) -> TTSEngine | None:
+        slot = self._slots.get(name)
+        return slot.engine if slot else None
+
+    def names(self) -> list[str]:
+        return list(self._slots)
+
+    def max_concurrency(self, name: str) -> int:
+        slot = self._slots.get(name)
+        return slot.max_concurrency if slot else 1
+
+    def health(self) -> dict[str, dict]:
+        return {name: slot.health.snapshot() for name, slot in self._slots.items()}
+
+    def supports(self, name: str, capability: str) -> bool:
+        slot = self._slots.get(name)
+        return slot is not None and capability in slot.engine.capabilities
+
+    def chain_for(self, language: str, preferred: str = None, capability: str = None) -> list[str]:
+        """
+        Urutan engine yang dicoba: engine pilihan, lalu rantai fallback bahasa ini. Engine yang
+        tidak mendukung bahasa/kemampuan dibuang; engine yang sedang diturunkan pindah ke belakang.
+        """
+        language = (language or "").lower()
+        configured = config_manager.get_config_value(SECTION, f"fallback_chain_{language}") \
+            or config_manager.get_config_value(SECTION, "fallback_chain", "custom, default")
+        names = ([preferred] if preferred else []) + [name.strip() for name in configured.split(",") if name.strip()]
+        chain = []
+        for name in dict.fromkeys(names):
+            slot = self._slots.get(name)
+            if slot is None:
+                if name == preferred:
+                    logger.error("Unknown TTS engine '%s'; using fallback chain.", name)
+                continue
+            if "*" not in slot.engine.languages and language not in slot.engine.languages:
+                continue
+            if capability and capability not in slot.engine.capabilities:
+                continue
+            chain.append(name)
+        now = time.monotonic()
+        return sorted(chain, key=lambda name: not self._slots[name].health.healthy(now))
+
+    async def _call(self, name: str, method: str, *args, timed: bool = True):
+        slot = self._slots[name]
+        timeout = slot.health.slo_seconds * self.timeout_factor if timed else None
+        async with slot.semaphore():
+            start = time.perf_counter()
+            try:
+                result = await asyncio.wait_for(getattr(slot.engine, method)(*args), timeout)
+            except asyncio.TimeoutError:
+                slot.health.record_failure()
+                logger.warning("TTS engine '%s' %s exceeded %.1f s; demoted.", name, method, timeout)
+                return None
+            except Exception as e:
+                slot.health.record_failure()
+                logger.warning("TTS engine '%s' %s failed: %s", name, method, e, exc_info=True)
+                return None
+            latency = time.perf_counter() - start
+        if not result:
+            slot.health.record_failure()
+            return result
+        if not timed:
+            slot.health.record_ok()
+        elif not slot.health.record_success(latency):
+            logger.warning("TTS engine '%s' latency EWMA %.0f ms above SLO %.0f ms; demoted for %.0f s.",
+                           name, slot.health.ewma_latency * 1e3, slot.health.slo_seconds * 1e3, self.cooldown_seconds)
+        return result
+
+    async def synthesize(self, text: str, language: str, speaker=None, preferred: str = None):
+        """
+        Mensintesis lewat engine pertama di rantai yang berhasil. Speaker hanya diteruskan ke
+        engine pilihan (ID Voicevox tidak berarti bagi Coqui). Mengembalikan (AudioBuffer, nama engine)
+        atau (None, None).
+        """
+        for name in self.chain_for(language, preferred, CAP_SYNTHESIZE):
+            buffer = await self._call(name, "synthesize", text, language, speaker if name == preferred else None)
+            if buffer is not None:
+                if preferred and name != preferred:
+                    logger.info("TTS fallback: segment synthesized by '%s' instead of '%s'.", name, preferred)
+                return buffer, name
+        return None, None
+
+    async def speak(self, text: str, language: str, rate: int = None, volume: float = None,
+                    speaker=None, preferred: str = None, exclude: tuple = ()) -> str | None:
+        """Mengucapkan langsung lewat rantai fallback; mengembalikan nama engine yang berhasil."""
+        for name in self.chain_for(language, preferred, CAP_SPEAK):
+            if name in exclude:
+                continue
+            # Durasi speak() termasuk pemutaran, jadi tidak dibandingkan dengan SLO sintesis.
+            ok = await self._call(name, "speak", text, language, rate, volume,
+                                  speaker if name == preferred else None, timed=False)
+            if ok:
+                if preferred and name != preferred:
+                    logger.info("TTS fallback: spoken by '%s' instead of '%s'.", name, preferred)
+                return name
+        logger.error("No TTS engine could speak the text (language '%s').", language)
+        return None
+
+    def stop_speaking(self):
+        """Barge-in: memanggil stop() pada engine speak-only yang menyediakannya."""
+        for name, slot in list(self._slots.items()):
+            stop = getattr(slot.engine, "stop", None)
+            if stop is None:
+                continue
+            try:
+                stop()
+            except Exception as e:
+                logger.warning("Stopping TTS engine '%s' failed: %s", name, e)
+
+    async def warmup(self, names: list[str] = None):
+        for name in names or self.names():
+            try:
+                await self._slots[name].engine.warmup()
+            except Exception as e:
+                logger.warning("Warm-up of TTS engine '%s' failed: %s", name, e)
+
+
+_registry_instance = None
+_registry_lock = threading.Lock()
+
+def get_registry() -> TTSEngineRegistry:
+    """Registry singleton berisi engine bawaan (default, japanese, custom)."""
+    global _registry_instance
+    if _registry_instance is None:
+        with _registry_lock:
+            if _registry_instance is None:
+                registry = TTSEngineRegistry()
+                for engine in (Pyttsx3Engine(), VoicevoxEngine(), CoquiEngine()):
+                    registry.register(engine)
+                _registry_instance = registry
+    return _registry_instance
@@ -0,0 +1,382 @@
+# core/voice_call.py
+"""
+Mode panggilan suara (menu 3): STT -> terjemahan (opsional) -> LLM stream -> pembersih TTS -> TTS pipeline.
+
+Setiap tahap berjalan sebagai task sendiri dan dihubungkan dengan asyncio.Queue berbatas,
+jadi tahap yang lambat menahan tahap sebelumnya (backpressure) alih-alih menumpuk data:
+  capture     merekam frasa berikutnya (thread) selagi balasan sebelumnya masih diproses;
+  recognize   mentranskripsi + menerjemahkan masukan, satu giliran (turn) per frasa;
+  respond     per giliran: LanguageModel.generate_response_stream() (thread) -> potongan teks
+              -> StreamingTTSCleaner -> kalimat bersih -> text_to_speech.speak_stream().
+Kalimat pertama sudah disintesis dan diputar selagi LLM masih menulis sisanya.
+
+Setiap giliran mencatat waktu per tahap (ms) dan latensi dari akhir ucapan (saat
+endpointing mendeteksi jeda) sampai sampel audio pertama terdengar; target di
+[voice_call] target_latency_ms. Dengan perekaman kontinu, akhir ucapan diputuskan
+core/endpointing.py (jeda adaptif, paling lama `pause_threshold`); tanpa itu jedanya tetap `pause_threshold`.
+
+Barge-in ([voice_call] barge_in): capture mendeteksi awal ucapan selagi giliran masih berjalan.
+Audio berhenti seketika, sintesis yang tertunda dibatalkan, thread LLM berhenti pada potongan
+berikutnya, dan bagian balasan yang sempat terdengar disimpan di ContextManager sebagai terpotong.
+Selama pemutaran ambang energi dikali `barge_in_energy_factor` agar gema suara sendiri tidak memicu.
+
+Dengan [voice_call] continuous_capture, capture memakai core/audio_capture.AudioCaptureService:
+mikrofon tetap terbuka sepanjang panggilan, jadi ucapan di antara giliran tidak hilang dan
+awalnya tidak terpotong. Jika stream gagal dibuka, panggilan kembali ke listen() per frasa.
+"""
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+from core import config_manager, text_to_speech
+from core.audio_capture import AudioCaptureService
+from core.logging_setup import get_logger
+from core.text_processing import StreamingTTSCleaner
+
+# --- Setup Logging ---
+logger = get_logger(__name__)
+
+SECTION = "voice_call"
+
+# Kode bahasa aplikasi -> kode bahasa Google Web Speech.
+STT_LANGUAGE_CODES = {"id": "id-ID", "en": "en-US", "ja": "ja-JP"}
+END_CALL_PHRASES = ("selesai", "akhiri panggilan", "tutup panggilan", "end call", "hang up", "stop")
+
+_END = object()
+
+
+def stt_language_for(language: str) -> str:
+    configured = config_manager.get_config_value("stt_settings", "default_language", "id-ID")
+    if configured.lower().split("-")[0] == language.lower():
+        return configured
+    return STT_LANGUAGE_CODES.get(language.lower(), language)
+
+
+async def _iterate_queue(queue: asyncio.Queue):
+    while True:
+        item = await queue.get()
+        if item is _END:
+            return
+        yield item
+
+
+def _ms(start: float | None, end: float | None) -> float | None:
+    if start is None or end is None:
+        return None
+    return (end - start) * 1e3
+
+
+def _format_timings(timings: dict) -> str:
+    return ", ".join("%s %s" % (name, "-" if value is None else "%.0f ms" % value) for name, value in timings.items())
+
+
+class VoiceCallSession:
+    """
+    Satu panggilan suara. `translate` adalah coroutine (text, target_lang, source_lang) -> str;
+    None berarti tanpa terjemahan. `context_manager` (opsional) menyimpan histori giliran.
+    """
+
+    def __init__(self, language_model, stt_processor, source_language: str, target_language: str,
+                 role: str, translate=None, context_manager=None):
+        self.language_model = language_model
+        self.stt = stt_processor
+        self.source_language = source_language
+        self.target_language = target_language
+        self.role = role
+        self.translate = translate
+        self.context_manager = context_manager
+
+        self.pause_threshold = config_manager.get_float(SECTION, "pause_threshold", 0.6)
+        self.listen_timeout = config_manager.get_float(SECTION, "listen_timeout", 1.0)
+        self.phrase_time_limit = config_manager.get_float(SECTION, "phrase_time_limit", 15.0)
+        self.chunk_queue_size = config_manager.get_int(SECTION, "chunk_queue_size", 8)
+        self.sentence_queue_size = config_manager.get_int(SECTION, "sentence_queue_size", 2)
+        self.target_latency_ms = config_manager.get_float(SECTION, "target_latency_ms", 1000.0)
+        self.ignore_speech_during_playback = config_manager.get_bool(SECTION, "ignore_speech_during_playback", True)
+        self.echo_tail_seconds = config_manager.get_float(SECTION, "echo_tail_seconds", 0.3)
+        self.barge_in = config_manager.get_bool(SECTION, "barge_in", True)
+        self.barge_in_energy_factor = config_manager.get_float(SECTION, "barge_in_energy_factor", 1.5)
+        self.barge_in_min_speech = config_manager.get_float(SECTION, "barge_in_min_speech_ms", 200.0) / 1e3
+        self.continuous_capture = config_manager.get_bool(SECTION, "continuous_capture", True)
+
+        self.stop_event = asyncio.Event()
+        self.turns: list[dict] = []
+        # (mulai, selesai) pemutaran balasan terakhir; selesai None = masih diputar.
+        self._playback_window = (None, None)
+        # Giliran yang sedang dijawab: {"cancel_event": asyncio.Event, "cancelled": threading.Event}.
+        self._active_turn = None
+        self._loop = None
+        self._capture_service = None
+        # Selama balasan diputar, gema speaker tidak boleh ikut dihitung sebagai derau ruangan.
+        self._calibrator = getattr(stt_processor, "calibrator", None)
+
+    # --- Tahap capture ---
+    def _overlaps_playback(self, speech_start: float, speech_end: float) -> bool:
+        started, ended = self._playback_window
+        if started is None:
+            return False
+        ended = float("inf") if ended is None else ended + self.echo_tail_seconds
+        return speech_start < ended and speech_end > started
+
+    def _playing(self) -> bool:
+        started, ended = self._playback_window
+        return started is not None and ended is None
+
+    def _onset_threshold(self) -> float:
+        threshold = self.stt.recognizer.energy_threshold
+        return threshold * self.barge_in_energy_factor if self._playing() else threshold
+
+    def _on_speech_start(self):
+        """Dipanggil di event loop saat capture mendeteksi awal ucapan."""
+        turn = self._active_turn
+        if turn is None or turn["cancel_event"].is_set():
+            return
+        logger.info("Voice call: barge-in, user started speaking; cancelling the current reply.")
+        turn["barge_in_at"] = time.perf_counter()
+        turn["cancelled"].set()
+        turn["cancel_event"].set()
+
+    def _listen(self):
+        if not self.barge_in:
+            return self.stt.listen(self.phrase_time_limit, self.listen_timeout, stt_language_for(self.source_language))
+        return self.stt.listen_with_onset(
+            self.phrase_time_limit, self.listen_timeout, self._onset_threshold, self.barge_in_min_speech,
+            lambda: self._loop.call_soon_threadsafe(self._on_speech_start),
+        )
+
+    async def _capture(self, audio_queue: asyncio.Queue):
+        while not self.stop_event.is_set():
+            listen_started = time.perf_counter()
+            try:
+                audio = await asyncio.to_thread(self._listen)
+            except Exception as e:
+                logger.error("Voice call: microphone capture failed: %s", e, exc_info=True)
+                self.stop_event.set()
+                break
+            if audio is None:
+                continue
+            speech_end = time.perf_counter()
+            duration = len(audio.frame_data) / float(audio.sample_rate * audio.sample_width)
+            speech_start = max(listen_started, speech_end - self.pause_threshold - duration)
+            if not self.barge_in and self.ignore_speech_during_playback and self._overlaps_playback(speech_start, speech_end):
+                logger.info("Voice call: ignored %.1f s of speech captured during playback (echo guard).", duration)
+                continue
+            # Antrean berukuran 1: frasa berikutnya menunggu sampai giliran sebelumnya diambil.
+            await audio_queue.put((audio, speech_end, None))
+
+    async def _start_capture_service(self) -> bool:
+        service = AudioCaptureService(
+            self._onset_threshold, on_speech_start=self._on_speech_start if self.barge_in else None,
+            language=stt_language_for(self.source_language), start_ms=int(self.barge_in_min_speech * 1e3),
+            max_silence_ms=self.pause_threshold * 1e3, calibrator=self._calibrator,
+        ).start()
+        if await service.wait_started():
+            self._capture_service = service
+            return True
+        service.stop()
+        logger.warning("Voice call: continuous capture unavailable (%s); falling back to per-phrase listening.",
+                       service.error)
+        return False
+
+    async def _capture_continuous(self, audio_queue: asyncio.Queue):
+        service = self._capture_service
+        while not self.stop_event.is_set():
+            utterance = await service.get()
+            if utterance is None:
+                if not self.stop_event.is_set():
+                    logger.error("Voice call: continuous microphone capture stopped: %s", service.error)
+                    self.stop_event.set()
+                break
+            if not self.barge_in and self.ignore_speech_during_playback \
+                    and self._overlaps_playback(utterance.started_at, utterance.ended_at):
+                logger.info("Voice call: ignored %.1f s of speech captured during playback (echo guard).",
+                            utterance.duration)
+                continue
+            await audio_queue.put((utterance.to_audio_data(), utterance.detected_at, utterance.endpoint_delay * 1e3))
+
+    # --- Tahap recognize (+ terjemahan) ---
+    async def _recognize(self, audio_queue: asyncio.Queue, turn_queue: asyncio.Queue):
+        stt_language = stt_language_for(self.source_language)
+        while True:
+            audio, speech_end, endpoint_ms = await audio_queue.get()
+            timings = {} if endpoint_ms is None else {"endpoint": endpoint_ms}
+            started = time.perf_counter()
+            text = await asyncio.to_thread(self.stt.recognize, audio, stt_language)
+            timings["stt"] = _ms(started, time.perf_counter())
+            if not text or not text.strip():
+                continue
+            text = text.strip()
+            print(f"[User ({self.source_language})]: {text}")
+            if text.lower().strip(" .!?") in END_CALL_PHRASES:
+                logger.info("Voice call: end phrase '%s' heard.", text)
+                self.stop_event.set()
+                return
+
+            prompt = text
+            if self.translate is not None and self.source_language.lower() != self.target_language.lower():
+                started = time.perf_counter()
+                prompt = await self.translate(text, target_lang=self.target_language,
+                                              source_lang=self.source_language) or text
+                timings["translate"] = _ms(started, time.perf_counter())
+            await turn_queue.put({"text": text, "prompt": prompt, "speech_end": speech_end, "timings": timings})
+
+    # --- Tahap respond: LLM stream -> pembersih -> TTS ---
+    async def _stream_llm(self, prompt: str, history: list, chunk_queue: asyncio.Queue, marks: dict,
+                          parts: list, cancelled: threading.Event):
+        loop = asyncio.get_running_loop()
+
+        def put(item):
+            future = asyncio.run_coroutine_threadsafe(chunk_queue.put(item), loop)
+            while True:
+                try:
+                    return future.result(timeout=0.2)
+                except concurrent.futures.TimeoutError:
+                    if cancelled.is_set():
+                        future.cancel()
+                        return None
+
+        def run():
+            marks["llm_start"] = time.perf_counter()
+            stream = self.language_model.generate_response_stream(
+                language=self.target_language, prompt=prompt, chat_history=history,
+                role_override=self.role, task="FULL",
+            )
+            for chunk in stream:
+                if cancelled.is_set():
+                    break
+                if "llm_first_chunk" not in marks:
+                    marks["llm_first_chunk"] = time.perf_counter()
+                parts.append(chunk)
+                put(chunk)
+            marks["llm_end"] = time.perf_counter()
+
+        try:
+            await asyncio.to_thread(run)
+        except Exception as e:
+            logger.error("Voice call: language model stream failed: %s", e, exc_info=True)
+        finally:
+            await chunk_queue.put(_END)
+
+    async def _clean(self, chunk_queue: asyncio.Queue, sentence_queue: asyncio.Queue, marks: dict):
+        cleaner = StreamingTTSCleaner()
+        try:
+            async for chunk in _iterate_queue(chunk_queue):
+                for sentence in cleaner.feed(chunk):
+                    marks.setdefault("first_sentence", time.perf_counter())
+                    await sentence_queue.put(sentence)
+            for sentence in cleaner.finish():
+                marks.setdefault("first_sentence", time.perf_counter())
+                await sentence_queue.put(sentence)
+        finally:
+            await sentence_queue.put(_END)
+
+    async def respond(self, turn: dict) -> str:
+        """Menjalankan satu giliran; mengembalikan balasan yang terdengar (terpotong jika barge-in)."""
+        history = self.context_manager.retrieve() if self.context_manager else None
+        chunk_queue = asyncio.Queue(maxsize=max(1, self.chunk_queue_size))
+        sentence_queue = asyncio.Queue(maxsize=max(1, self.sentence_queue_size))
+        marks, tts_stats, parts = {}, {}, []
+        active = {"cancel_event": asyncio.Event(), "cancelled": threading.Event()}
+        speech_end = turn["speech_end"]
+
+        llm_task = asyncio.create_task(self._stream_llm(turn["prompt"], history, chunk_queue, marks, parts,
+                                                        active["cancelled"]))
+        clean_task = asyncio.create_task(self._clean(chunk_queue, sentence_queue, marks))
+        self._active_turn = active
+        self._playback_window = (time.perf_counter(), None)
+        if self._calibrator is not None:
+            self._calibrator.paused = True
+        try:
+            await text_to_speech.speak_stream(_iterate_queue(sentence_queue), self.target_language,
+                                              cancel_event=active["cancel_event"], origin=speech_end, stats=tts_stats)
+            if not active["cancel_event"].is_set():
+                await llm_task
+                await clean_task
+        finally:
+            self._active_turn = None
+            # Thread LLM berhenti pada potongan berikutnya; task-nya tidak perlu ditunggu.
+            active["cancelled"].set()
+            for task in (llm_task, clean_task):
+                task.cancel()
+            await asyncio.gather(llm_task, clean_task, return_exceptions=True)
+            self._playback_window = (self._playback_window[0], time.perf_counter())
+            if self._calibrator is not None:
+                self._calibrator.paused = False
+        interrupted = active["cancel_event"].is_set()
+
+        timings = dict(turn["timings"])
+        timings["llm_first_chunk"] = _ms(marks.get("llm_start"), marks.get("llm_first_chunk"))
+        timings["llm_total"] = _ms(marks.get("llm_start"), marks.get("llm_end"))
+        timings["first_sentence"] = _ms(speech_end, marks.get("first_sentence"))
+        timings["first_audio"] = _ms(speech_end, tts_stats.get("first_sample_at"))
+        timings["turn_total"] = _ms(speech_end, time.perf_counter())
+        if interrupted:
+            timings["barge_in_stop"] = _ms(active.get("barge_in_at"), time.perf_counter())
+        self.turns.append(timings)
+        first_audio = timings["first_audio"]
+        if first_audio is not None and first_audio > self.target_latency_ms:
+            logger.warning("Voice call turn %d: end of speech -> first audio %.0f ms exceeds target %.0f ms (%s).",
+                           len(self.turns), first_audio, self.target_latency_ms, _format_timings(timings))
+        else:
+            logger.info("Voice call turn %d: %s.", len(self.turns), _format_timings(timings))
+
+        if interrupted:
+            reply = " ".join(" ".join(tts_stats.get("spoken", [])).split())
+            logger.info("Voice call turn %d interrupted: %d/%d chars of the reply were heard.",
+                        len(self.turns), len(reply), len("".join(parts)))
+            print(f"[Alph ({self.target_language}), disela]: {reply or '-'}")
+        else:
+            reply = " ".join("".join(parts).split())
+            print(f"[Alph ({self.target_language})]: {reply}" if reply else "Alph tidak memberikan balasan.")
+        if self.context_manager and (reply or interrupted):
+            self.context_manager.remember("user", turn["text"])
+            self.context_manager.remember("model", reply, truncated=interrupted)
+        return reply
+
+    async def _respond_loop(self, turn_queue: asyncio.Queue):
+        while True:
+            turn = await turn_queue.get()
+            try:
+                await self.respond(turn)
+            except Exception as e:
+                logger.error("Voice call: turn failed: %s", e, exc_info=True)
+
+    async def run(self):
+        """Menjalankan panggilan sampai stop_event di-set (frasa penutup, Enter, atau error mikrofon)."""
+        self._loop = asyncio.get_running_loop()
+        audio_queue = asyncio.Queue(maxsize=1)
+        turn_queue = asyncio.Queue(maxsize=1)
+        recognizer = self.stt.recognizer
+        saved = (recognizer.pause_threshold, recognizer.non_speaking_duration)
+        recognizer.pause_threshold = self.pause_threshold
+        recognizer.non_speaking_duration = min(recognizer.non_speaking_duration, self.pause_threshold)
+        logger.info("Voice call started (input %s, output %s, role %s, pause %.2f s, barge-in %s).",
+                    self.source_language, self.target_language, self.role, self.pause_threshold,
+                    "on" if self.barge_in else "off")
+
+        capture = self._capture
+        if self.continuous_capture and await self._start_capture_service():
+            capture = self._capture_continuous
+        stages = [
+            asyncio.create_task(capture(audio_queue), name="voice-call-capture"),
+            asyncio.create_task(self._recognize(audio_queue, turn_queue), name="voice-call-recognize"),
+            asyncio.create_task(self._respond_loop(turn_queue), name="voice-call-respond"),
+        ]
+        try:
+            await self.stop_event.wait()
+        finally:
+            for task in stages:
+                task.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
+            if self._capture_service is not None:
+                await asyncio.to_thread(self._capture_service.stop)
+                self._capture_service = None
+            recognizer.pause_threshold, recognizer.non_speaking_duration = saved
+        latencies = [timings["first_audio"] for timings in self.turns if timings.get("first_audio") is not None]
+        if latencies:
+            logger.info("Voice call ended: %d turns, end of speech -> first audio median %.0f ms (target %.0f ms).",
+                        len(self.turns), sorted(latencies)[len(latencies) // 2], self.target_latency_ms)
+        else:
+            logger.info("Voice call ended: %d turns.", len(self.turns))
+        return self.turns
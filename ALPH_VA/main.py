@@ -2,47 +2,13 @@
 import asyncio, configparser
 import os, json, logging
 from core import config_manager as app_config
+from core import logging_setup
 from core import module_manager
 
 # --- Setup Logging ---
-try:
-    _cfg_for_paths = app_config.ConfigManager()
-    _project_root_from_cfg = _cfg_for_paths.get_config_value(
-        "general", "project_root_dir", app_config.PROJECT_ROOT_DIR
-    )
-    LOG_DIR_MAIN = os.path.join(_project_root_from_cfg, "logs")
-except AttributeError:
-    print(
-        "WARNING: app_config.PROJECT_ROOT_DIR not found, using fallback for LOG_DIR_MAIN."
-    )
-    LOG_DIR_MAIN = os.path.join(
-        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "logs"
-    )
-except Exception as e_path:
-    print(
-        "ERROR setting up LOG_DIR_MAIN: %s. Using current directory as fallback.",
-        e_path,
-    )
-    LOG_DIR_MAIN = os.getcwd()
-
-
-if not os.path.exists(LOG_DIR_MAIN):
-    try:
-        os.makedirs(LOG_DIR_MAIN, exist_ok=True)
-    except OSError as e:
-        print("ERROR: Could not create main log directory %s: %s", LOG_DIR_MAIN, e)
-        LOG_DIR_MAIN = os.getcwd()
-
-APP_LOG_FILE = os.path.join(LOG_DIR_MAIN, "virtual_assistant.log")
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(module)s:%(lineno)d - %(message)s",
-    handlers=[
-        logging.FileHandler(APP_LOG_FILE, encoding="utf-8"),
-        logging.StreamHandler(),
-    ],
-)
+# Log aplikasi (logs/virtual_assistant.log), file per modul, dan konsol
+# ditulis oleh satu QueueListener di thread terpisah; lihat core/logging_setup.py.
+# Pipeline dipasang di blok __main__: proses anak (spawn) mengimpor ulang modul ini.
 logger = logging.getLogger(__name__)
 
 
@@ -91,7 +57,8 @@ class VirtualAssistantApp:
 
         self.language_model_instance = self._init_language_model()
         self.context_manager_instance = self._init_context_manager()
-        self.translator_plugin_instance = self._init_translator_plugin()
+        # Diisi di run(): init() plugin translator async dan didaftarkan ke ModuleManager.
+        self.translator_plugin_instance = None
 
         logger.info("VirtualAssistantApp initialized successfully.")
 
@@ -210,15 +177,20 @@ class VirtualAssistantApp:
             )
         return None
 
-    def _init_translator_plugin(self):
-        """Helper untuk inisialisasi TranslatorPlugin."""
+    async def _init_translator_plugin(self):
+        """Helper untuk inisialisasi TranslatorPlugin (hook init()/close() lewat ModuleManager)."""
         if self.target_language.lower() == self.source_language.lower():
             logger.info(
                 "Source and target languages are the same. Translator plugin not initialized."
             )
             return None
 
-        translator_module = self.manager.get_plugin("translator")
+        # Pilih plugin dari manifest (tanpa mengimpor kandidat lain)
+        candidates = self.manager.find_plugins("translate")
+        if not candidates:
+            logger.error("No plugin declares the 'translate' capability.")
+            return None
+        translator_module = await self.manager.init_plugin(candidates[0])
         if translator_module and hasattr(translator_module, "get_translator_plugin"):
             try:
                 instance = translator_module.get_translator_plugin()
@@ -239,16 +211,70 @@ class VirtualAssistantApp:
             )
         return None
 
+    async def _ensure_translator_plugin(self):
+        """Menginisialisasi translator jika bahasa sumber dan target berbeda dan belum ada instance."""
+        if self.translator_plugin_instance is None:
+            self.translator_plugin_instance = await self._init_translator_plugin()
+
+    def _start_tts_init(self):
+        """Mendaftarkan plugin TTS (pyttsx3 dan, jika dipakai, model kustom) agar close() ikut dijalankan saat keluar."""
+        engines = ["default_tts"]
+        if self.config.get_config_value("tts_settings", "default_engine", "default") == "custom":
+            engines.append("custom_model_tts")
+
+        async def _init():
+            for name in engines:
+                await self.manager.init_plugin(name)
+
+        self._tts_init_task = asyncio.create_task(_init())
+
+    def _start_audio_prewarm(self):
+        """Mengisi audio cache TTS (PREWARM_PHRASES peran aktif) di latar belakang tanpa menunda menu."""
+        if not self.config.get_bool("audio_cache", "prewarm_on_startup", True):
+            return
+        from core import text_to_speech
+
+        async def _prewarm():
+            try:
+                await text_to_speech.prewarm_audio_cache(
+                    role=self.current_chat_role, language=self.target_language
+                )
+            except Exception as e:
+                logger.warning("Audio cache prewarm failed: %s", e, exc_info=True)
+
+        # Referensi disimpan agar task tidak dibuang garbage collector sebelum selesai.
+        self._prewarm_task = asyncio.create_task(_prewarm())
+
+    def _start_voicevox_warmup(self):
+        """Membuka pool Voicevox dan memuat speaker yang dikonfigurasi di latar belakang jika bahasa Jepang dipakai."""
+        uses_japanese = (
+            self.target_language.lower() == "ja"
+            or self.config.get_config_value("tts_settings", "default_engine", "default") == "japanese"
+        )
+        if not uses_japanese:
+            return
+
+        async def _warmup():
+            # Urutan penting: voicevox_api terdaftar lebih dulu agar close() pool ikut dijalankan saat keluar.
+            for name in ("voicevox_api", "voicevox_catalog"):
+                await self.manager.warmup_plugin(name)
+
+        self._voicevox_warmup_task = asyncio.create_task(_warmup())
+
     async def run(self):
         logger.info("VA App Run method started.")
         self.select_language_preferences()
+        await self._ensure_translator_plugin()
         self.select_role_preferences()
+        self._start_tts_init()
+        self._start_voicevox_warmup()
+        self._start_audio_prewarm()
 
         while True:
             print("\n=== Menu Utama Virtual Assistant ===")
             print("1. Chat dengan Gemini")
             print("2. Terjemahkan Kalimat (Belum tersedia)")
-            print("3. Panggilan Suara (STT-TTS) (Belum tersedia)")
+            print("3. Panggilan Suara (STT-TTS)")
             print("4. Pengaturan Bahasa")
             print("5. Pengaturan Peran Chat")
             print("6. Keluar")
@@ -261,8 +287,11 @@ class VirtualAssistantApp:
 
             if choice == "1":
                 await self.mode_chat_gemini()
+            elif choice == "3":
+                await self.mode_voice_call()
             elif choice == "4":
                 self.select_language_preferences()
+                await self._ensure_translator_plugin()
             elif choice == "5":
                 self.select_role_preferences()
             elif choice == "6":
@@ -279,8 +308,9 @@ class VirtualAssistantApp:
                             "Sesi aktif %s disimpan sebelum keluar.",
                             self.context_manager_instance.session_id,
                         )
+                await self.manager.close_all_plugins()
                 break
-            elif choice in ["2", "3"]:
+            elif choice == "2":
                 logger.info(
                     "Pengguna memilih opsi '%s' yang belum diimplementasikan.", choice
                 )
@@ -481,6 +511,64 @@ class VirtualAssistantApp:
                 logger.error("Unexpected error in chat mode: %s", e, exc_info=True)
                 print("Terjadi kesalahan tak terduga saat berkomunikasi.")
 
+    async def mode_voice_call(self):
+        if not self.language_model_instance:
+            logger.error(
+                "LanguageModel instance is not available. Cannot start voice call mode."
+            )
+            print("Model bahasa tidak tersedia. Panggilan suara tidak dapat dimulai.")
+            return
+        from core import speech_to_text, voice_call
+
+        print("Menyiapkan mikrofon...")
+        # Inisialisasi pertama menyesuaikan ambient noise (~1 detik), jadi jangan di event loop.
+        stt_processor = await asyncio.to_thread(speech_to_text.get_stt_processor)
+        if not stt_processor:
+            print("Mikrofon/STT tidak tersedia. Panggilan suara tidak dapat dimulai.")
+            return
+
+        session = voice_call.VoiceCallSession(
+            self.language_model_instance,
+            stt_processor,
+            source_language=self.source_language,
+            target_language=self.target_language,
+            role=self.current_chat_role,
+            translate=(
+                self.translate_text_via_plugin
+                if self.translator_plugin_instance
+                else None
+            ),
+            context_manager=self.context_manager_instance,
+        )
+        print(
+            f"\n=== Panggilan Suara (Input: {self.source_language}, Output: {self.target_language}, Peran Alph: {self.current_chat_role}) ==="
+        )
+        print("Silakan bicara. Tekan Enter atau ucapkan 'selesai' untuk mengakhiri panggilan.")
+
+        # input() tidak bisa dibatalkan, jadi Enter selalu ditunggu sebelum kembali ke menu.
+        enter_task = asyncio.create_task(asyncio.to_thread(input))
+        call_task = asyncio.create_task(session.run())
+        turns = []
+        try:
+            await asyncio.wait({enter_task, call_task}, return_when=asyncio.FIRST_COMPLETED)
+            session.stop_event.set()
+            turns = await call_task
+        except Exception as e_call:
+            # Tetap menunggu Enter di bawah agar input() ini tidak berebut dengan input() menu utama.
+            logger.error("Voice call session failed: %s", e_call, exc_info=True)
+            print("Panggilan suara berhenti karena error.")
+        if not enter_task.done():
+            print("Panggilan selesai. Tekan Enter untuk kembali ke menu.")
+        await enter_task
+
+        if self.context_manager_instance and turns:
+            if not self.context_manager_instance.save_to_archive():
+                logger.error(
+                    "Gagal menyimpan sesi %s setelah panggilan suara.",
+                    self.context_manager_instance.session_id,
+                )
+        print(f"Panggilan suara berakhir ({len(turns)} giliran).")
+
     async def translate_text_via_plugin(
         self, text: str, target_lang: str, source_lang: str | None = None
     ) -> str | None:
@@ -576,15 +664,8 @@ class VirtualAssistantApp:
             else:
                 print("Preferensi bahasa disimpan.")
 
+            # Translator (jika bahasa kini berbeda) diinisialisasi oleh run() lewat _ensure_translator_plugin().
             if (
-                self.source_language.lower() != self.target_language.lower()
-                and not self.translator_plugin_instance
-            ):
-                logger.info(
-                    "Source and target languages now differ, attempting to initialize translator."
-                )
-                self.translator_plugin_instance = self._init_translator_plugin()
-            elif (
                 self.source_language.lower() == self.target_language.lower()
                 and self.translator_plugin_instance
             ):
@@ -707,6 +788,7 @@ async def main_async_runner():
 
 
 if __name__ == "__main__":
+    logging_setup.setup_logging(console=True)
     logger.info("Aplikasi Virtual Assistant dimulai.")
     try:
         asyncio.run(main_async_runner())
@@ -1,29 +1,41 @@
 # plugins/custom_model_tts.py
 
 import os
-import time
 import asyncio
 # from TTS.api import TTS # Kita tidak akan menggunakan API level atas ini lagi
-from TTS.utils.synthesizer import Synthesizer # Gunakan Synthesizer langsung
+# Synthesizer (Coqui TTS + torch) diimpor di dalam CoquiVITSTTS.__init__ agar
+# mengimpor plugin ini tidak langsung membayar biaya impor torch.
+from core import audio_buffer, audio_cache
+from core.audio_buffer import AudioBuffer
 from core import config_manager
+from core.logging_setup import get_logger, setup_logging
+from core import plugin_worker
 from plugins import play_voice
-import logging
+from plugins import vits_onnx
+from plugins.vits_inference import VitsInferenceEngine
 
-# --- Setup Logging --- (Tetap sama)
 # --- Setup Logging ---
-logger = logging.getLogger(__name__)
-if not logger.hasHandlers():
-    log_file_path = os.path.join(config_manager.LOG_DIR, f"{os.path.split(__file__)[1].split('.')[0]}.log")
-    file_handler = logging.FileHandler(log_file_path)
-    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-    logger.addHandler(file_handler)
-    logger.setLevel(logging.INFO)
+logger = get_logger(__name__)
+
+MODULE_MANIFEST = {
+    "capabilities": ["tts"],
+    "engines": ["custom", "coqui_vits"],
+    "languages": ["id"],
+    "cost_class": "high",
+}
+
+# Jika aktif, inferensi dijalankan di proses worker (lihat core/plugin_worker.py)
+# agar torch tidak berebut GIL/CPU dengan event loop utama.
+RUN_IN_WORKER = config_manager.get_bool("tts_custom_model", "run_in_worker", False)
+WORKER_MODULE_NAME = __name__ if __name__ != "__main__" else "plugins.custom_model_tts"
 
 _tts_synthesizer_instance = None
+_model_fingerprint = None
 
 class CoquiVITSTTS:
     def __init__(self):
         self.synthesizer = None
+        self.engine = None
         self.speaker_names = []
         self.is_multi_speaker = False # Default ke False
         self.sample_rate = 22050
@@ -53,15 +65,23 @@ class CoquiVITSTTS:
         _speakers_file_abs_path = None
         if speakers_file_rel_path:
             _speakers_file_abs_path = os.path.join(config_manager.PROJECT_ROOT_DIR, speakers_file_rel_path)
-            logger.info(f"  Speakers File (from config.ini): {_speakers_file_abs_path}")
+            logger.info("  Speakers File (from config.ini): %s", _speakers_file_abs_path)
         else:
-            logger.info(f"  Speakers File: Will be loaded based on model's config.json if specified there.")
+            logger.info("  Speakers File: Will be loaded based on model's config.json if specified there.")
+
+        logger.info("  Model Config: %s", self.model_config_path)
+        logger.info("  Model Checkpoint: %s", self.model_checkpoint_path)
+        logger.info("  Use GPU: %s", self.use_gpu)
 
-        logger.info(f"  Model Config: {self.model_config_path}")
-        logger.info(f"  Model Checkpoint: {self.model_checkpoint_path}")
-        logger.info(f"  Use GPU: {self.use_gpu}")
+        self.inference_backend = config_manager.get_config_value("tts_custom_model", "inference_backend", "torch").strip().lower()
+        if self.inference_backend == "onnx":
+            if self._load_onnx_backend():
+                return
+            logger.warning("Falling back to the PyTorch Synthesizer for custom TTS.")
+            self.inference_backend = "torch"
 
         try:
+            from TTS.utils.synthesizer import Synthesizer # Gunakan Synthesizer langsung
             self.synthesizer = Synthesizer(
                 tts_checkpoint=self.model_checkpoint_path,
                 tts_config_path=self.model_config_path,
@@ -69,6 +89,14 @@ class CoquiVITSTTS:
                 use_cuda=self.use_gpu,
             )
             logger.info("Coqui TTS Synthesizer loaded successfully.")
+            self.engine = VitsInferenceEngine(
+                self.synthesizer,
+                num_threads=config_manager.get_int("tts_custom_model", "torch_num_threads", 0),
+                interop_threads=config_manager.get_int("tts_custom_model", "torch_interop_threads", 1),
+                quantize_int8=config_manager.get_bool("tts_custom_model", "quantize_int8", False),
+                batch_size=config_manager.get_int("tts_custom_model", "batch_size", 4),
+                use_gpu=self.use_gpu,
+            ).prepare()
 
             # --- PERBAIKAN CARA CEK MULTI-SPEAKER ---
             # Cek dari konfigurasi model yang sudah dimuat oleh Synthesizer
@@ -89,7 +117,7 @@ class CoquiVITSTTS:
                     self.speaker_names = list(self.synthesizer.tts_model.speaker_manager.name_to_id.keys())
                 
                 if self.speaker_names:
-                    logger.info(f"Model is multi-speaker. Available speakers: {self.speaker_names}")
+                    logger.info("Model is multi-speaker. Available speakers: %s", self.speaker_names)
                 else:
                     logger.warning("Model is marked as multi-speaker, but could not retrieve speaker names. Speaker selection might require integer IDs or check 'speakers_file' in model's config.json.")
             else:
@@ -97,17 +125,43 @@ class CoquiVITSTTS:
             
             if hasattr(self.synthesizer, 'tts_config') and 'audio' in self.synthesizer.tts_config:
                 self.sample_rate = self.synthesizer.tts_config.audio.get('sample_rate', self.sample_rate)
-            logger.info(f"Model sample rate: {self.sample_rate}")
+            logger.info("Model sample rate: %s", self.sample_rate)
 
         except FileNotFoundError as fnf_error:
-            logger.error(f"FileNotFoundError during Synthesizer initialization: {fnf_error}. Check paths in config.ini and model's config.json.", exc_info=True)
+            logger.error("FileNotFoundError during Synthesizer initialization: %s. Check paths in config.ini and model's config.json.", fnf_error, exc_info=True)
             self.enabled = False
             self.synthesizer = None
         except Exception as e:
-            logger.error(f"Failed to load Coqui TTS Synthesizer: {e}", exc_info=True)
+            logger.error("Failed to load Coqui TTS Synthesizer: %s", e, exc_info=True)
             self.enabled = False
             self.synthesizer = None
+            self.engine = None
             
+    def _load_onnx_backend(self) -> bool:
+        """Memuat graf ONNX hasil tools/export_vits_onnx.py (tanpa torch). False jika gagal."""
+        onnx_path = _onnx_model_path()
+        logger.info("  ONNX Model: %s", onnx_path)
+        if not os.path.exists(onnx_path):
+            logger.error("ONNX model not found: %s. Run 'python -m tools.export_vits_onnx' first.", onnx_path)
+            return False
+        try:
+            self.engine = vits_onnx.OnnxVitsBackend(
+                onnx_path,
+                self.model_config_path,
+                intra_op_threads=config_manager.get_int("tts_custom_model", "onnx_intra_op_threads", 0),
+                inter_op_threads=config_manager.get_int("tts_custom_model", "onnx_inter_op_threads", 1),
+            )
+        except Exception as e:
+            logger.error("Failed to load ONNX VITS model: %s", e, exc_info=True)
+            self.engine = None
+            return False
+        self.speaker_names = list(self.engine.speakers)
+        self.is_multi_speaker = bool(self.speaker_names)
+        self.sample_rate = self.engine.sample_rate
+        logger.info("ONNX backend loaded (%s). Speakers: %s, sample rate: %s",
+                    os.path.basename(onnx_path), self.speaker_names or "single-speaker", self.sample_rate)
+        return True
+
     def get_speaker_name_for_synthesis(self, speaker_name_or_id):
         """
         Menentukan nama speaker yang akan digunakan untuk argumen `speaker_name` pada `synthesizer.tts()`.
@@ -124,9 +178,9 @@ class CoquiVITSTTS:
                 if 0 <= speaker_name_or_id < len(self.speaker_names):
                     target_speaker_name = self.speaker_names[speaker_name_or_id]
                 else:
-                    logger.warning(f"Speaker ID {speaker_name_or_id} is out of range for available speakers.")
+                    logger.warning("Speaker ID %s is out of range for available speakers.", speaker_name_or_id)
             else: # Jika nama tidak ditemukan
-                logger.warning(f"Speaker '{speaker_name_or_id}' not found in available speakers: {self.speaker_names}.")
+                logger.warning("Speaker '%s' not found in available speakers: %s.", speaker_name_or_id, self.speaker_names)
         
         if target_speaker_name is None and self.default_speaker_name_or_id: 
             if self.default_speaker_name_or_id in self.speaker_names:
@@ -137,66 +191,127 @@ class CoquiVITSTTS:
                     if 0 <= default_idx < len(self.speaker_names):
                         target_speaker_name = self.speaker_names[default_idx]
                 except ValueError:
-                    logger.warning(f"Default speaker '{self.default_speaker_name_or_id}' not found and is not a valid index.")
+                    logger.warning("Default speaker '%s' not found and is not a valid index.", self.default_speaker_name_or_id)
 
         if target_speaker_name is None and self.speaker_names: 
             target_speaker_name = self.speaker_names[0]
-            logger.info(f"Using first available speaker as fallback: {target_speaker_name}")
+            logger.info("Using first available speaker as fallback: %s", target_speaker_name)
         
         return target_speaker_name
 
-    def synthesize(self, text: str, speaker_name_or_id=None, language_code: str = None) -> str | None:
-        if not self.enabled or not self.synthesizer:
-            logger.error("Custom TTS Synthesizer is not enabled or not loaded. Cannot synthesize.")
-            return None
-
+    def synthesize_wav(self, text: str, speaker_name_or_id=None):
+        """Menjalankan inferensi saja; mengembalikan (wav, nama_speaker) atau (None, nama_speaker)."""
         speaker_name_for_tts = None
         if self.is_multi_speaker:
             speaker_name_for_tts = self.get_speaker_name_for_synthesis(speaker_name_or_id)
-        
-        audio_output_subdir = config_manager.get_config_value("tts_custom_model", "audio_output_subdir", "custom_tts")
-        output_dir = os.path.join(config_manager.PROJECT_ROOT_DIR, config_manager.get_config_value("general", "audio_output_path", "data/audio/"), audio_output_subdir)
-        if not os.path.exists(output_dir):
-            try:
-                os.makedirs(output_dir)
-                logger.info(f"Created custom TTS audio output directory: {output_dir}")
-            except Exception as e:
-                logger.error(f"Failed to create custom TTS audio output directory {output_dir}: {e}")
-                return None
-
-        timestamp = str(int(time.time()))
-        speaker_tag = f"_spk-{speaker_name_for_tts.replace(' ', '_')}" if speaker_name_for_tts else ""
-        output_filename = f"custom_tts_{timestamp}{speaker_tag}.wav"
-        output_path = os.path.join(output_dir, output_filename)
-
-        logger.info(f"Synthesizing text: '{text[:50]}...'")
+
+        logger.info("Synthesizing text: '%s...'", text[:50])
         if speaker_name_for_tts:
-            logger.info(f"Using speaker: {speaker_name_for_tts}")
-        try:
-            wav = self.synthesizer.tts(
-                text=text,
-                speaker_name=speaker_name_for_tts,
-                language_name=None, 
-                speaker_wav=None,   
-                reference_wav=None, 
-                style_wav=None,     
-                style_text=None,
-                reference_speaker_name=None
-            )
-            if wav is not None:
-                self.synthesizer.save_wav(wav=wav, path=output_path)
-                logger.info(f"Audio successfully synthesized and saved to: {output_path}")
+            logger.info("Using speaker: %s", speaker_name_for_tts)
+        wav = self.engine.tts(text, speaker_name=speaker_name_for_tts)
+        return wav, speaker_name_for_tts
 
-                play_blocking = config_manager.get_bool("tts_settings", "custom_tts_play_blocking", True)
-                play_voice.play_audio_file(output_path, block_until_done=play_blocking)
-                
-                return output_path
-            else:
-                logger.error("TTS synthesis returned None (no audio data).")
-                return None
+    def synthesize(self, text: str, speaker_name_or_id=None, language_code: str = None) -> AudioBuffer | None:
+        """Mensintesis dan memutar teks dari memori; mengembalikan AudioBuffer atau None."""
+        if not self.enabled or not self.engine:
+            logger.error("Custom TTS Synthesizer is not enabled or not loaded. Cannot synthesize.")
+            return None
+
+        cache = audio_cache.get_audio_cache()
+        cache_key = _cache_key(text, speaker_name_or_id) if cache else None
+        buffer = None
+        if cache:
+            cached_bytes = cache.get_bytes(cache_key)
+            if cached_bytes is not None:
+                logger.info("Audio cache hit for text: '%s...'", text[:50])
+                buffer = AudioBuffer.from_wav_bytes(cached_bytes)
+
+        try:
+            if buffer is None:
+                result = self.synthesize_to_wav_bytes(text, speaker_name_or_id)
+                if result is None:
+                    return None
+                wav_bytes, speaker_name_for_tts = result
+                if cache:
+                    cache.put_in_background(cache_key, wav_bytes, engine="custom")
+                buffer = AudioBuffer.from_wav_bytes(wav_bytes)
+                _archive(buffer, speaker_name_for_tts)
+                logger.info("Audio successfully synthesized (%.2f s).", buffer.duration)
+            _play(buffer)
+            return buffer
         except Exception as e:
-            logger.error(f"Error during Coqui TTS synthesis with Synthesizer: {e}", exc_info=True)
+            logger.error("Error during Coqui TTS synthesis with Synthesizer: %s", e, exc_info=True)
+            return None
+
+    def synthesize_to_wav_bytes(self, text: str, speaker_name_or_id=None) -> tuple[bytes, str | None] | None:
+        """Seperti synthesize(), tetapi mengembalikan isi file WAV di memori tanpa menyimpan/memutar."""
+        if not self.enabled or not self.engine:
+            logger.error("Custom TTS Synthesizer is not enabled or not loaded. Cannot synthesize.")
+            return None
+        wav, speaker_name_for_tts = self.synthesize_wav(text, speaker_name_or_id)
+        if wav is None:
+            logger.error("TTS synthesis returned None (no audio data).")
             return None
+        return self._wav_to_bytes(wav), speaker_name_for_tts
+
+    def synthesize_many_to_wav_bytes(self, texts: list[str], speaker_name_or_id=None) -> tuple[list[bytes], str | None] | None:
+        """Beberapa teks dalam inferensi ber-batch; isi WAV sesuai urutan `texts`."""
+        if not self.enabled or not self.engine:
+            logger.error("Custom TTS Synthesizer is not enabled or not loaded. Cannot synthesize.")
+            return None
+        speaker_name_for_tts = self.get_speaker_name_for_synthesis(speaker_name_or_id) if self.is_multi_speaker else None
+        logger.info("Synthesizing %d texts in batches of %d.", len(texts), self.engine.batch_size)
+        wavs = self.engine.tts_batch(texts, speaker_name=speaker_name_for_tts)
+        return [self._wav_to_bytes(wav) for wav in wavs], speaker_name_for_tts
+
+    def _wav_to_bytes(self, wav) -> bytes:
+        return self.engine.to_wav_bytes(wav)
+
+def _archive(buffer: AudioBuffer, speaker_name_for_tts: str | None):
+    """Arsip ke disk hanya jika [audio_archive] aktif (lihat core/audio_buffer.py)."""
+    audio_output_subdir = config_manager.get_config_value("tts_custom_model", "audio_output_subdir", "custom_tts")
+    speaker_tag = f"spk-{speaker_name_for_tts}" if speaker_name_for_tts else None
+    audio_buffer.archive_audio(buffer, audio_output_subdir, tag=speaker_tag)
+
+def _onnx_model_path() -> str:
+    """Path graf ONNX dari [tts_custom_model] (varian int8 jika onnx_use_int8)."""
+    onnx_rel_path = config_manager.get_config_value("tts_custom_model", "onnx_model_path", "assets/models/TTS/model.onnx")
+    onnx_path = os.path.join(config_manager.PROJECT_ROOT_DIR, onnx_rel_path)
+    if config_manager.get_bool("tts_custom_model", "onnx_use_int8", False):
+        onnx_path = vits_onnx.int8_path_for(onnx_path)
+    return onnx_path
+
+def _cache_key(text: str, speaker_name_or_id=None) -> str:
+    """
+    Kunci audio cache dari config saja (checkpoint, backend, speaker), jadi cache hit tidak perlu memuat model.
+    Backend ONNX memecah kalimat dan menormalkan puncak berbeda dari Synthesizer.tts dan audionya
+    bergantung pada graf hasil ekspor, jadi kuncinya memuat nama backend dan sidik file model.onnx.
+    """
+    global _model_fingerprint
+    if _model_fingerprint is None:
+        checkpoint = config_manager.get_config_value("tts_custom_model", "model_checkpoint_path", "")
+        _model_fingerprint = audio_cache.file_fingerprint(os.path.join(config_manager.PROJECT_ROOT_DIR, checkpoint))
+    if speaker_name_or_id is None:
+        speaker_name_or_id = config_manager.get_config_value("tts_custom_model", "default_speaker_name_or_id")
+    backend = config_manager.get_config_value("tts_custom_model", "inference_backend", "torch").strip().lower()
+    params = {"backend": "torch"}
+    if backend == "onnx":
+        onnx_path = _onnx_model_path()
+        # Tanpa graf, CoquiVITSTTS jatuh ke Synthesizer PyTorch; kuncinya ikut.
+        if os.path.exists(onnx_path):
+            params = {"backend": "onnx", "onnx_model": audio_cache.file_fingerprint(onnx_path)}
+    # Model int8 menghasilkan audio yang sedikit berbeda, jadi cache-nya dipisah.
+    if params["backend"] == "onnx":
+        int8 = config_manager.get_bool("tts_custom_model", "onnx_use_int8", False)
+    else:
+        int8 = config_manager.get_bool("tts_custom_model", "quantize_int8", False)
+    if int8:
+        params["int8"] = True
+    return audio_cache.make_key("custom", _model_fingerprint, speaker_name_or_id, params, text)
+
+def _play(buffer: AudioBuffer):
+    play_blocking = config_manager.get_bool("tts_settings", "custom_tts_play_blocking", True)
+    play_voice.play_audio_buffer(buffer, block_until_done=play_blocking)
 
 # --- Fungsi antarmuka publik ---
 def get_tts_instance() -> CoquiVITSTTS | None:
@@ -214,7 +329,89 @@ def get_tts_instance() -> CoquiVITSTTS | None:
         return None
     return _tts_synthesizer_instance
 
-async def speak_custom(text: str, speaker_name_or_id=None, language: str = None) -> str | None:
+def synthesize_to_wav_bytes(text: str, speaker_name_or_id=None, language: str = None) -> tuple[bytes, str | None] | None:
+    """Entry point untuk proses worker: (isi WAV, nama speaker) atau None."""
+    tts_instance = get_tts_instance()
+    if tts_instance is None:
+        logger.error("Custom TTS instance not available or not enabled.")
+        return None
+    return tts_instance.synthesize_to_wav_bytes(text, speaker_name_or_id)
+
+def synthesize_many_to_wav_bytes(texts: list[str], speaker_name_or_id=None, language: str = None) -> tuple[list[bytes], str | None] | None:
+    """Entry point untuk proses worker: versi batch synthesize_to_wav_bytes."""
+    tts_instance = get_tts_instance()
+    if tts_instance is None:
+        logger.error("Custom TTS instance not available or not enabled.")
+        return None
+    return tts_instance.synthesize_many_to_wav_bytes(texts, speaker_name_or_id)
+
+def load_model() -> bool:
+    """Entry point untuk proses worker: memuat checkpoint; True jika model siap."""
+    return get_tts_instance() is not None
+
+def warmup_model() -> None:
+    """Satu inferensi pendek (tanpa disimpan/diputar) agar request pertama tidak membayar biaya inisialisasi."""
+    tts_instance = get_tts_instance()
+    if tts_instance is None:
+        return
+    speaker = tts_instance.get_speaker_name_for_synthesis(None) if tts_instance.is_multi_speaker else None
+    tts_instance.engine.warmup(
+        text=config_manager.get_config_value("tts_custom_model", "warmup_text", "Halo, apa kabar?"),
+        runs=config_manager.get_int("tts_custom_model", "warmup_runs", 2),
+        speaker_name=speaker,
+    )
+
+async def synthesize_custom(text: str, speaker_name_or_id=None, language: str = None) -> AudioBuffer | None:
+    """
+    Mensintesis teks ke AudioBuffer di memori tanpa memutarnya (dipakai pipeline TTS), di worker jika RUN_IN_WORKER.
+    Cache hit tidak perlu memuat model maupun menyalakan worker.
+    """
+    cache = audio_cache.get_audio_cache()
+    cache_key = _cache_key(text, speaker_name_or_id) if cache else None
+    if cache:
+        cached_bytes = await asyncio.to_thread(cache.get_bytes, cache_key)
+        if cached_bytes is not None:
+            logger.info("Audio cache hit for text: '%s...'", text[:50])
+            return AudioBuffer.from_wav_bytes(cached_bytes)
+
+    if RUN_IN_WORKER:
+        worker = plugin_worker.get_worker(WORKER_MODULE_NAME)
+        try:
+            if not worker.is_alive():
+                await worker.start_async()
+            result = await worker.call("synthesize_to_wav_bytes", text, speaker_name_or_id, language)
+        except (plugin_worker.PluginWorkerError, TimeoutError) as e:
+            logger.error("Custom TTS worker failed: %s", e)
+            return None
+    else:
+        try:
+            result = await asyncio.to_thread(synthesize_to_wav_bytes, text, speaker_name_or_id, language)
+        except Exception as e:
+            logger.error("Error during Coqui TTS synthesis with Synthesizer: %s", e, exc_info=True)
+            return None
+    if result is None:
+        logger.error("Custom TTS returned no audio.")
+        return None
+    wav_bytes, speaker_name_for_tts = result
+    if cache:
+        cache.put_in_background(cache_key, wav_bytes, engine="custom")
+    buffer = AudioBuffer.from_wav_bytes(wav_bytes)
+    _archive(buffer, speaker_name_for_tts)
+    return buffer
+
+async def _speak_custom_in_worker(text: str, speaker_name_or_id=None, language: str = None) -> AudioBuffer | None:
+    buffer = await synthesize_custom(text, speaker_name_or_id, language)
+    if buffer is None:
+        return None
+    if config_manager.get_bool("tts_settings", "custom_tts_play_blocking", True):
+        await play_voice.play_async(buffer)
+    else:
+        play_voice.play_audio_buffer(buffer, block_until_done=False)
+    return buffer
+
+async def speak_custom(text: str, speaker_name_or_id=None, language: str = None) -> AudioBuffer | None:
+    if RUN_IN_WORKER:
+        return await _speak_custom_in_worker(text, speaker_name_or_id, language)
     tts_instance = get_tts_instance()
     if tts_instance:
         try:
@@ -228,6 +425,57 @@ async def speak_custom(text: str, speaker_name_or_id=None, language: str = None)
         logger.error("Custom TTS instance not available or not enabled.")
         return None
 
+async def prewarm_cache(phrases: list[str], speaker_name_or_id=None, language: str = None) -> int:
+    """Mensintesis frasa yang belum ada di audio cache (ber-batch, tanpa diputar). Mengembalikan jumlah frasa baru."""
+    cache = audio_cache.get_audio_cache()
+    if cache is None:
+        return 0
+    missing = [phrase for phrase in phrases if not cache.contains(_cache_key(phrase, speaker_name_or_id))]
+    if not missing:
+        return 0
+    try:
+        if RUN_IN_WORKER:
+            worker = plugin_worker.get_worker(WORKER_MODULE_NAME)
+            if not worker.is_alive():
+                await worker.start_async()
+            result = await worker.call("synthesize_many_to_wav_bytes", missing, speaker_name_or_id, language)
+        else:
+            result = await asyncio.to_thread(synthesize_many_to_wav_bytes, missing, speaker_name_or_id, language)
+    except Exception as e:
+        logger.warning("Custom TTS audio cache prewarm failed: %s", e)
+        return 0
+    if result is None:
+        return 0
+    added = 0
+    for phrase, wav_bytes in zip(missing, result[0]):
+        if await asyncio.to_thread(cache.put, _cache_key(phrase, speaker_name_or_id), wav_bytes, "custom"):
+            added += 1
+    return added
+
+# --- Lifecycle hooks (dipanggil oleh ModuleManager) ---
+async def init():
+    if RUN_IN_WORKER:
+        # Checkpoint dimuat di proses worker, bukan di proses utama.
+        worker = plugin_worker.get_worker(WORKER_MODULE_NAME)
+        await worker.start_async()
+        await worker.call("load_model")
+        return
+    # Memuat checkpoint di thread agar event loop tidak terblokir.
+    await asyncio.to_thread(get_tts_instance)
+
+async def warmup():
+    if RUN_IN_WORKER:
+        await plugin_worker.get_worker(WORKER_MODULE_NAME).call("warmup_model")
+        return
+    await asyncio.to_thread(warmup_model)
+
+async def close():
+    global _tts_synthesizer_instance, _model_fingerprint
+    _tts_synthesizer_instance = None
+    _model_fingerprint = None
+    if RUN_IN_WORKER:
+        await plugin_worker.get_worker(WORKER_MODULE_NAME).stop()
+
 async def main_test_custom():
     logger.info("--- Custom TTS (Coqui VITS - Synthesizer) Plugin Test ---")
     tts_instance = get_tts_instance()
@@ -236,23 +484,22 @@ async def main_test_custom():
         return
 
     if tts_instance.is_multi_speaker and tts_instance.speaker_names:
-        logger.info(f"Available speakers for custom model: {tts_instance.speaker_names}")
+        logger.info("Available speakers for custom model: %s", tts_instance.speaker_names)
         speaker_to_test = tts_instance.default_speaker_name_or_id if tts_instance.default_speaker_name_or_id in tts_instance.speaker_names else tts_instance.speaker_names[0]
         
-        logger.info(f"Testing with speaker: {speaker_to_test}")
+        logger.info("Testing with speaker: %s", speaker_to_test)
         await speak_custom("Halo, ini adalah tes suara dari model kustom VITS.", speaker_name_or_id=speaker_to_test)
         
         if len(tts_instance.speaker_names) > 1:
             idx_to_try = 1 % len(tts_instance.speaker_names)
             if tts_instance.speaker_names[idx_to_try] != speaker_to_test :
                  speaker_to_test_2 = tts_instance.speaker_names[idx_to_try]
-                 logger.info(f"Testing with another speaker: {speaker_to_test_2}")
+                 logger.info("Testing with another speaker: %s", speaker_to_test_2)
                  await speak_custom("Ini adalah suara dari speaker yang berbeda.", speaker_name_or_id=speaker_to_test_2)
     else:
         logger.info("Testing with default/single speaker configuration...")
         await speak_custom("Tes suara dari model kustom VITS, mode single speaker atau default.")
 
 if __name__ == "__main__":
-    if not logging.getLogger().hasHandlers():
-        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    setup_logging(console=True)
     asyncio.run(main_test_custom())
\ No newline at end of file
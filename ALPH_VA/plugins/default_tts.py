@@ -1,183 +1,293 @@
-# core/default_tts.py
+# plugins/default_tts.py
 
 import pyttsx3
 from core import config_manager
+from core.logging_setup import get_logger, setup_logging
+import asyncio
 import logging
+import queue
+import threading
+from concurrent.futures import Future
 from typing import Optional, List, Dict
 import os, time
 
 # --- Setup Logging ---
-logger = logging.getLogger(__name__)
-if not logger.hasHandlers():
-    log_file_path = os.path.join(config_manager.LOG_DIR, f"{os.path.split(__file__)[1].split('.')[0]}.log")
-    file_handler = logging.FileHandler(log_file_path)
-    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-    logger.addHandler(file_handler)
-    logger.setLevel(logging.INFO)
-
-
-def _initialize_engine_and_get_voices() -> tuple[Optional[pyttsx3.Engine], List[Dict]]:
-    """Helper untuk inisialisasi engine dan mendapatkan daftar suara. Dijalankan di thread yang sama."""
-    local_engine = None
+logger = get_logger(__name__)
+
+MODULE_MANIFEST = {
+    "capabilities": ["tts"],
+    "engines": ["default", "pyttsx3"],
+    "languages": ["id", "en"],
+    "cost_class": "low",
+}
+
+_worker_instance = None
+_worker_lock = threading.Lock()
+
+
+def _describe_voices(voices) -> List[Dict]:
+    """Mengubah objek voice pyttsx3 menjadi dict dengan bahasa/gender yang sudah di-decode."""
     voices_list = []
-    try:
-        local_engine = pyttsx3.init()
-        if local_engine is None:
-            logger.error("pyttsx3.init() returned None. Engine not available.")
-            return None, []
-        
-        voices = local_engine.getProperty('voices')
-        for i, voice in enumerate(voices):
-            voice_detail = {
-                "id": voice.id, "name": voice.name,
-                "languages": voice.languages, "gender": voice.gender, "age": voice.age
-            }
-            try:
-                voice_detail["languages"] = [lang.decode('utf-8', errors='replace') if isinstance(lang, bytes) else lang for lang in voice.languages]
-                if isinstance(voice.gender, bytes):
-                    voice_detail["gender"] = voice.gender.decode('utf-8', errors='replace')
-            except Exception as e_decode:
-                logger.debug(f"Could not decode all properties for voice {i}: {e_decode}")
-            voices_list.append(voice_detail)
-        logger.debug(f"Engine initialized in helper, found {len(voices_list)} voices.")
-        return local_engine, voices_list
-    except Exception as e:
-        logger.error(f"Failed to initialize pyttsx3 engine or get voices in helper: {e}", exc_info=True)
-        if local_engine:
-            try:
-                local_engine.stop()
-            except: pass
-        return None, []
+    for i, voice in enumerate(voices or []):
+        voice_detail = {
+            "id": voice.id, "name": voice.name,
+            "languages": voice.languages, "gender": voice.gender, "age": voice.age
+        }
+        try:
+            voice_detail["languages"] = [lang.decode('utf-8', errors='replace') if isinstance(lang, bytes) else lang for lang in voice.languages]
+            if isinstance(voice.gender, bytes):
+                voice_detail["gender"] = voice.gender.decode('utf-8', errors='replace')
+        except Exception as e_decode:
+            logger.debug("Could not decode all properties for voice %s: %s", i, e_decode)
+        voices_list.append(voice_detail)
+    return voices_list
 
 
-def list_available_voices() -> list:
-    """Lists available pyttsx3 voices. Inisialisasi engine sementara untuk ini."""
-    _, voices = _initialize_engine_and_get_voices()
-    return voices
-
-def _set_voice_on_engine(engine_instance, language_code: str = "id") -> bool:
-    """Mencoba menyetel suara pada instance engine yang diberikan."""
-    if engine_instance is None: return False
-    
-    logger.debug(f"Attempting to set voice for language: {language_code} on provided engine.")
-    try:
-        voices_objects = engine_instance.getProperty('voices') 
-        available_voices_data = []
-        for v_obj in voices_objects:
-            vd = {"id": v_obj.id, "name": v_obj.name, "languages": v_obj.languages, "gender": v_obj.gender, "age": v_obj.age}
+def resolve_voice_id(voices: List[Dict], language_code: str = "id") -> Optional[str]:
+    """
+    Memilih voice ID untuk bahasa: `voice_id_<lang>` di [tts_pyttsx3_specifics], lalu properti
+    bahasa voice, lalu heuristik nama. None berarti memakai voice default pyttsx3.
+    """
+    language = language_code.lower()
+    voice_id_from_config = config_manager.get_config_value("tts_pyttsx3_specifics", f"voice_id_{language}")
+    if voice_id_from_config:
+        if not voices or any(voice_info["id"] == voice_id_from_config for voice_info in voices):
+            logger.info("Using pyttsx3 voice from config for '%s': %s", language_code, voice_id_from_config)
+            return voice_id_from_config
+        logger.warning("Configured pyttsx3 voice ID '%s' is not installed. Will try other methods.", voice_id_from_config)
+
+    for voice_info in voices:
+        if language in [str(lang).lower() for lang in voice_info.get("languages", [])]:
+            logger.info("Selected pyttsx3 voice by language property match for '%s': %s", language_code, voice_info['name'])
+            return voice_info["id"]
+
+    for voice_info in voices:
+        voice_name_lower = (voice_info.get("name") or "").lower()
+        if (language == "id" and "indonesia" in voice_name_lower) or \
+           (language == "en" and ("zira" in voice_name_lower or "david" in voice_name_lower)):
+            logger.info("Selected pyttsx3 voice by name heuristic for '%s': %s", language_code, voice_info['name'])
+            return voice_info["id"]
+    logger.warning("No suitable pyttsx3 voice explicitly found for language '%s'. pyttsx3 will use its default voice.", language_code)
+    return None
+
+
+class Pyttsx3Worker:
+    """
+    Satu thread yang memiliki satu engine pyttsx3 seumur proses. Perintah masuk lewat antrean,
+    jadi engine tidak pernah disentuh dari dua thread sekaligus. Daftar voice dibaca sekali dan
+    voice ID per bahasa di-cache; rate/volume hanya di-set jika berubah. interrupt() (barge-in)
+    membuang antrean dan menghentikan ucapan yang sedang berjalan di batas kata berikutnya.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._engine = None
+        self._voices: List[Dict] = []
+        self._voice_cache: Dict[str, Optional[str]] = {}
+        # Properti yang sedang aktif di engine; None = belum pernah di-set.
+        self._current = {"voice": None, "rate": None, "volume": None}
+        self.available = None
+        # engine.stop() dipanggil dari callback 'started-word' di thread worker, bukan dari thread lain.
+        self._speaking = False
+        self._speaking_lock = threading.Lock()
+        self._stop_requested = threading.Event()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="pyttsx3-worker", daemon=True)
+                self._thread.start()
+
+    def submit(self, command: str, *args) -> Future:
+        future = Future()
+        self._ensure_started()
+        self._queue.put((command, args, future))
+        return future
+
+    def _run(self):
+        try:
+            self._engine = pyttsx3.init()
+            if self._engine is None:
+                raise RuntimeError("pyttsx3.init() returned None")
+            self._voices = _describe_voices(self._engine.getProperty('voices'))
+            self._engine.connect('started-word', self._on_word)
+            self.available = True
+            logger.info("pyttsx3 worker started with %d voices.", len(self._voices))
+        except Exception as e:
+            logger.error("pyttsx3 engine failed to initialize in worker: %s", e, exc_info=True)
+            self._engine = None
+            self.available = False
+
+        while True:
+            command, args, future = self._queue.get()
+            if command == "shutdown":
+                future.set_result(True)
+                break
+            if not future.set_running_or_notify_cancel():
+                continue
             try:
-                vd["languages"] = [lang.decode('utf-8', errors='replace') if isinstance(lang, bytes) else lang for lang in v_obj.languages]
-                if isinstance(v_obj.gender, bytes): vd["gender"] = v_obj.gender.decode('utf-8', errors='replace')
-            except: pass
-            available_voices_data.append(vd)
-    except Exception as e_get_voices:
-        logger.error(f"Could not get voices from provided engine instance: {e_get_voices}")
-        return False
+                if command == "say":
+                    future.set_result(self._say(*args))
+                elif command == "voices":
+                    future.set_result(list(self._voices))
+                else:
+                    raise ValueError(f"Unknown pyttsx3 worker command: {command}")
+            except Exception as e:
+                future.set_exception(e)
+        self._engine = None
 
-    config_voice_id_key = f"voice_id_{language_code.lower()}"
-    voice_id_from_config = config_manager.get_config_value("tts_pyttsx3_specifics", config_voice_id_key)
+    def _set_if_changed(self, name: str, value):
+        if value is not None and self._current[name] != value:
+            self._engine.setProperty(name, value)
+            self._current[name] = value
 
-    if voice_id_from_config:
+    def _say(self, text: str, language_code: str, rate: int, volume: float) -> bool:
+        if self._engine is None:
+            logger.error("pyttsx3 engine not available; cannot speak.")
+            return False
+        language = language_code.lower()
+        if language not in self._voice_cache:
+            self._voice_cache[language] = resolve_voice_id(self._voices, language)
+        try:
+            self._set_if_changed('voice', self._voice_cache[language])
+        except Exception as e_set:
+            logger.warning("Failed to set pyttsx3 voice '%s': %s. Using default voice.", self._voice_cache[language], e_set)
+            self._voice_cache[language] = None
+        self._set_if_changed('rate', rate)
+        self._set_if_changed('volume', volume)
+        with self._speaking_lock:
+            self._speaking = True
+            self._stop_requested.clear()
         try:
-            engine_instance.setProperty('voice', voice_id_from_config)
-            logger.info(f"Set pyttsx3 voice using config ID for '{language_code}': {voice_id_from_config}")
+            self._engine.say(text)
+            self._engine.runAndWait()
+            if self._stop_requested.is_set():
+                logger.info("pyttsx3 speech interrupted (barge-in).")
+            else:
+                logger.debug("pyttsx3 runAndWait() completed.")
             return True
-        except Exception as e_set_id:
-            logger.warning(f"Failed to set voice using config ID '{voice_id_from_config}': {e_set_id}. Will try other methods.")
+        except RuntimeError as re:
+            logger.error("RuntimeError during pyttsx3 speech: %s", re, exc_info=True)
+        except Exception as e:
+            logger.error("Error during pyttsx3 speech: %s", e, exc_info=True)
+        finally:
+            with self._speaking_lock:
+                self._speaking = False
+        return False
 
-    for voice_info in available_voices_data:
-        if language_code.lower() in [lang.lower() for lang in voice_info.get("languages", [])]:
-            try:
-                engine_instance.setProperty('voice', voice_info["id"])
-                logger.info(f"Set pyttsx3 voice by language property match for '{language_code}': {voice_info['name']}")
-                return True
-            except Exception as e_set_lang:
-                 logger.warning(f"Failed to set voice by language property for {voice_info['name']}: {e_set_lang}")
-    
-    for voice_info in available_voices_data:
-        voice_name_lower = voice_info.get("name", "").lower()
-        if language_code.lower() == "id" and "indonesia" in voice_name_lower:
-            try:
-                engine_instance.setProperty('voice', voice_info["id"])
-                logger.info(f"Set pyttsx3 voice by name heuristic for '{language_code}': {voice_info['name']}")
-                return True
-            except: pass
-        elif language_code.lower() == "en" and ("zira" in voice_name_lower or "david" in voice_name_lower):
+    def _on_word(self, name, location, length):
+        if self._stop_requested.is_set():
+            self._engine.stop()
+
+    def clear_pending(self) -> int:
+        """Membuang ucapan yang masih mengantre (hasilnya False); yang sedang diucapkan tetap selesai."""
+        keep, dropped = [], 0
+        while True:
             try:
-                engine_instance.setProperty('voice', voice_info["id"])
-                logger.info(f"Set pyttsx3 voice by name heuristic for '{language_code}': {voice_info['name']}")
-                return True
-            except: pass
-    logger.warning(f"No suitable pyttsx3 voice explicitly found for language '{language_code}'. pyttsx3 will use its default voice.")
-    return False
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item[0] == "say":
+                # Future yang sudah dibatalkan (mis. speak_default_async dibatalkan) dilewati saja.
+                if item[2].set_running_or_notify_cancel():
+                    item[2].set_result(False)
+                dropped += 1
+            else:
+                keep.append(item)
+        for item in keep:
+            self._queue.put(item)
+        return dropped
 
+    def interrupt(self) -> int:
+        """Barge-in: membuang antrean (lihat clear_pending) dan menghentikan ucapan yang sedang berjalan."""
+        dropped = self.clear_pending()
+        with self._speaking_lock:
+            if self._speaking:
+                self._stop_requested.set()
+        return dropped
 
-def speak_default(text: str, language_code: str = "id", rate: Optional[int] = None, volume: Optional[float] = None):
-    """Uses pyttsx3 to speak the given text. Initializes engine per call for thread safety."""
-    local_engine = None
-    try:
-        local_engine = pyttsx3.init()
-        if local_engine is None:
-            logger.error("pyttsx3.init() returned None in speak_default. Engine not available.")
+    def shutdown(self, timeout: float = 5.0):
+        if self._thread is None or not self._thread.is_alive():
             return
-        logger.debug("pyttsx3 engine initialized for speak_default call.")
-    except Exception as e_init:
-        logger.error(f"pyttsx3 engine failed to initialize in speak_default: {e_init}", exc_info=True)
-        return
+        self.submit("shutdown")
+        self._thread.join(timeout)
+
+
+def get_worker() -> Pyttsx3Worker:
+    """Instance singleton Pyttsx3Worker; thread-nya dimulai pada perintah pertama."""
+    global _worker_instance
+    if _worker_instance is None:
+        with _worker_lock:
+            if _worker_instance is None:
+                _worker_instance = Pyttsx3Worker()
+    return _worker_instance
+
+
+def list_available_voices() -> list:
+    """Lists available pyttsx3 voices (dibaca sekali oleh worker)."""
+    return get_worker().submit("voices").result()
 
+
+def _resolve_settings(rate: Optional[int], volume: Optional[float]) -> tuple[int, float]:
     actual_rate = rate if rate is not None else config_manager.get_int("tts_settings", "pyttsx3_rate", 150)
     actual_volume = volume if volume is not None else config_manager.get_float("tts_settings", "pyttsx3_volume", 1.0)
+    return actual_rate, actual_volume
 
-    logger.info(f"pyttsx3 speaking: '{text[:50]}...' (Lang: {language_code}, Rate: {actual_rate}, Vol: {actual_volume})")
 
+def speak_default(text: str, language_code: str = "id", rate: Optional[int] = None, volume: Optional[float] = None) -> bool:
+    """Uses pyttsx3 to speak the given text via the shared worker thread. Blocks until spoken."""
+    actual_rate, actual_volume = _resolve_settings(rate, volume)
+    logger.info("pyttsx3 speaking: '%s...' (Lang: %s, Rate: %s, Vol: %s)", text[:50], language_code, actual_rate, actual_volume)
     try:
-        _set_voice_on_engine(local_engine, language_code) 
-        
-        local_engine.setProperty('rate', actual_rate)
-        local_engine.setProperty('volume', actual_volume)
-        
-        local_engine.say(text)
-        local_engine.runAndWait()
-        logger.debug("pyttsx3 runAndWait() completed.")
-    except RuntimeError as re:
-        logger.error(f"RuntimeError during pyttsx3 speech: {re}", exc_info=True)
+        return get_worker().submit("say", text, language_code, actual_rate, actual_volume).result()
     except Exception as e:
-        logger.error(f"Error during pyttsx3 speech: {e}", exc_info=True)
-    finally:
-        # Meskipun runAndWait() seharusnya membersihkan, tidak ada salahnya mencoba stop
-        # Ini mungkin tidak selalu diperlukan atau bahkan tidak ada di semua driver pyttsx3
-        if local_engine:
-            try:
-                # local_engine.stop() # Hati-hati, stop() bisa menghentikan loop event yang sedang berjalan
-                # Untuk pyttsx3, runAndWait() adalah cara utama untuk memastikan semua selesai.
-                # Tidak ada metode 'shutdown' atau 'del' yang eksplisit dan aman untuk instance engine.
-                # Biarkan instance engine lokal ini di-garbage collect.
-                pass
-            except Exception as e_stop:
-                logger.debug(f"Exception while trying to stop local_engine (ignoring): {e_stop}")
+        logger.error("Error during pyttsx3 speech: %s", e, exc_info=True)
+        return False
+
+
+async def speak_default_async(text: str, language_code: str = "id", rate: Optional[int] = None, volume: Optional[float] = None) -> bool:
+    """Seperti speak_default(), tetapi menunggu tanpa memblokir event loop maupun thread executor."""
+    actual_rate, actual_volume = _resolve_settings(rate, volume)
+    logger.info("pyttsx3 speaking: '%s...' (Lang: %s, Rate: %s, Vol: %s)", text[:50], language_code, actual_rate, actual_volume)
+    return await asyncio.wrap_future(get_worker().submit("say", text, language_code, actual_rate, actual_volume))
+
+
+def stop_speaking() -> int:
+    """Menghentikan ucapan pyttsx3 yang sedang berjalan dan yang mengantre (barge-in)."""
+    if _worker_instance is None:
+        return 0
+    return _worker_instance.interrupt()
+
+
+# --- Lifecycle hooks (dipanggil oleh ModuleManager) ---
+async def close():
+    if _worker_instance is not None:
+        await asyncio.to_thread(_worker_instance.shutdown)
 
 
 if __name__ == '__main__':
-    # ... (Blok __main__ Anda bisa tetap sama, tapi sekarang list_available_voices
-    #      dan speak_default akan menginisialisasi engine mereka sendiri secara internal) ...
-    if not logging.getLogger().hasHandlers() and not logger.hasHandlers():
-        logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    setup_logging(console=True, level=logging.DEBUG)
 
     logger.info("--- Default TTS (pyttsx3) Test ---")
 
-    logger.info("Available pyttsx3 Voices (engine will be init/stopped for this):")
+    logger.info("Available pyttsx3 Voices (read once by the worker):")
     voices_data = list_available_voices() # Ganti nama variabel
     if voices_data:
         for i, voice_info_item in enumerate(voices_data):
-            logger.info(f"  Voice {i}: {voice_info_item}")
+            logger.info("  Voice %s: %s", i, voice_info_item)
     else:
         logger.info("  No voices found or engine not initialized.")
     logger.info("-" * 20)
-    
+
     logger.info("Testing speak_default with config values (Indonesia)...")
     speak_default("Halo, ini adalah tes suara dari pyttsx3 menggunakan bahasa Indonesia.", language_code="id")
-    
-    time.sleep(0.5) 
+
+    time.sleep(0.5)
 
     logger.info("\nTesting speak_default with config values (English)...")
     speak_default("Hello, this is a test voice from pyttsx3 using English.", language_code="en")
+    get_worker().shutdown()
@@ -1,20 +1,41 @@
 # plugins/play_voice.py
+"""
+Subsistem pemutaran audio lintas platform.
 
-import winsound  # Khusus untuk Windows
+Backend dipilih saat runtime ([playback] backend = auto | sounddevice |
+simpleaudio | winsound | null | file); "auto" mencoba sounddevice, simpleaudio,
+winsound (Windows), lalu null. Library backend diimpor saat dipilih, jadi
+mengimpor modul ini tidak pernah gagal di Linux/headless.
+
+Semua pemutaran lewat satu AudioPlayer: thread pemutar khusus membaca antrean,
+sehingga event loop tidak pernah terblokir. enqueue() mengembalikan Future
+berisi metrik (termasuk time-to-first-sample), stop() menghentikan audio yang
+sedang diputar dan mengosongkan antrean seketika (untuk barge-in).
+"""
+import asyncio
 import os
 import platform  # Untuk memeriksa sistem operasi
+import queue
+import threading
+import time # Untuk metrik pemutaran
+from concurrent.futures import Future
 from core import config_manager
+from core.audio_buffer import AudioBuffer, unique_audio_filename
+from core.logging_setup import get_logger, setup_logging
 import logging
-import time # Diperlukan untuk time.sleep jika kita ingin menunggu audio selesai
 
 # --- Setup Logging ---
-logger = logging.getLogger(__name__)
-if not logger.hasHandlers():
-    log_file_path = os.path.join(config_manager.LOG_DIR, f"{os.path.split(__file__)[1].split('.')[0]}.log")
-    file_handler = logging.FileHandler(log_file_path)
-    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-    logger.addHandler(file_handler)
-    logger.setLevel(logging.INFO)
+logger = get_logger(__name__)
+
+MODULE_MANIFEST = {
+    "capabilities": ["playback"],
+    "engines": ["sounddevice", "simpleaudio", "winsound", "null", "file"],
+    "languages": [],
+    "cost_class": "low",
+}
+
+CONFIG_SECTION = "playback"
+AUTO_BACKEND_ORDER = ("sounddevice", "simpleaudio", "winsound", "null")
 
 # --- Baca Konfigurasi Path Audio ---
 BASE_AUDIO_OUTPUT_PATH_CONFIG = config_manager.get_config_value("general", "audio_output_path", "data/audio/")
@@ -26,13 +47,332 @@ else:
 if not os.path.exists(DEFAULT_AUDIO_PATH):
     try:
         os.makedirs(DEFAULT_AUDIO_PATH)
-        logger.info(f"Created default audio output directory: {DEFAULT_AUDIO_PATH}")
+        logger.info("Created default audio output directory: %s", DEFAULT_AUDIO_PATH)
     except Exception as e:
-        logger.error(f"Failed to create default audio output directory {DEFAULT_AUDIO_PATH}: {e}")
+        logger.error("Failed to create default audio output directory %s: %s", DEFAULT_AUDIO_PATH, e)
+
+
+class PlaybackError(Exception):
+    pass
+
+
+# --- Backend ---
+# Setiap backend memutar satu AudioBuffer secara blocking (di thread pemutar),
+# memanggil on_first_sample(perkiraan waktu perf_counter saat sampel pertama
+# keluar) dan berhenti secepatnya jika stop_event di-set.
+class NullBackend:
+    """Sink tanpa suara untuk headless/testing; realtime=True menunggu selama durasi audio."""
+    name = "null"
+
+    def __init__(self, realtime: bool = True):
+        self.realtime = realtime
+
+    def play(self, buffer: AudioBuffer, stop_event: threading.Event, on_first_sample):
+        on_first_sample(time.perf_counter())
+        if self.realtime:
+            stop_event.wait(buffer.duration)
+
+    def stop(self):
+        pass
+
+
+class FileBackend:
+    """Menulis setiap audio yang 'diputar' ke direktori, untuk server tanpa perangkat audio."""
+    name = "file"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def play(self, buffer: AudioBuffer, stop_event: threading.Event, on_first_sample):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, unique_audio_filename("playback"))
+        on_first_sample(time.perf_counter())
+        with open(path, "wb") as f:
+            f.write(buffer.to_wav_bytes())
+        logger.info("Playback written to file sink: %s", path)
+
+    def stop(self):
+        pass
+
+
+class SounddeviceBackend:
+    name = "sounddevice"
+    _DTYPES = {1: "uint8", 2: "int16", 3: "int24", 4: "int32"}
+
+    def __init__(self, block_frames: int = 1024):
+        import sounddevice
+        self._sd = sounddevice
+        self.block_frames = block_frames
+
+    def play(self, buffer: AudioBuffer, stop_event: threading.Event, on_first_sample):
+        pcm = buffer.pcm_frames()
+        frame_bytes = buffer.channels * buffer.sample_width
+        block_bytes = self.block_frames * frame_bytes
+        with self._sd.RawOutputStream(samplerate=buffer.sample_rate, channels=buffer.channels,
+                                      dtype=self._DTYPES[buffer.sample_width], latency="low") as stream:
+            # Sampel pertama terdengar setelah latensi output perangkat.
+            on_first_sample(time.perf_counter() + stream.latency)
+            for offset in range(0, len(pcm), block_bytes):
+                if stop_event.is_set():
+                    stream.abort()
+                    return
+                stream.write(pcm[offset:offset + block_bytes])
+
+    def stop(self):
+        pass
+
+
+class SimpleaudioBackend:
+    name = "simpleaudio"
+
+    def __init__(self):
+        import simpleaudio
+        self._sa = simpleaudio
+        self._play_object = None
+
+    def play(self, buffer: AudioBuffer, stop_event: threading.Event, on_first_sample):
+        self._play_object = self._sa.play_buffer(buffer.pcm_frames(), buffer.channels, buffer.sample_width, buffer.sample_rate)
+        on_first_sample(time.perf_counter())
+        try:
+            while self._play_object.is_playing():
+                if stop_event.wait(0.01):
+                    self._play_object.stop()
+                    return
+        finally:
+            self._play_object = None
+
+    def stop(self):
+        play_object = self._play_object
+        if play_object is not None:
+            play_object.stop()
+
+
+class WinsoundBackend:
+    name = "winsound"
+
+    def __init__(self):
+        import winsound  # Khusus untuk Windows
+        self._winsound = winsound
+
+    def play(self, buffer: AudioBuffer, stop_event: threading.Event, on_first_sample):
+        # SND_MEMORY tidak bisa digabung dengan SND_ASYNC; pemanggilan blocking ini
+        # berjalan di thread pemutar dan dihentikan lewat stop().
+        on_first_sample(time.perf_counter())
+        self._winsound.PlaySound(buffer.to_wav_bytes(), self._winsound.SND_MEMORY)
+
+    def stop(self):
+        # PlaySound(None, ...) menghentikan waveform yang sedang diputar.
+        self._winsound.PlaySound(None, 0)
+
+
+def create_backend(name: str):
+    """Membuat backend berdasarkan nama; ImportError/PlaybackError jika tidak tersedia."""
+    if name == "sounddevice":
+        return SounddeviceBackend(config_manager.get_int(CONFIG_SECTION, "block_frames", 1024))
+    if name == "simpleaudio":
+        return SimpleaudioBackend()
+    if name == "winsound":
+        if platform.system() != "Windows":
+            raise PlaybackError("winsound is only available on Windows.")
+        return WinsoundBackend()
+    if name == "null":
+        return NullBackend(config_manager.get_bool(CONFIG_SECTION, "null_realtime", True))
+    if name == "file":
+        directory = config_manager.get_config_value(CONFIG_SECTION, "file_sink_dir", "data/audio/playback")
+        if not os.path.isabs(directory):
+            directory = os.path.join(config_manager.PROJECT_ROOT_DIR, directory)
+        return FileBackend(directory)
+    raise PlaybackError(f"Unknown playback backend: {name}")
+
+
+def select_backend(preferred: str = None):
+    """Backend dari config (atau `preferred`); 'auto' mengambil yang pertama tersedia."""
+    preferred = (preferred or config_manager.get_config_value(CONFIG_SECTION, "backend", "auto")).strip().lower()
+    candidates = AUTO_BACKEND_ORDER if preferred == "auto" else (preferred,)
+    for name in candidates:
+        try:
+            backend = create_backend(name)
+        except Exception as e:
+            logger.debug("Playback backend '%s' not available: %s", name, e)
+            continue
+        logger.info("Using playback backend: %s", name)
+        return backend
+    logger.error("Playback backend '%s' not available. Falling back to null sink.", preferred)
+    return NullBackend()
+
+
+# --- Player ---
+class AudioPlayer:
+    """Antrean pemutaran dengan satu thread pemutar; aman dipanggil dari thread mana pun dan dari event loop."""
+
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else select_backend()
+        self._queue = queue.Queue()
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._current = None
+        self._closed = False
+        # Dinaikkan oleh stop(); item dari generasi lama tidak diputar meski sudah diambil thread pemutar.
+        self._generation = 0
+        self.last_metrics = None
+        self._thread = threading.Thread(target=self._run, name="audio-player", daemon=True)
+        self._thread.start()
+
+    def enqueue(self, buffer: AudioBuffer, origin: float = None) -> Future:
+        """
+        Menambahkan audio ke antrean. Future selesai dengan dict metrik setelah audio selesai/dihentikan.
+        `origin` (time.perf_counter()) adalah titik awal time-to-first-sample; bawaannya saat enqueue.
+        """
+        future = Future()
+        if self._closed:
+            future.set_exception(PlaybackError("AudioPlayer is closed."))
+            return future
+        queued_at = time.perf_counter()
+        self._queue.put((buffer, future, queued_at, origin if origin is not None else queued_at, self._generation))
+        return future
+
+    async def play(self, buffer: AudioBuffer, origin: float = None) -> dict:
+        """Memutar audio dan menunggu sampai selesai tanpa memblokir event loop."""
+        return await asyncio.wrap_future(self.enqueue(buffer, origin))
+
+    def play_blocking(self, buffer: AudioBuffer, origin: float = None) -> dict:
+        return self.enqueue(buffer, origin).result()
+
+    def stop(self):
+        """
+        Menghentikan audio yang sedang diputar dan membuang antrean (barge-in).
+        Future item yang dibuang selesai dengan metrik {"stopped": True, "dropped": True}.
+        """
+        with self._lock:
+            self._generation += 1
+            self._stop_event.set()
+            dropped = 0
+            while True:
+                try:
+                    buffer, future, _, _, _ = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if future is not None:
+                    _finish_dropped(future, self.backend.name, buffer)
+                    dropped += 1
+            if self._current is not None:
+                try:
+                    self.backend.stop()
+                except Exception as e:
+                    logger.debug("Backend stop failed: %s", e)
+        if dropped:
+            logger.info("Playback stopped; %d queued items dropped.", dropped)
+
+    @property
+    def is_playing(self) -> bool:
+        return self._current is not None
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def close(self, timeout: float = 2.0):
+        self._closed = True
+        self.stop()
+        self._queue.put((None, None, 0.0, 0.0, 0))
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            buffer, future, queued_at, origin, generation = self._queue.get()
+            if buffer is None:
+                return
+            with self._lock:
+                if generation != self._generation:
+                    _finish_dropped(future, self.backend.name, buffer)
+                    continue
+                if not future.set_running_or_notify_cancel():
+                    continue
+                self._stop_event.clear()
+                self._current = buffer
+            metrics = {"backend": self.backend.name, "duration": buffer.duration, "queued_at": queued_at,
+                       "started_at": time.perf_counter(), "first_sample_at": None}
+
+            def on_first_sample(at: float):
+                metrics["first_sample_at"] = at
+
+            try:
+                self.backend.play(buffer, self._stop_event, on_first_sample)
+            except Exception as e:
+                logger.error("Error during audio playback (%s): %s", self.backend.name, e, exc_info=True)
+                with self._lock:
+                    self._current = None
+                future.set_exception(e)
+                continue
+            with self._lock:
+                self._current = None
+                stopped = self._stop_event.is_set()
+            metrics["ended_at"] = time.perf_counter()
+            metrics["stopped"] = stopped
+            if metrics["first_sample_at"] is not None:
+                metrics["ttfs"] = metrics["first_sample_at"] - origin
+                logger.debug("Playback (%s): time-to-first-sample %.1f ms, %.2f s audio%s",
+                             self.backend.name, metrics["ttfs"] * 1e3, buffer.duration, " (stopped)" if stopped else "")
+            self.last_metrics = metrics
+            future.set_result(metrics)
+
+
+def _finish_dropped(future: Future, backend_name: str, buffer: AudioBuffer):
+    if future.done():
+        return
+    now = time.perf_counter()
+    future.set_result({"backend": backend_name, "duration": buffer.duration, "queued_at": now, "started_at": None,
+                       "first_sample_at": None, "ended_at": now, "stopped": True, "dropped": True})
+
+
+_player_instance = None
+_player_lock = threading.Lock()
+
+
+def get_player() -> AudioPlayer:
+    """Instance singleton AudioPlayer (backend dipilih dari [playback] saat pertama dipakai)."""
+    global _player_instance
+    if _player_instance is None:
+        with _player_lock:
+            if _player_instance is None:
+                _player_instance = AudioPlayer()
+    return _player_instance
+
+
+def stop_playback():
+    """Menghentikan pemutaran seketika, jika player sudah dibuat."""
+    if _player_instance is not None:
+        _player_instance.stop()
+
+
+async def play_async(buffer: AudioBuffer, origin: float = None) -> dict:
+    """Memutar audio lewat player bersama; selesai saat audio selesai atau dihentikan."""
+    return await get_player().play(buffer, origin)
+
+
+def play_audio_buffer(buffer, block_until_done: bool = True):
+    """
+    Plays in-memory WAV audio (an AudioBuffer from core/audio_buffer.py, or raw WAV bytes).
+
+    Args:
+        buffer (AudioBuffer | bytes): The audio to play.
+        block_until_done (bool): If True, waits for the sound to finish playing.
+                                 If False, only enqueues it on the shared player.
+    """
+    try:
+        if isinstance(buffer, (bytes, bytearray, memoryview)):
+            buffer = AudioBuffer.from_wav_bytes(bytes(buffer))
+        future = get_player().enqueue(buffer)
+        if block_until_done:
+            future.result()
+            logger.info("Playback finished for in-memory audio.")
+    except Exception as e:
+        logger.error("Error playing in-memory audio: %s", e, exc_info=True)
+
 
 def play_audio_file(file_path: str, block_until_done: bool = True):
     """
-    Plays an audio file using winsound (Windows only).
+    Plays a WAV file with the selected playback backend.
     Normalizes the file path.
 
     Args:
@@ -40,43 +380,30 @@ def play_audio_file(file_path: str, block_until_done: bool = True):
         block_until_done (bool): If True, waits for the sound to finish playing.
                                  If False, plays asynchronously.
     """
-    if platform.system() != "Windows":
-        logger.error("winsound.PlaySound is only available on Windows. Cannot play audio.")
-        # Implementasi alternatif untuk OS lain bisa ditambahkan di sini.
-        return
-
     try:
         # os.path.normpath akan mengkonversi '/' menjadi '\' di Windows jika perlu,
         # dan menangani path yang tidak standar.
         normalized_file_path = os.path.normpath(file_path)
-        logger.info(f"Attempting to play audio file: {normalized_file_path} (Blocking: {block_until_done})")
-        
+        logger.info("Attempting to play audio file: %s (Blocking: %s)", normalized_file_path, block_until_done)
+
         if not os.path.exists(normalized_file_path):
-            logger.error(f"Audio file not found: {normalized_file_path}")
+            logger.error("Audio file not found: %s", normalized_file_path)
             return
 
-        flags = winsound.SND_FILENAME
-        if not block_until_done:
-            flags |= winsound.SND_ASYNC
-        else:
-            # Untuk mode blocking, kita bisa gunakan SND_SYNC atau SND_FILENAME saja (defaultnya blocking)
-            # Namun, SND_FILENAME saja sudah cukup untuk blocking.
-            # Jika ingin eksplisit, bisa tambahkan winsound.SND_SYNC, tapi hati-hati karena
-            # SND_SYNC akan menginterupsi suara lain yang sedang diputar dengan SND_ASYNC.
-            # SND_FILENAME tanpa SND_ASYNC adalah cara paling aman untuk blocking.
-            pass # SND_FILENAME saja sudah blocking
-
-        winsound.PlaySound(normalized_file_path, flags)
-        
+        with open(normalized_file_path, "rb") as f:
+            buffer = AudioBuffer.from_wav_bytes(f.read())
+        future = get_player().enqueue(buffer)
+
         if block_until_done:
-            logger.info(f"Playback finished for: {normalized_file_path}")
+            future.result()
+            logger.info("Playback finished for: %s", normalized_file_path)
         else:
-            logger.info(f"Playback started asynchronously for: {normalized_file_path}")
+            logger.info("Playback started asynchronously for: %s", normalized_file_path)
 
     except TypeError as te:
-        logger.error(f"TypeError during audio playback for path '{file_path}': {te}. Ensure path is a valid string.")
+        logger.error("TypeError during audio playback for path '%s': %s. Ensure path is a valid string.", file_path, te)
     except Exception as e:
-        logger.error(f"Error playing audio file '{file_path}': {e}", exc_info=True)
+        logger.error("Error playing audio file '%s': %s", file_path, e, exc_info=True)
 
 
 def play_audio_in_default_dir(filename: str, sub_directory: str = None, block_until_done: bool = True):
@@ -94,54 +421,36 @@ def play_audio_in_default_dir(filename: str, sub_directory: str = None, block_un
         # Pastikan sub_directory juga dinormalisasi jika mengandung separator yang salah
         normalized_sub_dir = os.path.normpath(sub_directory)
         play_path = os.path.join(DEFAULT_AUDIO_PATH, normalized_sub_dir)
-        
+
         if not os.path.exists(play_path):
-            logger.error(f"Subdirectory '{normalized_sub_dir}' not found in '{DEFAULT_AUDIO_PATH}'. Cannot play file '{filename}'.")
+            logger.error("Subdirectory '%s' not found in '%s'. Cannot play file '%s'.", normalized_sub_dir, DEFAULT_AUDIO_PATH, filename)
             return
-            
+
     # Gabungkan path dan nama file, lalu normalisasi seluruh path
     full_file_path = os.path.normpath(os.path.join(play_path, filename))
     play_audio_file(full_file_path, block_until_done=block_until_done)
 
 
 if __name__ == '__main__':
-    if not logging.getLogger().hasHandlers():
-        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    import math
+
+    setup_logging(console=True, level=logging.DEBUG)
 
     logger.info("--- Play Voice Test ---")
+    player = get_player()
+    logger.info("Backend: %s", player.backend.name)
+
+    rate = 22050
+    beep = AudioBuffer.from_samples([0.2 * math.sin(2 * math.pi * 660 * i / rate) for i in range(rate // 4)], rate)
+
+    async def _demo():
+        metrics = await play_async(beep)
+        logger.info("Beep played: ttfs %.1f ms", metrics["ttfs"] * 1e3)
+        futures = [player.enqueue(beep) for _ in range(3)]
+        await asyncio.sleep(0.1)
+        stop_playback()
+        results = [future.result() for future in futures]
+        logger.info("After stop(): %d interrupted, %d dropped from queue",
+                    sum(not r.get("dropped", False) for r in results), sum(r.get("dropped", False) for r in results))
 
-    dummy_filename = "test_audio_play.wav" # Anda perlu file WAV ini di DEFAULT_AUDIO_PATH
-    dummy_file_full_path = os.path.join(DEFAULT_AUDIO_PATH, dummy_filename)
-
-    if os.path.exists(dummy_file_full_path):
-        logger.info(f"Testing play_audio_in_default_dir (blocking) with: {dummy_filename}")
-        play_audio_in_default_dir(dummy_filename, block_until_done=True)
-        logger.info("Blocking playback test finished.")
-
-        # Beri jeda sedikit antar tes jika diperlukan
-        time.sleep(1)
-
-        logger.info(f"\nTesting play_audio_in_default_dir (async) with: {dummy_filename}")
-        play_audio_in_default_dir(dummy_filename, block_until_done=False)
-        logger.info("Async playback test started. Script will continue...")
-        
-        # Jika async, skrip akan langsung lanjut. Untuk melihat efeknya, kita bisa beri delay di sini.
-        # Dalam aplikasi nyata, loop utama akan terus berjalan.
-        if platform.system() == "Windows":
-            logger.info("Waiting for async audio to play for a bit (e.g., 3 seconds in this test)...")
-            time.sleep(3) 
-            # Untuk menghentikan suara async yang mungkin masih berjalan (jika perlu untuk tes bersih)
-            # winsound.PlaySound(None, winsound.SND_PURGE)
-            # logger.info("Async sound (if any) purged for test cleanup.")
-    else:
-        logger.warning(f"Dummy audio file '{dummy_file_full_path}' not found. Skipping playback test.")
-        logger.info(f"Please create a valid .wav file named '{dummy_filename}' in '{DEFAULT_AUDIO_PATH}' for testing.")
-
-    # Contoh path dengan backslash (Windows style)
-    # Ganti dengan path file WAV Anda yang valid jika ingin menguji ini.
-    # example_backslash_path = "D:\\path\\to\\your\\audio.wav" 
-    # if os.path.exists(example_backslash_path):
-    #    logger.info(f"\nTesting play_audio_file with backslash path (blocking): {example_backslash_path}")
-    #    play_audio_file(example_backslash_path, block_until_done=True)
-    # else:
-    #    logger.warning(f"Backslash path example file not found: {example_backslash_path}")
\ No newline at end of file
+    asyncio.run(_demo())
@@ -2,18 +2,19 @@
 
 from googletrans import Translator, LANGUAGES
 from core import config_manager
-import logging
+from core.logging_setup import get_logger, setup_logging
 import os
 import asyncio
 
 # --- Setup Logging ---
-logger = logging.getLogger(__name__)
-if not logger.hasHandlers():
-    log_file_path = os.path.join(config_manager.LOG_DIR, f"{os.path.split(__file__)[1].split('.')[0]}.log")
-    file_handler = logging.FileHandler(log_file_path)
-    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-    logger.addHandler(file_handler)
-    logger.setLevel(logging.INFO)
+logger = get_logger(__name__)
+
+MODULE_MANIFEST = {
+    "capabilities": ["translate", "detect_language"],
+    "engines": ["googletrans"],
+    "languages": ["*"],
+    "cost_class": "low",
+}
 
 translator_instance = None
 try:
@@ -21,7 +22,7 @@ try:
     translator_instance = Translator()
     logger.info("Googletrans Translator instance initialized successfully.")
 except Exception as e:
-    logger.error(f"Failed to initialize Googletrans Translator: {e}", exc_info=True)
+    logger.error("Failed to initialize Googletrans Translator: %s", e, exc_info=True)
 
 # --- Konfigurasi ---
 DEFAULT_SOURCE_LANG = config_manager.get_config_value("translator_plugin", "default_source_language", "auto")
@@ -45,25 +46,25 @@ class TranslationPlugin:
             logger.warning("Input text for translation is empty.")
             return text
         if not self.is_language_supported(target_lang):
-            logger.error(f"Target language '{target_lang}' is not supported.")
+            logger.error("Target language '%s' is not supported.", target_lang)
             return None
         if source_lang != "auto" and not self.is_language_supported(source_lang):
-            logger.error(f"Source language '{source_lang}' is not supported.")
+            logger.error("Source language '%s' is not supported.", source_lang)
             return None
 
-        logger.info(f"Attempting to translate from '{source_lang}' to '{target_lang}': '{text[:50]}...'")
+        logger.info("Attempting to translate from '%s' to '%s': '%s...'", source_lang, target_lang, text[:50])
         try:
             translated_object = await self.translator.translate(text, dest=target_lang.lower(), src=source_lang.lower())
             if translated_object and hasattr(translated_object, 'text'):
                 translated_text = translated_object.text
                 detected_source_lang = translated_object.src
-                logger.info(f"Successfully translated. Detected source: '{detected_source_lang}'. Result: '{translated_text[:50]}...'")
+                logger.info("Successfully translated. Detected source: '%s'. Result: '%s...'", detected_source_lang, translated_text[:50])
                 return translated_text
             else:
                 logger.error("Translation attempt returned an unexpected object or no text.")
                 return None
         except Exception as e:
-            logger.error(f"Error during translation from '{source_lang}' to '{target_lang}': {e}", exc_info=True)
+            logger.error("Error during translation from '%s' to '%s': %s", source_lang, target_lang, e, exc_info=True)
             return None
 
     async def detect_language(self, text: str) -> tuple[str | None, float | None]:
@@ -74,19 +75,19 @@ class TranslationPlugin:
             logger.warning("Input text for language detection is empty.")
             return None, None
             
-        logger.info(f"Attempting to detect language for: '{text[:50]}...'")
+        logger.info("Attempting to detect language for: '%s...'", text[:50])
         try:
             detected_object = await self.translator.detect(text)
             if detected_object and hasattr(detected_object, 'lang') and hasattr(detected_object, 'confidence'):
                 lang_code = detected_object.lang
                 confidence = detected_object.confidence
-                logger.info(f"Language detected: {lang_code} with confidence: {confidence:.2f}")
+                logger.info("Language detected: %s with confidence: %.2f", lang_code, confidence)
                 return lang_code, confidence
             else:
                 logger.error("Language detection returned an unexpected object.")
                 return None, None
         except Exception as e:
-            logger.error(f"Error during language detection: {e}", exc_info=True)
+            logger.error("Error during language detection: %s", e, exc_info=True)
             return None, None
 
 _plugin_instance = None
@@ -112,9 +113,25 @@ async def detect_text_language(text: str) -> tuple[str | None, float | None]:
         return await plugin.detect_language(text)
     return None, None
 
+# --- Lifecycle hooks (dipanggil oleh ModuleManager) ---
+async def init():
+    if get_translator_plugin() is None:
+        raise RuntimeError("Googletrans Translator is not available.")
+
+async def close():
+    global _plugin_instance
+    # googletrans versi async menyimpan httpx.AsyncClient di atribut `client`
+    http_client = getattr(translator_instance, "client", None)
+    aclose = getattr(http_client, "aclose", None)
+    if aclose is not None:
+        try:
+            await aclose()
+        except Exception as e:
+            logger.warning("Error closing translator HTTP client: %s", e)
+    _plugin_instance = None
+
 if __name__ == '__main__':
-    if not logging.getLogger().hasHandlers():
-        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    setup_logging(console=True)
     logger.info("--- Translator Plugin Test ---")
     async def run_tests():
         translator_plug = get_translator_plugin()
@@ -126,32 +143,32 @@ if __name__ == '__main__':
         text_en = "Hello, how are you world?"
         text_ja = "こんにちは、世界、お元気ですか？"
 
-        logger.info(f"\nOriginal (ID): {text_id}")
+        logger.info("\nOriginal (ID): %s", text_id)
         translated_to_en = await translate_text(text_id, target_lang="en", source_lang="id")
-        if translated_to_en: logger.info(f"  -> English: {translated_to_en}")
+        if translated_to_en: logger.info("  -> English: %s", translated_to_en)
 
         translated_to_ja = await translate_text(text_id, target_lang="ja") 
-        if translated_to_ja: logger.info(f"  -> Japanese: {translated_to_ja}")
+        if translated_to_ja: logger.info("  -> Japanese: %s", translated_to_ja)
         
-        logger.info(f"\nOriginal (EN): {text_en}")
+        logger.info("\nOriginal (EN): %s", text_en)
         translated_to_id_from_en = await translate_text(text_en, target_lang="id")
-        if translated_to_id_from_en: logger.info(f"  -> Indonesian: {translated_to_id_from_en}")
+        if translated_to_id_from_en: logger.info("  -> Indonesian: %s", translated_to_id_from_en)
 
-        logger.info(f"\nOriginal (JA): {text_ja}")
+        logger.info("\nOriginal (JA): %s", text_ja)
         translated_to_en_from_ja = await translate_text(text_ja, target_lang="en", source_lang="ja")
-        if translated_to_en_from_ja: logger.info(f"  -> English: {translated_to_en_from_ja}")
+        if translated_to_en_from_ja: logger.info("  -> English: %s", translated_to_en_from_ja)
 
         logger.info("\n--- Language Detection Test ---")
         lang_id, conf_id = await detect_text_language(text_id)
-        if lang_id: logger.info(f"Detected for '{text_id[:20]}...': {lang_id} (Confidence: {conf_id:.2f})")
+        if lang_id: logger.info("Detected for '%s...': %s (Confidence: %.2f)", text_id[:20], lang_id, conf_id)
         
         lang_en, conf_en = await detect_text_language(text_en)
-        if lang_en: logger.info(f"Detected for '{text_en[:20]}...': {lang_en} (Confidence: {conf_en:.2f})")
+        if lang_en: logger.info("Detected for '%s...': %s (Confidence: %.2f)", text_en[:20], lang_en, conf_en)
 
         lang_ja, conf_ja = await detect_text_language(text_ja)
-        if lang_ja: logger.info(f"Detected for '{text_ja[:10]}...': {lang_ja} (Confidence: {conf_ja:.2f})")
+        if lang_ja: logger.info("Detected for '%s...': %s (Confidence: %.2f)", text_ja[:10], lang_ja, conf_ja)
 
     try:
         asyncio.run(run_tests())
     except Exception as e:
-        logger.error(f"Error running translator tests: {e}", exc_info=True)
\ No newline at end of file
+        logger.error("Error running translator tests: %s", e, exc_info=True)
\ No newline at end of file
@@ -0,0 +1,229 @@
+# plugins/vits_inference.py
+"""
+Mesin inferensi Coqui VITS untuk CPU, dipakai oleh plugins/custom_model_tts.py.
+
+Di atas `Synthesizer` milik Coqui TTS, modul ini menambahkan:
+  * jumlah thread intra-op/inter-op torch yang bisa diatur (default menyisakan
+    satu core untuk event loop dan pemutaran audio);
+  * `torch.inference_mode()` di setiap pemanggilan (tanpa autograd/version counter);
+  * warm-up agar request pertama tidak membayar alokasi dan pemilihan kernel;
+  * sintesis beberapa kalimat dalam satu forward pass ber-batch (dengan
+    `x_lengths`), kembali ke per kalimat jika model tidak mendukungnya;
+  * opsional kuantisasi dinamis int8 (Linear/LSTM/GRU) untuk CPU.
+
+Statistik real-time factor (waktu sintesis / durasi audio) dicatat per engine;
+tools/bench_vits_rtf.py membandingkan RTF sebelum dan sesudah optimasi.
+"""
+import io
+import math
+import os
+import threading
+import time
+
+from core.logging_setup import get_logger
+
+# --- Setup Logging ---
+logger = get_logger(__name__)
+
+_threads_configured = False
+_threads_lock = threading.Lock()
+
+
+def default_num_threads() -> int:
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+def configure_torch_threads(num_threads: int = 0, interop_threads: int = 0) -> int:
+    """
+    Mengatur thread torch untuk proses ini; 0 = default_num_threads(). Thread inter-op
+    hanya bisa diatur sekali sebelum torch menjalankan pekerjaan paralel apa pun.
+    Mengembalikan jumlah thread intra-op yang berlaku.
+    """
+    global _threads_configured
+    import torch
+
+    num_threads = num_threads if num_threads and num_threads > 0 else default_num_threads()
+    with _threads_lock:
+        torch.set_num_threads(num_threads)
+        if interop_threads and interop_threads > 0 and not _threads_configured:
+            try:
+                torch.set_num_interop_threads(interop_threads)
+            except RuntimeError as e:
+                logger.debug("Could not set torch inter-op threads (already started): %s", e)
+        _threads_configured = True
+    logger.info("Torch threads: intra-op=%d, inter-op=%d.", torch.get_num_threads(), torch.get_num_interop_threads())
+    return num_threads
+
+
+def quantize_dynamic_int8(model):
+    """
+    Kuantisasi dinamis int8 untuk lapisan Linear/LSTM/GRU (in-place, hanya CPU).
+    Konvolusi decoder VITS tetap float; yang dipercepat terutama text encoder.
+    Mengembalikan jumlah modul yang dikuantisasi.
+    """
+    import torch
+
+    supported = torch.backends.quantized.supported_engines
+    if "fbgemm" in supported:
+        torch.backends.quantized.engine = "fbgemm"
+    elif "qnnpack" in supported:
+        torch.backends.quantized.engine = "qnnpack"
+    else:
+        logger.warning("No quantized engine available in this torch build; int8 quantization skipped.")
+        return 0
+    layer_types = {torch.nn.Linear, torch.nn.LSTM, torch.nn.GRU}
+    before = sum(1 for module in model.modules() if type(module) in layer_types)
+    torch.ao.quantization.quantize_dynamic(model, layer_types, dtype=torch.qint8, inplace=True)
+    logger.info("Dynamic int8 quantization applied to %d modules (engine %s).", before, torch.backends.quantized.engine)
+    return before
+
+
+class VitsInferenceEngine:
+    """Pembungkus `TTS.utils.synthesizer.Synthesizer` untuk inferensi CPU yang cepat dan terukur."""
+
+    def __init__(self, synthesizer, num_threads: int = 0, interop_threads: int = 1,
+                 quantize_int8: bool = False, batch_size: int = 4, use_gpu: bool = False):
+        self.synthesizer = synthesizer
+        self.model = synthesizer.tts_model
+        self.num_threads = num_threads
+        self.interop_threads = interop_threads
+        self.quantize_int8 = quantize_int8
+        self.batch_size = max(1, batch_size)
+        self.use_gpu = use_gpu
+        self.quantized = False
+        self.batch_supported = hasattr(self.model, "inference") and hasattr(self.model, "tokenizer")
+        self.sample_rate = synthesizer.output_sample_rate if hasattr(synthesizer, "output_sample_rate") else 22050
+        self._synth_seconds = 0.0
+        self._audio_seconds = 0.0
+        self._stats_lock = threading.Lock()
+
+    def prepare(self):
+        """Thread torch, mode eval, dan (jika diminta) kuantisasi int8. Dipanggil sekali setelah checkpoint dimuat."""
+        if not self.use_gpu:
+            configure_torch_threads(self.num_threads, self.interop_threads)
+        self.model.eval()
+        if self.quantize_int8:
+            if self.use_gpu:
+                logger.warning("int8 dynamic quantization is CPU-only; ignored because use_gpu = true.")
+            else:
+                self.quantized = quantize_dynamic_int8(self.model) > 0
+        return self
+
+    def _inference_mode(self):
+        import torch
+        return torch.inference_mode()
+
+    def _record(self, elapsed: float, samples: int):
+        with self._stats_lock:
+            self._synth_seconds += elapsed
+            self._audio_seconds += samples / self.sample_rate if self.sample_rate else 0.0
+
+    @property
+    def rtf(self) -> float | None:
+        """Real-time factor kumulatif: < 1 berarti lebih cepat dari waktu nyata."""
+        with self._stats_lock:
+            return self._synth_seconds / self._audio_seconds if self._audio_seconds else None
+
+    def tts(self, text: str, speaker_name: str = None):
+        """Satu teks lewat jalur Synthesizer biasa, di dalam inference_mode. Mengembalikan list sampel float."""
+        start = time.perf_counter()
+        with self._inference_mode():
+            wav = self.synthesizer.tts(text=text, speaker_name=speaker_name)
+        elapsed = time.perf_counter() - start
+        self._record(elapsed, len(wav))
+        logger.debug("VITS: %.2f s audio in %.2f s.", len(wav) / self.sample_rate, elapsed)
+        return wav
+
+    def tts_batch(self, texts: list[str], speaker_name: str = None) -> list:
+        """
+        Beberapa teks dalam forward pass ber-batch (per `batch_size`, diurutkan menurut panjang
+        agar padding minimal). Urutan hasil mengikuti `texts`.
+        """
+        if not texts:
+            return []
+        if not self.batch_supported or self.batch_size == 1 or len(texts) == 1:
+            return [self.tts(text, speaker_name) for text in texts]
+        order = sorted(range(len(texts)), key=lambda index: len(texts[index]))
+        results = [None] * len(texts)
+        for offset in range(0, len(order), self.batch_size):
+            chunk = order[offset:offset + self.batch_size]
+            wavs = None
+            if self.batch_supported:
+                try:
+                    wavs = self._forward_batch([texts[index] for index in chunk], speaker_name)
+                except Exception as e:
+                    logger.warning("Batched VITS inference failed (%s); falling back to per-sentence synthesis.", e)
+                    self.batch_supported = False
+            if wavs is None:
+                wavs = [self.tts(texts[index], speaker_name) for index in chunk]
+            for index, wav in zip(chunk, wavs):
+                results[index] = wav
+        return results
+
+    def _speaker_ids(self, speaker_name: str | None, batch: int):
+        import torch
+
+        manager = getattr(self.model, "speaker_manager", None)
+        if speaker_name is None or manager is None or not getattr(manager, "name_to_id", None):
+            return None
+        if getattr(getattr(self.model, "args", None), "use_d_vector_file", False):
+            raise NotImplementedError("d-vector speakers are not supported in batched mode")
+        return torch.full((batch,), manager.name_to_id[speaker_name], dtype=torch.long)
+
+    def _hop_length(self) -> int:
+        rates = getattr(getattr(self.model, "args", None), "upsample_rates_decoder", None)
+        if rates:
+            return math.prod(rates)
+        return self.synthesizer.tts_config.audio["hop_length"]
+
+    def _forward_batch(self, texts: list[str], speaker_name: str = None) -> list:
+        import torch
+
+        start = time.perf_counter()
+        device = next(self.model.parameters()).device
+        token_ids = [self.model.tokenizer.text_to_ids(text) for text in texts]
+        lengths = torch.tensor([len(ids) for ids in token_ids], dtype=torch.long, device=device)
+        tokens = torch.zeros((len(texts), int(lengths.max())), dtype=torch.long, device=device)
+        for row, ids in enumerate(token_ids):
+            tokens[row, :len(ids)] = torch.tensor(ids, dtype=torch.long, device=device)
+        speaker_ids = self._speaker_ids(speaker_name, len(texts))
+        aux_input = {"x_lengths": lengths, "speaker_ids": speaker_ids.to(device) if speaker_ids is not None else None,
+                     "d_vectors": None, "language_ids": None}
+        with self._inference_mode():
+            outputs = self.model.inference(tokens, aux_input=aux_input)
+        hop_length = self._hop_length()
+        frames = outputs["y_mask"].sum(dim=(1, 2)).long().tolist()
+        waveforms = outputs["model_outputs"]
+        trim = self.synthesizer.tts_config.audio.get("do_trim_silence", False)
+        wavs = []
+        for row, frame_count in enumerate(frames):
+            wav = waveforms[row].squeeze().cpu().numpy()[:frame_count * hop_length]
+            if trim:
+                # Sama dengan Synthesizer.tts (numpy_transforms.trim_silence hanya menerima argumen keyword).
+                from TTS.tts.utils.synthesis import trim_silence
+                wav = trim_silence(wav, self.model.ap)
+            wavs.append(list(wav))
+        elapsed = time.perf_counter() - start
+        self._record(elapsed, sum(len(wav) for wav in wavs))
+        logger.debug("VITS batch of %d: %.2f s.", len(texts), elapsed)
+        return wavs
+
+    def to_wav_bytes(self, wav) -> bytes:
+        buffer = io.BytesIO()
+        self.synthesizer.save_wav(wav=wav, path=buffer)
+        return buffer.getvalue()
+
+    def warmup(self, text: str = "Halo, apa kabar?", runs: int = 2, speaker_name: str = None) -> float:
+        """Beberapa inferensi pendek (jalur tunggal dan batch) yang tidak ikut statistik. Mengembalikan durasinya."""
+        start = time.perf_counter()
+        with self._stats_lock:
+            saved = (self._synth_seconds, self._audio_seconds)
+        for _ in range(max(1, runs)):
+            self.tts(text, speaker_name)
+        if self.batch_supported and self.batch_size > 1:
+            self.tts_batch([text, text + " " + text], speaker_name)
+        with self._stats_lock:
+            self._synth_seconds, self._audio_seconds = saved
+        elapsed = time.perf_counter() - start
+        logger.info("VITS warm-up finished in %.2f s.", elapsed)
+        return elapsed
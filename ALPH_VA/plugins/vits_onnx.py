@@ -0,0 +1,135 @@
+# plugins/vits_onnx.py
+"""
+Backend ONNX Runtime untuk suara Coqui VITS kustom (inference_backend = onnx).
+
+Graf dibuat oleh tools/export_vits_onnx.py dari checkpoint [tts_custom_model]. Di samping
+`model.onnx` diekspor `model.json` berisi sample rate, skala noise/panjang, dan
+pemetaan nama speaker -> ID embedding, jadi backend ini tidak perlu torch sama
+sekali: hanya onnxruntime, NumPy, dan tokenizer teks Coqui.
+
+Antarmukanya sama dengan plugins/vits_inference.VitsInferenceEngine
+(tts, tts_batch, warmup, rtf, to_wav_bytes) sehingga CoquiVITSTTS bisa memakai keduanya.
+"""
+import json
+import os
+import threading
+import time
+
+from core.audio_buffer import AudioBuffer
+from core.logging_setup import get_logger
+
+# --- Setup Logging ---
+logger = get_logger(__name__)
+
+
+def metadata_path_for(onnx_path: str) -> str:
+    """`model.onnx` dan `model.int8.onnx` sama-sama memakai `model.json`."""
+    base = os.path.splitext(onnx_path)[0]
+    if base.endswith(".int8"):
+        base = base[:-len(".int8")]
+    return base + ".json"
+
+
+def int8_path_for(onnx_path: str) -> str:
+    return os.path.splitext(onnx_path)[0] + ".int8.onnx"
+
+
+class OnnxVitsBackend:
+    """Sesi ONNX Runtime untuk VITS yang diekspor Coqui (`Vits.export_onnx`)."""
+
+    def __init__(self, onnx_path: str, model_config_path: str, intra_op_threads: int = 0,
+                 inter_op_threads: int = 1):
+        import numpy as np
+        import onnxruntime as ort
+        from TTS.config import load_config
+        from TTS.tts.utils.text.tokenizer import TTSTokenizer
+
+        self._np = np
+        self.onnx_path = onnx_path
+        with open(metadata_path_for(onnx_path), "r", encoding="utf-8") as f:
+            self.metadata = json.load(f)
+        self.sample_rate = self.metadata.get("sample_rate", 22050)
+        self.speakers = self.metadata.get("speakers") or {}
+        # Graf ekspor Coqui tidak mengeluarkan panjang per item, jadi padding batch tidak bisa dipotong:
+        # setiap teks dijalankan sendiri-sendiri.
+        self.batch_size = 1
+        self.batch_supported = False
+
+        options = ort.SessionOptions()
+        if intra_op_threads and intra_op_threads > 0:
+            options.intra_op_num_threads = intra_op_threads
+        else:
+            options.intra_op_num_threads = max(1, (os.cpu_count() or 1) - 1)
+        options.inter_op_num_threads = max(1, inter_op_threads)
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(onnx_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_names = {node.name for node in self.session.get_inputs()}
+
+        tokenizer_config = load_config(model_config_path)
+        self.tokenizer, _ = TTSTokenizer.init_from_config(tokenizer_config)
+        self.scales = np.array(
+            [self.metadata.get("noise_scale", 0.667), self.metadata.get("length_scale", 1.0),
+             self.metadata.get("noise_scale_dp", 0.8)],
+            dtype=np.float32,
+        )
+        self._synth_seconds = 0.0
+        self._audio_seconds = 0.0
+        self._stats_lock = threading.Lock()
+        logger.info("ONNX VITS session ready: %s (%d intra-op threads, %d speakers).",
+                    os.path.basename(onnx_path), options.intra_op_num_threads, len(self.speakers))
+
+    @property
+    def rtf(self) -> float | None:
+        with self._stats_lock:
+            return self._synth_seconds / self._audio_seconds if self._audio_seconds else None
+
+    def _speaker_id(self, speaker_name: str | None) -> int:
+        if speaker_name is None:
+            return 0
+        if speaker_name in self.speakers:
+            return self.speakers[speaker_name]
+        logger.warning("Speaker '%s' not in ONNX metadata; using speaker 0.", speaker_name)
+        return 0
+
+    def tts(self, text: str, speaker_name: str = None):
+        """Satu teks -> sampel float32 mono (dinormalisasi ke puncak seperti Synthesizer.save_wav)."""
+        np = self._np
+        start = time.perf_counter()
+        ids = self.tokenizer.text_to_ids(text)
+        inputs = {
+            "input": np.asarray([ids], dtype=np.int64),
+            "input_lengths": np.asarray([len(ids)], dtype=np.int64),
+            "scales": self.scales,
+        }
+        if "sid" in self.input_names:
+            inputs["sid"] = np.asarray([self._speaker_id(speaker_name)], dtype=np.int64)
+        if "langid" in self.input_names:
+            inputs["langid"] = np.zeros(1, dtype=np.int64)
+        wav = self.session.run(None, inputs)[0].reshape(-1)
+        peak = float(np.max(np.abs(wav))) if wav.size else 0.0
+        wav = wav * (1.0 / max(0.01, peak))
+        elapsed = time.perf_counter() - start
+        with self._stats_lock:
+            self._synth_seconds += elapsed
+            self._audio_seconds += len(wav) / self.sample_rate
+        logger.debug("ONNX VITS: %.2f s audio in %.2f s.", len(wav) / self.sample_rate, elapsed)
+        return wav
+
+    def tts_batch(self, texts: list[str], speaker_name: str = None) -> list:
+        return [self.tts(text, speaker_name) for text in texts]
+
+    def warmup(self, text: str = "Halo, apa kabar?", runs: int = 2, speaker_name: str = None) -> float:
+        start = time.perf_counter()
+        with self._stats_lock:
+            saved = (self._synth_seconds, self._audio_seconds)
+        for _ in range(max(1, runs)):
+            self.tts(text, speaker_name)
+        with self._stats_lock:
+            self._synth_seconds, self._audio_seconds = saved
+        elapsed = time.perf_counter() - start
+        logger.info("ONNX VITS warm-up finished in %.2f s.", elapsed)
+        return elapsed
+
+    def to_wav_bytes(self, wav) -> bytes:
+        return AudioBuffer.from_samples(wav, self.sample_rate).to_wav_bytes()
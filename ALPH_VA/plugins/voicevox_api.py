@@ -1,21 +1,27 @@
 # plugins/voicevox_api.py
 
 import asyncio
-import time
+import io
 import os
-from voicevox import Client # Pastikan library voicevox-client terinstal
+import random
+import zipfile
+import httpx # Klien HTTP keep-alive ke VOICEVOX engine
 import plugins.play_voice as play_voice # Mengganti nama agar lebih jelas
 from core import config_manager # Menggunakan ConfigManager yang sudah kita buat
-import logging
+import plugins.voicevox_catalog as voicevox_catalog
+from core import audio_buffer, audio_cache
+from core.audio_buffer import AudioBuffer
+from core.logging_setup import get_logger, setup_logging
 
 # --- Setup Logging ---
-logger = logging.getLogger(__name__)
-if not logger.hasHandlers():
-    log_file_path = os.path.join(config_manager.LOG_DIR, f"{os.path.split(__file__)[1].split('.')[0]}.log")
-    file_handler = logging.FileHandler(log_file_path)
-    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-    logger.addHandler(file_handler)
-    logger.setLevel(logging.INFO)
+logger = get_logger(__name__)
+
+MODULE_MANIFEST = {
+    "capabilities": ["tts_backend"],
+    "engines": ["voicevox"],
+    "languages": ["ja"],
+    "cost_class": "medium",
+}
 
 # --- Baca Konfigurasi ---
 # Path dasar untuk output audio dari config general
@@ -32,76 +38,326 @@ VOICEVOX_AUDIO_DIR = os.path.join(BASE_AUDIO_OUTPUT_PATH, "voicevox")
 if not os.path.exists(VOICEVOX_AUDIO_DIR):
     try:
         os.makedirs(VOICEVOX_AUDIO_DIR)
-        logger.info(f"Created Voicevox audio output directory: {VOICEVOX_AUDIO_DIR}")
+        logger.info("Created Voicevox audio output directory: %s", VOICEVOX_AUDIO_DIR)
     except Exception as e:
-        logger.error(f"Failed to create Voicevox audio output directory {VOICEVOX_AUDIO_DIR}: {e}")
+        logger.error("Failed to create Voicevox audio output directory %s: %s", VOICEVOX_AUDIO_DIR, e)
         # Fallback ke base audio path jika gagal membuat subdirektori
         VOICEVOX_AUDIO_DIR = BASE_AUDIO_OUTPUT_PATH
 
 
-# Default speaker ID dari config tts_settings
-DEFAULT_SPEAKER_ID = config_manager.get_int("tts_settings", "voicevox_speaker_id", 3) # Default ke 3 jika tidak ada
+# Default speaker ID dari config tts_settings (boleh berupa nama, mis. "Zundamon/Normal")
+DEFAULT_SPEAKER_ID = voicevox_catalog.resolve_config_speaker("tts_settings", "voicevox_speaker_id", 3) # Default ke 3 jika tidak ada
 
 # Voicevox Host and Port (jika perlu dikonfigurasi)
 VOICEVOX_HOST = config_manager.get_config_value("tts_voicevox_specifics", "host", "127.0.0.1") # Contoh
 VOICEVOX_PORT = config_manager.get_int("tts_voicevox_specifics", "port", 50021)       # Contoh
+VOICEVOX_BASE_URL = f"http://{VOICEVOX_HOST}:{VOICEVOX_PORT}"
+
+# Koneksi keep-alive ke engine dan jumlah request query/sintesis yang boleh berjalan bersamaan.
+MAX_CONNECTIONS = config_manager.get_int("tts_voicevox_specifics", "max_connections", 4)
+MAX_CONCURRENCY = config_manager.get_int("tts_voicevox_specifics", "max_concurrency", 2)
+REQUEST_TIMEOUT = config_manager.get_float("tts_voicevox_specifics", "timeout", 30.0)
+MAX_RETRIES = config_manager.get_int("tts_voicevox_specifics", "max_retries", 3)
+BACKOFF_BASE = config_manager.get_float("tts_voicevox_specifics", "backoff_base", 0.5)
+BACKOFF_MAX = config_manager.get_float("tts_voicevox_specifics", "backoff_max", 8.0)
+USE_MULTI_SYNTHESIS = config_manager.get_bool("tts_voicevox_specifics", "use_multi_synthesis", True)
+
+
+class VoicevoxUnavailableError(Exception):
+    pass
 
-async def generate_speech(text: str, speaker_id: int = None) -> str | None:
+
+class VoicevoxPool:
+    """
+    Klien HTTP VOICEVOX yang berumur panjang: koneksi keep-alive ke VOICEVOX_BASE_URL,
+    konkurensi dibatasi semaphore, retry dengan exponential backoff + jitter saat
+    koneksi gagal atau engine mengembalikan 5xx.
     """
-    Generates speech using Voicevox API and saves it to a file.
-    Plays the generated audio.
+
+    def __init__(self, base_url: str = VOICEVOX_BASE_URL, max_connections: int = MAX_CONNECTIONS,
+                 max_concurrency: int = MAX_CONCURRENCY, timeout: float = REQUEST_TIMEOUT,
+                 max_retries: int = MAX_RETRIES, backoff_base: float = BACKOFF_BASE, backoff_max: float = BACKOFF_MAX):
+        self.base_url = base_url
+        self.max_connections = max(1, max_connections)
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = timeout
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.multi_synthesis_supported = USE_MULTI_SYNTHESIS
+        # httpx.AsyncClient dan Semaphore terikat ke event loop; dibuat ulang jika loop berganti.
+        self._client = None
+        self._semaphore = None
+        self._loop = None
+
+    async def _ensure_client(self):
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            if self._client is not None:
+                old_client, old_loop, self._client = self._client, self._loop, None
+                await self._close_client(old_client, old_loop)
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+            logger.debug("Voicevox connection pool created for %s.", self.base_url)
+        return self._client
+
+    @staticmethod
+    async def _close_client(client, client_loop):
+        """Menutup klien dari event loop lama: di loop itu jika masih berjalan, jika tidak di loop ini."""
+        try:
+            if client_loop is not None and client_loop.is_running() and client_loop is not asyncio.get_running_loop():
+                future = asyncio.run_coroutine_threadsafe(client.aclose(), client_loop)
+                await asyncio.wait_for(asyncio.wrap_future(future), timeout=5.0)
+            else:
+                await client.aclose()
+            logger.debug("Closed Voicevox connection pool of a previous event loop.")
+        except Exception as e:
+            # Loop lama sudah ditutup: transport-nya tidak bisa ditutup dengan rapi lagi.
+            logger.debug("Could not cleanly close Voicevox client of a previous event loop: %s", e)
+
+    async def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        client = await self._ensure_client()
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore:
+                    response = await client.request(method, path, **kwargs)
+                if response.status_code < 500:
+                    response.raise_for_status()
+                    return response
+                error = f"HTTP {response.status_code}"
+            except httpx.TransportError as e:
+                error = f"{type(e).__name__}: {e}"
+            if attempt == self.max_retries:
+                break
+            delay = min(self.backoff_max, self.backoff_base * (2 ** attempt)) * random.uniform(0.5, 1.0)
+            logger.warning("Voicevox request %s %s failed (%s); retrying in %.2f s.", method, path, error, delay)
+            await asyncio.sleep(delay)
+        raise VoicevoxUnavailableError(f"Voicevox engine at {self.base_url} unavailable after {self.max_retries + 1} attempts: {error}")
+
+    async def version(self) -> str:
+        response = await self._request("GET", "/version")
+        return response.json()
+
+    async def speakers(self) -> list[dict]:
+        response = await self._request("GET", "/speakers")
+        return response.json()
+
+    async def initialize_speaker(self, speaker_id: int):
+        """Memuat model gaya di engine sebelum sintesis pertama."""
+        try:
+            await self._request("POST", "/initialize_speaker", params={"speaker": speaker_id, "skip_reinit": "true"})
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code not in (404, 405):
+                raise
+            # Engine lama tanpa /initialize_speaker memuat model pada audio_query pertama.
+            await self.audio_query("あ", speaker_id)
+
+    async def audio_query(self, text: str, speaker_id: int) -> dict:
+        response = await self._request("POST", "/audio_query", params={"text": text, "speaker": speaker_id})
+        return response.json()
+
+    async def synthesis(self, query: dict, speaker_id: int) -> bytes:
+        response = await self._request("POST", "/synthesis", params={"speaker": speaker_id}, json=query)
+        return response.content
+
+    async def multi_synthesis(self, queries: list[dict], speaker_id: int) -> list[bytes]:
+        """Satu request untuk beberapa query; engine mengembalikan ZIP berisi WAV sesuai urutan."""
+        response = await self._request("POST", "/multi_synthesis", params={"speaker": speaker_id}, json=queries)
+        with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+            names = sorted(archive.namelist())
+            return [archive.read(name) for name in names]
+
+    async def synthesize(self, text: str, speaker_id: int) -> bytes:
+        query = await self.audio_query(text, speaker_id)
+        logger.debug("Audio query created for speaker %s.", speaker_id)
+        audio_data = await self.synthesis(query, speaker_id)
+        logger.debug("Speech synthesis complete.")
+        return audio_data
+
+    async def synthesize_many(self, texts: list[str], speaker_id: int) -> list[bytes]:
+        """
+        Query semua teks bersamaan (dibatasi semaphore), lalu satu /multi_synthesis.
+        Jika engine tidak mendukung /multi_synthesis, sintesis per teks secara bersamaan.
+        """
+        if not texts:
+            return []
+        queries = await asyncio.gather(*(self.audio_query(text, speaker_id) for text in texts))
+        if self.multi_synthesis_supported and len(queries) > 1:
+            try:
+                wavs = await self.multi_synthesis(list(queries), speaker_id)
+                if len(wavs) == len(queries):
+                    return wavs
+                logger.warning("Voicevox /multi_synthesis returned %d files for %d queries; falling back.", len(wavs), len(queries))
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code in (404, 405, 422):
+                    logger.info("Voicevox engine does not support /multi_synthesis (HTTP %s); using /synthesis.", e.response.status_code)
+                    self.multi_synthesis_supported = False
+                else:
+                    raise
+            except zipfile.BadZipFile as e:
+                logger.warning("Invalid /multi_synthesis response (%s); falling back to /synthesis.", e)
+        return list(await asyncio.gather(*(self.synthesis(query, speaker_id) for query in queries)))
+
+    async def close(self):
+        client, client_loop = self._client, self._loop
+        self._client = self._loop = None
+        if client is not None:
+            await self._close_client(client, client_loop)
+
+
+_pool_instance = None
+
+def get_pool() -> VoicevoxPool:
+    """Instance singleton VoicevoxPool untuk endpoint dari [tts_voicevox_specifics]."""
+    global _pool_instance
+    if _pool_instance is None:
+        _pool_instance = VoicevoxPool()
+    return _pool_instance
+
+def _resolve_speaker(speaker) -> int:
+    """ID style dari int, string angka, atau nama di katalog; None -> DEFAULT_SPEAKER_ID."""
+    return voicevox_catalog.resolve_speaker(speaker, DEFAULT_SPEAKER_ID)
+
+def _cache_key(text: str, speaker_id: int) -> str:
+    return audio_cache.make_key("voicevox", f"{VOICEVOX_HOST}:{VOICEVOX_PORT}", speaker_id, None, text)
+
+def _store_fresh(cache, text: str, speaker_id: int, audio_data: bytes) -> AudioBuffer:
+    if cache:
+        cache.put_in_background(_cache_key(text, speaker_id), audio_data, engine="voicevox")
+    buffer = AudioBuffer.from_wav_bytes(audio_data)
+    audio_buffer.archive_audio(buffer, "voicevox", tag=f"spk{speaker_id}")
+    return buffer
+
+async def synthesize_to_buffer(text: str, speaker_id: int | str = None) -> AudioBuffer | None:
+    """
+    Mensintesis teks ke AudioBuffer di memori tanpa memutarnya (dipakai pipeline TTS).
+    Cache hit dibaca dari audio cache; hasil baru ditulis ke cache (dan arsip, jika aktif) di thread latar belakang.
+    """
+    actual_speaker_id = _resolve_speaker(speaker_id)
+
+    cache = audio_cache.get_audio_cache()
+    if cache:
+        cached_bytes = await asyncio.to_thread(cache.get_bytes, _cache_key(text, actual_speaker_id))
+        if cached_bytes is not None:
+            logger.info("Audio cache hit for text: '%s...' (speaker %s)", text[:50], actual_speaker_id)
+            return AudioBuffer.from_wav_bytes(cached_bytes)
+
+    logger.info("Attempting to generate speech for text: '%s...' with speaker ID: %s", text[:50], actual_speaker_id)
+    try:
+        audio_data = await get_pool().synthesize(text, actual_speaker_id)
+        return _store_fresh(cache, text, actual_speaker_id, audio_data)
+    except VoicevoxUnavailableError as e:
+        logger.error("%s. Ensure Voicevox engine is running and accessible at %s.", e, VOICEVOX_BASE_URL)
+        return None
+    except Exception as e:
+        logger.error("Error during Voicevox speech generation: %s", e, exc_info=True)
+        return None
+
+async def synthesize_batch_to_buffers(texts: list[str], speaker_id: int | str = None) -> list[AudioBuffer | None]:
+    """
+    Versi batch synthesize_to_buffer: teks yang belum ada di cache disintesis lewat satu
+    /multi_synthesis. Urutan hasil mengikuti `texts`; None untuk teks yang gagal.
+    """
+    actual_speaker_id = _resolve_speaker(speaker_id)
+    cache = audio_cache.get_audio_cache()
+    results: list[AudioBuffer | None] = [None] * len(texts)
+    missing = []
+    cached = [None] * len(texts)
+    if cache:
+        # Satu hop ke thread untuk seluruh batch; pembacaan file tidak boleh di event loop.
+        keys = [_cache_key(text, actual_speaker_id) for text in texts]
+        cached = await asyncio.to_thread(lambda: [cache.get_bytes(key) for key in keys])
+    for index, cached_bytes in enumerate(cached):
+        if cached_bytes is not None:
+            results[index] = AudioBuffer.from_wav_bytes(cached_bytes)
+        else:
+            missing.append(index)
+    if not missing:
+        return results
+    try:
+        wavs = await get_pool().synthesize_many([texts[index] for index in missing], actual_speaker_id)
+    except VoicevoxUnavailableError as e:
+        logger.error("%s. Ensure Voicevox engine is running and accessible at %s.", e, VOICEVOX_BASE_URL)
+        return results
+    except Exception as e:
+        logger.error("Error during Voicevox batch synthesis: %s", e, exc_info=True)
+        return results
+    for index, audio_data in zip(missing, wavs):
+        results[index] = _store_fresh(cache, texts[index], actual_speaker_id, audio_data)
+    return results
+
+async def generate_speech(text: str, speaker_id: int | str = None) -> AudioBuffer | None:
+    """
+    Generates speech using Voicevox API and plays it from memory.
+    If the audio cache is enabled, a cached rendition of the same text/speaker is reused.
+    The audio is written to disk only when [audio_archive] is enabled.
 
     Args:
         text (str): The text to synthesize.
-        speaker_id (int, optional): The Voicevox speaker ID. 
-                                    Defaults to DEFAULT_SPEAKER_ID from config.
+        speaker_id (int | str, optional): The Voicevox speaker ID, or a catalog name
+                                    such as "Zundamon/Normal". Defaults to DEFAULT_SPEAKER_ID from config.
 
     Returns:
-        str | None: The full path to the generated audio file if successful, else None.
+        AudioBuffer | None: The synthesized audio if successful, else None.
     """
-    actual_speaker_id = speaker_id if speaker_id is not None else DEFAULT_SPEAKER_ID
-    
-    # Buat nama file unik
-    timestamp = str(int(time.time()))
-    audio_filename = f"voicevox_{timestamp}_spk{actual_speaker_id}.wav"
-    full_audio_path = os.path.join(VOICEVOX_AUDIO_DIR, audio_filename)
-
-    logger.info(f"Attempting to generate speech for text: '{text[:50]}...' with speaker ID: {actual_speaker_id}")
-    
+    buffer = await synthesize_to_buffer(text, speaker_id)
+    if buffer is None:
+        return None
     try:
-        # Menggunakan host dan port dari config jika library Client mendukungnya
-        # Periksa dokumentasi voicevox-client Anda untuk cara set base_url
-        # Jika Client() tidak menerima base_url, Anda mungkin perlu set env var VOICEVOX_BASE_URL
-        # atau library akan menggunakan defaultnya.
-        # Untuk sekarang, kita asumsikan Client() akan menemukan engine Voicevox yang berjalan.
-        # Jika voicevox-client versi baru, mungkin: client = Client(base_url=f"http://{VOICEVOX_HOST}:{VOICEVOX_PORT}")
-        async with Client() as client: # Anda mungkin perlu Client(base_url=f"http://{VOICEVOX_HOST}:{VOICEVOX_PORT}")
-            logger.debug("Voicevox client initialized.")
-            audio_query = await client.create_audio_query(text=text, speaker=actual_speaker_id)
-            logger.debug(f"Audio query created for speaker {actual_speaker_id}.")
-            
-            audio_data = await audio_query.synthesis(speaker=actual_speaker_id)
-            logger.debug("Speech synthesis complete.")
-
-            with open(full_audio_path, "wb") as f:
-                f.write(audio_data)
-            logger.info(f"Generated audio file saved to: {full_audio_path}")
         play_blocking = config_manager.get_bool("tts_settings", "voicevox_play_blocking", True)
-        play_voice.play_audio_file(full_audio_path, block_until_done=play_blocking)
-        
-        return full_audio_path
-    except ConnectionRefusedError:
-        logger.error(f"Connection refused. Ensure Voicevox engine is running and accessible at expected host/port.")
-        return None
+        if play_blocking:
+            # Menunggu pemutaran selesai tanpa memblokir event loop.
+            await play_voice.play_async(buffer)
+        else:
+            play_voice.play_audio_buffer(buffer, block_until_done=False)
+        return buffer
     except Exception as e:
-        logger.error(f"Error during Voicevox speech generation or playback: {e}", exc_info=True)
+        logger.error("Error during Voicevox playback: %s", e, exc_info=True)
         return None
 
+async def prewarm_cache(phrases: list[str], speaker_id: int | str = None) -> int:
+    """Mensintesis frasa yang belum ada di audio cache (tanpa diputar). Mengembalikan jumlah frasa baru."""
+    cache = audio_cache.get_audio_cache()
+    if cache is None:
+        return 0
+    actual_speaker_id = _resolve_speaker(speaker_id)
+    missing = [phrase for phrase in phrases if not cache.contains(_cache_key(phrase, actual_speaker_id))]
+    if not missing:
+        return 0
+    try:
+        wavs = await get_pool().synthesize_many(missing, actual_speaker_id)
+    except Exception as e:
+        logger.warning("Voicevox audio cache prewarm failed: %s", e)
+        return 0
+    added = 0
+    for phrase, audio_data in zip(missing, wavs):
+        if await asyncio.to_thread(cache.put, _cache_key(phrase, actual_speaker_id), audio_data, "voicevox"):
+            added += 1
+    return added
+
+# --- Lifecycle hooks (dipanggil oleh ModuleManager) ---
+async def warmup():
+    # Membuka koneksi keep-alive lebih awal; engine yang mati hanya dicatat.
+    try:
+        logger.info("Voicevox engine %s reachable (version %s).", VOICEVOX_BASE_URL, await get_pool().version())
+    except Exception as e:
+        logger.warning("Voicevox engine not reachable during warmup: %s", e)
+
+async def close():
+    if _pool_instance is not None:
+        await _pool_instance.close()
+
 def remove_all_voicevox_outputs():
     """Removes all .wav files from the Voicevox audio output directory."""
     removed_count = 0
     if not os.path.exists(VOICEVOX_AUDIO_DIR):
-        logger.warning(f"Voicevox audio directory not found, cannot remove files: {VOICEVOX_AUDIO_DIR}")
+        logger.warning("Voicevox audio directory not found, cannot remove files: %s", VOICEVOX_AUDIO_DIR)
         return
         
     try:
@@ -110,38 +366,41 @@ def remove_all_voicevox_outputs():
                 file_path_to_remove = os.path.join(VOICEVOX_AUDIO_DIR, filename)
                 try:
                     os.remove(file_path_to_remove)
-                    logger.info(f"Removed audio file: {file_path_to_remove}")
+                    logger.info("Removed audio file: %s", file_path_to_remove)
                     removed_count += 1
                 except Exception as e_remove:
-                    logger.error(f"Failed to remove file {file_path_to_remove}: {e_remove}")
+                    logger.error("Failed to remove file %s: %s", file_path_to_remove, e_remove)
         if removed_count > 0:
-            logger.info(f"Successfully removed {removed_count} .wav files from {VOICEVOX_AUDIO_DIR}.")
+            logger.info("Successfully removed %s .wav files from %s.", removed_count, VOICEVOX_AUDIO_DIR)
         else:
-            logger.info(f"No .wav files found to remove in {VOICEVOX_AUDIO_DIR}.")
+            logger.info("No .wav files found to remove in %s.", VOICEVOX_AUDIO_DIR)
     except Exception as e_list:
-        logger.error(f"Error listing files in {VOICEVOX_AUDIO_DIR} for removal: {e_list}")
+        logger.error("Error listing files in %s for removal: %s", VOICEVOX_AUDIO_DIR, e_list)
 
 async def main_test(): # Mengganti nama agar tidak konflik dengan 'main' di aplikasi utama
     text_to_speak = "うん、元気だよ。君は？"
-    logger.info(f"--- Voicevox API Test ---")
-    logger.info(f"Text to speak: {text_to_speak}")
+    logger.info("--- Voicevox API Test ---")
+    logger.info("Text to speak: %s", text_to_speak)
     
     generated_file = await generate_speech(text_to_speak) # Akan menggunakan speaker default dari config
     
     if generated_file:
-        logger.info(f"Test speech generated and played: {generated_file}")
+        logger.info("Test speech generated and played: %s", generated_file)
     else:
         logger.error("Test speech generation failed.")
+
+    batch = await synthesize_batch_to_buffers(["一つ目の文です。", "二つ目の文です。"])
+    logger.info("Batch synthesis result: %s", batch)
+    await close()
     
     # Contoh menghapus output setelah tes (opsional)
     # remove_all_voicevox_outputs()
 
 
 if __name__ == "__main__":
-    if not logging.getLogger().hasHandlers():
-        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    setup_logging(console=True)
 
     try:
         asyncio.run(main_test())
     except Exception as e:
-        logger.error(f"Error running Voicevox API main_test: {e[:50]}", exc_info=True)
\ No newline at end of file
+        logger.error("Error running Voicevox API main_test: %s", e[:50], exc_info=True)
\ No newline at end of file
@@ -0,0 +1,229 @@
+# plugins/voicevox_catalog.py
+"""
+Katalog speaker VOICEVOX: nama speaker/gaya -> style ID.
+
+Indeks awal dibaca dari assets/audio/voicevox_metas.json dan bisa diperbarui dari
+endpoint `/speakers` engine yang sedang berjalan. Nama dari file tetap berlaku
+sebagai alias, jadi "Shikoku Metan/Sweet" dan nama Jepang dari engine sama-sama
+bisa dipakai di config (`voicevox_speaker_id = Zundamon`).
+
+Engine memuat model tiap gaya saat pertama dipakai; preinitialize_speakers()
+melakukannya di depan (di latar belakang) agar balasan Jepang pertama tidak lebih lambat.
+"""
+import asyncio
+import json
+import os
+import threading
+
+from core import config_manager
+from core.logging_setup import get_logger, setup_logging
+
+# --- Setup Logging ---
+logger = get_logger(__name__)
+
+MODULE_MANIFEST = {
+    "capabilities": ["tts_catalog"],
+    "engines": ["voicevox"],
+    "languages": ["ja"],
+    "cost_class": "low",
+}
+
+SECTION = "tts_voicevox_specifics"
+METAS_PATH_CONFIG = config_manager.get_config_value(SECTION, "metas_path", "assets/audio/voicevox_metas.json")
+if not os.path.isabs(METAS_PATH_CONFIG):
+    METAS_PATH = os.path.join(config_manager.PROJECT_ROOT_DIR, METAS_PATH_CONFIG)
+else:
+    METAS_PATH = METAS_PATH_CONFIG
+
+# Gaya yang dipakai jika hanya nama speaker yang disebut.
+DEFAULT_STYLE_NAMES = ("normal", "ノーマル")
+
+
+def _normalize(name: str) -> str:
+    return "".join(ch for ch in str(name).casefold() if ch not in " _-・")
+
+
+class VoicevoxCatalog:
+    """Indeks style ID VOICEVOX berdasarkan nama speaker dan gaya."""
+
+    def __init__(self):
+        self._names: dict[str, int] = {}
+        self._styles: dict[int, dict] = {}
+        self._lock = threading.Lock()
+        self.source = None
+
+    def load_file(self, path: str = METAS_PATH) -> int:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            logger.warning("Voicevox metas file not found: %s", path)
+            return 0
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error("Could not read Voicevox metas file %s: %s", path, e)
+            return 0
+        return self.load_entries(entries, source=path)
+
+    def load_entries(self, entries: list, source: str = None) -> int:
+        """
+        Menambahkan entri format /speakers ke indeks. Alias nama lama dipertahankan;
+        info per ID diganti dengan data terbaru. Mengembalikan jumlah gaya yang dimuat.
+        """
+        count = 0
+        with self._lock:
+            for speaker in entries or []:
+                speaker_name = speaker.get("name")
+                styles = [style for style in speaker.get("styles", []) if "id" in style]
+                if not speaker_name or not styles:
+                    continue
+                talk_styles = [style for style in styles if style.get("type", "talk") == "talk"]
+                default_style = next((style for style in talk_styles if _normalize(style.get("name", "")) in DEFAULT_STYLE_NAMES),
+                                     talk_styles[0] if talk_styles else styles[0])
+                self._names[_normalize(speaker_name)] = default_style["id"]
+                for style in styles:
+                    style_id = int(style["id"])
+                    style_type = style.get("type", "talk")
+                    self._styles[style_id] = {
+                        "id": style_id,
+                        "speaker": speaker_name,
+                        "style": style.get("name"),
+                        "type": style_type,
+                        "speaker_uuid": speaker.get("speaker_uuid"),
+                    }
+                    key = f"{_normalize(speaker_name)}/{_normalize(style.get('name', ''))}"
+                    # Gaya talk lebih diutamakan daripada gaya frame_decode (nyanyian) dengan nama sama.
+                    if style_type == "talk" or key not in self._names:
+                        self._names[key] = style_id
+                    count += 1
+            self.source = source
+        logger.debug("Voicevox catalog: %d styles loaded from %s.", count, source)
+        return count
+
+    async def refresh_from_engine(self) -> int:
+        """Memperbarui indeks dari endpoint /speakers engine. Mengembalikan 0 jika engine tidak terjangkau."""
+        import plugins.voicevox_api as voicevox_api # Diimpor di sini: voicevox_api juga memakai katalog ini
+
+        try:
+            entries = await voicevox_api.get_pool().speakers()
+        except Exception as e:
+            logger.warning("Could not refresh Voicevox speaker catalog from engine: %s", e)
+            return 0
+        return self.load_entries(entries, source=voicevox_api.VOICEVOX_BASE_URL)
+
+    def resolve(self, speaker) -> int | None:
+        """
+        ID style untuk int, string angka, "Speaker", "Speaker/Gaya" atau "Speaker:Gaya".
+        Mengembalikan None jika nama tidak dikenal.
+        """
+        if speaker is None:
+            return None
+        if isinstance(speaker, int):
+            return speaker
+        text = str(speaker).strip()
+        if text.lstrip("-").isdigit():
+            return int(text)
+        speaker_name, separator, style_name = text.replace(":", "/").partition("/")
+        key = _normalize(speaker_name)
+        if separator:
+            key = f"{key}/{_normalize(style_name)}"
+        with self._lock:
+            return self._names.get(key)
+
+    def describe(self, style_id: int) -> dict | None:
+        with self._lock:
+            info = self._styles.get(int(style_id))
+        return dict(info) if info else None
+
+    def list_styles(self, include_singing: bool = False) -> list[dict]:
+        with self._lock:
+            styles = [dict(info) for info in self._styles.values()]
+        if not include_singing:
+            styles = [info for info in styles if info["type"] == "talk"]
+        return sorted(styles, key=lambda info: info["id"])
+
+    def __len__(self) -> int:
+        return len(self._styles)
+
+
+_catalog_instance = None
+_catalog_lock = threading.Lock()
+
+def get_catalog() -> VoicevoxCatalog:
+    """Instance singleton katalog, dimuat dari file metas saat pertama dipakai."""
+    global _catalog_instance
+    if _catalog_instance is None:
+        with _catalog_lock:
+            if _catalog_instance is None:
+                catalog = VoicevoxCatalog()
+                catalog.load_file()
+                _catalog_instance = catalog
+    return _catalog_instance
+
+def resolve_speaker(speaker, default: int | None = None) -> int | None:
+    style_id = get_catalog().resolve(speaker)
+    if style_id is None and speaker is not None:
+        logger.warning("Unknown Voicevox speaker '%s'; using %s.", speaker, default)
+    return style_id if style_id is not None else default
+
+def resolve_config_speaker(section: str, key: str, default: int | None = None) -> int | None:
+    """Seperti config_manager.get_int, tetapi nilai config juga boleh berupa nama speaker/gaya."""
+    value = config_manager.get_config_value(section, key)
+    if value is None or not value.strip():
+        return default
+    return resolve_speaker(value, default)
+
+def configured_speaker_ids() -> list[int]:
+    """Speaker default dari [tts_settings] ditambah daftar `preinit_speakers` (nama atau ID, dipisah koma)."""
+    ids = [
+        resolve_config_speaker("tts_settings", "voicevox_speaker_id", 3),
+        resolve_config_speaker("tts_settings", "japanese_default_speaker_id", None),
+    ]
+    extra = config_manager.get_config_value(SECTION, "preinit_speakers", "") or ""
+    ids.extend(resolve_speaker(name.strip()) for name in extra.split(",") if name.strip())
+    return list(dict.fromkeys(style_id for style_id in ids if style_id is not None))
+
+async def preinitialize_speakers(speaker_ids: list[int] = None, refresh: bool = True) -> list[int]:
+    """
+    Memuat model gaya yang dikonfigurasi di engine sebelum dipakai. Berjalan bersamaan lewat
+    pool Voicevox; kegagalan hanya dicatat. Mengembalikan ID yang siap.
+    """
+    import plugins.voicevox_api as voicevox_api
+
+    catalog = get_catalog()
+    if refresh:
+        await catalog.refresh_from_engine()
+    ids = speaker_ids if speaker_ids is not None else configured_speaker_ids()
+    if not ids:
+        return []
+    pool = voicevox_api.get_pool()
+
+    async def _initialize(style_id: int) -> int | None:
+        try:
+            await pool.initialize_speaker(style_id)
+        except Exception as e:
+            logger.warning("Could not initialize Voicevox speaker %s: %s", style_id, e)
+            return None
+        info = catalog.describe(style_id)
+        logger.info("Voicevox speaker %s initialized (%s).", style_id,
+                    f"{info['speaker']}/{info['style']}" if info else "not in catalog")
+        return style_id
+
+    results = await asyncio.gather(*(_initialize(style_id) for style_id in ids))
+    return [style_id for style_id in results if style_id is not None]
+
+# --- Lifecycle hooks (dipanggil oleh ModuleManager) ---
+async def warmup():
+    if config_manager.get_bool(SECTION, "preinitialize_speakers", True):
+        await preinitialize_speakers()
+
+
+# --- Contoh Penggunaan jika file ini dijalankan langsung ---
+if __name__ == "__main__":
+    setup_logging(console=True)
+
+    catalog = get_catalog()
+    logger.info("Loaded %d styles from %s.", len(catalog), catalog.source)
+    for name in ("Zundamon", "Shikoku Metan/Sweet", "shikoku_metan:whisper", "3", "Unknown"):
+        style_id = catalog.resolve(name)
+        logger.info("%-24s -> %s %s", name, style_id, catalog.describe(style_id) if style_id is not None else "")
+    logger.info("Configured speakers: %s", configured_speaker_ids())
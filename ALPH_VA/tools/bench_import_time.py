@@ -0,0 +1,98 @@
+# tools/bench_import_time.py
+"""
+Benchmark waktu impor modul inti, dijalankan manual (tanpa CI).
+
+Setiap pengukuran memakai interpreter baru agar cache sys.modules tidak
+mempengaruhi hasil. Skrip gagal (exit code 1) jika median waktu impor
+melebihi anggaran atau jika modul berat (SDK/torch) ikut termuat.
+
+Contoh:
+    python -m tools.bench_import_time
+    python -m tools.bench_import_time --module core.language_model --budget-ms 400
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modul yang tidak boleh ikut termuat hanya karena mengimpor modul inti.
+HEAVY_MODULES = (
+    "google.genai",
+    "speech_recognition",
+    "TTS",
+    "torch",
+    "pyttsx3",
+)
+
+_PROBE_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"elapsed": elapsed, "heavy": heavy}}))
+"""
+
+
+def measure_import(module: str) -> dict:
+    """Mengukur satu kali impor `module` di interpreter baru."""
+    snippet = _PROBE_SNIPPET.format(module=module, heavy=HEAVY_MODULES)
+    completed = subprocess.run(
+        [sys.executable, "-c", snippet],
+        cwd=PROJECT_ROOT_DIR,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(
+            f"Import of {module} failed:\n{completed.stderr.strip()}"
+        )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="core.context_manager")
+    parser.add_argument("--budget-ms", type=float, default=250.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    samples_ms = []
+    heavy_seen = set()
+    for _ in range(max(1, args.runs)):
+        result = measure_import(args.module)
+        samples_ms.append(result["elapsed"] * 1000.0)
+        heavy_seen.update(result["heavy"])
+
+    median_ms = statistics.median(samples_ms)
+    print(
+        "import %s: median %.1f ms, min %.1f ms, max %.1f ms (%d runs, budget %.0f ms)"
+        % (
+            args.module,
+            median_ms,
+            min(samples_ms),
+            max(samples_ms),
+            len(samples_ms),
+            args.budget_ms,
+        )
+    )
+
+    ok = True
+    if heavy_seen:
+        print("FAIL: heavy modules loaded at import time: %s" % sorted(heavy_seen))
+        ok = False
+    if median_ms > args.budget_ms:
+        print("FAIL: median import time exceeds budget.")
+        ok = False
+    if ok:
+        print("OK")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
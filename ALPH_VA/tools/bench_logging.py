@@ -0,0 +1,166 @@
+# tools/bench_logging.py
+"""
+Benchmark overhead logging per giliran percakapan, dijalankan manual (tanpa CI).
+
+Membandingkan dua konfigurasi pada deretan panggilan log yang sama dengan
+satu giliran (pembersihan teks, dispatch TTS, terjemahan, sintesis, playback):
+  - lama: FileHandler sinkron per modul + log aplikasi, pesan f-string dibuat
+    walaupun level DEBUG tidak aktif;
+  - baru: QueueHandler/QueueListener dari core.logging_setup, pesan %-style.
+Yang diukur adalah waktu di thread pemanggil; waktu listener mengosongkan
+antrean dilaporkan terpisah. File log ditulis ke direktori sementara.
+
+Contoh:
+    python -m tools.bench_logging
+    python -m tools.bench_logging --turns 5000 --level DEBUG
+    python -m tools.bench_logging --gap-ms 0
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from core.logging_setup import APP_LOG_NAME, LOG_FORMAT, build_queue_pipeline
+
+MODULES = ("text_processing", "text_to_speech", "translator", "custom_model_tts", "play_voice")
+
+SAMPLE_REPLY = (
+    "(tersenyum) Halo! **Tentu saja**, aku bisa membantumu. Cuaca hari ini cerah, "
+    "sekitar 31 derajat, jadi jangan lupa minum air yang cukup ya... Kalau kamu mau "
+    "jalan-jalan sore, taman kota biasanya ramai tapi tetap nyaman. *mengangguk* "
+    "Oh iya, besok diperkirakan hujan ringan di sore hari, jadi bawa payung kalau "
+    "keluar rumah. Ada lagi yang ingin kamu tanyakan? Aku senang bisa menemanimu "
+    "mengobrol hari ini, dan semoga harimu menyenangkan sampai malam nanti!"
+)
+AUDIO_PATH = "data/audio/custom_tts/custom_tts_1700000000_spk-VCTK_p225.wav"
+
+
+def _make_loggers(handlers: list[logging.Handler], level: int) -> dict[str, logging.Logger]:
+    """Logger terisolasi (tidak terdaftar di logging.root) agar konfigurasi aplikasi tidak tersentuh."""
+    loggers = {}
+    for module in MODULES:
+        package = "plugins" if module in ("translator", "custom_model_tts", "play_voice") else "core"
+        lg = logging.Logger(f"{package}.{module}", level)
+        for handler in handlers:
+            lg.addHandler(handler)
+        lg.propagate = False
+        loggers[module] = lg
+    return loggers
+
+
+def legacy_turn(lg: dict[str, logging.Logger], text: str):
+    tp = lg["text_processing"]
+    tp.debug(f"Original text for TTS cleaning: '{text}'")
+    for stage in ("removing bracketed actions", "removing specific asterisked actions", "removing markdown",
+                  "handling repetitions and ellipsis", "removing URLs", "quote normalization"):
+        tp.debug(f"After {stage}: '{text}'")
+    tp.debug(f"After final space/punctuation normalization: '{text}'")
+    tp.info(f"Cleaned text for TTS: '{text}' (Original length: {len(text)}, Cleaned length: {len(text)})")
+    lg["text_to_speech"].info(f"Dispatching TTS: Engine='custom', Lang='id', Text='{text[:30]}...'")
+    lg["translator"].info(f"Attempting to translate from 'auto' to 'id': '{text[:50]}...'")
+    lg["translator"].info(f"Successfully translated. Detected source: 'id'. Result: '{text[:50]}...'")
+    lg["custom_model_tts"].info(f"Synthesizing text: '{text[:50]}...'")
+    lg["custom_model_tts"].info(f"Audio successfully synthesized and saved to: {AUDIO_PATH}")
+    lg["play_voice"].info(f"Attempting to play audio file: {AUDIO_PATH} (Blocking: True)")
+    lg["play_voice"].info(f"Playback finished for: {AUDIO_PATH}")
+
+
+def lazy_turn(lg: dict[str, logging.Logger], text: str):
+    tp = lg["text_processing"]
+    tp.debug("Original text for TTS cleaning: '%s'", text)
+    for stage in ("removing bracketed actions", "removing specific asterisked actions", "removing markdown",
+                  "handling repetitions and ellipsis", "removing URLs", "quote normalization"):
+        tp.debug("After %s: '%s'", stage, text)
+    tp.debug("After final space/punctuation normalization: '%s'", text)
+    tp.info("Cleaned text for TTS: '%s' (Original length: %d, Cleaned length: %d)", text, len(text), len(text))
+    lg["text_to_speech"].info("Dispatching TTS: Engine='%s', Lang='%s', Text='%s...'", "custom", "id", text[:30])
+    lg["translator"].info("Attempting to translate from '%s' to '%s': '%s...'", "auto", "id", text[:50])
+    lg["translator"].info("Successfully translated. Detected source: '%s'. Result: '%s...'", "id", text[:50])
+    lg["custom_model_tts"].info("Synthesizing text: '%s...'", text[:50])
+    lg["custom_model_tts"].info("Audio successfully synthesized and saved to: %s", AUDIO_PATH)
+    lg["play_voice"].info("Attempting to play audio file: %s (Blocking: %s)", AUDIO_PATH, True)
+    lg["play_voice"].info("Playback finished for: %s", AUDIO_PATH)
+
+
+def _time_turns(turn_fn, lg, text: str, turns: int, gap_seconds: float) -> list[float]:
+    samples = []
+    for _ in range(turns):
+        start = time.perf_counter()
+        turn_fn(lg, text)
+        samples.append(time.perf_counter() - start)
+        if gap_seconds:
+            # Giliran nyata berjarak detik; jeda (di luar pengukuran) memberi listener waktu menulis.
+            time.sleep(gap_seconds)
+    return samples
+
+
+def bench_legacy(log_dir: str, level: int, turns: int, text: str, gap_seconds: float) -> list[float]:
+    formatter = logging.Formatter(LOG_FORMAT)
+    app_handler = logging.FileHandler(os.path.join(log_dir, f"{APP_LOG_NAME}.log"), encoding="utf-8")
+    app_handler.setFormatter(formatter)
+    loggers = {}
+    handlers = [app_handler]
+    for module, lg in _make_loggers([app_handler], level).items():
+        module_handler = logging.FileHandler(os.path.join(log_dir, f"{module}.log"), encoding="utf-8")
+        module_handler.setFormatter(formatter)
+        lg.addHandler(module_handler)
+        handlers.append(module_handler)
+        loggers[module] = lg
+    try:
+        return _time_turns(legacy_turn, loggers, text, turns, gap_seconds)
+    finally:
+        for handler in handlers:
+            handler.close()
+
+
+def bench_queue(log_dir: str, level: int, turns: int, text: str, gap_seconds: float) -> tuple[list[float], float]:
+    queue_handler, listener, router = build_queue_pipeline(log_dir)
+    listener.start()
+    loggers = _make_loggers([queue_handler], level)
+    try:
+        samples = _time_turns(lazy_turn, loggers, text, turns, gap_seconds)
+    finally:
+        drain_start = time.perf_counter()
+        listener.stop()
+        drain_seconds = time.perf_counter() - drain_start
+        router.close()
+    return samples, drain_seconds
+
+
+def _summary(label: str, samples: list[float]) -> float:
+    median_us = statistics.median(samples) * 1e6
+    p99_us = sorted(samples)[int(len(samples) * 0.99) - 1] * 1e6
+    print("%-28s median %8.1f us/turn, p99 %8.1f us/turn" % (label, median_us, p99_us))
+    return median_us
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--turns", type=int, default=2000)
+    parser.add_argument("--level", default="INFO", choices=("DEBUG", "INFO", "WARNING"))
+    parser.add_argument("--text-chars", type=int, default=len(SAMPLE_REPLY))
+    parser.add_argument("--gap-ms", type=float, default=2.0, help="jeda antar giliran (0 = back-to-back)")
+    args = parser.parse_args(argv)
+
+    level = logging.getLevelName(args.level)
+    text = (SAMPLE_REPLY * (args.text_chars // len(SAMPLE_REPLY) + 1))[: args.text_chars]
+    turns = max(1, args.turns)
+
+    with tempfile.TemporaryDirectory(prefix="bench_logging_") as tmp:
+        legacy_dir = os.path.join(tmp, "legacy")
+        queue_dir = os.path.join(tmp, "queue")
+        os.makedirs(legacy_dir)
+        os.makedirs(queue_dir)
+        print("Level %s, %d turns, reply %d chars, gap %.1f ms" % (args.level, turns, len(text), args.gap_ms))
+        legacy_us = _summary("sync FileHandler + f-string", bench_legacy(legacy_dir, level, turns, text, args.gap_ms / 1000.0))
+        queue_samples, drain_seconds = bench_queue(queue_dir, level, turns, text, args.gap_ms / 1000.0)
+        queue_us = _summary("QueueHandler + %-style", queue_samples)
+    print("Speedup on caller thread: %.1fx (listener drain after run: %.1f ms)" % (legacy_us / queue_us, drain_seconds * 1e3))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
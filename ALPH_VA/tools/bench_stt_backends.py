@@ -0,0 +1,106 @@
+# tools/bench_stt_backends.py
+"""
+Uji backend STT dari file audio, tanpa mikrofon (core/stt_backends.py).
+
+Setiap file (WAV/AIFF/FLAC, dibaca lewat speech_recognition.AudioFile) ditranskripsi oleh
+setiap backend yang diminta. Dicetak: waktu muat + warm-up per backend, latensi dan RTF per
+file, serta WER jika ada file referensi `<nama audio>.txt` di sebelahnya. Backend yang tidak
+tersedia (paket/model tidak ada, tanpa internet) dilaporkan lalu dilewati.
+
+Contoh:
+    python -m tools.bench_stt_backends rekaman/*.wav
+    python -m tools.bench_stt_backends --backend faster_whisper --backend vosk --language id-ID halo.wav
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from core import stt_backends
+from core.logging_setup import setup_logging
+
+
+def load_audio(path: str):
+    import speech_recognition as sr
+
+    with sr.AudioFile(path) as source:
+        return sr.Recognizer().record(source)
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    ref, hyp = reference.lower().split(), hypothesis.lower().split()
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word))
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def reference_for(path: str) -> str | None:
+    reference_path = os.path.splitext(path)[0] + ".txt"
+    if not os.path.exists(reference_path):
+        return None
+    with open(reference_path, encoding="utf-8") as f:
+        return f.read().strip()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--backend", action="append", choices=sorted(stt_backends.BACKENDS),
+                        help="boleh diulang (default: [stt_settings] backend)")
+    parser.add_argument("--language", default=stt_backends.default_language())
+    args = parser.parse_args(argv)
+
+    setup_logging(console=False)
+    clips = []
+    for path in args.files:
+        audio = load_audio(path)
+        duration = len(audio.frame_data) / float(audio.sample_rate * audio.sample_width)
+        clips.append((path, audio, duration, reference_for(path)))
+    print("%d files, %.1f s audio, language %s" % (len(clips), sum(clip[2] for clip in clips), args.language))
+
+    failed = False
+    for name in args.backend or [None]:
+        backend = stt_backends.get_backend(name)
+        try:
+            warmup = backend.warmup()
+        except stt_backends.RecognizerUnavailableError as e:
+            print("%-15s unavailable: %s" % (backend.name, e))
+            failed = True
+            continue
+        print("%-15s load + warm-up %.2f s" % (backend.name, warmup))
+        rtfs, errors = [], []
+        for path, audio, duration, reference in clips:
+            start = time.perf_counter()
+            try:
+                text = backend.recognize(audio, args.language) or ""
+            except stt_backends.RecognizerUnavailableError as e:
+                print("  %s: unavailable: %s" % (os.path.basename(path), e))
+                failed = True
+                break
+            elapsed = time.perf_counter() - start
+            rtfs.append(elapsed / duration if duration else 0.0)
+            line = "  %-24s %6.0f ms  RTF %.3f" % (os.path.basename(path), elapsed * 1e3, rtfs[-1])
+            if reference is not None:
+                errors.append(word_error_rate(reference, text))
+                line += "  WER %.2f" % errors[-1]
+            print("%s  %s" % (line, text))
+        if rtfs:
+            summary = "  median RTF %.3f" % statistics.median(rtfs)
+            if errors:
+                summary += ", mean WER %.2f over %d files" % (statistics.mean(errors), len(errors))
+            print(summary)
+    if failed:
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
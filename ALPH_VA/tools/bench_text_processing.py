@@ -0,0 +1,212 @@
+# tools/bench_text_processing.py
+"""
+Golden check, micro-benchmark, dan fuzz waktu terburuk untuk normalizer TTS, dijalankan manual (tanpa CI).
+
+Empat tahap:
+  1. golden: setiap kasus di assets/text/tts_normalizer_golden.json harus
+     menghasilkan keluaran yang persis sama;
+  2. bench: median waktu per panggilan untuk korpus golden dan satu balasan
+     LLM panjang;
+  3. fuzz: input adversarial (kurung/penanda tanpa pasangan, run spasi
+     panjang, dsb.) dan input acak harus selesai di bawah anggaran waktu;
+  4. stream: StreamingTTSCleaner dengan potongan acak harus menghasilkan
+     ' '.join(segmen) yang identik dengan versi batch, dan kutip/span pembuka
+     tanpa pasangan tidak menahan balasan panjang sampai finish().
+Exit code 1 jika ada tahap yang gagal.
+
+Contoh:
+    python -m tools.bench_text_processing
+    python -m tools.bench_text_processing --adversarial-chars 200000 --budget-ms 1000
+"""
+import argparse
+import json
+import logging
+import random
+import statistics
+import sys
+import time
+
+from core import text_processing
+
+SAMPLE_REPLY = (
+    "(tersenyum hangat) Halo, sayang! **Tentu saja** aku ingat... Kemarin kamu cerita soal "
+    "_proyek baru_ di kantor, kan? *mengangguk* Nah, menurutku ada beberapa hal yang bisa kamu coba:\n"
+    "## Saran\n- Mulai dari bagian yang paling kecil dulu.\n- Catat progres tiap hari.\n"
+    "+ Jangan lupa istirahat ya!!!\n\n\"Pelan-pelan asal selamat,\" kata orang. "
+    "Kalau butuh referensi, buka https://example.com/tips?topik=produktivitas atau tanya aku lagi. "
+    "Hahahaha, aku yakin kamu bisa kok~ (memeluk) &quot;Semangat!&quot;"
+)
+
+# Token untuk fuzz acak; sengaja didominasi karakter yang dipakai aturan normalizer.
+_FUZZ_TOKENS = (
+    "(", ")", "[", "]", "{", "}", "*", "**", "***", "_", "__", "___", "~~", "~~~", "```", "`",
+    "#", "## ", "- ", "+ ", "* ", " ", "  ", "\n", "\n\n", "\t", ".", "..", "...", ",", "!", "?",
+    ":", ";", '"', "'", "ha ", "Ha", "HA ", "aaaa", "http://x.co/a", "&amp;", "halo", "dunia", "é", "1",
+)
+# Tambahan untuk fuzz stream: batas kalimat dan kasus tepi di sekitar potongan.
+_STREAM_FUZZ_TOKENS = _FUZZ_TOKENS + (
+    ". ", "! ", "? ", ". Aku", "! Halo", ".\n", "... ", "Kamu ", "baik ", "https://", "&not", "\r\n", "\xa0", " *wow_",
+)
+
+
+def adversarial_inputs(size: int) -> dict[str, str]:
+    """Input yang memicu backtracking kuadratik pada pola lazy/`\\s*` yang tidak dijaga."""
+    half = size // 2
+    return {
+        "unclosed_parens": "(" * size,
+        "unclosed_parens_spaced": "( a " * (size // 4),
+        "mixed_unclosed_brackets": "([{" * (size // 3),
+        "whitespace_run_then_text": " " * size + "x",
+        "newline_run_then_text": "\n " * half + "x",
+        "whitespace_runs_between_words": ("a" + " " * 1000) * (size // 1001),
+        "unclosed_bold": "**a " * (size // 4),
+        "unclosed_italic": "_a " * (size // 3),
+        "unclosed_strike": "~~a " * (size // 4),
+        "unclosed_backtick": "`a " * (size // 3),
+        "unclosed_fence": "```" + "a" * size,
+        "heading_markers_no_space": "\n#" * half,
+        "bullet_markers_no_space": "\n-" * half,
+        "quote_then_spaces": '"' + " " * size,
+        "dots_and_spaces": ". " * half,
+        "many_ellipses": "a.." * (size // 3),
+        "asterisk_then_spaces": " *" + " " * size,
+        "repeated_ha": "ha " * (size // 3),
+        "url_like": "http://" * (size // 7),
+    }
+
+
+def check_golden() -> bool:
+    with open(text_processing.TTS_NORMALIZER_GOLDEN_PATH, encoding="utf-8") as f:
+        cases = json.load(f)["cases"]
+    failed = 0
+    for case in cases:
+        got = text_processing.clean_llm_output_for_tts(case["input"])
+        if got != case["expected"]:
+            failed += 1
+            print("FAIL golden %s\n  expected: %r\n  got     : %r" % (case["name"], case["expected"], got))
+    print("golden: %d/%d cases match" % (len(cases) - failed, len(cases)))
+    return failed == 0
+
+
+def _median_call_us(texts: list[str], iterations: int) -> float:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        for text in texts:
+            text_processing.clean_llm_output_for_tts(text)
+        samples.append((time.perf_counter() - start) / len(texts))
+    return statistics.median(samples) * 1e6
+
+
+def run_bench(iterations: int):
+    with open(text_processing.TTS_NORMALIZER_GOLDEN_PATH, encoding="utf-8") as f:
+        corpus = [case["input"] for case in json.load(f)["cases"]]
+    print("bench: golden corpus  median %7.1f us/call (%d inputs)" % (_median_call_us(corpus, iterations), len(corpus)))
+    print("bench: LLM reply      median %7.1f us/call (%d chars)" % (_median_call_us([SAMPLE_REPLY], iterations), len(SAMPLE_REPLY)))
+    long_reply = SAMPLE_REPLY * 20
+    print("bench: long reply     median %7.1f us/call (%d chars)" % (_median_call_us([long_reply], max(1, iterations // 10)), len(long_reply)))
+
+
+def run_fuzz(size: int, random_cases: int, budget_ms: float, seed: int) -> bool:
+    ok = True
+    worst_name, worst_ms = "", 0.0
+    for name, text in adversarial_inputs(size).items():
+        start = time.perf_counter()
+        text_processing.clean_llm_output_for_tts(text)
+        elapsed_ms = (time.perf_counter() - start) * 1e3
+        if elapsed_ms > worst_ms:
+            worst_name, worst_ms = name, elapsed_ms
+        if elapsed_ms > budget_ms:
+            print("FAIL fuzz %s: %.1f ms > %.0f ms budget (%d chars)" % (name, elapsed_ms, budget_ms, len(text)))
+            ok = False
+    print("fuzz: adversarial worst %.1f ms (%s, ~%d chars, budget %.0f ms)" % (worst_ms, worst_name, size, budget_ms))
+
+    rng = random.Random(seed)
+    worst_ms = 0.0
+    for _ in range(random_cases):
+        text = "".join(rng.choice(_FUZZ_TOKENS) for _ in range(rng.randint(1, 400)))
+        start = time.perf_counter()
+        result = text_processing.clean_llm_output_for_tts(text)
+        elapsed_ms = (time.perf_counter() - start) * 1e3
+        worst_ms = max(worst_ms, elapsed_ms)
+        if not isinstance(result, str) or result != result.strip():
+            print("FAIL fuzz random: unexpected result %r for %r" % (result, text))
+            ok = False
+            break
+    print("fuzz: %d random inputs, worst %.2f ms (seed %d)" % (random_cases, worst_ms, seed))
+    return ok
+
+
+def _stream_clean(text: str, rng: random.Random, max_chunk: int,
+                  max_buffer_chars: int | None = None) -> tuple[list[str], int]:
+    """Segmen dari StreamingTTSCleaner untuk potongan acak; nilai kedua = jumlah segmen sebelum finish()."""
+    cleaner = text_processing.StreamingTTSCleaner(max_buffer_chars=max_buffer_chars)
+    segments = []
+    pos = 0
+    while pos < len(text):
+        size = rng.randint(1, max_chunk)
+        segments.extend(cleaner.feed(text[pos:pos + size]))
+        pos += size
+    early = len(segments)
+    segments.extend(cleaner.finish())
+    return segments, early
+
+
+def run_stream_check(random_cases: int, seed: int) -> bool:
+    rng = random.Random(seed)
+    with open(text_processing.TTS_NORMALIZER_GOLDEN_PATH, encoding="utf-8") as f:
+        texts = [case["input"] for case in json.load(f)["cases"]]
+    texts.append(SAMPLE_REPLY)
+    texts.extend(
+        "".join(rng.choice(_STREAM_FUZZ_TOKENS) for _ in range(rng.randint(1, 80))) for _ in range(random_cases)
+    )
+    early_total = 0
+    for text in texts:
+        segments, early = _stream_clean(text, rng, rng.choice((1, 4, 16, 64)))
+        early_total += early
+        expected = text_processing.clean_llm_output_for_tts(text)
+        if " ".join(segments) != expected or not all(segments):
+            print("FAIL stream %r\n  expected: %r\n  segments: %r" % (text, expected, segments))
+            return False
+    segments, early = _stream_clean(SAMPLE_REPLY, rng, 8, text_processing.STREAM_MAX_BUFFER_CHARS)
+    first = segments[0] if segments else ""
+    print("stream: %d inputs identical to batch, %d segments emitted before finish()" % (len(texts), early_total))
+    print("stream: LLM reply -> %d segments (%d before finish), first %d of %d chars" % (
+        len(segments), early, len(first), len(text_processing.clean_llm_output_for_tts(SAMPLE_REPLY))))
+
+    # Kutip/strikethrough pembuka tanpa pasangan tidak boleh menahan seluruh balasan sampai finish().
+    for opener in ('"', "~~"):
+        text = opener + "Kata ini. " * 4000
+        start = time.perf_counter()
+        segments, early = _stream_clean(text, rng, 16, text_processing.STREAM_MAX_BUFFER_CHARS)
+        elapsed_ms = (time.perf_counter() - start) * 1e3
+        first = segments[0] if segments else ""
+        if not early or len(first) > 2 * text_processing.STREAM_MAX_BUFFER_CHARS:
+            print("FAIL stream unmatched %r: first segment %d chars, %d before finish()" % (opener, len(first), early))
+            return False
+        print("stream: unmatched %r over %d chars -> first segment %d chars, %.1f ms" % (
+            opener, len(text), len(first), elapsed_ms))
+    return True
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--adversarial-chars", type=int, default=50_000)
+    parser.add_argument("--random-cases", type=int, default=2000)
+    parser.add_argument("--budget-ms", type=float, default=500.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    # Log per panggilan tidak relevan untuk pengukuran ini.
+    logging.disable(logging.CRITICAL)
+    ok = check_golden()
+    run_bench(max(1, args.iterations))
+    ok = run_fuzz(args.adversarial_chars, args.random_cases, args.budget_ms, args.seed) and ok
+    ok = run_stream_check(args.random_cases, args.seed) and ok
+    print("OK" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
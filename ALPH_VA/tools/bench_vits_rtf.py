@@ -0,0 +1,132 @@
+# tools/bench_vits_rtf.py
+"""
+Real-time factor (RTF = waktu sintesis / durasi audio) model Coqui VITS kustom, sebelum dan sesudah optimasi.
+
+Tahap, semuanya pada checkpoint dari [tts_custom_model] di proses yang sama:
+  1. baseline: `Synthesizer.tts()` per kalimat dengan thread default torch,
+     tanpa warm-up (pemanggilan pertama ikut dihitung, seperti request pertama);
+  2. optimized: VitsInferenceEngine (thread diatur, inference_mode, warm-up), per kalimat;
+  3. batched: kalimat yang sama lewat tts_batch();
+  4. int8 (dengan --int8): kuantisasi dinamis int8 lalu ulangi tahap 2-3.
+Kuantisasi mengubah model in-place, jadi selalu dijalankan terakhir.
+
+Contoh:
+    python -m tools.bench_vits_rtf
+    python -m tools.bench_vits_rtf --threads 4 --batch-size 8 --int8 --rounds 3
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from core import config_manager
+from core.logging_setup import setup_logging
+
+SENTENCES = (
+    "Halo, apa kabar hari ini?",
+    "Aku sudah menyiapkan jadwal rapat untuk besok pagi.",
+    "Cuaca di luar cukup cerah, jadi jangan lupa bawa air minum.",
+    "Kalau kamu butuh bantuan, panggil saja aku kapan pun.",
+    "Terima kasih sudah mendengarkan, sampai jumpa lagi!",
+    "Pelan-pelan saja, yang penting kita terus belajar setiap hari.",
+)
+
+
+def _default_speaker(synthesizer):
+    manager = getattr(synthesizer.tts_model, "speaker_manager", None)
+    names = list(getattr(manager, "name_to_id", {}) or {})
+    if not names:
+        return None
+    configured = config_manager.get_config_value("tts_custom_model", "default_speaker_name_or_id")
+    return configured if configured in names else names[0]
+
+
+def _report(label: str, elapsed: list[float], audio_seconds: float, first: float = None):
+    median = statistics.median(elapsed)
+    line = "%-18s median %6.2f s for %6.2f s audio  RTF %.3f" % (label, median, audio_seconds, median / audio_seconds)
+    if first is not None:
+        line += "  (first call %.2f s)" % first
+    print(line)
+    return median / audio_seconds
+
+
+def _measure_sequential(synthesize, texts, sample_rate, rounds):
+    elapsed, first, audio_seconds = [], None, 0.0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        samples = 0
+        for text in texts:
+            call_start = time.perf_counter()
+            samples += len(synthesize(text))
+            if first is None:
+                first = time.perf_counter() - call_start
+        elapsed.append(time.perf_counter() - start)
+        audio_seconds = samples / sample_rate
+    return elapsed, audio_seconds, first
+
+
+def _measure_batched(engine, texts, speaker, sample_rate, rounds):
+    elapsed, audio_seconds = [], 0.0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        wavs = engine.tts_batch(list(texts), speaker)
+        elapsed.append(time.perf_counter() - start)
+        audio_seconds = sum(len(wav) for wav in wavs) / sample_rate
+    return elapsed, audio_seconds
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=config_manager.get_int("tts_custom_model", "torch_num_threads", 0))
+    parser.add_argument("--interop-threads", type=int, default=config_manager.get_int("tts_custom_model", "torch_interop_threads", 1))
+    parser.add_argument("--batch-size", type=int, default=config_manager.get_int("tts_custom_model", "batch_size", 4))
+    parser.add_argument("--int8", action="store_true", help="tambahkan tahap kuantisasi dinamis int8")
+    parser.add_argument("--text-file", help="satu kalimat per baris (default: kalimat contoh bawaan)")
+    args = parser.parse_args(argv)
+
+    setup_logging(console=False)
+    from plugins.vits_inference import VitsInferenceEngine, quantize_dynamic_int8
+    from tools.export_vits_onnx import load_synthesizer
+    import torch
+
+    texts = SENTENCES
+    if args.text_file:
+        with open(args.text_file, encoding="utf-8") as f:
+            texts = tuple(line.strip() for line in f if line.strip())
+
+    print("loading checkpoint...")
+    synthesizer = load_synthesizer()
+    speaker = _default_speaker(synthesizer)
+    sample_rate = synthesizer.output_sample_rate
+    print("torch %s, %d CPU, %d sentences, speaker %s" % (torch.__version__, os.cpu_count() or 1, len(texts), speaker))
+
+    elapsed, audio_seconds, first = _measure_sequential(
+        lambda text: synthesizer.tts(text=text, speaker_name=speaker), texts, sample_rate, args.rounds)
+    baseline = _report("baseline (torch %d thr)" % torch.get_num_threads(), elapsed, audio_seconds, first)
+
+    engine = VitsInferenceEngine(synthesizer, num_threads=args.threads, interop_threads=args.interop_threads,
+                                 batch_size=args.batch_size).prepare()
+    results = {}
+
+    def run_optimized(tag: str):
+        warmup = engine.warmup(speaker_name=speaker)
+        elapsed, audio_seconds, first = _measure_sequential(lambda text: engine.tts(text, speaker), texts, sample_rate, args.rounds)
+        results[tag] = _report(tag, elapsed, audio_seconds, first)
+        elapsed, audio_seconds = _measure_batched(engine, texts, speaker, sample_rate, args.rounds)
+        results[tag + " batch"] = _report("%s batch x%d" % (tag, engine.batch_size), elapsed, audio_seconds)
+        print("%-18s warm-up %.2f s, batched path %s" % ("", warmup, "used" if engine.batch_supported else "unsupported (fell back)"))
+
+    run_optimized("optimized")
+    if args.int8:
+        quantize_dynamic_int8(synthesizer.tts_model)
+        run_optimized("int8")
+
+    best_tag = min(results, key=results.get)
+    print("baseline RTF %.3f -> best %.3f (%s), %.2fx faster" % (baseline, results[best_tag], best_tag, baseline / results[best_tag]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
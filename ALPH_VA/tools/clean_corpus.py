@@ -0,0 +1,116 @@
+# tools/clean_corpus.py
+"""
+Membersihkan korpus teks untuk fine-tuning TTS dengan clean_llm_output_for_tts, paralel (multi-proses).
+
+Input JSONL: setiap baris berupa objek JSON (teks diambil dari --field) atau
+string JSON. Keluaran JSONL dengan urutan yang sama; hasil bersih ditulis ke
+--output-field (bawaan "tts_text", teks asli tetap ada). Dengan --archive,
+input adalah arsip sesi chat (data/memory/<chat_archive_filename>) dan setiap
+pesan dengan role --role menjadi satu record.
+Input dibaca bertahap, jadi file sebesar apa pun diproses dengan memori terbatas.
+
+Contoh:
+    python -m tools.clean_corpus replies.jsonl corpus.jsonl --workers 8
+    python -m tools.clean_corpus data/memory/chat_history corpus.jsonl --archive --drop-empty
+    cat replies.jsonl | python -m tools.clean_corpus - - --field reply --output-field reply
+"""
+import argparse
+import collections
+import json
+import os
+import sys
+import time
+
+from core import text_processing
+from core.logging_setup import setup_logging
+
+
+def iter_jsonl_records(stream, field: str):
+    for line_no, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            print(f"WARNING: line {line_no} is not valid JSON ({e}); skipped.", file=sys.stderr)
+            continue
+        if isinstance(record, str):
+            record = {field: record}
+        elif not isinstance(record, dict):
+            print(f"WARNING: line {line_no} is neither an object nor a string; skipped.", file=sys.stderr)
+            continue
+        yield record
+
+
+def iter_archive_records(path: str, field: str, role: str):
+    """Record per pesan dari arsip sesi ContextManager ({"sessions": {id: {"history": [...]}}})."""
+    with open(path, encoding="utf-8") as f:
+        sessions = json.load(f).get("sessions", {})
+    for session_id, session in sessions.items():
+        for index, message in enumerate(session.get("history", [])):
+            if role and message.get("role") != role:
+                continue
+            text = "".join(part.get("text", "") for part in message.get("parts", []) if isinstance(part, dict))
+            yield {"session_id": session_id, "index": index, "role": message.get("role"), field: text}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input", help="file JSONL (atau arsip sesi dengan --archive); '-' untuk stdin")
+    parser.add_argument("output", help="file JSONL keluaran; '-' untuk stdout")
+    parser.add_argument("--field", default="text", help="field teks pada input (bawaan: text)")
+    parser.add_argument("--output-field", default="tts_text", help="field hasil (bawaan: tts_text)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunksize", type=int, default=256)
+    parser.add_argument("--drop-empty", action="store_true", help="lewati record yang hasil bersihnya kosong")
+    parser.add_argument("--archive", action="store_true", help="input adalah arsip sesi chat (JSON)")
+    parser.add_argument("--role", default="model", help="role pesan yang diambil dari arsip (bawaan: model)")
+    args = parser.parse_args(argv)
+
+    setup_logging(console=False)
+    in_stream = None
+    if args.archive:
+        records = iter_archive_records(args.input, args.field, args.role)
+    else:
+        in_stream = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+        records = iter_jsonl_records(in_stream, args.field)
+    out_stream = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+
+    # Record menunggu hasilnya di antrean ini; clean_many membaca input paling banyak
+    # max_pending * chunksize di depan, jadi panjang antrean ikut terbatas.
+    in_flight = collections.deque()
+
+    def texts():
+        for record in records:
+            in_flight.append(record)
+            text = record.get(args.field)
+            yield text if isinstance(text, str) else ""
+
+    total = written = 0
+    start = time.perf_counter()
+    try:
+        for cleaned in text_processing.clean_many(texts(), workers=args.workers, chunksize=args.chunksize):
+            record = in_flight.popleft()
+            total += 1
+            if args.drop_empty and not cleaned:
+                continue
+            record[args.output_field] = cleaned
+            out_stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+            written += 1
+    finally:
+        if in_stream is not None and in_stream is not sys.stdin:
+            in_stream.close()
+        if out_stream is not sys.stdout:
+            out_stream.close()
+    elapsed = time.perf_counter() - start
+    print(
+        "%d records cleaned, %d written in %.2f s (%.0f records/s, %d workers)"
+        % (total, written, elapsed, total / elapsed if elapsed else 0.0, args.workers),
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
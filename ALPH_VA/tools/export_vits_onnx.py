@@ -0,0 +1,130 @@
+# tools/export_vits_onnx.py
+"""
+Ekspor model Coqui VITS kustom ([tts_custom_model]) ke ONNX untuk inference_backend = onnx.
+
+Menulis:
+  * <onnx_model_path>           graf float32 (`Vits.export_onnx`, input: input, input_lengths, scales[, sid]);
+  * <nama>.json                 metadata: sample rate, skala noise/panjang, nama speaker -> ID embedding;
+  * <nama>.int8.onnx (--int8)   graf dengan bobot int8 (onnxruntime.quantization.quantize_dynamic).
+Dengan --verify, hasil ONNX dibandingkan dengan Synthesizer PyTorch (durasi dan RTF).
+
+Butuh torch + Coqui TTS (hanya untuk ekspor) dan onnx/onnxruntime.
+
+Contoh:
+    python -m tools.export_vits_onnx
+    python -m tools.export_vits_onnx --int8 --verify
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from core import audio_cache, config_manager
+from core.logging_setup import setup_logging
+
+
+def _config_path(key: str, default: str = None) -> str | None:
+    value = config_manager.get_config_value("tts_custom_model", key, default)
+    return os.path.join(config_manager.PROJECT_ROOT_DIR, value) if value else None
+
+
+def load_synthesizer():
+    """Synthesizer PyTorch untuk checkpoint di [tts_custom_model], selalu di CPU."""
+    from TTS.utils.synthesizer import Synthesizer
+
+    return Synthesizer(
+        tts_checkpoint=_config_path("model_checkpoint_path"),
+        tts_config_path=_config_path("model_config_path"),
+        tts_speakers_file=_config_path("speakers_file_path"),
+        use_cuda=False,
+    )
+
+
+def export(synthesizer, onnx_path: str) -> dict:
+    model = synthesizer.tts_model
+    if getattr(getattr(model, "args", None), "use_d_vector_file", False):
+        raise ValueError("Model uses d-vector speaker embeddings; only speaker-ID embeddings (sid) can be exported.")
+    os.makedirs(os.path.dirname(onnx_path) or ".", exist_ok=True)
+    model.export_onnx(output_path=onnx_path, verbose=False)
+
+    manager = getattr(model, "speaker_manager", None)
+    speakers = dict(getattr(manager, "name_to_id", {}) or {}) if getattr(model, "num_speakers", 0) > 0 else {}
+    metadata = {
+        "sample_rate": synthesizer.output_sample_rate,
+        "noise_scale": float(model.inference_noise_scale),
+        "length_scale": float(model.length_scale),
+        "noise_scale_dp": float(model.inference_noise_scale_dp),
+        "speakers": {name: int(speaker_id) for name, speaker_id in speakers.items()},
+        "checkpoint_fingerprint": audio_cache.file_fingerprint(_config_path("model_checkpoint_path")),
+        "exported_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    from plugins.vits_onnx import metadata_path_for
+
+    with open(metadata_path_for(onnx_path), "w", encoding="utf-8") as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=2)
+    return metadata
+
+
+def quantize_int8(onnx_path: str) -> str:
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from plugins.vits_onnx import int8_path_for
+
+    int8_path = int8_path_for(onnx_path)
+    quantize_dynamic(onnx_path, int8_path, weight_type=QuantType.QInt8)
+    return int8_path
+
+
+def verify(synthesizer, onnx_path: str, text: str, speaker: str | None):
+    from plugins.vits_onnx import OnnxVitsBackend
+
+    start = time.perf_counter()
+    backend = OnnxVitsBackend(onnx_path, _config_path("model_config_path"))
+    load_seconds = time.perf_counter() - start
+    backend.warmup(text, runs=1, speaker_name=speaker)
+    start = time.perf_counter()
+    onnx_wav = backend.tts(text, speaker)
+    onnx_seconds = time.perf_counter() - start
+    synthesizer.tts(text=text, speaker_name=speaker)
+    start = time.perf_counter()
+    torch_wav = synthesizer.tts(text=text, speaker_name=speaker)
+    torch_seconds = time.perf_counter() - start
+    rate = backend.sample_rate
+    print("verify %s: session load %.2f s" % (os.path.basename(onnx_path), load_seconds))
+    print("  torch: %.2f s audio, RTF %.3f" % (len(torch_wav) / rate, torch_seconds / (len(torch_wav) / rate)))
+    print("  onnx : %.2f s audio, RTF %.3f" % (len(onnx_wav) / rate, onnx_seconds / (len(onnx_wav) / rate)))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", default=_config_path("onnx_model_path", "assets/models/TTS/model.onnx"))
+    parser.add_argument("--int8", action="store_true", help="juga tulis graf dengan bobot int8")
+    parser.add_argument("--verify", action="store_true", help="bandingkan keluaran ONNX dengan PyTorch")
+    parser.add_argument("--text", default="Halo, ini adalah tes suara dari model kustom.")
+    args = parser.parse_args(argv)
+
+    setup_logging(console=False)
+    print("loading checkpoint...")
+    synthesizer = load_synthesizer()
+    try:
+        metadata = export(synthesizer, args.output)
+    except ValueError as e:
+        print("FAIL: %s" % e)
+        return 1
+    print("exported %s (%d speakers, %d Hz)" % (args.output, len(metadata["speakers"]), metadata["sample_rate"]))
+    outputs = [args.output]
+    if args.int8:
+        outputs.append(quantize_int8(args.output))
+        print("quantized %s" % outputs[-1])
+    for path in outputs:
+        print("  %s: %.1f MB" % (os.path.basename(path), os.path.getsize(path) / 1e6))
+    if args.verify:
+        speaker = next(iter(metadata["speakers"]), None)
+        for path in outputs:
+            verify(synthesizer, path, args.text, speaker)
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+# tools/transcribe_files.py
+"""
+Mentranskripsi rekaman audio (WAV/FLAC) secara massal, paralel (multi-proses), ke JSONL.
+
+Input berupa file atau direktori (dicari rekursif). Setiap baris keluaran adalah hasil
+speech_to_text.transcribe_files(): path, text, durasi, waktu decode/resample/recognize, RTF,
+atau error. Jika ada file referensi `<nama audio>.txt` di sebelahnya, baris itu juga berisi
+`reference` dan `wer`, jadi keluarannya bisa langsung dipakai sebagai benchmark regresi STT.
+Ringkasan (throughput, WER rata-rata) dicetak ke stderr.
+
+Contoh:
+    python -m tools.transcribe_files rekaman/ hasil.jsonl --workers 4
+    python -m tools.transcribe_files --backend vosk --language id-ID panggilan.flac -
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+from core import speech_to_text, stt_backends
+from core.logging_setup import setup_logging
+from tools.bench_stt_backends import reference_for, word_error_rate
+
+
+def iter_audio_paths(inputs: list[str]):
+    for path in inputs:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(speech_to_text.AUDIO_FILE_EXTENSIONS):
+                    yield os.path.join(root, name)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("inputs", nargs="+", help="file audio atau direktori")
+    parser.add_argument("output", help="file JSONL keluaran; '-' untuk stdout")
+    parser.add_argument("--backend", choices=sorted(stt_backends.BACKENDS),
+                        help="bawaan: [stt_settings] backend")
+    parser.add_argument("--language", default=stt_backends.default_language())
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    setup_logging(console=False)
+    out_stream = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    total = failed = 0
+    audio_seconds = 0.0
+    errors = []
+    start = time.perf_counter()
+    try:
+        results = speech_to_text.transcribe_files(iter_audio_paths(args.inputs), args.language,
+                                                  workers=args.workers, backend=args.backend)
+        for result in results:
+            total += 1
+            if result.get("error"):
+                failed += 1
+                print("WARNING: %s: %s" % (result["path"], result["error"]), file=sys.stderr)
+            else:
+                audio_seconds += result["duration_s"]
+                reference = reference_for(result["path"])
+                if reference is not None:
+                    result["reference"] = reference
+                    result["wer"] = round(word_error_rate(reference, result["text"]), 4)
+                    errors.append(result["wer"])
+            out_stream.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out_stream.flush()
+    finally:
+        if out_stream is not sys.stdout:
+            out_stream.close()
+    elapsed = time.perf_counter() - start
+    summary = "%d files transcribed (%d failed), %.1f s audio in %.2f s (%.1fx realtime, %d workers)" % (
+        total, failed, audio_seconds, elapsed, audio_seconds / elapsed if elapsed else 0.0, args.workers)
+    if errors:
+        summary += ", mean WER %.3f over %d files" % (statistics.mean(errors), len(errors))
+    print(summary, file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())